@@ -0,0 +1,14 @@
+from services.fixture_ticker import build_fixture_matrix
+from services.projections import build_projections
+from services.autosub_simulator import simulate_bench, DEFAULT_TRIALS
+
+DOUBLE_GW = 34
+
+def test_simulate_bench(benchmark, fpl_payloads):
+    bootstrap = fpl_payloads["bootstrap"]
+    matrix = build_fixture_matrix(bootstrap, fpl_payloads["fixtures"])
+    projections = build_projections(bootstrap, matrix)
+    picks = [pick for pick in fpl_payloads["picks"]["picks"] if pick["element"] in projections["row_of"]]
+
+    result = benchmark(simulate_bench, projections, matrix, picks, DOUBLE_GW, DEFAULT_TRIALS)
+    assert result["trials"] == DEFAULT_TRIALS and len(result["bench_orders"]) == 6
@@ -0,0 +1,42 @@
+from services.chip_calculator import (
+    process_fixtures_for_chip_calculations,
+    identify_double_gameweeks,
+    calculate_gameweek_difficulty,
+    get_recommended_players
+)
+
+CURRENT_GW = 30
+
+def test_process_fixtures_for_chip_calculations(benchmark, fpl_payloads, run_async):
+    processed = benchmark(run_async, process_fixtures_for_chip_calculations, fpl_payloads["fpl_data"])
+    assert processed["current_gameweek"]["id"] == CURRENT_GW
+
+def test_identify_double_gameweeks(benchmark, fpl_payloads):
+    team_fixtures = benchmark(identify_double_gameweeks, fpl_payloads["fixtures"], CURRENT_GW)
+    assert max(team_fixtures[34].values()) == 2
+
+def test_calculate_gameweek_difficulty(benchmark, fpl_payloads):
+    fixtures = fpl_payloads["fixtures"]
+    teams = {team["id"]: team for team in fpl_payloads["bootstrap"]["teams"]}
+    team_fixtures = identify_double_gameweeks(fixtures, CURRENT_GW)
+
+    # Every remaining gameweek, as the chip recommendations compute them
+    def all_gameweeks():
+        return [calculate_gameweek_difficulty(gw, team_fixtures, fixtures, teams) for gw in sorted(team_fixtures)]
+
+    metrics = benchmark(all_gameweeks)
+    assert len(metrics) == 38 - CURRENT_GW + 1
+
+def test_get_recommended_players(benchmark, fpl_payloads):
+    fixtures = fpl_payloads["fixtures"]
+    bootstrap = fpl_payloads["bootstrap"]
+    teams = {team["id"]: team for team in bootstrap["teams"]}
+    team_fixtures = identify_double_gameweeks(fixtures, CURRENT_GW)
+    gameweek_data = calculate_gameweek_difficulty(34, team_fixtures, fixtures, teams)
+
+    # One call per position, as a bench boost recommendation makes
+    def all_positions():
+        return [get_recommended_players(gameweek_data, bootstrap, position_filter=position) for position in (1, 2, 3, 4)]
+
+    recommendations = benchmark(all_positions)
+    assert all(recommendations)
@@ -0,0 +1,18 @@
+import json
+import pytest
+from benchmarks.fixtures import load_fixture_bytes
+from services.fpl_schema import decode_bootstrap, decode_fixtures
+
+# json_loads is what httpx's response.json() runs on the body
+
+@pytest.mark.parametrize("decoder", ["json_loads", "compact"])
+def test_decode_bootstrap(benchmark, decoder):
+    raw = load_fixture_bytes("bootstrap")
+    bootstrap = benchmark(json.loads if decoder == "json_loads" else decode_bootstrap, raw)
+    assert len(bootstrap["elements"]) == 700
+
+@pytest.mark.parametrize("decoder", ["json_loads", "compact"])
+def test_decode_fixtures(benchmark, decoder):
+    raw = load_fixture_bytes("fixtures")
+    fixtures = benchmark(json.loads if decoder == "json_loads" else decode_fixtures, raw)
+    assert len(fixtures) == 380
@@ -0,0 +1,26 @@
+from services.gemini import format_response
+
+# A typical Gemini answer: markdown headings, bold text and bullet lists
+SAMPLE_RESPONSE = """## Captaincy Options for Gameweek 30
+
+**Top Pick: Salah (LIV)** - Liverpool face Southampton at home. Salah has returned **8 goals** and *6 assists* in his last 6 matches and is on penalties.
+
+### Alternatives
+* **Haaland (MCI)** - Double gameweek coming up, but rotation risk is real after the midweek cup tie.
+* **Palmer (CHE)** - Great underlying numbers: 0.65 xGI per 90 over the last month.
+* __Isak (NEW)__ - Facing a leaky Ipswich defence that has conceded 2.1 goals per game away.
+
+### Transfer Advice
+1. Consider moving out injured players before the deadline.
+2. Bank the free transfer if your team has no flagged players.
+3. Plan for the blank in gameweek 31 - several teams do not play.
+
+<b>Summary:</b> Captain Salah, vice Haaland. Keep an eye on team news on Friday's press conferences!!!
+
+
+
+""" * 3
+
+def test_format_response(benchmark):
+    formatted = benchmark(format_response, SAMPLE_RESPONSE)
+    assert "**" not in formatted
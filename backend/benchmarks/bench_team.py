@@ -0,0 +1,15 @@
+from routes.teams import process_team_data
+
+def test_process_team_data(benchmark, fpl_payloads, run_async):
+    processed = benchmark(
+        run_async,
+        process_team_data,
+        123456,
+        30,
+        fpl_payloads["bootstrap"],
+        fpl_payloads["entry"],
+        fpl_payloads["history"],
+        fpl_payloads["picks"],
+        fpl_payloads["live"]
+    )
+    assert len(processed["lineup"]) == 15
@@ -0,0 +1,37 @@
+import asyncio
+import os
+import pytest
+from benchmarks.fixtures import load_fixture
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def pytest_collect_file(file_path, parent):
+    """Collect bench_*.py, but only when the benchmarks are run explicitly"""
+    if not (file_path.name.startswith("bench_") and file_path.suffix == ".py"):
+        return None
+    # Files named on the command line are collected by pytest itself
+    if parent.session.isinitpath(file_path):
+        return None
+    requested = any(
+        os.path.abspath(arg.split("::")[0]).startswith(BENCHMARK_DIR)
+        for arg in parent.config.invocation_params.args
+        if not arg.startswith("-")
+    )
+    if requested:
+        return pytest.Module.from_parent(parent, path=file_path)
+    return None
+
+@pytest.fixture(scope="session")
+def fpl_payloads():
+    """Recorded FPL API payloads, keyed by name"""
+    names = ["bootstrap", "fixtures", "entry", "history", "picks", "live"]
+    payloads = {name: load_fixture(name) for name in names}
+    payloads["fpl_data"] = {"bootstrap": payloads["bootstrap"], "fixtures": payloads["fixtures"], "version": 1}
+    return payloads
+
+@pytest.fixture(scope="session")
+def run_async():
+    """Run a coroutine function to completion on a reused event loop"""
+    loop = asyncio.new_event_loop()
+    yield lambda coroutine_function, *args: loop.run_until_complete(coroutine_function(*args))
+    loop.close()
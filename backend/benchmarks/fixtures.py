@@ -0,0 +1,425 @@
+"""
+Recorded FPL API payloads for benchmarks and offline testing
+
+Payloads are stored gzipped in benchmarks/fixtures/. Record them from the live
+API with:
+
+    python -m benchmarks.fixtures record --team 123456 --gameweek 30 --league 314
+
+or, without network access, generate deterministic payloads with the same
+shape as the live API:
+
+    python -m benchmarks.fixtures synthesize
+
+Replacing the payloads changes what the benchmarks measure, so save a new
+baseline afterwards (see benchmarks/README.md).
+"""
+import os
+import sys
+import gzip
+import json
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Payload name -> FPL API path (with {team}, {gameweek} and {league} placeholders)
+PAYLOAD_PATHS = {
+    "bootstrap": "bootstrap-static/",
+    "fixtures": "fixtures/",
+    "entry": "entry/{team}/",
+    "history": "entry/{team}/history/",
+    "picks": "entry/{team}/event/{gameweek}/picks/",
+    "live": "event/{gameweek}/live/",
+    "league_standings": "leagues-classic/{league}/standings/",
+}
+
+FPL_API_BASE = "https://fantasy.premierleague.com/api"
+
+def fixture_path(name: str) -> str:
+    return os.path.join(FIXTURE_DIR, f"{name}.json.gz")
+
+def load_fixture(name: str) -> Any:
+    """Load a recorded payload by name (bootstrap, fixtures, entry, ...)"""
+    with gzip.open(fixture_path(name), "rt", encoding="utf-8") as fixture_file:
+        return json.load(fixture_file)
+
+def load_fixture_bytes(name: str) -> bytes:
+    """Load a recorded payload as the raw JSON bytes the API would send"""
+    with gzip.open(fixture_path(name), "rb") as fixture_file:
+        return fixture_file.read()
+
+def save_fixture(name: str, payload: Any) -> None:
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    # mtime=0 keeps the files byte-identical across runs
+    with open(fixture_path(name), "wb") as raw_file:
+        with gzip.GzipFile(fileobj=raw_file, mode="wb", mtime=0) as fixture_file:
+            fixture_file.write(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+def record_payloads(team_id: int, gameweek: int, league_id: int) -> None:
+    """Download every payload from the live FPL API"""
+    import httpx
+
+    with httpx.Client(follow_redirects=True, timeout=30) as client:
+        for name, path in PAYLOAD_PATHS.items():
+            url = f"{FPL_API_BASE}/{path.format(team=team_id, gameweek=gameweek, league=league_id)}"
+            response = client.get(url)
+            response.raise_for_status()
+            save_fixture(name, response.json())
+            print(f"Recorded {name} from {url}")
+
+# Synthetic payloads -------------------------------------------------------
+
+TEAM_NAMES = [
+    ("Arsenal", "ARS"), ("Aston Villa", "AVL"), ("Bournemouth", "BOU"), ("Brentford", "BRE"),
+    ("Brighton", "BHA"), ("Chelsea", "CHE"), ("Crystal Palace", "CRY"), ("Everton", "EVE"),
+    ("Fulham", "FUL"), ("Ipswich", "IPS"), ("Leicester", "LEI"), ("Liverpool", "LIV"),
+    ("Man City", "MCI"), ("Man Utd", "MUN"), ("Newcastle", "NEW"), ("Nott'm Forest", "NFO"),
+    ("Southampton", "SOU"), ("Spurs", "TOT"), ("West Ham", "WHU"), ("Wolves", "WOL"),
+]
+SQUAD_SIZE = {1: 3, 2: 10, 3: 12, 4: 10}  # Players per club by position (~700 elements)
+SYNTHETIC_GAMEWEEK = 30  # Current gameweek of the synthetic season
+SEASON_START = datetime(2024, 8, 16, 18, 30, tzinfo=timezone.utc)
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _synthesize_events(current: int) -> list:
+    events = []
+    for gw in range(1, 39):
+        deadline = SEASON_START + timedelta(days=7 * (gw - 1))
+        finished = gw < current
+        events.append({
+            "id": gw, "name": f"Gameweek {gw}", "deadline_time": _iso(deadline),
+            "release_time": None, "average_entry_score": 50 + gw % 13 if finished else 0,
+            "finished": finished, "data_checked": finished,
+            "highest_scoring_entry": 3000000 + gw if finished else None,
+            "deadline_time_epoch": int(deadline.timestamp()), "deadline_time_game_offset": 0,
+            "highest_score": 110 + gw % 20 if finished else None,
+            "is_previous": gw == current - 1, "is_current": gw == current, "is_next": gw == current + 1,
+            "cup_leagues_created": gw > 16, "h2h_ko_matches_created": False,
+            "can_enter": gw > current, "can_manage": gw >= current, "released": True,
+            "ranked_count": 10500000 if finished else 0,
+            "overrides": {"rules": {}, "scoring": {}, "element_types": [], "pick_multiplier": None},
+            "chip_plays": [{"chip_name": "bboost", "num_played": 120000 + gw}, {"chip_name": "3xc", "num_played": 150000 + gw}],
+            "most_selected": 328, "most_transferred_in": 401, "top_element": 328,
+            "top_element_info": {"id": 328, "points": 15} if finished else None,
+            "transfers_made": 9000000 + gw * 1000, "most_captained": 328, "most_vice_captained": 351,
+        })
+    return events
+
+def _synthesize_teams() -> list:
+    return [
+        {
+            "code": 100 + team_id, "draw": 0, "form": None, "id": team_id, "loss": 0,
+            "name": name, "played": 0, "points": 0, "position": 0, "short_name": short_name,
+            "strength": 2 + team_id % 4, "team_division": None, "unavailable": False, "win": 0,
+            "strength_overall_home": 1050 + team_id * 11, "strength_overall_away": 1040 + team_id * 13,
+            "strength_attack_home": 1060 + team_id * 7, "strength_attack_away": 1050 + team_id * 9,
+            "strength_defence_home": 1070 + team_id * 5, "strength_defence_away": 1055 + team_id * 6,
+            "pulse_id": 200 + team_id,
+        }
+        for team_id, (name, short_name) in enumerate(TEAM_NAMES, start=1)
+    ]
+
+def _synthesize_elements(rng: random.Random, current: int) -> list:
+    elements = []
+    element_id = 0
+    for team_id in range(1, len(TEAM_NAMES) + 1):
+        for element_type, count in SQUAD_SIZE.items():
+            for squad_index in range(count):
+                element_id += 1
+                regular = squad_index < {1: 1, 2: 5, 3: 5, 4: 2}[element_type]
+                minutes = rng.randint(1800, 2610) if regular else rng.choice([0, 0, rng.randint(1, 900)])
+                total_points = int(minutes / 90 * rng.uniform(2.5, 6.5)) if minutes else 0
+                now_cost = {1: 45, 2: 45, 3: 55, 4: 60}[element_type] + (rng.randint(0, 90) if regular else rng.randint(0, 15))
+                form = round(rng.uniform(0, 9), 1) if minutes else 0.0
+                status = rng.choices(["a", "d", "i", "s", "u"], weights=[85, 6, 6, 2, 1])[0]
+                chance = None if status == "a" else {"d": rng.choice([25, 50, 75]), "i": 0, "s": 0, "u": 0}[status]
+                news = "" if status == "a" else {"d": "Knock - 75% chance of playing", "i": "Hamstring injury - Expected back 12 Apr",
+                                                  "s": "Suspended until 05 Apr", "u": "Joined on loan"}[status]
+                xg = round(minutes / 90 * {1: 0, 2: 0.05, 3: 0.2, 4: 0.45}[element_type] * rng.uniform(0.5, 1.5), 2)
+                xa = round(minutes / 90 * {1: 0.01, 2: 0.07, 3: 0.18, 4: 0.12}[element_type] * rng.uniform(0.5, 1.5), 2)
+                elements.append({
+                    "can_transact": True, "can_select": status != "u",
+                    "chance_of_playing_next_round": chance, "chance_of_playing_this_round": chance,
+                    "code": 400000 + element_id, "cost_change_event": 0, "cost_change_event_fall": 0,
+                    "cost_change_start": rng.randint(-3, 6), "cost_change_start_fall": 0,
+                    "dreamteam_count": rng.randint(0, 4) if regular else 0, "element_type": element_type,
+                    "ep_next": f"{form * 0.8:.1f}", "ep_this": f"{form * 0.75:.1f}",
+                    "event_points": rng.randint(0, 12) if regular else 0,
+                    "first_name": f"Player{element_id}", "form": f"{form:.1f}", "id": element_id,
+                    "in_dreamteam": False, "news": news, "news_added": None if status == "a" else "2025-03-28T10:00:00.000000Z",
+                    "now_cost": now_cost, "photo": f"{400000 + element_id}.jpg",
+                    "points_per_game": f"{total_points / max(1, minutes // 90 or 1):.1f}",
+                    "removed": False, "second_name": f"Surname{element_id}",
+                    "selected_by_percent": f"{rng.uniform(0.1, 60) if regular else rng.uniform(0, 1):.1f}",
+                    "special": False, "squad_number": None, "status": status, "team": team_id,
+                    "team_code": 100 + team_id, "total_points": total_points,
+                    "transfers_in": rng.randint(0, 3000000), "transfers_in_event": rng.randint(0, 200000),
+                    "transfers_out": rng.randint(0, 3000000), "transfers_out_event": rng.randint(0, 200000),
+                    "value_form": f"{form / now_cost * 10:.1f}", "value_season": f"{total_points / now_cost * 10:.1f}",
+                    "web_name": f"Player{element_id}", "region": 241, "team_join_date": "2023-07-01",
+                    "birth_date": "1997-05-12", "has_temporary_code": False, "opta_code": f"p{200000 + element_id}",
+                    "minutes": minutes, "goals_scored": int(xg * rng.uniform(0.6, 1.4)),
+                    "assists": int(xa * rng.uniform(0.6, 1.4)), "clean_sheets": minutes // 90 // 4 if element_type < 4 else 0,
+                    "goals_conceded": minutes // 90, "own_goals": 0, "penalties_saved": 0, "penalties_missed": 0,
+                    "yellow_cards": rng.randint(0, 8), "red_cards": 0, "saves": minutes // 30 if element_type == 1 else 0,
+                    "bonus": rng.randint(0, 20) if regular else 0, "bps": minutes // 3,
+                    "influence": f"{minutes / 4:.1f}", "creativity": f"{minutes / 5:.1f}", "threat": f"{minutes / 6:.1f}",
+                    "ict_index": f"{minutes / 50:.1f}", "clearances_blocks_interceptions": minutes // 60,
+                    "recoveries": minutes // 20, "tackles": minutes // 80, "defensive_contribution": minutes // 40,
+                    "starts": minutes // 85, "expected_goals": f"{xg:.2f}", "expected_assists": f"{xa:.2f}",
+                    "expected_goal_involvements": f"{xg + xa:.2f}", "expected_goals_conceded": f"{minutes / 90 * 1.3:.2f}",
+                    "influence_rank": element_id, "influence_rank_type": element_id % 200,
+                    "creativity_rank": element_id, "creativity_rank_type": element_id % 200,
+                    "threat_rank": element_id, "threat_rank_type": element_id % 200,
+                    "ict_index_rank": element_id, "ict_index_rank_type": element_id % 200,
+                    "corners_and_indirect_freekicks_order": None, "corners_and_indirect_freekicks_text": "",
+                    "direct_freekicks_order": None, "direct_freekicks_text": "",
+                    "penalties_order": 1 if regular and element_type == 4 and squad_index == 0 else None, "penalties_text": "",
+                    "expected_goals_per_90": round(xg / max(minutes, 1) * 90, 2), "saves_per_90": 0,
+                    "expected_assists_per_90": round(xa / max(minutes, 1) * 90, 2),
+                    "expected_goal_involvements_per_90": round((xg + xa) / max(minutes, 1) * 90, 2),
+                    "expected_goals_conceded_per_90": 1.3, "goals_conceded_per_90": 1.3,
+                    "now_cost_rank": element_id, "now_cost_rank_type": element_id % 200,
+                    "form_rank": element_id, "form_rank_type": element_id % 200,
+                    "points_per_game_rank": element_id, "points_per_game_rank_type": element_id % 200,
+                    "selected_rank": element_id, "selected_rank_type": element_id % 200,
+                    "starts_per_90": round(minutes / 85 / max(minutes / 90, 1), 2), "clean_sheets_per_90": 0.25,
+                    "defensive_contribution_per_90": 4.1,
+                })
+    return elements
+
+def _synthesize_fixtures(rng: random.Random, elements: list, current: int) -> list:
+    """A double round robin, with one postponed fixture rescheduled as a double gameweek"""
+    team_ids = list(range(1, len(TEAM_NAMES) + 1))
+    by_team = {}
+    for element in elements:
+        by_team.setdefault(element["team"], []).append(element["id"])
+
+    # Circle method round robin: 19 rounds, then the reverse fixtures
+    rounds = []
+    rotation = team_ids[1:]
+    for _ in range(len(team_ids) - 1):
+        lineup = [team_ids[0]] + rotation
+        rounds.append([(lineup[i], lineup[-1 - i]) for i in range(len(lineup) // 2)])
+        rotation = rotation[-1:] + rotation[:-1]
+    rounds += [[(away, home) for home, away in matches] for matches in rounds]
+
+    fixtures = []
+    fixture_id = 0
+    for gw, matches in enumerate(rounds, start=1):
+        for home, away in matches:
+            fixture_id += 1
+            kickoff = SEASON_START + timedelta(days=7 * (gw - 1) + 1, hours=(fixture_id % 4) * 2)
+            event = gw
+            # Blank in gameweek 31 for two fixtures, played again in gameweek 34 (a double)
+            if gw == 31 and fixture_id % 10 in (1, 2):
+                event = 34
+            finished = event < current
+            started = finished or (event == current and fixture_id % 10 < 5)
+            stats = []
+            if started:
+                home_goals, away_goals = rng.randint(0, 4), rng.randint(0, 3)
+                home_players = by_team[home][:14]
+                away_players = by_team[away][:14]
+                stats = [
+                    {"identifier": "goals_scored", "a": [{"value": 1, "element": e} for e in away_players[-away_goals:]] if away_goals else [],
+                     "h": [{"value": 1, "element": e} for e in home_players[-home_goals:]] if home_goals else []},
+                    {"identifier": "assists", "a": [], "h": [{"value": 1, "element": home_players[5]}] if home_goals else []},
+                    {"identifier": "own_goals", "a": [], "h": []},
+                    {"identifier": "penalties_saved", "a": [], "h": []},
+                    {"identifier": "penalties_missed", "a": [], "h": []},
+                    {"identifier": "yellow_cards", "a": [{"value": 1, "element": away_players[3]}], "h": []},
+                    {"identifier": "red_cards", "a": [], "h": []},
+                    {"identifier": "saves", "a": [{"value": rng.randint(0, 6), "element": away_players[0]}],
+                     "h": [{"value": rng.randint(0, 6), "element": home_players[0]}]},
+                    {"identifier": "bonus", "a": [{"value": 1, "element": away_players[7]}] if finished else [],
+                     "h": [{"value": 3, "element": home_players[8]}, {"value": 2, "element": home_players[9]}] if finished else []},
+                    {"identifier": "bps", "a": [{"value": rng.randint(0, 40), "element": e} for e in away_players],
+                     "h": [{"value": rng.randint(0, 40), "element": e} for e in home_players]},
+                ]
+            fixtures.append({
+                "code": 2444000 + fixture_id, "event": event, "finished": finished, "finished_provisional": finished,
+                "id": fixture_id, "kickoff_time": _iso(kickoff + timedelta(days=21 if event != gw else 0)),
+                "minutes": 90 if finished else (45 if started else 0), "provisional_start_time": False,
+                "started": started, "team_a": away, "team_a_score": stats and len(stats[0]["a"]) if started else None,
+                "team_h": home, "team_h_score": stats and len(stats[0]["h"]) if started else None,
+                "stats": stats, "team_h_difficulty": 2 + (away * 7 + home) % 4, "team_a_difficulty": 2 + (home * 7 + away) % 4,
+                "pulse_id": 115000 + fixture_id,
+            })
+
+    # One fixture still to be rescheduled
+    fixtures[-1]["event"] = None
+    fixtures[-1]["kickoff_time"] = None
+    return fixtures
+
+def _synthesize_live(rng: random.Random, elements: list, fixtures: list, gameweek: int) -> Dict[str, Any]:
+    gw_fixtures = {}
+    for fixture in fixtures:
+        if fixture["event"] == gameweek:
+            gw_fixtures.setdefault(fixture["team_h"], []).append(fixture)
+            gw_fixtures.setdefault(fixture["team_a"], []).append(fixture)
+
+    live_elements = []
+    for element in elements:
+        played = [f for f in gw_fixtures.get(element["team"], []) if f["started"]]
+        minutes = sum(rng.choice([90, 90, 75, 0]) for _ in played) if element["minutes"] > 900 else 0
+        points = (2 if minutes >= 60 else 1 if minutes else 0) + (rng.choice([0, 0, 0, 2, 5]) if minutes else 0)
+        stats = {
+            "minutes": minutes, "goals_scored": 1 if points >= 7 else 0, "assists": 1 if points == 4 else 0,
+            "clean_sheets": 0, "goals_conceded": 1 if minutes else 0, "own_goals": 0, "penalties_saved": 0,
+            "penalties_missed": 0, "yellow_cards": 0, "red_cards": 0, "saves": 0, "bonus": 0,
+            "bps": rng.randint(0, 30) if minutes else 0, "influence": "10.2", "creativity": "8.4", "threat": "6.0",
+            "ict_index": "2.5", "starts": 1 if minutes else 0, "expected_goals": "0.12", "expected_assists": "0.05",
+            "expected_goal_involvements": "0.17", "expected_goals_conceded": "1.10", "total_points": points,
+            "in_dreamteam": False,
+        }
+        live_elements.append({
+            "id": element["id"],
+            "stats": stats,
+            "explain": [
+                {"fixture": fixture["id"], "stats": [{"identifier": "minutes", "points": 2 if minutes >= 60 else 1, "value": minutes, "points_modification": 0}]}
+                for fixture in played
+            ] if minutes else [],
+            "modified": False,
+        })
+    return {"elements": live_elements}
+
+def synthesize_payloads(seed: int = 2025) -> Dict[str, Any]:
+    """
+    Build deterministic payloads shaped like the live FPL API responses
+
+    Used when the live API can't be recorded (CI, offline development). The
+    element records carry the full set of fields the API returns, so parse
+    time and memory measurements are representative.
+    """
+    rng = random.Random(seed)
+    gameweek = SYNTHETIC_GAMEWEEK
+    events = _synthesize_events(gameweek)
+    teams = _synthesize_teams()
+    elements = _synthesize_elements(rng, gameweek)
+    fixtures = _synthesize_fixtures(rng, elements, gameweek)
+
+    bootstrap = {
+        "chips": [{"id": 1, "name": "wildcard", "number": 1, "start_event": 2, "stop_event": 19, "chip_type": "transfer"},
+                  {"id": 2, "name": "freehit", "number": 1, "start_event": 2, "stop_event": 38, "chip_type": "transfer"},
+                  {"id": 3, "name": "bboost", "number": 1, "start_event": 1, "stop_event": 38, "chip_type": "team"},
+                  {"id": 4, "name": "3xc", "number": 1, "start_event": 1, "stop_event": 38, "chip_type": "team"}],
+        "events": events,
+        "game_settings": {"league_join_private_max": 25, "squad_squadplay": 11, "squad_squadsize": 15,
+                          "squad_team_limit": 3, "squad_total_spend": 1000, "transfers_cap": 20, "timezone": "UTC"},
+        "phases": [{"id": 1, "name": "Overall", "start_event": 1, "stop_event": 38, "highest_score": None}],
+        "teams": teams,
+        "total_players": 10800000,
+        "element_stats": [{"label": "Minutes played", "name": "minutes"}, {"label": "Goals scored", "name": "goals_scored"}],
+        "element_types": [
+            {"id": 1, "plural_name": "Goalkeepers", "plural_name_short": "GKP", "singular_name": "Goalkeeper", "singular_name_short": "GKP", "squad_select": 2, "squad_min_play": 1, "squad_max_play": 1, "element_count": 60},
+            {"id": 2, "plural_name": "Defenders", "plural_name_short": "DEF", "singular_name": "Defender", "singular_name_short": "DEF", "squad_select": 5, "squad_min_play": 3, "squad_max_play": 5, "element_count": 200},
+            {"id": 3, "plural_name": "Midfielders", "plural_name_short": "MID", "singular_name": "Midfielder", "singular_name_short": "MID", "squad_select": 5, "squad_min_play": 2, "squad_max_play": 5, "element_count": 240},
+            {"id": 4, "plural_name": "Forwards", "plural_name_short": "FWD", "singular_name": "Forward", "singular_name_short": "FWD", "squad_select": 3, "squad_min_play": 1, "squad_max_play": 3, "element_count": 200},
+        ],
+        "elements": elements,
+    }
+
+    # A squad of regulars: 2 GK, 5 DEF, 5 MID, 3 FWD from different clubs
+    squad = []
+    for element_type, count in [(1, 2), (2, 5), (3, 5), (4, 3)]:
+        candidates = [e for e in elements if e["element_type"] == element_type and e["minutes"] > 1800]
+        squad += [candidates[(len(squad) * 7 + i * 11) % len(candidates)] for i in range(count)]
+    starters = [squad[0]] + squad[2:6] + squad[7:11] + squad[12:14]
+    bench = [squad[1], squad[6], squad[11], squad[14]]
+    captain = max(starters, key=lambda e: e["total_points"])
+    vice = sorted(starters, key=lambda e: e["total_points"])[-2]
+    picks = [
+        {"element": e["id"], "position": position, "multiplier": (2 if e is captain else 1) if position <= 11 else 0,
+         "is_captain": e is captain, "is_vice_captain": e is vice, "element_type": e["element_type"]}
+        for position, e in enumerate(starters + bench, start=1)
+    ]
+
+    team_id = 123456
+    history_current = []
+    total = 0
+    for gw in range(1, gameweek):
+        points = 40 + rng.randint(0, 50)
+        total += points
+        history_current.append({
+            "event": gw, "points": points, "total_points": total, "rank": rng.randint(1000, 5000000),
+            "rank_sort": 0, "overall_rank": max(1000, 2000000 - gw * 40000), "percentile_rank": 20,
+            "bank": rng.randint(0, 30), "value": 1000 + gw, "event_transfers": rng.randint(0, 2),
+            "event_transfers_cost": 0, "points_on_bench": rng.randint(0, 15),
+        })
+
+    return {
+        "bootstrap": bootstrap,
+        "fixtures": fixtures,
+        "entry": {
+            "id": team_id, "joined_time": "2024-07-20T10:00:00Z", "started_event": 1, "favourite_team": 12,
+            "player_first_name": "Sample", "player_last_name": "Manager", "player_region_id": 241,
+            "player_region_name": "England", "player_region_iso_code_short": "EN", "player_region_iso_code_long": "ENG",
+            "years_active": 6, "summary_overall_points": total, "summary_overall_rank": history_current[-1]["overall_rank"],
+            "summary_event_points": history_current[-1]["points"], "summary_event_rank": history_current[-1]["rank"],
+            "current_event": gameweek, "name": "Sample XI", "name_change_blocked": False,
+            "entered_events": list(range(1, gameweek + 1)), "kit": None,
+            "last_deadline_bank": 12, "last_deadline_value": 1031, "last_deadline_total_transfers": 31,
+            "leagues": {
+                "classic": [{"id": 314, "name": "Overall", "short_name": "overall", "league_type": "s", "scoring": "c",
+                             "entry_rank": history_current[-1]["overall_rank"], "entry_last_rank": history_current[-1]["overall_rank"]}],
+                "h2h": [], "cup": {"matches": [], "status": {}, "cup_league": None}, "cup_matches": [],
+            },
+        },
+        "history": {
+            "current": history_current,
+            "past": [{"season_name": f"20{y}/{y + 1}", "total_points": 2100 + y * 10, "rank": 400000 - y * 1000} for y in range(18, 24)],
+            "chips": [{"name": "wildcard", "time": "2024-10-04T10:00:00Z", "event": 7},
+                      {"name": "freehit", "time": "2025-02-14T10:00:00Z", "event": 25}],
+        },
+        "picks": {
+            "active_chip": None, "automatic_subs": [],
+            "entry_history": {"event": gameweek, "points": 0, "total_points": total, "rank": None, "rank_sort": None,
+                              "overall_rank": history_current[-1]["overall_rank"], "percentile_rank": None,
+                              "bank": 12, "value": 1031, "event_transfers": 1, "event_transfers_cost": 0, "points_on_bench": 0},
+            "picks": picks,
+        },
+        "live": _synthesize_live(rng, elements, fixtures, gameweek),
+        "league_standings": {
+            "new_entries": {"has_next": False, "page": 1, "results": []},
+            "last_updated_data": _iso(SEASON_START + timedelta(days=7 * (gameweek - 1))),
+            "league": {"id": 314, "name": "Overall", "created": "2024-07-01T10:00:00Z", "closed": False,
+                       "max_entries": None, "league_type": "s", "scoring": "c", "admin_entry": None, "start_event": 1,
+                       "code_privacy": "p", "has_cup": True, "cup_league": None, "rank": None},
+            "standings": {
+                "has_next": True, "page": 1,
+                "results": [
+                    {"id": 90000000 + rank, "event_total": 60 + rank % 30, "player_name": f"Manager {rank}",
+                     "rank": rank, "last_rank": rank + 1, "rank_sort": rank, "total": 2200 - rank,
+                     "entry": 1000 + rank * 37, "entry_name": f"Team {rank}", "has_played": True}
+                    for rank in range(1, 51)
+                ],
+            },
+        },
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record or synthesize FPL payloads for benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record = subparsers.add_parser("record", help="Record payloads from the live FPL API")
+    record.add_argument("--team", type=int, required=True)
+    record.add_argument("--gameweek", type=int, required=True)
+    record.add_argument("--league", type=int, default=314)
+    synthesize = subparsers.add_parser("synthesize", help="Generate deterministic offline payloads")
+    synthesize.add_argument("--seed", type=int, default=2025)
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record_payloads(args.team, args.gameweek, args.league)
+    else:
+        for name, payload in synthesize_payloads(args.seed).items():
+            save_fixture(name, payload)
+            print(f"Wrote {fixture_path(name)}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,275 @@
+"""
+Local stand-in for the FPL API and the Gemini API
+
+Replays the recorded payloads from benchmarks/fixtures with configurable
+latency, error rate and rate limiting, so the whole stack can be load tested
+offline. Point the backend at it with:
+
+    FPL_API_BASE=http://127.0.0.1:8001/api
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8001
+
+Run it with:
+
+    python -m loadtest.mock_upstream --port 8001 --fpl-latency 80 --llm-latency 1500
+
+The injected behaviour can be changed while it runs through PUT /_mock/config.
+"""
+import sys
+import json
+import math
+import random
+import asyncio
+import argparse
+from collections import Counter
+from typing import Dict, Any, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, JSONResponse
+
+from benchmarks.fixtures import load_fixture, load_fixture_bytes
+
+# Injected behaviour per upstream
+# latency_ms is the median of a log-normal distribution whose spread is jitter;
+# error_rate answers with 503, rate_limit_rate with 429 and a Retry-After header
+_mock_config = {
+    "fpl": {"latency_ms": 80.0, "jitter": 0.5, "error_rate": 0.0, "rate_limit_rate": 0.0},
+    "llm": {"latency_ms": 1500.0, "jitter": 0.4, "error_rate": 0.0, "rate_limit_rate": 0.0},
+}
+
+# Requests served, by route and status
+_mock_stats = Counter()
+
+# Payloads are serialized once; responses are just bytes
+_payloads: Dict[str, bytes] = {}
+_fixtures_by_event: Dict[int, bytes] = {}
+_element_summaries: Dict[int, bytes] = {}
+
+app = FastAPI(title="FPL and Gemini stand-in")
+
+def load_payloads() -> None:
+    for name in ["bootstrap", "fixtures", "entry", "history", "picks", "live", "league_standings"]:
+        _payloads[name] = load_fixture_bytes(name)
+
+    fixtures = load_fixture("fixtures")
+    events = {f["event"] for f in fixtures if f["event"] is not None}
+    for event in events:
+        _fixtures_by_event[event] = json.dumps([f for f in fixtures if f["event"] == event]).encode("utf-8")
+
+    bootstrap = load_fixture("bootstrap")
+    for element in bootstrap["elements"]:
+        _element_summaries[element["id"]] = json.dumps(synthesize_element_summary(element, fixtures)).encode("utf-8")
+
+def synthesize_element_summary(element: Dict[str, Any], fixtures: list) -> Dict[str, Any]:
+    """Gameweek history for one player, spread over their team's finished fixtures"""
+    rng = random.Random(element["id"])
+    played = [f for f in fixtures if f["finished"] and element["team"] in (f["team_h"], f["team_a"])]
+    share = element["minutes"] / (90 * len(played)) if played else 0
+    history = []
+    for fixture in played:
+        is_home = fixture["team_h"] == element["team"]
+        minutes = 90 if rng.random() < share else (rng.choice([0, 0, 15, 30, 60]) if share else 0)
+        points = (2 if minutes >= 60 else 1 if minutes else 0) + (rng.choice([0, 0, 0, 1, 2, 3, 5, 6]) if minutes else 0)
+        history.append({
+            "element": element["id"],
+            "fixture": fixture["id"],
+            "opponent_team": fixture["team_a"] if is_home else fixture["team_h"],
+            "total_points": points,
+            "was_home": is_home,
+            "kickoff_time": fixture["kickoff_time"],
+            "team_h_score": fixture["team_h_score"],
+            "team_a_score": fixture["team_a_score"],
+            "round": fixture["event"],
+            "minutes": minutes,
+            "goals_scored": int(points >= 6),
+            "assists": int(points == 5),
+            "clean_sheets": int(minutes >= 60 and rng.random() < 0.3),
+            "goals_conceded": rng.randint(0, 3) if minutes else 0,
+            "own_goals": 0,
+            "penalties_saved": 0,
+            "penalties_missed": 0,
+            "yellow_cards": int(rng.random() < 0.1),
+            "red_cards": 0,
+            "saves": rng.randint(0, 5) if element["element_type"] == 1 and minutes else 0,
+            "bonus": rng.choice([0, 0, 0, 1, 2, 3]) if points >= 5 else 0,
+            "bps": rng.randint(0, 40) if minutes else 0,
+            "influence": f"{rng.uniform(0, 60):.1f}",
+            "creativity": f"{rng.uniform(0, 50):.1f}",
+            "threat": f"{rng.uniform(0, 70):.1f}",
+            "ict_index": f"{rng.uniform(0, 15):.1f}",
+            "starts": int(minutes >= 60),
+            "expected_goals": f"{rng.uniform(0, 0.8):.2f}",
+            "expected_assists": f"{rng.uniform(0, 0.5):.2f}",
+            "expected_goal_involvements": f"{rng.uniform(0, 1.2):.2f}",
+            "expected_goals_conceded": f"{rng.uniform(0, 2.5):.2f}",
+            "value": element["now_cost"],
+            "transfers_balance": rng.randint(-50000, 50000),
+            "selected": rng.randint(1000, 5000000),
+            "transfers_in": rng.randint(0, 50000),
+            "transfers_out": rng.randint(0, 50000)
+        })
+    return {"fixtures": [], "history": history, "history_past": []}
+
+def sample_latency(upstream: str) -> float:
+    """Draw a latency in seconds from the configured log-normal distribution"""
+    config = _mock_config[upstream]
+    median = config["latency_ms"] / 1000
+    if median <= 0:
+        return 0.0
+    return median * math.exp(random.gauss(0, config["jitter"]))
+
+async def simulate(upstream: str, route: str) -> Optional[Response]:
+    """
+    Wait for the injected latency, then maybe fail
+
+    Returns:
+        An error response to send instead of the payload, or None
+    """
+    await asyncio.sleep(sample_latency(upstream))
+
+    config = _mock_config[upstream]
+    roll = random.random()
+    if roll < config["rate_limit_rate"]:
+        _mock_stats[(route, 429)] += 1
+        return JSONResponse({"error": "Too Many Requests"}, status_code=429, headers={"Retry-After": "1"})
+    if roll < config["rate_limit_rate"] + config["error_rate"]:
+        _mock_stats[(route, 503)] += 1
+        return JSONResponse({"error": "Service Unavailable"}, status_code=503)
+
+    _mock_stats[(route, 200)] += 1
+    return None
+
+async def serve_payload(route: str, payload: bytes) -> Response:
+    error = await simulate("fpl", route)
+    return error or Response(content=payload, media_type="application/json")
+
+# FPL API --------------------------------------------------------------------
+
+@app.get("/api/bootstrap-static/")
+async def bootstrap_static():
+    return await serve_payload("bootstrap-static", _payloads["bootstrap"])
+
+@app.get("/api/fixtures/")
+async def fixtures(event: Optional[int] = None):
+    payload = _payloads["fixtures"] if event is None else _fixtures_by_event.get(event, b"[]")
+    return await serve_payload("fixtures", payload)
+
+@app.get("/api/entry/{team_id}/")
+async def entry(team_id: int):
+    return await serve_payload("entry", _payloads["entry"])
+
+@app.get("/api/entry/{team_id}/history/")
+async def entry_history(team_id: int):
+    return await serve_payload("entry-history", _payloads["history"])
+
+@app.get("/api/entry/{team_id}/event/{gameweek}/picks/")
+async def entry_picks(team_id: int, gameweek: int):
+    return await serve_payload("picks", _payloads["picks"])
+
+@app.get("/api/element-summary/{element_id}/")
+async def element_summary(element_id: int):
+    payload = _element_summaries.get(element_id)
+    if payload is None:
+        _mock_stats[("element-summary", 404)] += 1
+        return JSONResponse({"detail": "Not found."}, status_code=404)
+    return await serve_payload("element-summary", payload)
+
+@app.get("/api/event/{gameweek}/live/")
+async def event_live(gameweek: int):
+    return await serve_payload("live", _payloads["live"])
+
+@app.get("/api/leagues-classic/{league_id}/standings/")
+async def league_standings(league_id: int):
+    return await serve_payload("league-standings", _payloads["league_standings"])
+
+# Gemini API -----------------------------------------------------------------
+
+MOCK_ANSWER = (
+    "Captain Salah this week: Liverpool are at home and he is on penalties. "
+    "Haaland is the alternative with a double gameweek coming up. "
+    "Keep your free transfer unless you have an injured starter."
+)
+
+@app.post("/v1beta/cachedContents")
+async def create_cached_content():
+    # Context caching isn't emulated; the backend falls back to an inline prefix
+    _mock_stats[("cached-contents", 400)] += 1
+    return JSONResponse({"error": {"code": 400, "message": "Context caching is not supported by the stand-in", "status": "INVALID_ARGUMENT"}}, status_code=400)
+
+@app.post("/v1beta/models/{model_method}")
+async def generate_content(model_method: str, request: Request):
+    body = await request.body()
+    error = await simulate("llm", "generate-content")
+    if error is not None:
+        return error
+
+    # Roughly 4 characters per token, like the real tokenizer on English text
+    prompt_tokens = max(1, len(body) // 4)
+    completion_tokens = len(MOCK_ANSWER) // 4
+    return {
+        "candidates": [{
+            "content": {"parts": [{"text": MOCK_ANSWER}], "role": "model"},
+            "finishReason": "STOP",
+            "index": 0
+        }],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": completion_tokens,
+            "totalTokenCount": prompt_tokens + completion_tokens
+        },
+        "modelVersion": model_method.split(":")[0]
+    }
+
+# Control --------------------------------------------------------------------
+
+@app.get("/_mock/config")
+async def get_mock_config():
+    return _mock_config
+
+@app.put("/_mock/config")
+async def update_mock_config(update: Dict[str, Dict[str, float]]):
+    """Change the injected behaviour, e.g. {"fpl": {"rate_limit_rate": 0.2}}"""
+    # Validate the whole update first, so a rejected request changes nothing
+    for upstream, settings in update.items():
+        if upstream not in _mock_config:
+            return JSONResponse({"detail": f"Unknown upstream {upstream}"}, status_code=400)
+        for key in settings:
+            if key not in _mock_config[upstream]:
+                return JSONResponse({"detail": f"Unknown setting {key}"}, status_code=400)
+
+    for upstream, settings in update.items():
+        for key, value in settings.items():
+            _mock_config[upstream][key] = float(value)
+    return _mock_config
+
+@app.get("/_mock/stats")
+async def get_mock_stats():
+    return {f"{route} {status}": count for (route, status), count in sorted(_mock_stats.items())}
+
+@app.on_event("startup")
+async def startup_event():
+    load_payloads()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve recorded FPL and Gemini responses with injected latency")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--fpl-latency", type=float, default=80, help="Median FPL API latency in ms")
+    parser.add_argument("--llm-latency", type=float, default=1500, help="Median Gemini latency in ms")
+    parser.add_argument("--jitter", type=float, default=None, help="Log-normal spread for both upstreams")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    args = parser.parse_args(argv)
+
+    _mock_config["fpl"]["latency_ms"] = args.fpl_latency
+    _mock_config["llm"]["latency_ms"] = args.llm_latency
+    for config in _mock_config.values():
+        if args.jitter is not None:
+            config["jitter"] = args.jitter
+        config["error_rate"] = args.error_rate
+        config["rate_limit_rate"] = args.rate_limit_rate
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,195 @@
+"""
+Load-test scenario for the backend API
+
+Drives a weighted mix of the routes the frontend uses and reports latency
+percentiles and throughput per route. Against an already running backend:
+
+    python -m loadtest.scenario --target http://127.0.0.1:8000 --duration 60 --concurrency 50
+
+Or let it start the FPL/Gemini stand-in and the backend itself, wired together:
+
+    python -m loadtest.scenario --spawn --workers 2 --fpl-latency 80 --llm-latency 1500
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (name, weight, request factory) - names are the reported route labels
+TEAM_IDS = range(100000, 100500)  # Enough distinct teams to miss the team cache regularly
+
+def _team_request() -> Tuple[str, str, dict]:
+    return "GET", f"/teams/{random.choice(TEAM_IDS)}", {}
+
+def _chat_request() -> Tuple[str, str, dict]:
+    return "POST", "/chat", {"json": {"message": "Who should I captain this week?", "team_id": str(random.choice(TEAM_IDS))}}
+
+SCENARIO = [
+    ("GET /teams/{team_id}", 40, _team_request),
+    ("GET /chips/calculate", 15, lambda: ("GET", "/chips/calculate", {})),
+    ("GET /injuries/", 15, lambda: ("GET", "/injuries/", {"params": {"max_chance": 50}})),
+    ("GET /fpl/bootstrap-static", 10, lambda: ("GET", "/fpl/bootstrap-static", {})),
+    ("GET /changes/", 10, lambda: ("GET", "/changes/", {"params": {"since": 0}})),
+    ("POST /chat", 10, _chat_request),
+]
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+async def run_scenario(target: str, duration: float, concurrency: int, timeout: float) -> Dict[str, dict]:
+    """
+    Run the route mix with a fixed number of concurrent virtual users
+
+    Returns:
+        Dict mapping route label -> latencies (seconds) and status counts
+    """
+    names = [name for name, _, _ in SCENARIO]
+    weights = [weight for _, weight, _ in SCENARIO]
+    factories = {name: factory for name, _, factory in SCENARIO}
+    results = defaultdict(lambda: {"latencies": [], "statuses": defaultdict(int)})
+    deadline = time.perf_counter() + duration
+
+    async def virtual_user(client: httpx.AsyncClient):
+        while time.perf_counter() < deadline:
+            name = random.choices(names, weights)[0]
+            method, path, kwargs = factories[name]()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            results[name]["latencies"].append(time.perf_counter() - start)
+            results[name]["statuses"][status] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=target, timeout=timeout, limits=limits) as client:
+        await asyncio.gather(*(virtual_user(client) for _ in range(concurrency)))
+
+    return results
+
+def summarize(results: Dict[str, dict], duration: float) -> Dict[str, dict]:
+    summary = {}
+    all_latencies = []
+    for name, result in results.items():
+        latencies = sorted(result["latencies"])
+        all_latencies += latencies
+        errors = sum(count for status, count in result["statuses"].items() if not status.startswith("2"))
+        summary[name] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "throughput": len(latencies) / duration,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "statuses": dict(result["statuses"]),
+        }
+
+    all_latencies.sort()
+    summary["total"] = {
+        "requests": len(all_latencies),
+        "errors": sum(route["errors"] for route in summary.values()),
+        "throughput": len(all_latencies) / duration,
+        "p50_ms": percentile(all_latencies, 0.50) * 1000,
+        "p95_ms": percentile(all_latencies, 0.95) * 1000,
+        "p99_ms": percentile(all_latencies, 0.99) * 1000,
+        "statuses": {},
+    }
+    return summary
+
+def print_report(summary: Dict[str, dict]) -> None:
+    header = f"{'Route':<28}{'Requests':>10}{'Errors':>8}{'Req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, row in summary.items():
+        print(
+            f"{name:<28}{row['requests']:>10}{row['errors']:>8}{row['throughput']:>9.1f}"
+            f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+        )
+
+def wait_until_ready(url: str, timeout: float = 60) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+def spawn_stack(args) -> List[subprocess.Popen]:
+    """Start the stand-in upstream and the backend pointed at it"""
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    mock = subprocess.Popen(
+        [sys.executable, "-m", "loadtest.mock_upstream", "--port", str(args.mock_port),
+         "--fpl-latency", str(args.fpl_latency), "--llm-latency", str(args.llm_latency),
+         "--error-rate", str(args.error_rate), "--rate-limit-rate", str(args.rate_limit_rate)],
+        cwd=BACKEND_DIR
+    )
+    wait_until_ready(f"{mock_url}/_mock/config")
+
+    env = {
+        **os.environ,
+        "FPL_API_BASE": f"{mock_url}/api",
+        "GEMINI_API_ENDPOINT": mock_url,
+        "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY", "stand-in"),
+    }
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    wait_until_ready(f"http://127.0.0.1:{args.port}/")
+    return [backend, mock]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the backend API")
+    parser.add_argument("--target", default=None, help="Base URL of a running backend")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--spawn", action="store_true", help="Start the stand-in upstream and the backend")
+    parser.add_argument("--port", type=int, default=8000, help="Backend port when spawning")
+    parser.add_argument("--workers", type=int, default=1, help="Backend workers when spawning")
+    parser.add_argument("--mock-port", type=int, default=8001)
+    parser.add_argument("--fpl-latency", type=float, default=80)
+    parser.add_argument("--llm-latency", type=float, default=1500)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    processes = spawn_stack(args) if args.spawn else []
+    target = args.target or f"http://127.0.0.1:{args.port}"
+    try:
+        started = time.perf_counter()
+        results = asyncio.run(run_scenario(target, args.duration, args.concurrency, args.timeout))
+        summary = summarize(results, time.perf_counter() - started)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
 import logging
@@ -7,8 +8,22 @@ from routes.injuries import router as injuries_router
 from routes.chips import router as chips_router
 from routes.teams import router as teams_router
 from routes.fpl import router as fpl_router
+from routes.changes import router as changes_router
+from routes.events import router as events_router
+from routes.traces import router as traces_router
+from routes.players import router as players_router
+from routes.fixtures import router as fixtures_router
+from routes.projections import router as projections_router
+from routes.ownership import router as ownership_router
 from services.chip_calculator import initialize_cache_refresh, refresh_processed_fixtures_cache
 from services.fpl_data import initialize_fpl_data_cache, refresh_fpl_data_cache
+from services.live_points import initialize_live_points_engine
+from services.player_history import initialize_player_history_ingester
+from services.team_history import initialize_team_history_writer
+from services.transfer_optimizer import shutdown_optimizer_pool
+from services.leader_election import initialize_leader_election, release_leadership
+from services.metrics import MetricsMiddleware, render_metrics
+from services.tracing import TracingMiddleware, initialize_trace_writer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,18 +37,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Trace-Id"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 
 app.include_router(chat_router)
 app.include_router(injuries_router)
 app.include_router(chips_router)
 app.include_router(teams_router)
 app.include_router(fpl_router)
+app.include_router(changes_router)
+app.include_router(events_router)
+app.include_router(traces_router)
+app.include_router(players_router)
+app.include_router(fixtures_router)
+app.include_router(projections_router)
+app.include_router(ownership_router)
 
 @app.get("/")
 def read_root():
     return {"message": "FPL Chatbot API is running"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (per worker process)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.post("/admin/refresh-cache")
 async def refresh_all_caches():
     """
@@ -63,10 +93,34 @@ async def startup_event():
     """Initialize background tasks when the application starts"""
     logger.info("Initializing background tasks...")
     
+    # Decide which process performs upstream refreshes before the caches start
+    await initialize_leader_election()
+    
     # Initialize FPL data cache first as other services depend on it
     await initialize_fpl_data_cache()
     
     # Then initialize the chip calculator cache
     await initialize_cache_refresh()
     
+    # Start polling live gameweek points during match windows
+    await initialize_live_points_engine()
+    
+    # Keep the local player history store up to date
+    await initialize_player_history_ingester()
+    
+    # Store team snapshots fetched while serving requests
+    await initialize_team_history_writer()
+    
+    # Append kept request traces to the trace log
+    await initialize_trace_writer()
+    
     logger.info("Background tasks initialized successfully")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Hand over leadership straight away and stop the optimizer processes"""
+    # Release leadership instead of waiting for the lease to expire
+    await release_leadership()
+    
+    # Stop the optimizer worker processes
+    shutdown_optimizer_pool()
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException, Query
+from services.snapshot_diff import get_changes_since
+
+router = APIRouter(prefix="/changes", tags=["Changes"])
+
+@router.get("/")
+async def get_changes(since: int = Query(0, description="Last data version the client has seen", ge=0)):
+    """
+    Get what changed in the FPL data since a given version
+    
+    Parameters:
+    - since: The data version the client already has
+    
+    Returns:
+    - Versioned deltas (price moves, status and news changes, deadline and fixture changes)
+      published after that version, or full_refresh_required if the client is too far behind
+      or holds a version this server never published
+    """
+    try:
+        return get_changes_since(since)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
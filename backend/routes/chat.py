@@ -4,11 +4,22 @@ from typing import Optional
 import httpx
 import asyncio
 import logging
-from services.gemini import get_gemini_response
+from services.gemini import get_gemini_response, is_transfer_request, is_captaincy_request
+from services.fpl_data import get_fpl_data
+from services.projections import get_projections, top_projected
+from services.team_squad import get_team_squad
+from services.transfer_optimizer import suggest_transfers
+from services.fixture_ticker import get_fixture_matrix
+from services.captaincy import rank_captains
+from services.upstream import upstream_client, FPL_API_BASE
+from services.tracing import span
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Seconds the transfer optimizer may search while a chat request waits
+CHAT_TRANSFER_TIME_BUDGET = 1.0
+
 class ChatRequest(BaseModel):
     message: str
     team_id: Optional[str] = None
@@ -23,33 +34,71 @@ async def chat_with_ai(request: ChatRequest):
         # If team ID is provided, fetch team data
         if team_id:
             try:
-                async with httpx.AsyncClient() as client:
-                    team_response = await client.get(f"https://fantasy.premierleague.com/api/entry/{team_id}/")
-                    if team_response.status_code == 200:
-                        team_data = team_response.json()
+                with span("team_fetch"):
+                    async with upstream_client() as client:
+                        team_response = await client.get(f"{FPL_API_BASE}/entry/{team_id}/")
+                        if team_response.status_code == 200:
+                            team_data = team_response.json()
                         
-                    # Also get current picks if possible
-                    current_gw_response = await client.get("https://fantasy.premierleague.com/api/bootstrap-static/")
-                    if current_gw_response.status_code == 200:
-                        current_gw_data = current_gw_response.json()
-                        current_gw = next((event['id'] for event in current_gw_data['events'] 
-                                         if event['is_current']), None)
+                        # Also get current picks if possible
+                        current_gw_response = await client.get(f"{FPL_API_BASE}/bootstrap-static/")
+                        if current_gw_response.status_code == 200:
+                            current_gw_data = current_gw_response.json()
+                            current_gw = next((event['id'] for event in current_gw_data['events'] 
+                                             if event['is_current']), None)
                         
-                        if current_gw:
-                            picks_response = await client.get(f"https://fantasy.premierleague.com/api/entry/{team_id}/event/{current_gw}/picks/")
-                            if picks_response.status_code == 200:
-                                picks_data = picks_response.json()
-                                # Add picks to team data
-                                team_data['picks'] = picks_data['picks']
-                                team_data['active_chip'] = picks_data.get('active_chip')
+                            if current_gw:
+                                picks_response = await client.get(f"{FPL_API_BASE}/entry/{team_id}/event/{current_gw}/picks/")
+                                if picks_response.status_code == 200:
+                                    picks_data = picks_response.json()
+                                    # Add picks to team data
+                                    team_data['picks'] = picks_data['picks']
+                                    team_data['active_chip'] = picks_data.get('active_chip')
                                 
             except Exception as e:
                 logger.error(f"Error fetching team data: {e}")
                 # Continue without team data if it fails
                 pass
+            
+            # Give the model the optimizer's best transfers and the captain ranking
+            # rather than letting it guess, but only when the question needs them
+            wants_transfers = is_transfer_request(user_message)
+            wants_captain = is_captaincy_request(user_message)
+            if team_data is not None and (wants_transfers or wants_captain):
+                try:
+                    squad = await get_team_squad(int(team_id))
+                except Exception as e:
+                    logger.error(f"Error fetching team squad: {e}")
+                    squad = None
+                
+                if squad is not None and wants_transfers:
+                    if squad['active_chip'] == "freehit":
+                        # Transfers would be planned for a squad that reverts after the gameweek
+                        team_data['transfer_note'] = f"Free Hit is active in gameweek {squad['gameweek']}; the squad reverts next gameweek, so no transfers are suggested"
+                    else:
+                        try:
+                            with span("transfer_optimizer"):
+                                team_data['suggested_transfers'] = await suggest_transfers(
+                                    await get_projections(),
+                                    squad['squad'],
+                                    squad['bank'],
+                                    free_transfers=squad['free_transfers'],
+                                    time_budget=CHAT_TRANSFER_TIME_BUDGET
+                                )
+                                team_data['free_transfers'] = squad['free_transfers']
+                        except Exception as e:
+                            logger.error(f"Error suggesting transfers: {e}")
+                
+                if squad is not None and wants_captain:
+                    try:
+                        with span("captaincy"):
+                            team_data['captain_options'] = rank_captains(await get_projections(), await get_fixture_matrix(), squad['picks'])
+                    except Exception as e:
+                        logger.error(f"Error ranking captains: {e}")
         
         # Get latest FPL data for context
-        latest_fpl_data = await fetch_latest_fpl_data()
+        with span("fpl_context"):
+            latest_fpl_data = await fetch_latest_fpl_data()
         
         # Get response from Gemini
         ai_response = await get_gemini_response(user_message, latest_fpl_data, team_data)
@@ -60,31 +109,34 @@ async def chat_with_ai(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 async def fetch_latest_fpl_data():
-    """Fetch latest data from FPL API for context"""
+    """Fetch latest data from the shared FPL data cache for context"""
     try:
-        async with httpx.AsyncClient() as client:
-            # Get general FPL data
-            response = await client.get("https://fantasy.premierleague.com/api/bootstrap-static/")
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Extract only what we need to avoid overloading the context
-                elements = data.get('elements', [])[:30]  # Top 30 players by points
-                sorted_elements = sorted(elements, key=lambda x: x.get('total_points', 0), reverse=True)
-                
-                # Get current gameweek info
-                current_gw = next((event for event in data.get('events', []) 
-                                if event.get('is_current')), None)
-                
-                # Create a compact version with just what we need
-                compact_data = {
-                    'top_players': sorted_elements,
-                    'current_gameweek': current_gw,
-                }
-                
-                return compact_data
-            else:
-                return None
+        data = await get_fpl_data()
+        bootstrap = data["bootstrap"]
+        
+        # Extract only what we need to avoid overloading the context
+        elements = bootstrap.get('elements', [])
+        sorted_elements = sorted(elements, key=lambda x: x.get('total_points', 0), reverse=True)[:30]  # Top 30 players by points
+        
+        # Get current gameweek info
+        current_gw = next((event for event in bootstrap.get('events', []) 
+                        if event.get('is_current')), None)
+        
+        # Players expected to score the most in the next gameweek
+        projections = await get_projections()
+        top_projected_players = top_projected(projections, gameweeks=1, limit=15)
+        
+        # Create a compact version with just what we need
+        # The version lets the Gemini service reuse its cached prompt prefix
+        compact_data = {
+            'top_players': sorted_elements,
+            'top_projected': top_projected_players['players'],
+            'projected_gameweek': (top_projected_players['gameweeks'] or [None])[0],
+            'current_gameweek': current_gw,
+            'version': data.get('version', 0),
+        }
+        
+        return compact_data
     except Exception as e:
         logger.error(f"Error fetching FPL data: {e}")
         return None
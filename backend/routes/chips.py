@@ -1,33 +1,61 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Optional
-from services.chip_calculator import calculate_chip_recommendations
+import httpx
+from services.chip_calculator import calculate_chip_recommendations, calculate_team_chip_recommendations
+from services.chip_planner import plan_chips, CHIP_NAMES
+from services.fpl_data import get_fpl_data
+from services.projections import get_projections
+from services.response_cache import cached_response
 
 router = APIRouter(prefix="/chips", tags=["Chips"])
 
 @router.get("/calculate")
 async def get_chip_recommendations(
-    limit: Optional[int] = Query(3, description="Number of recommendations to return for each chip", ge=1, le=10)
+    request: Request,
+    limit: Optional[int] = Query(3, description="Number of recommendations to return for each chip", ge=1, le=10),
+    team_id: Optional[int] = Query(None, description="FPL team ID to base recommendations on the team's own squad")
 ):
     """
     Calculate optimal gameweeks for using FPL chips like Bench Boost and Triple Captain
     
     Parameters:
     - limit: Number of recommendations to return for each chip (default: 3)
+    - team_id: Optional FPL team ID; recommendations then use the team's squad and remaining chips
     
     Returns:
-    - List of recommended gameweeks for each chip type with details about fixture difficulty
+    - List of recommended gameweeks for each chip type with details about fixture difficulty,
+      or with a team_id, the squad's doubles, blanks and projected chip points per gameweek
     """
     try:
-        recommendations = await calculate_chip_recommendations(number_of_recommendations=limit)
-        
-        if recommendations["status"] == "error":
-            raise HTTPException(
-                status_code=500, 
-                detail=recommendations.get("message", "Failed to calculate chip recommendations")
-            )
-            
-        return recommendations
+        # A team's recommendations change with its transfers and chips, not just
+        # the FPL data; they are built per request from the squad cache instead
+        # of filling the shared response cache with one entry per team
+        if team_id is not None:
+            return await calculate_team_chip_recommendations(team_id, number_of_recommendations=limit)
         
+        # Recommendations only change when the FPL data does, so they are
+        # calculated and serialized once per data version
+        fpl_data = await get_fpl_data()
+
+        async def build():
+            recommendations = await calculate_chip_recommendations(number_of_recommendations=limit)
+
+            if recommendations["status"] == "error":
+                raise HTTPException(
+                    status_code=500,
+                    detail=recommendations.get("message", "Failed to calculate chip recommendations")
+                )
+
+            return recommendations
+
+        return await cached_response(request, ("chips", limit), fpl_data.get("version", 0), build)
+    
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found or not set to public.")
+        raise HTTPException(status_code=500, detail=f"Failed to process chip recommendations: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         # Log the error for debugging
         print(f"Error in chip recommendations endpoint: {str(e)}")
@@ -36,4 +64,39 @@ async def get_chip_recommendations(
         raise HTTPException(
             status_code=500,
             detail=f"Failed to process chip recommendations: {str(e)}"
-        ) 
\ No newline at end of file
+        ) 
+
+@router.get("/plan")
+async def get_chip_plan(
+    request: Request,
+    chips: Optional[str] = Query(None, description="Comma separated chips still available (wildcard, wildcard2, freehit, bboost, 3xc)")
+):
+    """
+    Jointly schedule the remaining chips over the rest of the season
+    
+    Parameters:
+    - chips: Chips still available (default: every chip that can still be played)
+    
+    Returns:
+    - The gameweek and expected gain of each chip, chips not worth playing, and
+      projected season points with and without them, for a template squad
+    """
+    try:
+        chip_names = [chip.strip().lower() for chip in chips.split(",") if chip.strip()] if chips is not None else None
+        unknown = [chip for chip in chip_names or [] if chip not in CHIP_NAMES]
+        if unknown:
+            raise ValueError(f"Unknown chips {', '.join(unknown)}; use {', '.join(CHIP_NAMES)}")
+        fpl_data = await get_fpl_data()
+
+        async def build():
+            projections = await get_projections()
+            chips_status = [{"name": chip, "available": True} for chip in chip_names] if chip_names is not None else None
+            return plan_chips(projections, chips_status)
+
+        cache_key = ("chip_plan", tuple(sorted(chip_names)) if chip_names is not None else None)
+        return await cached_response(request, cache_key, fpl_data.get("version", 0), build)
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
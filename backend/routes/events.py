@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Header
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from services.push_hub import subscribe_events, parse_event_id, get_subscriber_count
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+@router.get("/stream")
+async def stream_events(last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events stream of small typed updates
+    
+    Event types:
+    - deadline: current and next gameweek deadlines (sent on connect and when they change)
+    - injuries: players whose status, news or chance of playing changed
+    - live_points: live gameweek point updates during matches
+    
+    Browsers reconnect automatically and resume from the Last-Event-ID header.
+    Ids issued by another worker or before a restart start a fresh stream.
+    """
+    return StreamingResponse(
+        subscribe_events(parse_event_id(last_event_id)),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Don't let a reverse proxy buffer the stream
+        }
+    )
+
+@router.get("/stats")
+async def get_event_stats():
+    """Get the number of connected push subscribers"""
+    return {"subscribers": get_subscriber_count()}
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
+from services.fpl_data import get_fpl_data
+from services.fixture_ticker import get_fixture_matrix, fixture_ticker
+from services.response_cache import cached_response
+
+router = APIRouter(prefix="/fixtures", tags=["Fixtures"])
+
+@router.get("/ticker")
+async def get_fixture_ticker(
+    request: Request,
+    from_gameweek: Optional[int] = Query(None, alias="from", description="First gameweek of the window (default: next gameweek)", ge=1),
+    to_gameweek: Optional[int] = Query(None, alias="to", description="Last gameweek of the window (default: five after from)", ge=1),
+    sort: str = Query("difficulty", description="difficulty, total, fixtures or team; prefix with - to reverse")
+):
+    """
+    Get every team's opponents and fixture difficulty over a gameweek window
+
+    Parameters:
+    - from, to: Inclusive gameweek window
+    - sort: How to order teams (default: easiest average fixture difficulty first)
+
+    Returns:
+    - One row per team with its fixture count, total and average difficulty,
+      blank and double gameweeks, and opponents per gameweek
+    """
+    try:
+        fpl_data = await get_fpl_data()
+
+        async def build():
+            matrix = await get_fixture_matrix()
+            return fixture_ticker(matrix, from_gameweek, to_gameweek, sort)
+
+        cache_key = ("fixture-ticker", from_gameweek, to_gameweek, sort)
+        return await cached_response(request, cache_key, fpl_data.get("version", 0), build)
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
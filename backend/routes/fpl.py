@@ -1,6 +1,9 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
 from services.fpl_data import get_fpl_data
+from services.response_cache import cached_response
 import httpx
+from services.upstream import upstream_client, FPL_API_BASE
 import logging
 
 # Configure logging
@@ -14,10 +17,12 @@ router = APIRouter(
 )
 
 @router.get("/bootstrap-static")
-async def get_bootstrap_static():
+async def get_bootstrap_static(request: Request):
     """
     Proxy endpoint for the FPL bootstrap-static API
     This endpoint is used by the deadline countdown component
+
+    Served compressed with an ETag, so polling clients mostly get a 304
     """
     try:
         logger.info("Fetching FPL bootstrap-static data for deadline countdown")
@@ -25,16 +30,19 @@ async def get_bootstrap_static():
         # Get the data from our cached service
         fpl_data = await get_fpl_data()
         
-        # Return just the bootstrap data which contains gameweek information
-        if fpl_data and "bootstrap" in fpl_data:
-            return fpl_data["bootstrap"]
+        # Return the bootstrap response exactly as the FPL API sent it
+        # (the cached bootstrap itself only keeps the fields the backend uses)
+        if fpl_data and (fpl_data.get("bootstrap_raw") or "bootstrap" in fpl_data):
+            async def build():
+                return fpl_data.get("bootstrap_raw") or fpl_data["bootstrap"]
+            return await cached_response(request, ("bootstrap-static",), fpl_data.get("version", 0), build)
         
         # Fallback to direct API call if our cache doesn't have it
         logger.warning("Cache miss - fetching directly from FPL API")
-        async with httpx.AsyncClient() as client:
-            response = await client.get("https://fantasy.premierleague.com/api/bootstrap-static/")
+        async with upstream_client() as client:
+            response = await client.get(f"{FPL_API_BASE}/bootstrap-static/")
             response.raise_for_status()
-            return response.json()
+            return Response(content=response.content, media_type="application/json")
             
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error while fetching FPL data: {str(e)}")
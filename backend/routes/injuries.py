@@ -1,46 +1,96 @@
-from fastapi import APIRouter, HTTPException, Query
-from services.fpl_data import get_fpl_data
-from collections import defaultdict
+from fastapi import APIRouter, HTTPException, Query, Request
+from services.fpl_data import get_fpl_data, build_injury_index, query_injuries
+from services.response_cache import cached_response
 from typing import Optional
 
 router = APIRouter(prefix="/injuries", tags=["Injuries"])
 
 @router.get("/")
-async def get_injuries(group_by_team: Optional[bool] = Query(False, description="Group injuries by team")):
+async def get_injuries(
+    request: Request,
+    group_by_team: Optional[bool] = Query(False, description="Group injuries by team"),
+    team: Optional[str] = Query(None, description="Filter by team ID or team name"),
+    status: Optional[str] = Query(None, description="Filter by FPL status code (d, i, s, n)"),
+    max_chance: Optional[int] = Query(None, description="Only players with at most this chance of playing", ge=0, le=100),
+    position: Optional[str] = Query(None, description="Filter by position (GK, DEF, MID, FWD)"),
+    limit: Optional[int] = Query(None, description="Maximum number of injuries to return", ge=1),
+    offset: int = Query(0, description="Number of injuries to skip", ge=0)
+):
     """Get a list of currently injured players from FPL data
-    
+
     Parameters:
     - group_by_team: If True, returns injuries grouped by team
+    - team, status, max_chance, position: Optional filters
+    - limit, offset: Optional pagination over the filtered injuries
     """
     try:
-        # Fetch FPL data that now includes injury information
+        # Fetch FPL data that now includes injury information and its index
         fpl_data = await get_fpl_data()
-        injuries = fpl_data.get("injuries", [])
-        
-        # Format the response
-        if group_by_team:
-            # Group injuries by team
-            injuries_by_team = defaultdict(list)
-            for injury in injuries:
-                injuries_by_team[injury['team']].append(injury)
-            
-            # Convert to dictionary for JSON response
-            grouped_injuries = {
-                team: team_injuries 
-                for team, team_injuries in sorted(injuries_by_team.items())
-            }
-            
-            return {
-                "injuries_by_team": grouped_injuries,
-                "team_count": len(grouped_injuries),
-                "total_count": len(injuries)
-            }
-        else:
-            # Return flat list of injuries
-            return {
-                "injuries": injuries,
-                "count": len(injuries)
-            }
-    
+
+        # Each distinct query is built and serialized once per data version
+        async def build():
+            injury_index = fpl_data.get("injury_index") or build_injury_index(fpl_data.get("injuries", []))
+
+            # Resolve the team filter to a team ID
+            team_id = None
+            if team is not None:
+                if team.isdigit():
+                    team_id = int(team)
+                else:
+                    team_id = injury_index["team_ids_by_name"].get(team.lower(), -1)
+
+            is_filtered = any(value is not None for value in (team_id, status, max_chance, position))
+            is_paginated = limit is not None or offset > 0
+
+            injuries = query_injuries(
+                injury_index,
+                team_id=team_id,
+                status=status,
+                max_chance=max_chance,
+                position=position.upper() if position else None
+            )
+            total_count = len(injuries)
+
+            if is_paginated:
+                end = offset + limit if limit is not None else None
+                injuries = injuries[offset:end]
+
+            # Format the response
+            if group_by_team:
+                if not is_filtered and not is_paginated:
+                    # Unfiltered grouping is precomputed once per refresh
+                    grouped_injuries = injury_index["grouped_by_team"]
+                else:
+                    injuries_by_team = {}
+                    for injury in injuries:
+                        injuries_by_team.setdefault(injury['team'], []).append(injury)
+                    grouped_injuries = {
+                        team_name: team_injuries
+                        for team_name, team_injuries in sorted(injuries_by_team.items())
+                    }
+
+                return {
+                    "injuries_by_team": grouped_injuries,
+                    "team_count": len(grouped_injuries),
+                    "total_count": total_count,
+                    "offset": offset,
+                    "limit": limit
+                }
+            else:
+                # Return flat list of injuries
+                return {
+                    "injuries": injuries,
+                    "count": len(injuries),
+                    "total_count": total_count,
+                    "offset": offset,
+                    "limit": limit
+                }
+
+        cache_key = (
+            "injuries", bool(group_by_team), team.lower() if team else None, status,
+            max_chance, position.upper() if position else None, limit, offset
+        )
+        return await cached_response(request, cache_key, fpl_data.get("version", 0), build)
+
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,80 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+import httpx
+from services.fpl_data import get_fpl_data
+from services.projections import get_projections
+from services.league_picks import get_league_picks, get_teams_picks, ownership_analytics, DEFAULT_LEAGUE_SIZE, MAX_LEAGUE_SIZE
+
+router = APIRouter(prefix="/ownership", tags=["Ownership"])
+
+@router.get("/")
+async def get_ownership_analytics(
+    league_id: Optional[int] = Query(None, description="Classic league whose top entries to analyze"),
+    team_ids: Optional[str] = Query(None, description="Comma separated team IDs to analyze, instead of or as well as a league"),
+    league_size: int = Query(DEFAULT_LEAGUE_SIZE, description="Top entries of the league to include", ge=1, le=MAX_LEAGUE_SIZE),
+    gameweek: Optional[int] = Query(None, description="Gameweek whose picks to use (default: the current one)", ge=1),
+    limit: int = Query(50, description="Number of players to return, by effective ownership", ge=1, le=700)
+):
+    """
+    Effective ownership across a league or a set of teams, and each team's differentials
+
+    Parameters:
+    - league_id, team_ids: The teams to analyze; at least one is required
+    - league_size: Number of top league entries to include
+    - gameweek: Optional gameweek of the picks, up to the current one (default: the current one)
+    - limit: Number of players to return
+
+    Returns:
+    - Selected, starting, captaincy and effective ownership of the most owned
+      players, the template squad and, per team, its overlap with the template,
+      its differentials and their projected worth against the field in the
+      next gameweek; teams_failed lists teams whose picks couldn't be fetched
+      and teams_without_picks those that have none for the gameweek
+    """
+    try:
+        try:
+            ids = [int(part) for part in team_ids.split(",") if part.strip()] if team_ids else []
+        except ValueError:
+            raise HTTPException(status_code=400, detail="team_ids must be comma separated integers")
+        if league_id is None and not ids:
+            raise HTTPException(status_code=400, detail="Pass a league_id or team_ids")
+        if len(ids) > MAX_LEAGUE_SIZE:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_LEAGUE_SIZE} team_ids can be analyzed at once")
+
+        fpl_data = await get_fpl_data()
+        current_gameweek = next((event["id"] for event in fpl_data["bootstrap"]["events"] if event["is_current"]), None)
+        if current_gameweek is None:
+            raise HTTPException(status_code=400, detail="The season hasn't started yet, so there are no picks")
+        if gameweek is None:
+            gameweek = current_gameweek
+        elif gameweek > current_gameweek:
+            # Picks only exist once a gameweek's deadline has passed
+            raise HTTPException(status_code=400, detail=f"Gameweek {gameweek} hasn't started yet; picks are available up to gameweek {current_gameweek}")
+
+        picks_by_team, failed, without_picks = await get_league_picks(league_id, gameweek, league_size) if league_id is not None else ({}, [], [])
+        missing = [team_id for team_id in dict.fromkeys(ids) if team_id not in picks_by_team and team_id not in failed and team_id not in without_picks]
+        team_picks, team_failed, team_without_picks = await get_teams_picks(missing, gameweek)
+        picks_by_team.update(team_picks)
+
+        projections = await get_projections()
+        return {
+            "league_id": league_id,
+            "picks_gameweek": gameweek,
+            "teams_requested": len(set(ids) | set(picks_by_team) | set(failed) | set(without_picks)),
+            # Teams left out because the FPL API kept failing or rate limiting their picks
+            "teams_failed": failed + team_failed,
+            # Teams left out because they have no picks for the gameweek (they joined later)
+            "teams_without_picks": without_picks + team_without_picks,
+            **ownership_analytics(picks_by_team, projections, limit=limit)
+        }
+
+    except HTTPException:
+        raise
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail=f"League with ID {league_id} not found.")
+        raise HTTPException(status_code=500, detail=f"Error fetching league from FPL: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
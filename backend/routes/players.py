@@ -0,0 +1,109 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
+from services.fpl_data import get_fpl_data
+from services.player_index import get_player_index, resolve_team_ids, query_players, project
+from services.player_history import get_player_history
+from services.response_cache import cached_response
+
+router = APIRouter(prefix="/players", tags=["Players"])
+
+def _split(value: Optional[str]):
+    """Split a comma separated query parameter"""
+    if value is None:
+        return None
+    return [part.strip() for part in value.split(",") if part.strip()] or None
+
+@router.get("/")
+async def get_players(
+    request: Request,
+    position: Optional[str] = Query(None, description="Comma separated positions (GK, DEF, MID, FWD)"),
+    team: Optional[str] = Query(None, description="Comma separated team IDs, names or short names"),
+    min_price: Optional[float] = Query(None, description="Minimum price in millions, e.g. 5.5", ge=0),
+    max_price: Optional[float] = Query(None, description="Maximum price in millions", ge=0),
+    status: Optional[str] = Query(None, description="Comma separated FPL status codes (a, d, i, s, u, n)"),
+    min_minutes: Optional[int] = Query(None, description="Minimum minutes played this season", ge=0),
+    sort: str = Query("-total_points", description="Comma separated sort fields, prefix with - for descending"),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return"),
+    limit: int = Query(50, description="Players per page", ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """
+    Query players without downloading the whole bootstrap-static payload
+
+    Parameters:
+    - position, team, min_price, max_price, status, min_minutes: Optional filters
+    - sort: e.g. "-form,now_cost" (default: most total points first); ties break on player ID
+    - fields: e.g. "id,web_name,price" (default: every field)
+    - limit, cursor: Cursor pagination; pass next_cursor to get the following page
+
+    Returns:
+    - Players on this page, the applied sort and the cursor of the next page (null on the last page)
+    """
+    try:
+        fpl_data = await get_fpl_data()
+        positions = [name.upper() for name in _split(position) or []] or None
+        statuses = [code.lower() for code in _split(status) or []] or None
+        teams = _split(team)
+        field_list = _split(fields)
+
+        async def build():
+            index = await get_player_index()
+            page = query_players(
+                index,
+                positions=positions,
+                team_ids=resolve_team_ids(index, teams) if teams else None,
+                statuses=statuses,
+                min_cost=round(min_price * 10) if min_price is not None else None,
+                max_cost=round(max_price * 10) if max_price is not None else None,
+                min_minutes=min_minutes,
+                sort=sort,
+                limit=limit,
+                cursor=cursor
+            )
+            players = project(page["players"], field_list)
+            return {
+                "players": players,
+                "count": len(players),
+                "sort": page["sort"],
+                "limit": limit,
+                "next_cursor": page["next_cursor"]
+            }
+
+        cache_key = (
+            "players", tuple(sorted(positions or [])), tuple(sorted(team.lower() for team in teams or [])),
+            min_price, max_price, tuple(sorted(statuses or [])), min_minutes, sort,
+            tuple(field_list or []), limit, cursor
+        )
+        return await cached_response(request, cache_key, fpl_data.get("version", 0), build)
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{player_id}/history")
+async def get_player_gameweek_history(
+    player_id: int,
+    from_round: Optional[int] = Query(None, alias="from", description="First gameweek", ge=1),
+    to_round: Optional[int] = Query(None, alias="to", description="Last gameweek", ge=1)
+):
+    """
+    Get a player's gameweek-by-gameweek history from the local history store
+
+    Parameters:
+    - from, to: Optional inclusive gameweek range
+
+    Returns:
+    - One row per fixture played (minutes, points, goals, xG, ICT, price, ownership, ...)
+    """
+    try:
+        history = await asyncio.to_thread(get_player_history, player_id, from_round, to_round)
+        if not history and from_round is None and to_round is None:
+            raise HTTPException(status_code=404, detail=f"No history stored for player {player_id} yet")
+        return {"player_id": player_id, "history": history, "count": len(history)}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
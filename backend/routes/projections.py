@@ -0,0 +1,49 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
+from services.fpl_data import get_fpl_data
+from services.projections import get_projections, top_projected
+from services.response_cache import cached_response
+
+router = APIRouter(prefix="/projections", tags=["Projections"])
+
+POSITION_TYPES = {"GK": 1, "DEF": 2, "MID": 3, "FWD": 4}
+
+@router.get("/")
+async def get_player_projections(
+    request: Request,
+    gameweeks: int = Query(5, description="Number of gameweeks to project, from the next one", ge=1, le=38),
+    position: Optional[str] = Query(None, description="Filter by position (GK, DEF, MID, FWD)"),
+    team: Optional[int] = Query(None, description="Filter by team ID"),
+    limit: int = Query(50, description="Number of players to return", ge=1, le=700)
+):
+    """
+    Get the players with the most expected points over the next gameweeks
+
+    Parameters:
+    - gameweeks: Projection horizon (default: 5)
+    - position, team: Optional filters
+    - limit: Number of players to return (default: 50)
+
+    Returns:
+    - The projected gameweeks and the players, with total and per-gameweek expected points
+    """
+    try:
+        element_type = None
+        if position is not None:
+            element_type = POSITION_TYPES.get(position.upper())
+            if element_type is None:
+                raise HTTPException(status_code=400, detail=f"Unknown position {position}")
+
+        fpl_data = await get_fpl_data()
+
+        async def build():
+            projections = await get_projections()
+            return top_projected(projections, gameweeks, element_type=element_type, team_id=team, limit=limit)
+
+        cache_key = ("projections", gameweeks, element_type, team, limit)
+        return await cached_response(request, cache_key, fpl_data.get("version", 0), build)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -7,6 +7,21 @@ import json
 import traceback
 import logging
 from pydantic import BaseModel
+from services.live_points import get_live_data, get_team_live_view, track_team
+from services.cache_backend import get_cache_backend
+from services.upstream import upstream_client, FPL_API_BASE
+from services.fpl_schema import decode_bootstrap
+from services.fpl_data import get_fpl_data
+from services.team_history import record_team_history, get_team_snapshots, snapshots_from_history, last_updated, store_is_fresh, downsample
+from services.team_squad import get_team_squad, get_chips_status
+from services.projections import get_projections
+from services.fixture_ticker import get_fixture_matrix
+from services.transfer_optimizer import suggest_transfers, TIME_BUDGET, DEFAULT_HORIZON, MAX_TRANSFERS
+from services.autosub_simulator import simulate_bench, DEFAULT_TRIALS, MAX_TRIALS
+from services.captaincy import rank_captains
+from services.league_picks import get_league_picks, effective_ownership, DEFAULT_LEAGUE_SIZE, MAX_LEAGUE_SIZE
+from services.metrics import record_cache_access
+from services.tracing import span, traced
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -14,11 +29,10 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/teams", tags=["Teams"])
 
 # Cache configuration for team data to reduce API calls
-team_cache = {}
+# Entries live in the configured cache backend, shared by all workers
 CACHE_DURATION = 15 * 60  # 15 minutes in seconds
 
 # FPL API URLs
-FPL_API_BASE = "https://fantasy.premierleague.com/api"
 FPL_BOOTSTRAP_URL = f"{FPL_API_BASE}/bootstrap-static/"
 FPL_TEAM_URL = f"{FPL_API_BASE}/entry"
 FPL_GAMEWEEK_URL = f"{FPL_API_BASE}/event"
@@ -32,6 +46,186 @@ class TeamSearchResult(BaseModel):
     total_points: Optional[int] = None
     rank: Optional[int] = None
 
+@router.get("/{team_id}/history")
+async def get_team_history(
+    team_id: int,
+    from_event: Optional[int] = Query(None, alias="from", description="First gameweek", ge=1),
+    to_event: Optional[int] = Query(None, alias="to", description="Last gameweek", ge=1),
+    step: Optional[int] = Query(None, description="Gameweeks merged into each point", ge=1),
+    max_points: Optional[int] = Query(None, description="Maximum number of points returned", ge=1)
+):
+    """
+    Get a team's full-season rank history from the local snapshot store
+    
+    Parameters:
+    - from, to: Optional inclusive gameweek range
+    - step, max_points: Optional downsampling; points within a bucket are summed and ranks taken from its last gameweek
+    
+    Returns:
+    - One snapshot per gameweek (or bucket) with points, total points, ranks, value, bank, transfers and chip
+    """
+    try:
+        snapshots = await asyncio.to_thread(get_team_snapshots, team_id)
+        updated_at = await asyncio.to_thread(last_updated, team_id)
+        source = "store"
+        
+        # Only go upstream for teams whose snapshots miss or predate the current gameweek's final scores
+        fpl_data = await get_fpl_data()
+        current_event = next((event for event in fpl_data["bootstrap"]["events"] if event["is_current"]), None)
+        if not await asyncio.to_thread(store_is_fresh, updated_at, current_event):
+            async with upstream_client(follow_redirects=True) as client:
+                with span("history_fetch"):
+                    history_response = await client.get(f"{FPL_TEAM_URL}/{team_id}/history/")
+                    history_response.raise_for_status()
+                    history_data = history_response.json()
+            record_team_history(team_id, history_data)
+            snapshots = snapshots_from_history(team_id, history_data)
+            source = "upstream"
+        
+        snapshots = [
+            snapshot for snapshot in snapshots
+            if (from_event is None or snapshot["event"] >= from_event) and (to_event is None or snapshot["event"] <= to_event)
+        ]
+        history = downsample(snapshots, step=step, max_points=max_points)
+        return {"team_id": team_id, "source": source, "history": history, "count": len(history)}
+    
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found or not set to public.")
+        raise HTTPException(status_code=500, detail=f"Error fetching team history from FPL: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{team_id}/transfers")
+async def get_transfer_suggestions(
+    team_id: int,
+    free_transfers: Optional[int] = Query(None, description="Free transfers available (default: worked out from the team's history)", ge=0, le=5),
+    horizon: int = Query(DEFAULT_HORIZON, description="Gameweeks of projected points to maximize", ge=1, le=10),
+    max_transfers: Optional[int] = Query(None, description="Most transfers to consider (default: one more than the free ones)", ge=1, le=MAX_TRANSFERS),
+    time_budget: float = Query(TIME_BUDGET, description="Seconds to search before returning the best transfers so far", gt=0, le=10)
+):
+    """
+    Suggest the transfers that maximize a team's projected points
+    
+    Parameters:
+    - free_transfers, horizon, max_transfers, time_budget: Optional search settings
+    
+    Returns:
+    - Transfers out and in, points hits taken, and the squad's projected points
+      over the horizon before and after them; complete is false if the search
+      ran out of time and returned its best answer so far
+    """
+    try:
+        squad = await get_team_squad(team_id)
+        if squad["active_chip"] == "freehit":
+            # Transfers would be planned for a squad that reverts after the gameweek
+            raise ValueError(f"Team {team_id} is playing Free Hit in gameweek {squad['gameweek']}, so its squad reverts next gameweek; ask again after it")
+        projections = await get_projections()
+        free_transfers = free_transfers if free_transfers is not None else squad["free_transfers"]
+        suggestions = await suggest_transfers(
+            projections,
+            squad["squad"],
+            squad["bank"],
+            free_transfers=free_transfers,
+            horizon=horizon,
+            max_transfers=max_transfers,
+            time_budget=time_budget
+        )
+        return {"team_id": team_id, "free_transfers": free_transfers, "bank": squad["bank"] / 10, **suggestions}
+    
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found or not set to public.")
+        raise HTTPException(status_code=500, detail=f"Error fetching team from FPL: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{team_id}/bench")
+async def get_bench_simulation(
+    team_id: int,
+    gameweek: Optional[int] = Query(None, description="Projected gameweek to simulate (default: the next one)"),
+    trials: int = Query(DEFAULT_TRIALS, description="Number of simulated gameweeks", ge=100, le=MAX_TRIALS)
+):
+    """
+    Simulate a team's gameweek with automatic substitutions, every bench order and Bench Boost
+    
+    Parameters:
+    - gameweek: Optional projected gameweek (default: the next one)
+    - trials: Number of simulated gameweeks
+    
+    Returns:
+    - Mean, variance and spread of the team's points, of its points with Bench
+      Boost and of the gain from it, each bench order ranked by its mean, and
+      every player's chance of playing and of coming on
+    """
+    try:
+        squad = await get_team_squad(team_id)
+        projections = await get_projections()
+        matrix = await get_fixture_matrix()
+        simulation = simulate_bench(projections, matrix, squad["picks"], gameweek=gameweek, trials=trials)
+        return {"team_id": team_id, **simulation}
+    
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found or not set to public.")
+        raise HTTPException(status_code=500, detail=f"Error fetching team from FPL: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{team_id}/captain")
+async def get_captain_recommendation(
+    team_id: int,
+    gameweek: Optional[int] = Query(None, description="Projected gameweek to captain for (default: the next one)"),
+    league_id: Optional[int] = Query(None, description="Classic league to compute effective ownership in"),
+    league_size: int = Query(DEFAULT_LEAGUE_SIZE, description="Top entries of the league to include", ge=1, le=MAX_LEAGUE_SIZE)
+):
+    """
+    Rank a team's players as captain by projected points
+    
+    Parameters:
+    - gameweek: Optional projected gameweek (default: the next one)
+    - league_id: Optional classic league; effective ownership comes from its
+      top entries' current picks
+    - league_size: Number of top entries to include
+    
+    Returns:
+    - The recommended captain and vice captain, and every player ranked by
+      expected captain points with fixtures, spread, chance of playing,
+      ownership and, with a league, effective ownership and points gained on it;
+      league_teams_failed lists league entries whose picks couldn't be fetched
+    """
+    try:
+        squad = await get_team_squad(team_id)
+        projections = await get_projections()
+        matrix = await get_fixture_matrix()
+        
+        league_ownership = None
+        league_failed = []
+        if league_id is not None:
+            league_picks, league_failed, _ = await get_league_picks(league_id, squad["gameweek"], league_size)
+            if league_picks:
+                league_ownership = effective_ownership(league_picks, projections["row_of"], len(projections["players"]))
+        
+        ranking = rank_captains(projections, matrix, squad["picks"], gameweek=gameweek, effective_ownership=league_ownership)
+        return {"team_id": team_id, "league_id": league_id, "league_teams_failed": league_failed, **ranking}
+    
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            if league_id is None:
+                raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found or not set to public.")
+            raise HTTPException(status_code=404, detail=f"Team {team_id} or league {league_id} not found or not set to public.")
+        raise HTTPException(status_code=500, detail=f"Error fetching data from FPL: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{team_id}")
 async def get_team_data(
     team_id: int,
@@ -50,20 +244,27 @@ async def get_team_data(
     print(f"Received request for team ID {team_id}, gameweek {gameweek}")
     
     # Check cache first
+    team_cache = get_cache_backend()
     cache_key = f"team_{team_id}_{gameweek}"
-    if cache_key in team_cache:
-        cached_data, timestamp = team_cache[cache_key]
-        if datetime.now() - timestamp < timedelta(seconds=CACHE_DURATION):
-            print(f"Returning cached data for team ID {team_id}, gameweek {gameweek}")
-            return cached_data
+    try:
+        with span("team_cache"):
+            cached_data = await team_cache.get(cache_key)
+    except Exception as e:
+        print(f"Error reading team cache: {str(e)}")
+        cached_data = None
+    record_cache_access("team", cached_data is not None)
+    if cached_data is not None:
+        print(f"Returning cached data for team ID {team_id}, gameweek {gameweek}")
+        return with_live_view(cached_data)
     
     try:
-        async with httpx.AsyncClient(follow_redirects=True) as client:
+        async with upstream_client(follow_redirects=True) as client:
             # Fetch Bootstrap data (for general information like events, teams, etc.)
             print(f"Fetching bootstrap data from {FPL_BOOTSTRAP_URL}")
-            bootstrap_response = await client.get(FPL_BOOTSTRAP_URL)
-            bootstrap_response.raise_for_status()
-            bootstrap_data = bootstrap_response.json()
+            with span("bootstrap_fetch"):
+                bootstrap_response = await client.get(FPL_BOOTSTRAP_URL)
+                bootstrap_response.raise_for_status()
+                bootstrap_data = decode_bootstrap(bootstrap_response.content)
             
             # Determine current gameweek if not specified
             if not gameweek:
@@ -86,9 +287,10 @@ async def get_team_data(
             team_url = f"{FPL_TEAM_URL}/{team_id}/"
             print(f"Fetching team data from {team_url}")
             try:
-                team_response = await client.get(team_url)
-                team_response.raise_for_status()
-                team_info = team_response.json()
+                with span("team_fetch"):
+                    team_response = await client.get(team_url)
+                    team_response.raise_for_status()
+                    team_info = team_response.json()
                 print(f"Team data response structure: {list(team_info.keys()) if isinstance(team_info, dict) else 'Not a dict'}")
             except Exception as e:
                 print(f"Error fetching team info: {str(e)}")
@@ -106,34 +308,43 @@ async def get_team_data(
             history_url = f"{FPL_TEAM_URL}/{team_id}/history/"
             print(f"Fetching team history from {history_url}")
             try:
-                history_response = await client.get(history_url)
-                history_response.raise_for_status()
-                history_data = history_response.json()
+                with span("history_fetch"):
+                    history_response = await client.get(history_url)
+                    history_response.raise_for_status()
+                    history_data = history_response.json()
             except Exception as e:
                 print(f"Error fetching history: {str(e)}")
                 history_data = {"current": [], "chips": []}
             
+            # Keep the full season in the local snapshot store
+            record_team_history(team_id, history_data)
+            
             # Fetch team's picks for the specified gameweek
             picks_url = f"{FPL_TEAM_URL}/{team_id}/event/{gameweek}/picks/"
             print(f"Fetching team picks from {picks_url}")
             try:
-                picks_response = await client.get(picks_url)
-                picks_response.raise_for_status()
-                picks_data = picks_response.json()
+                with span("picks_fetch"):
+                    picks_response = await client.get(picks_url)
+                    picks_response.raise_for_status()
+                    picks_data = picks_response.json()
             except Exception as e:
                 print(f"Error fetching picks: {str(e)}")
                 picks_data = {"picks": [], "entry_history": {"points": 0, "rank": 0}}
             
-            # Fetch live gameweek data for points
-            live_url = f"{FPL_LIVE_URL}/{gameweek}/live/"
-            print(f"Fetching live gameweek data from {live_url}")
-            try:
-                live_response = await client.get(live_url)
-                live_response.raise_for_status()
-                live_data = live_response.json()
-            except Exception as e:
-                print(f"Error fetching live data: {str(e)}")
-                live_data = {"elements": []}
+            # Use the live points engine's data for the current gameweek,
+            # and only fetch live data for gameweeks it is not polling
+            live_data = get_live_data(gameweek)
+            if live_data is None:
+                live_url = f"{FPL_LIVE_URL}/{gameweek}/live/"
+                print(f"Fetching live gameweek data from {live_url}")
+                try:
+                    with span("live_fetch"):
+                        live_response = await client.get(live_url)
+                        live_response.raise_for_status()
+                        live_data = live_response.json()
+                except Exception as e:
+                    print(f"Error fetching live data: {str(e)}")
+                    live_data = {"elements": []}
             
             # Process and enrich the team data
             try:
@@ -148,9 +359,12 @@ async def get_team_data(
                 )
                 
                 # Store in cache
-                team_cache[cache_key] = (processed_data, datetime.now())
+                await team_cache.set(cache_key, processed_data, ttl=CACHE_DURATION)
                 
-                return processed_data
+                # Keep this team's live score up to date while it is being viewed
+                track_team(team_id, gameweek, picks_data)
+                
+                return with_live_view(processed_data)
             except Exception as e:
                 print(f"Error in process_team_data: {str(e)}")
                 traceback_str = traceback.format_exc()
@@ -185,6 +399,7 @@ async def get_team_data(
             detail=f"Error processing team data: {str(e)}"
         )
 
+@traced("process_team_data")
 async def process_team_data(team_id, gameweek, bootstrap, team_info, history, picks, live):
     """Process and enrich the team data for return to the client"""
     
@@ -199,6 +414,8 @@ async def process_team_data(team_id, gameweek, bootstrap, team_info, history, pi
         # Get current event data
         current_event = next((e for e in bootstrap.get("events", []) if e.get("id") == gameweek), None)
         
+        live_map = {p.get("id"): p for p in live.get("elements", [])}
+        
         # Process team picks (lineup)
         processed_picks = []
         for pick in picks.get("picks", []):
@@ -207,10 +424,7 @@ async def process_team_data(team_id, gameweek, bootstrap, team_info, history, pi
                 player_data = players_map.get(player_id, {})
                 
                 # Get live points for the player
-                player_live = next(
-                    (p for p in live.get("elements", []) if p.get("id") == player_id), 
-                    {"stats": {"total_points": 0}}
-                )
+                player_live = live_map.get(player_id, {"stats": {"total_points": 0}})
                 
                 # Create processed player object
                 processed_player = {
@@ -259,38 +473,8 @@ async def process_team_data(team_id, gameweek, bootstrap, team_info, history, pi
         except Exception as e:
             print(f"Error processing chips used: {str(e)}")
         
-        # Standard available chips
-        all_chips = ["wildcard", "freehit", "bboost", "3xc"]
-        
-        # Check used wildcard to determine if second wildcard is available
-        wildcards_used = [chip for chip in chips_used if chip.get("name") == "wildcard"]
-        
-        # In FPL, there are 2 wildcards allowed per season
-        wildcard_status = []
-        if len(wildcards_used) == 0:
-            wildcard_status = [{"name": "wildcard", "available": True, "used_in": None}]
-        elif len(wildcards_used) == 1:
-            wildcard_gw = wildcards_used[0].get("event", 0)
-            # First half wildcard can only be used in first half of season (roughly GW1-19)
-            if wildcard_gw <= 19:  
-                wildcard_status = [
-                    {"name": "wildcard", "available": False, "used_in": wildcard_gw},
-                    {"name": "wildcard2", "available": True, "used_in": None}
-                ]
-            else:
-                wildcard_status = [{"name": "wildcard", "available": False, "used_in": wildcard_gw}]
-        else:
-            wildcard_status = [{"name": "wildcard", "available": False, "used_in": wildcards_used[-1].get("event", 0)}]
-        
-        # Check status of other chips
-        chips_status = wildcard_status
-        for chip_name in ["freehit", "bboost", "3xc"]:
-            used = next((chip for chip in chips_used if chip.get("name") == chip_name), None)
-            chips_status.append({
-                "name": chip_name,
-                "available": used is None,
-                "used_in": used.get("event") if used else None
-            })
+        # Which chips are still available
+        chips_status = get_chips_status(chips_used)
         
         # Extract and format value and bank data from entry_history
         entry_history_value = picks.get('entry_history', {}).get('value', team_info.get('value', 0))
@@ -359,6 +543,13 @@ async def process_team_data(team_id, gameweek, bootstrap, team_info, history, pi
             "current_event": {}
         }
 
+def with_live_view(team_data):
+    """Attach the live points engine's precomputed view for this team, if it has one"""
+    live_view = get_team_live_view(team_data["team_id"], team_data["gameweek"])
+    if live_view is None:
+        return team_data
+    return {**team_data, "live": live_view}
+
 def get_position_name(position_id):
     """Convert position ID to position name"""
     positions = {
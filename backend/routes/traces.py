@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from services.tracing import get_recent_traces, get_trace
+
+router = APIRouter(prefix="/traces", tags=["Traces"])
+
+@router.get("/")
+async def list_traces(
+    limit: int = Query(50, description="Maximum number of traces to return", ge=1, le=200),
+    min_duration_ms: float = Query(0, description="Only traces at least this slow", ge=0),
+    route: Optional[str] = Query(None, description="Only traces for this route template, e.g. /teams/{team_id}")
+):
+    """
+    List recently kept request traces of this worker, newest first
+    
+    Returns:
+    - Trace summaries (id, route, status, total duration); fetch /traces/{trace_id} for the span tree
+    """
+    return {"traces": get_recent_traces(limit, min_duration_ms, route)}
+
+@router.get("/{trace_id}")
+async def get_trace_detail(trace_id: str):
+    """
+    Get one trace with its span tree
+    
+    Each span has its start offset and duration in milliseconds and its child spans.
+    """
+    trace = get_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found in this worker's recent traces")
+    return trace
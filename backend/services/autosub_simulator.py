@@ -0,0 +1,329 @@
+import logging
+import itertools
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from services.chip_planner import LINEUP_MINIMUMS, LINEUP_SIZE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Simulation settings
+#
+# In every trial each player plays each of their team's fixtures with their
+# projected chance of playing. A player who plays scores APPEARANCE_POINTS
+# (less if their projection is lower) plus geometrically distributed returns -
+# mostly nothing, now and then a haul - so their mean over trials is their
+# expected points.
+DEFAULT_TRIALS = 10000
+MAX_TRIALS = 100000
+DEFAULT_SEED = 0  # Fixed, so the same squad and data always give the same answer
+APPEARANCE_POINTS = 1.0
+
+def draw_points(
+    expected_points: np.ndarray,
+    appearances: np.ndarray,
+    fixtures: np.ndarray,
+    trials: int,
+    rng: np.random.Generator
+) -> Dict[str, np.ndarray]:
+    """
+    Draw whether each player plays and what they score, in every trial at once
+
+    One uniform per player, fixture and trial decides both: below the chance
+    of playing the player plays, and where it falls below it sets the returns
+    by inverting their CDF.
+
+    Args:
+        expected_points: Expected points per player in the gameweek
+        appearances: Chance of playing each fixture, per player
+        fixtures: Fixtures in the gameweek, per player
+        trials: Number of trials
+        rng: Random generator
+
+    Returns:
+        Dict with "played" (bool) and "points" arrays of shape (players, trials)
+    """
+    chance = np.clip(appearances, 0, 1)
+    expected_games = fixtures * chance
+    per_game = np.divide(expected_points, expected_games, out=np.zeros(len(expected_points)), where=expected_games > 0)
+    base = np.minimum(per_game, APPEARANCE_POINTS)
+    # Returns are geometric with P(returns >= k) = ratio^k, which has mean per_game - base
+    ratio = (per_game - base) / (1 + per_game - base)
+    log_ratio = np.log(np.where(ratio > 0, ratio, 0.5)).astype(np.float32)[:, None]
+
+    # Single precision halves the cost of drawing and of the logarithms, and is plenty for points
+    played = np.zeros((len(expected_points), trials), dtype=bool)
+    points = np.zeros((len(expected_points), trials), dtype=np.float32)
+    for fixture in range(int(fixtures.max(initial=0))):
+        rows = np.flatnonzero(fixtures > fixture)
+        uniforms = rng.random((len(rows), trials), dtype=np.float32)
+        plays = uniforms < chance[rows, None]
+        tail = 1 - uniforms / np.where(chance[rows] > 0, chance[rows], 1).astype(np.float32)[:, None]
+        returns = np.floor(np.log(np.maximum(tail, np.float32(1e-30))) / log_ratio[rows])
+        returns[ratio[rows] <= 0] = 0
+        played[rows] |= plays
+        points[rows] += plays * (base[rows, None].astype(np.float32) + returns)
+    return {"played": played, "points": points}
+
+def points_moments(expected_points: np.ndarray, appearances: np.ndarray, fixtures: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Exact mean and variance of the points draw_points simulates, and the
+    chance of playing at all, without drawing anything
+
+    Args:
+        expected_points, appearances, fixtures: Per player, as for draw_points
+
+    Returns:
+        Dict with "mean", "variance" and "chance_of_playing" arrays
+    """
+    chance = np.clip(appearances, 0, 1)
+    expected_games = fixtures * chance
+    per_game = np.divide(expected_points, expected_games, out=np.zeros(len(expected_points)), where=expected_games > 0)
+    returns = per_game - np.minimum(per_game, APPEARANCE_POINTS)
+
+    # Per fixture: appearance with the chance of playing, then base plus geometric returns (variance m + m^2)
+    second_moment = chance * (per_game ** 2 + returns + returns ** 2)
+    variance = fixtures * (second_moment - (chance * per_game) ** 2)
+    return {
+        "mean": fixtures * chance * per_game,
+        "variance": variance,
+        "chance_of_playing": 1 - (1 - chance) ** fixtures
+    }
+
+def _captain_points(played: np.ndarray, points: np.ndarray, captain: int, vice_captain: Optional[int]) -> np.ndarray:
+    """Extra points from the armband: the captain's, or the vice captain's if the captain didn't play"""
+    if vice_captain is None:
+        return points[captain]
+    return np.where(played[captain], points[captain], played[vice_captain] * points[vice_captain])
+
+def autosubs(played: np.ndarray, element_types: np.ndarray, order: List[int]) -> np.ndarray:
+    """
+    Automatic substitutions of a squad, in every trial at once
+
+    Substitutes are taken in bench order. Each one that played replaces the
+    first starter who didn't, as long as goalkeepers only replace goalkeepers
+    and the XI keeps at least LINEUP_MINIMUMS players of each position.
+
+    Args:
+        played: Array of shape (squad, trials) from draw_points
+        element_types: Element type per squad index
+        order: Squad indices, the XI first and then the bench in its order
+
+    Returns:
+        Bool array of shape (squad, trials), true where a substitute came on
+    """
+    starters, bench = order[:LINEUP_SIZE], order[LINEUP_SIZE:]
+    missing = {starter: ~played[starter] for starter in starters if not played[starter].all()}
+    counts = {
+        position: np.full(played.shape[1], int((element_types[starters] == position).sum()), dtype=np.int8)
+        for position in LINEUP_MINIMUMS
+    }
+
+    subbed_on = np.zeros(played.shape, dtype=bool)
+    for substitute in bench:
+        incoming = int(element_types[substitute])
+        available = played[substitute].copy()
+        for starter, needs in missing.items():
+            outgoing = int(element_types[starter])
+            if (outgoing == 1) != (incoming == 1):
+                continue
+            swap = available & needs
+            if outgoing != incoming:
+                swap &= counts[outgoing] > LINEUP_MINIMUMS[outgoing]
+                counts[outgoing] -= swap
+                counts[incoming] += swap
+            # swap is a subset of both, so this clears it from them
+            needs ^= swap
+            available ^= swap
+        subbed_on[substitute] = played[substitute] ^ available
+    return subbed_on
+
+def autosub_points(
+    played: np.ndarray,
+    points: np.ndarray,
+    element_types: np.ndarray,
+    order: List[int],
+    captain: int,
+    vice_captain: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Points of a squad after automatic substitutions, in every trial at once
+
+    Args:
+        played, points: Arrays of shape (squad, trials) from draw_points
+        element_types: Element type per squad index
+        order: Squad indices, the XI first and then the bench in its order
+        captain, vice_captain: Squad indices of the captain and vice captain
+
+    Returns:
+        Dict with "points" per trial and "subbed_on" from autosubs
+    """
+    subbed_on = autosubs(played, element_types, order)
+    # Starters who didn't play score nothing, so only substitutes add to the XI's points
+    bench = order[LINEUP_SIZE:]
+    total = points[order[:LINEUP_SIZE]].sum(axis=0) + (subbed_on[bench] * points[bench]).sum(axis=0)
+    return {"points": total + _captain_points(played, points, captain, vice_captain), "subbed_on": subbed_on}
+
+def summarize(points: np.ndarray) -> Dict[str, float]:
+    """Mean, variance and spread of simulated points"""
+    mean = float(points.mean())
+    variance = float(np.dot(points - mean, points - mean)) / len(points)
+    p10, p90 = np.percentile(points, [10, 90])
+    return {
+        "mean": round(mean, 2),
+        "variance": round(variance, 2),
+        "std": round(variance ** 0.5, 2),
+        "p10": round(float(p10), 2),
+        "p90": round(float(p90), 2)
+    }
+
+def simulate_squad(
+    expected_points: np.ndarray,
+    appearances: np.ndarray,
+    fixtures: np.ndarray,
+    element_types: np.ndarray,
+    order: List[int],
+    captain: int,
+    vice_captain: Optional[int] = None,
+    trials: int = DEFAULT_TRIALS,
+    seed: int = DEFAULT_SEED
+) -> Dict[str, Any]:
+    """
+    Simulate a squad's gameweek under its bench order, every other order of
+    the outfield substitutes, and Bench Boost
+
+    Every alternative is scored on the same draws, so differences between them
+    come from the decision and not from sampling noise.
+
+    Args:
+        expected_points, appearances, fixtures, element_types: Per squad index
+        order: Squad indices, the XI first and then the bench in its order
+        captain, vice_captain: Squad indices of the captain and vice captain
+        trials: Number of trials
+        seed: Random seed
+
+    Returns:
+        Dict with the points under the current order, Bench Boost points and
+        gain, every bench order's points and gain, and per player chances of
+        playing and of coming on
+    """
+    rng = np.random.default_rng(seed)
+    draws = draw_points(expected_points, appearances, fixtures, trials, rng)
+    played, points = draws["played"], draws["points"]
+
+    current = autosub_points(played, points, element_types, order, captain, vice_captain)
+    bench_boost = points.sum(axis=0) + _captain_points(played, points, captain, vice_captain)
+
+    # Orders only differ in who comes on, so each is the current total plus the change in substitutes' points
+    starters, bench = order[:LINEUP_SIZE], order[LINEUP_SIZE:]
+    goalkeepers = [index for index in bench if element_types[index] == 1]
+    outfield = [index for index in bench if element_types[index] != 1]
+    bench_orders = []
+    for permutation in itertools.permutations(outfield):
+        is_current = list(permutation) == outfield
+        if is_current:
+            change = np.zeros(trials)
+        else:
+            subbed_on = autosubs(played, element_types, starters + goalkeepers + list(permutation))
+            change = (points[outfield] * subbed_on[outfield]).sum(axis=0) - \
+                (points[outfield] * current["subbed_on"][outfield]).sum(axis=0)
+        totals = current["points"] + change
+        bench_orders.append({
+            "order": list(permutation),
+            "current": is_current,
+            "mean": round(float(totals.mean()), 2),
+            "std": round(float(totals.std()), 2),
+            "gain": round(float(change.mean()), 2),
+            "chance_of_gain": round(float((change > 0).mean()), 3)
+        })
+    bench_orders.sort(key=lambda entry: (-entry["mean"], not entry["current"]))
+
+    gain = bench_boost - current["points"]
+    return {
+        "trials": trials,
+        "points": summarize(current["points"]),
+        "bench_boost": {
+            **summarize(bench_boost),
+            "gain": summarize(gain),
+            "chance_of_gain": round(float((gain > 0).mean()), 3)
+        },
+        "bench_orders": bench_orders,
+        "played": played.mean(axis=1),
+        "subbed_on": current["subbed_on"].mean(axis=1)
+    }
+
+def simulate_bench(
+    projections: Dict[str, Any],
+    matrix: Dict[str, Any],
+    picks: List[Dict[str, Any]],
+    gameweek: Optional[int] = None,
+    trials: int = DEFAULT_TRIALS,
+    seed: int = DEFAULT_SEED
+) -> Dict[str, Any]:
+    """
+    Simulate a team's picks in a projected gameweek
+
+    Args:
+        projections: Projections from build_projections
+        matrix: Fixture matrix from build_fixture_matrix
+        picks: The team's 15 picks, with element, position and captaincy
+        gameweek: Projected gameweek to simulate (default: the next one)
+        trials: Number of trials
+        seed: Random seed
+
+    Returns:
+        The simulation from simulate_squad, with players described
+
+    Raises:
+        ValueError: If the gameweek isn't projected or the picks aren't a full squad
+    """
+    gameweeks = projections["gameweeks"]
+    gameweek = gameweek if gameweek is not None else (gameweeks[0] if gameweeks else None)
+    if gameweek not in gameweeks:
+        raise ValueError(f"Gameweek {gameweek} is not projected (projections cover {gameweeks[0] if gameweeks else '-'} to {gameweeks[-1] if gameweeks else '-'})")
+    picks = sorted(picks, key=lambda pick: pick.get("position") or 0)
+    if len(picks) != LINEUP_SIZE + 4 or any(pick["element"] not in projections["row_of"] for pick in picks):
+        raise ValueError("A full squad of 15 known players is needed to simulate the bench")
+
+    column = gameweek - gameweeks[0]
+    rows = np.array([projections["row_of"][pick["element"]] for pick in picks], dtype=np.int64)
+    team_row = {team["id"]: row for row, team in enumerate(matrix["teams"])}
+    team_rows = np.array([team_row.get(int(team_id), 0) for team_id in projections["team_ids"][rows]], dtype=np.int64)
+
+    captain = next((index for index, pick in enumerate(picks) if pick.get("is_captain")), 0)
+    vice_captain = next((index for index, pick in enumerate(picks) if pick.get("is_vice_captain")), None)
+
+    result = simulate_squad(
+        projections["expected_points"][rows, column],
+        projections["appearances"][rows, column],
+        matrix["counts"][team_rows, gameweek],
+        projections["element_types"][rows],
+        list(range(len(picks))),
+        captain,
+        vice_captain,
+        trials=trials,
+        seed=seed
+    )
+
+    players = [projections["players"][row] for row in rows.tolist()]
+    return {
+        "gameweek": gameweek,
+        **{key: value for key, value in result.items() if key not in ("played", "subbed_on")},
+        "bench_orders": [
+            {**entry, "order": [players[index] for index in entry["order"]]}
+            for entry in result["bench_orders"]
+        ],
+        "players": [
+            {
+                **players[index],
+                "position_in_team": pick.get("position"),
+                "expected_points": round(float(projections["expected_points"][rows[index], column]), 2),
+                "chance_of_playing": round(float(result["played"][index]), 3),
+                "chance_of_coming_on": round(float(result["subbed_on"][index]), 3) if index >= LINEUP_SIZE else None
+            }
+            for index, pick in enumerate(picks)
+        ]
+    }
@@ -0,0 +1,419 @@
+import os
+import sys
+import gzip
+import json
+import asyncio
+import argparse
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from services.chip_calculator import (
+    identify_double_gameweeks, calculate_gameweek_difficulty, get_recommended_players,
+    DIFFICULTY_WEIGHTS, SCORE_WEIGHTS
+)
+from services.chip_planner import SQUAD_QUOTAS
+from services.player_history import get_history_series
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Archive of per-gameweek snapshots, one directory per season and gameweek:
+#   <archive>/<season>/gw<NN>/bootstrap.json.gz  bootstrap-static before the gameweek's deadline
+#   <archive>/<season>/gw<NN>/fixtures.json.gz   fixtures before the gameweek's deadline
+#   <archive>/<season>/gw<NN>/live.json.gz       event/<NN>/live once the gameweek is over
+BACKTEST_ARCHIVE_DIR = os.getenv("BACKTEST_ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "archive"))
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(os.cpu_count() or 1)))  # Processes sweeping parameter grids
+SNAPSHOT_PAYLOADS = ("bootstrap", "fixtures", "live")
+CHIP_WINDOW = 6  # Gameweeks a chip decision chooses between
+FORM_GAMEWEEKS = 4  # Gameweeks averaged into form when rebuilding snapshots (FPL uses 30 days)
+
+# Metrics reported per season, and whether more is better
+METRICS = {
+    "points_per_pick": True,
+    "capture": True,
+    "captain_points": True,
+    "triple_captain_value": True,
+    "triple_captain_regret": False,
+    "triple_captain_hit_rate": True,
+    "bench_boost_value": True,
+    "bench_boost_regret": False,
+    "bench_boost_hit_rate": True
+}
+DEFAULT_OBJECTIVE = "captain_points"
+
+_worker_state = {
+    "seasons": None
+}
+
+def season_name(bootstrap: Dict[str, Any]) -> str:
+    """Season of a bootstrap payload, e.g. "2024-25", from its first deadline"""
+    deadlines = [event["deadline_time"] for event in bootstrap.get("events", []) if event.get("deadline_time")]
+    if not deadlines:
+        raise ValueError("Bootstrap data has no deadlines to tell the season from")
+    year = datetime.fromisoformat(min(deadlines).replace("Z", "+00:00")).year
+    return f"{year}-{(year + 1) % 100:02d}"
+
+def snapshot_dir(season: str, gameweek: int, root: Optional[str] = None) -> str:
+    return os.path.join(root or BACKTEST_ARCHIVE_DIR, season, f"gw{gameweek:02d}")
+
+def archive_payload(season: str, gameweek: int, name: str, payload: Any, root: Optional[str] = None) -> str:
+    """Write one payload of a gameweek's snapshot, replacing any earlier copy"""
+    if name not in SNAPSHOT_PAYLOADS:
+        raise ValueError(f"Unknown snapshot payload {name}; use one of {', '.join(SNAPSHOT_PAYLOADS)}")
+    directory = snapshot_dir(season, gameweek, root)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.json.gz")
+    # mtime=0 keeps rewrites of the same payload byte-identical
+    with open(path + ".tmp", "wb") as raw_file:
+        with gzip.GzipFile(fileobj=raw_file, mode="wb", mtime=0) as snapshot_file:
+            snapshot_file.write(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    os.replace(path + ".tmp", path)
+    return path
+
+def list_seasons(root: Optional[str] = None) -> List[str]:
+    """Seasons with an archive directory"""
+    root = root or BACKTEST_ARCHIVE_DIR
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
+
+def load_season(season: str, root: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Archived snapshots of a season, in gameweek order
+
+    Gameweeks missing any of the payloads (the one in progress has no final
+    live data yet) are left out.
+    """
+    directory = os.path.join(root or BACKTEST_ARCHIVE_DIR, season)
+    snapshots = []
+    for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        if not name.startswith("gw"):
+            continue
+        paths = {payload: os.path.join(directory, name, f"{payload}.json.gz") for payload in SNAPSHOT_PAYLOADS}
+        if not all(os.path.exists(path) for path in paths.values()):
+            continue
+        snapshot = {"gameweek": int(name[2:])}
+        for payload, path in paths.items():
+            with gzip.open(path, "rt", encoding="utf-8") as snapshot_file:
+                snapshot[payload] = json.load(snapshot_file)
+        snapshots.append(snapshot)
+    return snapshots
+
+def snapshots_from_history(bootstrap: Dict[str, Any], fixtures: List[Dict], path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Rebuild the current season's snapshots from the player history store
+
+    Each finished gameweek gets a bootstrap whose points, minutes, form and
+    price are as they stood before it, and live data of the points scored in
+    it. Fixtures are today's, so difficulty ratings revised during the season
+    are seen with hindsight.
+
+    Args:
+        bootstrap: Current bootstrap data
+        fixtures: Current fixtures
+        path: Optional player history store path
+
+    Returns:
+        Snapshots shaped like load_season's
+    """
+    finished = sorted(event["id"] for event in bootstrap["events"] if event.get("finished"))
+    element_ids = [element["id"] for element in bootstrap["elements"]]
+    series = {column: get_history_series(element_ids, column, path=path) for column in ("total_points", "minutes")}
+    series["value"] = get_history_series(element_ids, "value", path=path, aggregate="last")
+
+    snapshots = []
+    for gameweek in finished:
+        elements = []
+        for element in bootstrap["elements"]:
+            points = series["total_points"][element["id"]]
+            recent = [value for round_number, value in points.items() if gameweek - FORM_GAMEWEEKS <= round_number < gameweek]
+            prices = [value for round_number, value in series["value"][element["id"]].items() if round_number <= gameweek]
+            elements.append({
+                **element,
+                "total_points": int(sum(value for round_number, value in points.items() if round_number < gameweek)),
+                "minutes": int(sum(value for round_number, value in series["minutes"][element["id"]].items() if round_number < gameweek)),
+                "form": f"{sum(recent) / len(recent):.1f}" if recent else "0.0",
+                "now_cost": int(prices[-1]) if prices else element["now_cost"]
+            })
+        snapshots.append({
+            "gameweek": gameweek,
+            "bootstrap": {"teams": bootstrap["teams"], "events": bootstrap["events"], "elements": elements},
+            "fixtures": fixtures,
+            "live": {"elements": [
+                {"id": element_id, "stats": {"total_points": int(series["total_points"][element_id].get(gameweek, 0))}}
+                for element_id in element_ids
+            ]}
+        })
+    return snapshots
+
+def prepare_snapshot(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Work a snapshot needs whatever the parameters: team lookups, fixture counts and realized points"""
+    gameweek = snapshot["gameweek"]
+    elements = snapshot["bootstrap"]["elements"]
+    team_fixtures = identify_double_gameweeks(snapshot["fixtures"], gameweek)
+    realized = {element["id"]: element["stats"].get("total_points", 0) for element in snapshot["live"]["elements"]}
+    playing = team_fixtures.get(gameweek, {})
+
+    # Best possible picks per position among players whose team plays, for the capture ratio
+    best = {}
+    for position in SQUAD_QUOTAS:
+        points = sorted((realized.get(element["id"], 0) for element in elements if element["element_type"] == position and element["team"] in playing), reverse=True)
+        best[position] = points
+    return {
+        "gameweek": gameweek,
+        "bootstrap": snapshot["bootstrap"],
+        "fixtures": snapshot["fixtures"],
+        "teams": {team["id"]: team for team in snapshot["bootstrap"]["teams"]},
+        "team_fixtures": team_fixtures,
+        "realized": realized,
+        "best": best
+    }
+
+def _split_params(params: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+    unknown = set(params) - set(DIFFICULTY_WEIGHTS) - set(SCORE_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown parameters {', '.join(sorted(unknown))}; use {', '.join(list(DIFFICULTY_WEIGHTS) + list(SCORE_WEIGHTS))}")
+    return {
+        "difficulty": {key: value for key, value in params.items() if key in DIFFICULTY_WEIGHTS},
+        "score": {key: value for key, value in params.items() if key in SCORE_WEIGHTS}
+    }
+
+def evaluate_season(prepared: List[Dict[str, Any]], params: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Replay a season's snapshots through the chip calculator's heuristics
+
+    In every gameweek the player scoring picks the best players per position
+    (scored on how many of the best realized scores they capture), the best
+    of them is captained and the top 2/5/5/3 make a Bench Boost squad. Every
+    gameweek with CHIP_WINDOW gameweeks of results ahead is also a chip
+    decision: Triple Captain goes in the gameweek with the lowest difficulty
+    score and Bench Boost in the one with the most doubles, as
+    calculate_chip_recommendations does, and both are scored against the best
+    gameweek in the window with hindsight.
+
+    Args:
+        prepared: Snapshots from prepare_snapshot, in gameweek order
+        params: Optional DIFFICULTY_WEIGHTS and SCORE_WEIGHTS overrides
+
+    Returns:
+        Dictionary of METRICS, averaged over the season's gameweeks
+    """
+    weights = _split_params(params or {})
+    by_gameweek = {snapshot["gameweek"]: snapshot for snapshot in prepared}
+    captain_points, squad_points = {}, {}
+    picked_points, best_points, picks = 0.0, 0.0, 0
+
+    for snapshot in prepared:
+        gameweek, realized = snapshot["gameweek"], snapshot["realized"]
+        gameweek_data = calculate_gameweek_difficulty(gameweek, snapshot["team_fixtures"], snapshot["fixtures"], snapshot["teams"], weights["difficulty"])
+        recommended = {
+            position: get_recommended_players(gameweek_data, snapshot["bootstrap"], position_filter=position, weights=weights["score"])
+            for position in SQUAD_QUOTAS
+        }
+        for position, players in recommended.items():
+            picked_points += sum(realized.get(player["id"], 0) for player in players)
+            best_points += sum(snapshot["best"][position][:len(players)])
+            picks += len(players)
+
+        ranked = sorted((player for players in recommended.values() for player in players), key=lambda player: -player["score"])
+        captain_points[gameweek] = realized.get(ranked[0]["id"], 0) if ranked else 0
+        squad_points[gameweek] = sum(
+            realized.get(player["id"], 0)
+            for position, quota in SQUAD_QUOTAS.items()
+            for player in recommended[position][:quota]
+        )
+
+    chips = {"triple_captain": [], "bench_boost": []}
+    for snapshot in prepared:
+        window = [snapshot["gameweek"] + offset for offset in range(CHIP_WINDOW)]
+        if not all(gameweek in by_gameweek for gameweek in window):
+            continue
+        # Decided with the fixtures known at the time, judged on what happened
+        metrics = [
+            calculate_gameweek_difficulty(gameweek, snapshot["team_fixtures"], snapshot["fixtures"], snapshot["teams"], weights["difficulty"])
+            for gameweek in window
+        ]
+        triple_captain = min(metrics, key=lambda x: (x["difficulty_score"], x["gameweek"]))["gameweek"]
+        bench_boost = min(metrics, key=lambda x: (-x["teams_with_multiple_fixtures"], x["avg_fixture_difficulty"], x["gameweek"]))["gameweek"]
+        for chip, chosen, values in (("triple_captain", triple_captain, captain_points), ("bench_boost", bench_boost, squad_points)):
+            best = max(values[gameweek] for gameweek in window)
+            chips[chip].append((values[chosen], best))
+
+    def mean(values):
+        return round(sum(values) / len(values), 3) if values else None
+
+    result = {
+        "gameweeks": len(prepared),
+        "points_per_pick": round(picked_points / picks, 3) if picks else None,
+        "capture": round(picked_points / best_points, 3) if best_points else None,
+        "captain_points": mean(list(captain_points.values())),
+        "chip_decisions": len(chips["triple_captain"])
+    }
+    for chip, decisions in chips.items():
+        result[f"{chip}_value"] = mean([value for value, _ in decisions])
+        result[f"{chip}_regret"] = mean([best - value for value, best in decisions])
+        result[f"{chip}_hit_rate"] = mean([1.0 if value >= best else 0.0 for value, best in decisions])
+    return result
+
+def parameter_grid(grid: Dict[str, List[float]]) -> List[Dict[str, float]]:
+    """Every combination of the grid's values"""
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+def _init_worker(seasons: Dict[str, List[Dict[str, Any]]]):
+    """Keep the prepared seasons in each worker, so they're sent once rather than per task"""
+    _worker_state["seasons"] = seasons
+
+def _evaluate_params(params: Dict[str, float]) -> Dict[str, Any]:
+    """Evaluate one point of the grid on every season"""
+    seasons = {season: evaluate_season(prepared, params) for season, prepared in _worker_state["seasons"].items()}
+    overall = {}
+    for metric in METRICS:
+        values = [result[metric] for result in seasons.values() if result[metric] is not None]
+        overall[metric] = round(sum(values) / len(values), 3) if values else None
+    return {"params": params, "overall": overall, "seasons": seasons}
+
+def sweep(
+    seasons: Dict[str, List[Dict[str, Any]]],
+    grid: Optional[Dict[str, List[float]]] = None,
+    workers: int = BACKTEST_WORKERS,
+    objective: str = DEFAULT_OBJECTIVE
+) -> Dict[str, Any]:
+    """
+    Backtest every combination of a parameter grid on every season
+
+    Args:
+        seasons: Snapshots per season, from load_season or snapshots_from_history
+        grid: Values to try per parameter; an empty grid backtests the current weights
+        workers: Processes to spread the grid over; 1 runs in this process
+        objective: Metric to rank the combinations by
+
+    Returns:
+        Dictionary with the current weights' results, and every combination's
+        results per season and overall, best first
+
+    Raises:
+        ValueError: If the objective or a parameter is unknown
+    """
+    if objective not in METRICS:
+        raise ValueError(f"Unknown objective {objective}; use one of {', '.join(METRICS)}")
+    combinations = parameter_grid(grid or {})
+    for params in combinations:
+        _split_params(params)
+
+    prepared = {season: [prepare_snapshot(snapshot) for snapshot in snapshots] for season, snapshots in seasons.items()}
+    tasks = [{}] + [params for params in combinations if params]
+    if workers <= 1 or len(tasks) == 1:
+        _init_worker(prepared)
+        results = [_evaluate_params(params) for params in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(prepared,)) as executor:
+            results = list(executor.map(_evaluate_params, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+    higher_is_better = METRICS[objective]
+
+    def rank_key(result):
+        value = result["overall"][objective]
+        if value is None:
+            return float("inf")
+        return -value if higher_is_better else value
+
+    return {
+        "objective": objective,
+        "seasons": {season: len(snapshots) for season, snapshots in seasons.items()},
+        "baseline": results[0],
+        "results": sorted(results[1:], key=rank_key) if len(results) > 1 else []
+    }
+
+async def archive_current_gameweek(root: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Archive the latest finished gameweek's live data and the next gameweek's bootstrap and fixtures
+
+    Run once a gameweek's results are final and before the next deadline;
+    run weekly, it builds the season's archive.
+    """
+    from services.upstream import upstream_client, FPL_API_BASE
+
+    async with upstream_client(follow_redirects=True) as client:
+        bootstrap_response, fixtures_response = await asyncio.gather(
+            client.get(f"{FPL_API_BASE}/bootstrap-static/"),
+            client.get(f"{FPL_API_BASE}/fixtures/")
+        )
+        bootstrap_response.raise_for_status()
+        fixtures_response.raise_for_status()
+        bootstrap = bootstrap_response.json()
+        season = season_name(bootstrap)
+
+        written = []
+        finished = [event["id"] for event in bootstrap["events"] if event.get("finished")]
+        if finished:
+            live_response = await client.get(f"{FPL_API_BASE}/event/{finished[-1]}/live/")
+            live_response.raise_for_status()
+            written.append(archive_payload(season, finished[-1], "live", live_response.json(), root))
+
+        upcoming = next((event["id"] for event in bootstrap["events"] if event.get("is_next")), None)
+        if upcoming is not None:
+            written.append(archive_payload(season, upcoming, "bootstrap", bootstrap, root))
+            written.append(archive_payload(season, upcoming, "fixtures", fixtures_response.json(), root))
+    return {"season": season, "written": written}
+
+async def _current_payloads():
+    from services.upstream import upstream_client, FPL_API_BASE
+
+    async with upstream_client(follow_redirects=True) as client:
+        bootstrap_response, fixtures_response = await asyncio.gather(
+            client.get(f"{FPL_API_BASE}/bootstrap-static/"),
+            client.get(f"{FPL_API_BASE}/fixtures/")
+        )
+    bootstrap_response.raise_for_status()
+    fixtures_response.raise_for_status()
+    return bootstrap_response.json(), fixtures_response.json()
+
+def _parse_grid(values: List[str]) -> Dict[str, List[float]]:
+    grid = {}
+    for value in values or []:
+        name, _, options = value.partition("=")
+        grid[name.strip()] = [float(option) for option in options.split(",") if option.strip()]
+    return grid
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the chip calculator's heuristics on archived gameweeks")
+    parser.add_argument("--archive", default=BACKTEST_ARCHIVE_DIR, help="Archive directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("archive", help="Archive the latest results and the next gameweek's data from the FPL API")
+    rebuild = subparsers.add_parser("rebuild", help="Rebuild this season's snapshots from the player history store into the archive")
+    rebuild.add_argument("--db", default=None, help="Player history store (default: PLAYER_HISTORY_DB)")
+    run = subparsers.add_parser("run", help="Backtest the current weights and a parameter grid")
+    run.add_argument("--season", action="append", help="Season to replay, e.g. 2024-25 (default: every archived season)")
+    run.add_argument("--grid", action="append", help="Parameter values, e.g. double_teams=3,5,7 (repeatable)")
+    run.add_argument("--workers", type=int, default=BACKTEST_WORKERS)
+    run.add_argument("--objective", default=DEFAULT_OBJECTIVE, choices=list(METRICS))
+    run.add_argument("--top", type=int, default=10, help="Combinations to print")
+    args = parser.parse_args(argv)
+
+    if args.command == "archive":
+        print(json.dumps(asyncio.run(archive_current_gameweek(args.archive)), indent=2))
+    elif args.command == "rebuild":
+        bootstrap, fixtures = asyncio.run(_current_payloads())
+        season = season_name(bootstrap)
+        for snapshot in snapshots_from_history(bootstrap, fixtures, args.db):
+            for name in SNAPSHOT_PAYLOADS:
+                archive_payload(season, snapshot["gameweek"], name, snapshot[name], args.archive)
+        print(f"Rebuilt {season} in {args.archive}")
+    else:
+        seasons = {season: load_season(season, args.archive) for season in (args.season or list_seasons(args.archive))}
+        seasons = {season: snapshots for season, snapshots in seasons.items() if snapshots}
+        if not seasons:
+            print(f"No archived gameweeks in {args.archive}", file=sys.stderr)
+            return 1
+        report = sweep(seasons, _parse_grid(args.grid), workers=args.workers, objective=args.objective)
+        report["results"] = report["results"][:args.top]
+        print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+import asyncio
+import mmap
+import os
+import re
+import struct
+import tempfile
+import time
+import logging
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+import msgspec
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Backend selection: "memory" (per process, the default), "shm" or "redis"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_SHM_DIR = os.getenv(
+    "CACHE_SHM_DIR",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "fpl-ai-cache")
+)
+
+# Stored entries start with a fixed-size stamp identifying the write, so readers
+# can tell whether their already-decoded copy is still current without
+# transferring or decoding the whole value
+STAMP_SIZE = 32
+
+# Shared values are stored as MessagePack, never pickled: other processes can
+# write to a shared store, and unpickling what they wrote would run their code
+# in every worker. MessagePack keeps bytes and integer dict keys; numpy arrays
+# travel as an extension type holding dtype, shape and raw data.
+NDARRAY_EXT_CODE = 1
+
+def _encode_extension(value: Any) -> Any:
+    if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+        return msgspec.msgpack.Ext(NDARRAY_EXT_CODE, msgspec.msgpack.encode(
+            (value.dtype.str, value.shape, np.ascontiguousarray(value).tobytes())
+        ))
+    if isinstance(value, np.generic):
+        return value.item()
+    raise NotImplementedError(f"Can't store {type(value).__name__} in a shared cache")
+
+def _decode_extension(code: int, data: memoryview) -> Any:
+    if code != NDARRAY_EXT_CODE:
+        raise ValueError(f"Unknown cache extension type {code}")
+    dtype, shape, buffer = msgspec.msgpack.decode(data)
+    return np.frombuffer(buffer, dtype=np.dtype(dtype)).reshape(shape).copy()
+
+_value_encoder = msgspec.msgpack.Encoder(enc_hook=_encode_extension)
+_value_decoder = msgspec.msgpack.Decoder(ext_hook=_decode_extension)
+
+def encode_value(value: Any) -> bytes:
+    """Serialize a value for a shared backend"""
+    return _value_encoder.encode(value)
+
+def decode_value(data: bytes, key: str = "") -> Optional[Any]:
+    """
+    Deserialize a value written by encode_value
+
+    Entries that don't decode (written in another format, or tampered with)
+    are treated as missing, so the caller rebuilds and overwrites them.
+    """
+    try:
+        return _value_decoder.decode(data)
+    except (msgspec.DecodeError, ValueError, TypeError) as e:
+        logger.warning(f"Ignoring undecodable cache entry {key}: {str(e)}")
+        return None
+
+def _new_stamp() -> bytes:
+    """Create a unique stamp for one write"""
+    return f"{time.time_ns()}-{os.getpid()}".encode("ascii").ljust(STAMP_SIZE, b" ")[:STAMP_SIZE]
+
+class InProcessCacheBackend:
+    """Cache held in this process only; every worker has its own copy"""
+    is_shared = False
+
+    def __init__(self):
+        self._entries = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at and expires_at < time.time():
+            del self._entries[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._entries[key] = (value, time.time() + ttl if ttl else 0)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+class SharedMemoryCacheBackend:
+    """
+    Cache stored as files in a shared-memory directory (/dev/shm by default)
+
+    Writers replace files atomically; readers memory-map them and keep the decoded
+    value until the stamp in the file header changes.
+    """
+    is_shared = True
+    HEADER = struct.Struct(f"<d{STAMP_SIZE}s")  # Expiry timestamp (0 for no expiry), write stamp
+
+    def __init__(self, directory: str = CACHE_SHM_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._decoded = {}  # key -> (stamp, value)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^A-Za-z0-9_.-]", "_", key))
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            f = open(self._path(key), "rb")
+        except FileNotFoundError:
+            self._decoded.pop(key, None)
+            return None
+
+        with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            expires_at, stamp = self.HEADER.unpack_from(mapped, 0)
+            if expires_at and expires_at < time.time():
+                return None
+
+            decoded = self._decoded.get(key)
+            if decoded is not None and decoded[0] == stamp:
+                return decoded[1]
+
+            value = decode_value(mapped[self.HEADER.size:], key)
+            if value is None:
+                return None
+
+        self._decoded[key] = (stamp, value)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        payload = self.HEADER.pack(time.time() + ttl if ttl else 0, _new_stamp()) + encode_value(value)
+
+        # Write to a temporary file and rename it over the old one, so readers
+        # never see a partial write
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    async def delete(self, key: str) -> None:
+        self._decoded.pop(key, None)
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+class RedisProtocolError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+class RedisCacheBackend:
+    """
+    Cache stored in any server speaking the Redis protocol (RESP)
+
+    Uses a single connection with a minimal RESP client, so no Redis client
+    library is required. Readers fetch the stamp at the start of a value first
+    and only transfer the full value when it changed.
+    """
+    is_shared = True
+
+    def __init__(self, url: str = CACHE_REDIS_URL):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+        self._decoded = {}  # key -> (stamp, value)
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._send_command("AUTH", self.password)
+        if self.db:
+            await self._send_command("SELECT", self.db)
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    @staticmethod
+    def _encode_command(*args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    async def _read_reply(self):
+        line = await self._reader.readuntil(b"\r\n")
+        prefix, body = line[:1], line[1:-2]
+        if prefix == b"+":
+            return body.decode("utf-8")
+        if prefix == b"-":
+            raise RedisProtocolError(body.decode("utf-8"))
+        if prefix == b":":
+            return int(body)
+        if prefix == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            length = int(body)
+            if length < 0:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise RedisProtocolError(f"Unexpected reply: {line!r}")
+
+    async def _send_command(self, *args):
+        self._writer.write(self._encode_command(*args))
+        await self._writer.drain()
+        return await self._read_reply()
+
+    async def execute(self, *args):
+        """Run one command and return its decoded reply"""
+        async with self._lock:
+            if self._writer is None:
+                await self._connect()
+            try:
+                return await self._send_command(*args)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # Drop the broken connection; the next command reconnects
+                self._close()
+                raise
+
+    async def get(self, key: str) -> Optional[Any]:
+        decoded = self._decoded.get(key)
+        if decoded is not None:
+            stamp = await self.execute("GETRANGE", key, 0, STAMP_SIZE - 1)
+            if stamp == decoded[0]:
+                return decoded[1]
+
+        data = await self.execute("GET", key)
+        if data is None:
+            self._decoded.pop(key, None)
+            return None
+
+        value = decode_value(data[STAMP_SIZE:], key)
+        if value is None:
+            self._decoded.pop(key, None)
+            return None
+        self._decoded[key] = (data[:STAMP_SIZE], value)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        payload = _new_stamp() + encode_value(value)
+        if ttl:
+            await self.execute("SET", key, payload, "PX", int(ttl * 1000))
+        else:
+            await self.execute("SET", key, payload)
+
+    async def delete(self, key: str) -> None:
+        self._decoded.pop(key, None)
+        await self.execute("DEL", key)
+
+_cache_backend = {
+    "backend": None
+}
+
+def create_cache_backend(name: str = CACHE_BACKEND):
+    """Create a cache backend by name ("memory", "shm" or "redis")"""
+    if name == "shm":
+        return SharedMemoryCacheBackend()
+    if name == "redis":
+        return RedisCacheBackend()
+    if name != "memory":
+        logger.warning(f"Unknown cache backend '{name}', using in-process cache")
+    return InProcessCacheBackend()
+
+def get_cache_backend():
+    """Get the cache backend configured for this process"""
+    if _cache_backend["backend"] is None:
+        _cache_backend["backend"] = create_cache_backend()
+        logger.info(f"Using {type(_cache_backend['backend']).__name__}")
+    return _cache_backend["backend"]
+
+def set_cache_backend(backend) -> None:
+    """Replace the cache backend (used by tests and tools)"""
+    _cache_backend["backend"] = backend
@@ -0,0 +1,94 @@
+import logging
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from services.autosub_simulator import points_moments
+from services.chip_planner import LINEUP_SIZE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CAPTAIN_MULTIPLIER = 2
+
+def rank_captains(
+    projections: Dict[str, Any],
+    matrix: Dict[str, Any],
+    picks: List[Dict[str, Any]],
+    gameweek: Optional[int] = None,
+    effective_ownership: Optional[np.ndarray] = None
+) -> Dict[str, Any]:
+    """
+    Rank a team's picks as captain for a projected gameweek
+
+    Expected points and their spread come from the projections and the
+    simulator's points model, over every fixture the player's team has in the
+    gameweek, so doubles count twice and blanks score nothing.
+
+    Args:
+        projections: Projections from build_projections
+        matrix: Fixture matrix from build_fixture_matrix
+        picks: The team's picks, with element and position
+        gameweek: Projected gameweek (default: the next one)
+        effective_ownership: Optional effective ownership per projections row,
+            in percent, from league_picks.effective_ownership
+
+    Returns:
+        Dictionary with the gameweek and the picks ranked by expected captain
+        points, each with its fixtures, spread, chance of playing, ownership
+        and, with effective ownership, the points gained on the field
+
+    Raises:
+        ValueError: If the gameweek isn't projected
+    """
+    gameweeks = projections["gameweeks"]
+    gameweek = gameweek if gameweek is not None else (gameweeks[0] if gameweeks else None)
+    if gameweek not in gameweeks:
+        raise ValueError(f"Gameweek {gameweek} is not projected (projections cover {gameweeks[0] if gameweeks else '-'} to {gameweeks[-1] if gameweeks else '-'})")
+
+    picks = [pick for pick in picks if pick["element"] in projections["row_of"]]
+    column = gameweek - gameweeks[0]
+    rows = np.array([projections["row_of"][pick["element"]] for pick in picks], dtype=np.int64)
+    team_row = {team["id"]: row for row, team in enumerate(matrix["teams"])}
+    team_rows = [team_row.get(int(team_id), 0) for team_id in projections["team_ids"][rows]]
+    fixtures = matrix["counts"][team_rows, gameweek] if len(rows) else np.zeros(0, dtype=np.int64)
+
+    moments = points_moments(projections["expected_points"][rows, column], projections["appearances"][rows, column], fixtures)
+    captain_points = CAPTAIN_MULTIPLIER * moments["mean"]
+    captain_std = CAPTAIN_MULTIPLIER * np.sqrt(moments["variance"])
+    # Captaining gains on the field by the points the field doesn't count as many times
+    field_gain = moments["mean"] * (CAPTAIN_MULTIPLIER - effective_ownership[rows] / 100) if effective_ownership is not None else None
+
+    # Most expected captain points first, the steadier pick first on ties
+    order = np.lexsort((captain_std, -np.round(captain_points, 2)))
+    candidates = []
+    for index in order.tolist():
+        row = int(rows[index])
+        candidate = {
+            **projections["players"][row],
+            "in_lineup": (picks[index].get("position") or 0) <= LINEUP_SIZE,
+            "fixtures": [
+                f"{fixture['opponent']} ({'H' if fixture['home'] else 'A'}) {fixture['difficulty']}"
+                for fixture in matrix["opponents"][team_rows[index]][gameweek]
+            ],
+            "expected_points": round(float(moments["mean"][index]), 2),
+            "captain_points": round(float(captain_points[index]), 2),
+            "captain_std": round(float(captain_std[index]), 2),
+            "variance": round(float(moments["variance"][index]), 2),
+            "chance_of_playing": round(float(moments["chance_of_playing"][index]), 3),
+            "ownership": round(float(projections["ownership"][row]), 1)
+        }
+        if field_gain is not None:
+            candidate["effective_ownership"] = round(float(effective_ownership[row]), 1)
+            candidate["field_gain"] = round(float(field_gain[index]), 2)
+        candidates.append(candidate)
+
+    # The recommendation is the best starter; benched players only score as captain if they come on
+    recommended = next((candidate for candidate in candidates if candidate["in_lineup"]), None)
+    return {
+        "gameweek": gameweek,
+        "captain": recommended,
+        "vice_captain": next((candidate for candidate in candidates if candidate["in_lineup"] and candidate is not recommended), None),
+        "candidates": candidates
+    }
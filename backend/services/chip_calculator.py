@@ -3,7 +3,16 @@ import functools
 import time
 import logging
 from typing import Dict, List, Tuple, Optional, Any
-from services.fpl_data import get_fpl_data
+
+import numpy as np
+
+from services.fpl_data import get_fpl_data, get_data_version
+from services.cache_backend import get_cache_backend
+from services.metrics import record_cache_access, observe_histogram, register_gauge_callback, gauge_value
+from services.projections import get_projections, gameweek_column
+from services.chip_planner import plan_chips, lineup_points, remaining_chips
+from services.fixture_ticker import get_fixture_matrix
+from services.team_squad import get_team_squad
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -14,10 +23,29 @@ CACHE_TTL = 86400  # 24 hour cache lifetime
 _processed_fixtures_cache = {
     "data": None,
     "timestamp": 0,
+    "version": None,  # FPL data version the processed data was built from
     "refresh_task": None,
     "is_refreshing": False
 }
 
+# Shared cache entry holding the processed fixtures for all workers
+SHARED_PROCESSED_FIXTURES_KEY = "processed_fixtures"
+
+# Heuristic weights, overridable per call so the backtester can sweep them
+# Gameweek difficulty score: average fixture difficulty against teams with more than one fixture
+DIFFICULTY_WEIGHTS = {
+    "avg_difficulty": 0.3,
+    "double_teams": 0.7 * 10
+}
+# Player composite score
+SCORE_WEIGHTS = {
+    "form": 3,             # Form is important
+    "fixtures": 2,         # Multiple fixtures is a big advantage
+    "easiness": 0.5,       # Easier fixtures are better (5 is the max difficulty)
+    "total_points": 1 / 20 # Total points shows consistency
+}
+MIN_MINUTES = 450  # Less than 5 full games
+
 async def process_fixtures_for_chip_calculations(fpl_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Process raw FPL data into a format suitable for chip calculations
@@ -51,17 +79,34 @@ async def refresh_processed_fixtures_cache():
     try:
         _processed_fixtures_cache["is_refreshing"] = True
         logger.info("Starting automatic processed fixtures cache refresh")
+        refresh_start = time.perf_counter()
         
         # Get data from the shared FPL data cache
         fpl_data = await get_fpl_data()
+        version = fpl_data.get("version")
+        backend = get_cache_backend()
         
-        # Process the data for chip calculations
-        processed_data = await process_fixtures_for_chip_calculations(fpl_data)
+        # Reuse the processed data if another worker already built it for this version
+        shared = await backend.get(SHARED_PROCESSED_FIXTURES_KEY)
+        if shared is not None and shared["version"] == version:
+            processed_data = shared["data"]
+            timestamp = shared["timestamp"]
+        else:
+            # Process the data for chip calculations
+            processed_data = await process_fixtures_for_chip_calculations(fpl_data)
+            timestamp = time.time()
+            await backend.set(SHARED_PROCESSED_FIXTURES_KEY, {
+                "data": processed_data,
+                "timestamp": timestamp,
+                "version": version
+            })
         
         # Update cache
         _processed_fixtures_cache["data"] = processed_data
-        _processed_fixtures_cache["timestamp"] = time.time()
+        _processed_fixtures_cache["timestamp"] = timestamp
+        _processed_fixtures_cache["version"] = version
         
+        observe_histogram("fpl_cache_refresh_duration_seconds", time.perf_counter() - refresh_start, cache="processed_fixtures")
         logger.info(f"Processed fixtures cache refreshed successfully at {time.ctime()}")
         
         # Schedule next refresh after CACHE_TTL seconds
@@ -89,8 +134,14 @@ async def get_cached_fixtures() -> Dict[str, Any]:
     global _processed_fixtures_cache
     current_time = time.time()
     
-    # Check if cache is valid
-    if _processed_fixtures_cache["data"] is None or (current_time - _processed_fixtures_cache["timestamp"]) > CACHE_TTL:
+    # Check if cache is valid (and built from the current FPL data)
+    is_valid = (
+        _processed_fixtures_cache["data"] is not None
+        and (current_time - _processed_fixtures_cache["timestamp"]) <= CACHE_TTL
+        and _processed_fixtures_cache["version"] == get_data_version()
+    )
+    record_cache_access("processed_fixtures", is_valid)
+    if not is_valid:
         # Cache expired or not initialized, refresh processed data
         if not _processed_fixtures_cache["is_refreshing"]:  # Only if not already refreshing
             await refresh_processed_fixtures_cache()
@@ -106,6 +157,17 @@ async def get_cached_fixtures() -> Dict[str, Any]:
             
     return _processed_fixtures_cache["data"]
 
+def _processed_fixtures_cache_metrics():
+    """Report processed fixtures cache size and age at scrape time"""
+    if _processed_fixtures_cache["data"] is None:
+        return {}
+    return {
+        **gauge_value(len(_processed_fixtures_cache["data"]["fixtures"]), cache="processed_fixtures", metric="fixtures"),
+        **gauge_value(time.time() - _processed_fixtures_cache["timestamp"], cache="processed_fixtures", metric="age_seconds"),
+    }
+
+register_gauge_callback("fpl_cache_state", "Cache size, age and version, by cache and metric", _processed_fixtures_cache_metrics)
+
 def identify_double_gameweeks(fixtures: List[Dict], current_gw: int) -> Dict[int, Dict[int, int]]:
     """
     Identify gameweeks where teams play multiple times
@@ -144,11 +206,15 @@ def calculate_gameweek_difficulty(
     gw: int,
     team_fixtures: Dict[int, Dict[int, int]],
     fixtures: List[Dict],
-    teams: Dict[int, Dict]
+    teams: Dict[int, Dict],
+    weights: Optional[Dict[str, float]] = None
 ) -> Dict:
     """
     Calculate difficulty of a gameweek for chip usage
     
+    Args:
+        weights: Optional overrides of DIFFICULTY_WEIGHTS
+    
     Returns:
         Dict with difficulty metrics and team data
     """
@@ -194,7 +260,8 @@ def calculate_gameweek_difficulty(
     
     # Calculate a composite difficulty score (lower is better for chips)
     # Formula factors: average difficulty (30%), number of teams with multiple fixtures (70%)
-    difficulty_score = (avg_difficulty * 0.3) - (len(double_gw_teams) * 0.7 * 10)
+    weights = {**DIFFICULTY_WEIGHTS, **(weights or {})}
+    difficulty_score = (avg_difficulty * weights["avg_difficulty"]) - (len(double_gw_teams) * weights["double_teams"])
     
     return {
         "gameweek": gw,
@@ -221,7 +288,7 @@ def calculate_gameweek_difficulty(
         }
     }
 
-def get_recommended_players(gameweek_data, bootstrap_data, position_filter=None):
+def get_recommended_players(gameweek_data, bootstrap_data, position_filter=None, projections=None, weights=None):
     """
     Get player recommendations based on fixture difficulty and form
     
@@ -229,9 +296,12 @@ def get_recommended_players(gameweek_data, bootstrap_data, position_filter=None)
         gameweek_data: Gameweek metrics including team difficulty data
         bootstrap_data: Bootstrap data from FPL API containing player information
         position_filter: Optional filter for player position (1=GK, 2=DEF, 3=MID, 4=FWD)
+        projections: Optional expected points projections; when they cover the
+            gameweek, players are ranked by expected points instead of the composite score
+        weights: Optional overrides of SCORE_WEIGHTS
     
     Returns:
-        List of recommended players sorted by a composite score
+        List of recommended players sorted by expected points or a composite score
     """
     # Get team data from gameweek metrics
     team_data = gameweek_data["team_data"]
@@ -244,6 +314,10 @@ def get_recommended_players(gameweek_data, bootstrap_data, position_filter=None)
     # Create position mappings
     position_map = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
     
+    # Expected points for this gameweek, if projected
+    expected_points = gameweek_column(projections, gameweek_data["gameweek"]) if projections else None
+    weights = {**SCORE_WEIGHTS, **(weights or {})}
+    
     # Calculate player scores based on form, upcoming fixtures, and total points
     player_scores = []
     for player in players:
@@ -264,7 +338,7 @@ def get_recommended_players(gameweek_data, bootstrap_data, position_filter=None)
         minutes = player["minutes"]
         
         # Skip players with very low minutes
-        if minutes < 450:  # Less than 5 full games
+        if minutes < MIN_MINUTES:
             continue
         
         # Calculate composite score: 
@@ -273,12 +347,17 @@ def get_recommended_players(gameweek_data, bootstrap_data, position_filter=None)
         # - Higher for teams with easier fixtures
         # - Higher for players with more total points
         composite_score = (
-            form * 3 +                          # Form is important
-            team_fixtures_count * 2 +           # Multiple fixtures is a big advantage
-            (5 - fixture_difficulty) * 0.5 +    # Easier fixtures are better (5 is the max difficulty)
-            points / 20                         # Total points shows consistency
+            form * weights["form"] +
+            team_fixtures_count * weights["fixtures"] +
+            (5 - fixture_difficulty) * weights["easiness"] +
+            points * weights["total_points"]
         )
         
+        if expected_points is not None:
+            row = projections["row_of"].get(player["id"])
+            player_expected_points = float(expected_points[row]) if row is not None else 0.0
+            composite_score = player_expected_points
+        
         # Create player entry
         player_entry = {
             "id": player["id"],
@@ -292,6 +371,8 @@ def get_recommended_players(gameweek_data, bootstrap_data, position_filter=None)
             "avg_fixture_difficulty": fixture_difficulty,
             "score": composite_score
         }
+        if expected_points is not None:
+            player_entry["expected_points"] = round(player_expected_points, 2)
         
         player_scores.append(player_entry)
     
@@ -318,9 +399,10 @@ async def calculate_chip_recommendations(number_of_recommendations: int = 3) ->
         teams = data["teams"]
         current_gw = data["current_gameweek"]["id"]
         
-        # Get bootstrap data for player recommendations
+        # Get bootstrap data and expected points for player recommendations
         fpl_data = await get_fpl_data()
         bootstrap_data = fpl_data["bootstrap"]
+        projections = await get_projections()
         
         # Identify double/triple gameweeks
         team_fixtures_by_gw = identify_double_gameweeks(fixtures, current_gw)
@@ -355,21 +437,25 @@ async def calculate_chip_recommendations(number_of_recommendations: int = 3) ->
         for rec in bench_boost_recommendations:
             # For Bench Boost, recommend 3 goalkeepers, 5 defenders, 5 midfielders, and 3 forwards
             rec["recommended_players"] = {
-                "GK": get_recommended_players(rec, bootstrap_data, position_filter=1),
-                "DEF": get_recommended_players(rec, bootstrap_data, position_filter=2),
-                "MID": get_recommended_players(rec, bootstrap_data, position_filter=3),
-                "FWD": get_recommended_players(rec, bootstrap_data, position_filter=4)
+                "GK": get_recommended_players(rec, bootstrap_data, position_filter=1, projections=projections),
+                "DEF": get_recommended_players(rec, bootstrap_data, position_filter=2, projections=projections),
+                "MID": get_recommended_players(rec, bootstrap_data, position_filter=3, projections=projections),
+                "FWD": get_recommended_players(rec, bootstrap_data, position_filter=4, projections=projections)
             }
         
         for rec in triple_captain_recommendations:
             # For Triple Captain, recommend top players regardless of position but prioritize attackers
             rec["recommended_players"] = {
-                "GK": get_recommended_players(rec, bootstrap_data, position_filter=1)[:3],
-                "DEF": get_recommended_players(rec, bootstrap_data, position_filter=2)[:5],
-                "MID": get_recommended_players(rec, bootstrap_data, position_filter=3)[:7],
-                "FWD": get_recommended_players(rec, bootstrap_data, position_filter=4)[:5]
+                "GK": get_recommended_players(rec, bootstrap_data, position_filter=1, projections=projections)[:3],
+                "DEF": get_recommended_players(rec, bootstrap_data, position_filter=2, projections=projections)[:5],
+                "MID": get_recommended_players(rec, bootstrap_data, position_filter=3, projections=projections)[:7],
+                "FWD": get_recommended_players(rec, bootstrap_data, position_filter=4, projections=projections)[:5]
             }
         
+        # Joint schedule for every chip, including Free Hit and Wildcard,
+        # for a template team that hasn't played any yet
+        schedule = plan_chips(projections)
+        
         # Calculate next refresh time
         current_time = time.time()
         last_updated = _processed_fixtures_cache["timestamp"]
@@ -379,6 +465,7 @@ async def calculate_chip_recommendations(number_of_recommendations: int = 3) ->
         return {
             "bench_boost": bench_boost_recommendations,
             "triple_captain": triple_captain_recommendations,
+            "schedule": schedule,
             "current_gameweek": current_gw,
             "status": "success",
             "last_updated": last_updated,
@@ -398,5 +485,106 @@ async def calculate_chip_recommendations(number_of_recommendations: int = 3) ->
             "current_gameweek": None,
             "bench_boost": [],
             "triple_captain": [],
+            "schedule": None,
             "auto_update_enabled": True
-        } 
\ No newline at end of file
+        } 
+
+def squad_chip_outlook(projections: Dict[str, Any], matrix: Dict[str, Any], squad: List[int], starters: List[int]) -> List[Dict[str, Any]]:
+    """
+    A squad's double and blank exposure and chip value in every projected gameweek
+    
+    Fixture counts and expected points of the 15 players are looked up as
+    (players x gameweeks) arrays, so every gameweek is computed at once.
+    
+    Args:
+        projections: Projections from build_projections
+        matrix: Fixture matrix from build_fixture_matrix
+        squad: Player IDs of the squad
+        starters: Player IDs of the squad's current starting XI
+    
+    Returns:
+        One entry per projected gameweek with the squad's doubles and blanks
+        (all players and starters), its Bench Boost points and its Triple
+        Captain points with the captain they come from
+    """
+    gameweeks = projections["gameweeks"]
+    if not squad:
+        return []
+    rows = np.array([projections["row_of"][player_id] for player_id in squad], dtype=np.int64)
+    team_row = {team["id"]: row for row, team in enumerate(matrix["teams"])}
+    team_rows = np.array([team_row.get(int(team_id), 0) for team_id in projections["team_ids"][rows]], dtype=np.int64)
+    
+    counts = matrix["counts"][team_rows][:, gameweeks]
+    is_starter = np.isin(squad, starters)[:, None]
+    expected_points = projections["expected_points"][rows]
+    points = lineup_points(expected_points, projections["element_types"][rows])
+    captains = rows[expected_points.argmax(axis=0)]
+    
+    doubles, blanks = counts > 1, counts == 0
+    return [
+        {
+            "gameweek": gameweek,
+            "players_with_doubles": int(doubles[:, column].sum()),
+            "starters_with_doubles": int((doubles & is_starter)[:, column].sum()),
+            "players_with_blanks": int(blanks[:, column].sum()),
+            "starters_with_blanks": int((blanks & is_starter)[:, column].sum()),
+            "fixtures": int(counts[:, column].sum()),
+            "lineup_points": round(float(points["lineup"][column]), 2),
+            "bench_boost_points": round(float(points["bench"][column]), 2),
+            "triple_captain_points": round(float(points["captain"][column]), 2),
+            "captain": projections["players"][int(captains[column])]
+        }
+        for column, gameweek in enumerate(gameweeks)
+    ]
+
+async def calculate_team_chip_recommendations(team_id: int, number_of_recommendations: int = 3) -> Dict:
+    """
+    Calculate chip recommendations for the squad a team actually owns
+    
+    Args:
+        team_id: The FPL team ID
+        number_of_recommendations: Number of gameweeks to recommend for each chip
+    
+    Returns:
+        Dictionary with the squad's outlook per gameweek, the best gameweeks for
+        Bench Boost and Triple Captain by projected points, and a joint schedule
+        for every chip the team still has
+    
+    Raises:
+        ValueError: If the season hasn't started yet
+        httpx.HTTPStatusError: If the FPL API doesn't know the team
+    """
+    squad = await get_team_squad(team_id)
+    projections = await get_projections()
+    matrix = await get_fixture_matrix()
+    
+    starters = [pick["element"] for pick in squad["picks"] if (pick.get("position") or 0) <= 11]
+    known = [player_id for player_id in squad["squad"] if player_id in projections["row_of"]]
+    outlook = squad_chip_outlook(projections, matrix, known, starters)
+    
+    chips = remaining_chips(squad["chips_status"], projections["gameweeks"][0], projections["gameweeks"][-1]) if projections["gameweeks"] else []
+    
+    # Bench Boost - the squad's projected bench points, more doubles first on ties
+    bench_boost_recommendations = sorted(
+        outlook,
+        key=lambda x: (-x["bench_boost_points"], -x["players_with_doubles"])
+    )[:number_of_recommendations] if "bboost" in chips else []
+    
+    # Triple Captain - the best captain's projected points
+    triple_captain_recommendations = sorted(
+        outlook,
+        key=lambda x: (-x["triple_captain_points"], -x["starters_with_doubles"])
+    )[:number_of_recommendations] if "3xc" in chips else []
+    
+    schedule = plan_chips(projections, squad["chips_status"], known, budget=squad["value"] + squad["bank"])
+    
+    return {
+        "team_id": team_id,
+        "current_gameweek": squad["gameweek"],
+        "chips_available": chips,
+        "gameweeks": outlook,
+        "bench_boost": bench_boost_recommendations,
+        "triple_captain": triple_captain_recommendations,
+        "schedule": schedule,
+        "status": "success"
+    }
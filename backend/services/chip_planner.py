@@ -0,0 +1,287 @@
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Chip names as used in chips.status from process_team_data
+CHIP_NAMES = {
+    "wildcard": "Wildcard",
+    "wildcard2": "Wildcard",
+    "freehit": "Free Hit",
+    "bboost": "Bench Boost",
+    "3xc": "Triple Captain"
+}
+HALF_SEASON_GAMEWEEK = 19  # The first wildcard has to be played by this gameweek, the second one after it
+
+# Squad rules
+SQUAD_QUOTAS = {1: 2, 2: 5, 3: 5, 4: 3}  # Players per element_type
+LINEUP_MINIMUMS = {1: 1, 2: 3, 3: 2, 4: 1}  # Starters per element_type in any valid formation
+LINEUP_SIZE = 11
+MAX_PER_TEAM = 3
+DEFAULT_BUDGET = 1000  # In tenths of a million, like now_cost
+WILDCARD_HORIZON = 6  # Gameweeks a wildcard squad is picked for
+
+def chip_window(chip: str, last_gameweek: int) -> Tuple[int, int]:
+    """First and last gameweek a chip can be played in"""
+    if chip == "wildcard":
+        return 1, HALF_SEASON_GAMEWEEK
+    if chip == "wildcard2":
+        return HALF_SEASON_GAMEWEEK + 1, last_gameweek
+    return 1, last_gameweek
+
+def remaining_chips(chips_status: Optional[List[Dict[str, Any]]], start_gameweek: int, last_gameweek: int) -> List[str]:
+    """
+    Chips that can still be played from start_gameweek
+
+    Args:
+        chips_status: chips.status from process_team_data, or None for a team
+            that hasn't played any chip yet
+    """
+    if chips_status is None:
+        available = list(CHIP_NAMES)
+    else:
+        available = [chip["name"] for chip in chips_status if chip.get("available") and chip.get("name") in CHIP_NAMES]
+        # A team that hasn't played its first wildcard is listed with just that
+        # one, but still gets the second half's
+        if "wildcard" in available and not any(chip.get("name") == "wildcard2" for chip in chips_status):
+            available.insert(available.index("wildcard") + 1, "wildcard2")
+    return [chip for chip in available if chip_window(chip, last_gameweek)[1] >= start_gameweek]
+
+def pick_squad(scores: np.ndarray, element_types: np.ndarray, team_ids: np.ndarray, costs: np.ndarray, budget: int = DEFAULT_BUDGET) -> np.ndarray:
+    """
+    Greedy 15-player squad maximizing the summed score within the squad rules
+
+    Players are taken in descending score as long as the rest of the squad can
+    still be filled with the cheapest players of each position; a second pass
+    in ascending cost fills any slots left over.
+
+    Returns:
+        Row indices of the picked players
+    """
+    # cheapest[position][k] is the cost of the k cheapest players there
+    cheapest = {
+        position: [0] + np.cumsum(np.sort(costs[element_types == position])[:quota]).tolist()
+        for position, quota in SQUAD_QUOTAS.items()
+    }
+    remaining = {position: min(quota, len(cheapest[position]) - 1) for position, quota in SQUAD_QUOTAS.items()}
+    fill_cost = sum(cheapest[position][left] for position, left in remaining.items())
+    types, teams, prices = element_types.tolist(), team_ids.tolist(), costs.tolist()
+    per_team = {}
+    picked = set()
+    spent = 0
+
+    for order in (np.argsort(-scores, kind="stable"), np.argsort(costs, kind="stable")):
+        for row in order.tolist():
+            position, team = types[row], teams[row]
+            left = remaining.get(position)
+            if not left or per_team.get(team, 0) >= MAX_PER_TEAM or row in picked:
+                continue
+            # Budget left must still cover the cheapest way to fill the other slots
+            rest_cost = fill_cost - cheapest[position][left] + cheapest[position][left - 1]
+            if spent + prices[row] + rest_cost > budget:
+                continue
+            remaining[position] = left - 1
+            fill_cost = rest_cost
+            picked.add(row)
+            spent += prices[row]
+            per_team[team] = per_team.get(team, 0) + 1
+            if not any(remaining.values()):
+                return np.array(sorted(picked), dtype=np.int64)
+
+    return np.array(sorted(picked), dtype=np.int64)
+
+def lineup_points(expected_points: np.ndarray, element_types: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Best starting XI, captain and bench points of a squad in every gameweek
+
+    Each position's minimum number of starters is filled with its best
+    players and the remaining places go to the best outfield players left, which
+    is the optimal lineup of any squad within SQUAD_QUOTAS.
+
+    Args:
+        expected_points: Array of shape (squad players, gameweeks)
+        element_types: Position of each squad player
+
+    Returns:
+        Dict with "lineup", "captain" and "bench" arrays, one value per gameweek
+    """
+    gameweeks = expected_points.shape[1]
+    lineup = np.zeros(gameweeks)
+    leftovers = []
+    for position, minimum in LINEUP_MINIMUMS.items():
+        ranked = -np.sort(-expected_points[element_types == position], axis=0)
+        lineup += ranked[:minimum].sum(axis=0)
+        if position != 1:
+            leftovers.append(ranked[minimum:])
+
+    flexible = LINEUP_SIZE - sum(LINEUP_MINIMUMS.values())
+    leftovers = np.concatenate(leftovers + [np.zeros((flexible, gameweeks))])
+    lineup += -np.sort(-leftovers, axis=0)[:flexible].sum(axis=0)
+
+    return {
+        "lineup": lineup,
+        # The best player always starts
+        "captain": expected_points.max(axis=0) if len(expected_points) else np.zeros(gameweeks),
+        "bench": expected_points.sum(axis=0) - lineup
+    }
+
+def solve_chip_schedule(
+    projections: Dict[str, Any],
+    chips: List[str],
+    squad: Optional[List[int]] = None,
+    budget: int = DEFAULT_BUDGET
+) -> Dict[str, Any]:
+    """
+    Jointly optimal gameweeks for the remaining chips
+
+    Dynamic programming backwards over the projected gameweeks. The state is
+    the set of unplayed chips and the squad held: the starting squad, or the
+    squad a wildcard was played on. Playing a chip in a gameweek earns:
+    - Triple Captain: the captain's expected points once more
+    - Bench Boost: the bench's expected points
+    - Free Hit: the best squad for that gameweek instead of the held one
+    - Wildcard: the best squad for the next WILDCARD_HORIZON gameweeks, held
+      over that horizon, so a Bench Boost or Triple Captain in it uses its players
+    At most one chip is played per gameweek. Transfers aren't modelled: squads
+    are held as they are, and a wildcard's advantage ends with its horizon.
+
+    Args:
+        projections: Projections from build_projections
+        chips: Chips to schedule, e.g. from remaining_chips
+        squad: Player IDs of the team's squad (default: the 15 most owned
+            players that fit the squad rules, as a template team)
+        budget: Squad value plus bank for Free Hit and Wildcard squads
+
+    Returns:
+        Dictionary with the planned gameweek and expected gain of each chip,
+        the chips left unplayed and the season totals with and without chips
+    """
+    gameweeks = projections["gameweeks"]
+    expected_points = projections["expected_points"]
+    element_types = projections["element_types"]
+    team_ids = projections["team_ids"]
+    costs = projections["costs"]
+    last_gameweek = gameweeks[-1] if gameweeks else 0
+    chips = [chip for chip in dict.fromkeys(chips) if chip in CHIP_NAMES]
+
+    if squad is not None:
+        squad_rows = np.array([projections["row_of"][player_id] for player_id in squad if player_id in projections["row_of"]], dtype=np.int64)
+    else:
+        squad_rows = pick_squad(projections["ownership"], element_types, team_ids, costs, budget)
+
+    def squad_points(rows):
+        points = lineup_points(expected_points[rows], element_types[rows])
+        points["base"] = points["lineup"] + points["captain"]
+        return points
+
+    # Squad 0 is the starting squad; a wildcard in column g switches to squad wildcard_squad[g]
+    squads = [squad_points(squad_rows)]
+    squad_players = [squad_rows]
+    wildcard_squad = {}
+    wildcards = [chip for chip in chips if chip.startswith("wildcard")]
+    for column, gameweek in enumerate(gameweeks):
+        if any(chip_window(chip, last_gameweek)[0] <= gameweek <= chip_window(chip, last_gameweek)[1] for chip in wildcards):
+            rows = pick_squad(expected_points[:, column:column + WILDCARD_HORIZON].sum(axis=1), element_types, team_ids, costs, budget)
+            wildcard_squad[column] = len(squads)
+            squads.append(squad_points(rows))
+            squad_players.append(rows)
+
+    base = np.array([points["base"] for points in squads])
+    captain = np.array([points["captain"] for points in squads])
+    bench = np.array([points["bench"] for points in squads])
+    # Past its horizon a wildcard squad is worth what the starting squad is,
+    # standing in for the transfers both would have made by then
+    for column, squad_index in wildcard_squad.items():
+        for table in (base, captain, bench):
+            table[squad_index, column + WILDCARD_HORIZON:] = table[0, column + WILDCARD_HORIZON:]
+
+    free_hit = np.zeros(len(gameweeks))
+    if "freehit" in chips:
+        for column in range(len(gameweeks)):
+            rows = pick_squad(expected_points[:, column], element_types, team_ids, costs, budget)
+            free_hit[column] = squad_points(rows)["base"][column]
+
+    # value[mask, squad] is the best total from the current column onwards;
+    # choice[column, mask, squad] the chip played there (-1 for none)
+    masks = 1 << len(chips)
+    value = np.zeros((masks, len(squads)))
+    choice = np.full((len(gameweeks), masks, len(squads)), -1, dtype=np.int64)
+    for column in reversed(range(len(gameweeks))):
+        gameweek = gameweeks[column]
+        playable = [
+            (i, chip) for i, chip in enumerate(chips)
+            if chip_window(chip, last_gameweek)[0] <= gameweek <= chip_window(chip, last_gameweek)[1]
+        ]
+        next_value = np.empty_like(value)
+        for mask in range(masks):
+            best = base[:, column] + value[mask]
+            action = np.full(len(squads), -1, dtype=np.int64)
+            for i, chip in playable:
+                if not mask & (1 << i):
+                    continue
+                rest = value[mask & ~(1 << i)]
+                if chip == "3xc":
+                    candidate = base[:, column] + captain[:, column] + rest
+                elif chip == "bboost":
+                    candidate = base[:, column] + bench[:, column] + rest
+                elif chip == "freehit":
+                    candidate = free_hit[column] + rest
+                else:
+                    new_squad = wildcard_squad[column]
+                    candidate = np.full(len(squads), base[new_squad, column] + rest[new_squad])
+                better = candidate > best + 1e-9
+                best = np.where(better, candidate, best)
+                action = np.where(better, i, action)
+            next_value[mask] = best
+            choice[column, mask] = action
+        value = next_value
+
+    # Follow the choices forward from the starting squad with every chip unplayed
+    plan = []
+    mask, held = masks - 1, 0
+    for column, gameweek in enumerate(gameweeks):
+        action = int(choice[column, mask, held])
+        if action < 0:
+            continue
+        chip = chips[action]
+        if chip == "3xc":
+            gain = captain[held, column]
+        elif chip == "bboost":
+            gain = bench[held, column]
+        elif chip == "freehit":
+            gain = free_hit[column] - base[held, column]
+        else:
+            new_squad = wildcard_squad[column]
+            gain = (base[new_squad, column:column + WILDCARD_HORIZON] - base[held, column:column + WILDCARD_HORIZON]).sum()
+            held = new_squad
+        plan.append({"gameweek": gameweek, "chip": chip, "name": CHIP_NAMES[chip], "expected_gain": round(float(gain), 2)})
+        mask &= ~(1 << action)
+
+    total = float(value[masks - 1, 0]) if gameweeks else 0.0
+    baseline = float(base[0].sum())
+    return {
+        "gameweeks": gameweeks,
+        "plan": plan,
+        "unused": [chip for i, chip in enumerate(chips) if mask & (1 << i)],
+        "expected_points": round(total, 2),
+        "baseline_points": round(baseline, 2),
+        "expected_gain": round(total - baseline, 2),
+        "squad": [projections["players"][row]["id"] for row in squad_players[0].tolist()]
+    }
+
+def plan_chips(
+    projections: Dict[str, Any],
+    chips_status: Optional[List[Dict[str, Any]]] = None,
+    squad: Optional[List[int]] = None,
+    budget: int = DEFAULT_BUDGET
+) -> Dict[str, Any]:
+    """Schedule every chip still playable over the projected gameweeks"""
+    gameweeks = projections["gameweeks"]
+    if not gameweeks:
+        return solve_chip_schedule(projections, [], squad, budget)
+    chips = remaining_chips(chips_status, gameweeks[0], gameweeks[-1])
+    return solve_chip_schedule(projections, chips, squad, budget)
@@ -0,0 +1,172 @@
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from services.fpl_data import get_versioned, register_versioned_cache_metrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Sort orders for the ticker; every one falls back to team name
+TICKER_SORTS = ("difficulty", "total", "fixtures", "team")
+BLANK_DIFFICULTY = 6  # Added to the "total" sort per blank gameweek; worse than the hardest fixture (FDR 5)
+
+def build_fixture_matrix(bootstrap_data: Dict[str, Any], fixtures: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build the team x gameweek fixture matrix, once per data version
+
+    Row i is the i-th team by ID and column g is gameweek g (column 0 is unused),
+    so a blank is a zero count and a double a count of two. Prefix sums along
+    the gameweek axis let any window be summed for all teams with two column
+    lookups.
+
+    Args:
+        bootstrap_data: Bootstrap data with teams and events
+        fixtures: All fixtures; unscheduled ones (no event) are left out
+
+    Returns:
+        Dictionary with the teams, per-cell counts, difficulty sums and opponent
+        lists, and the prefix sums over gameweeks
+    """
+    teams = sorted(bootstrap_data["teams"], key=lambda team: team["id"])
+    row_of = {team["id"]: row for row, team in enumerate(teams)}
+    short_names = {team["id"]: team["short_name"] for team in teams}
+    last_gameweek = max(
+        [event["id"] for event in bootstrap_data["events"]] + [f["event"] for f in fixtures if f["event"] is not None],
+        default=0
+    )
+
+    counts = np.zeros((len(teams), last_gameweek + 1), dtype=np.int64)
+    difficulty = np.zeros((len(teams), last_gameweek + 1), dtype=np.int64)
+    opponents = [[[] for _ in range(last_gameweek + 1)] for _ in teams]
+
+    for fixture in sorted((f for f in fixtures if f["event"] is not None), key=lambda f: (f["kickoff_time"] or "", f["id"])):
+        gameweek = fixture["event"]
+        for team_id, opponent_id, is_home, team_difficulty in (
+            (fixture["team_h"], fixture["team_a"], True, fixture["team_h_difficulty"]),
+            (fixture["team_a"], fixture["team_h"], False, fixture["team_a_difficulty"]),
+        ):
+            row = row_of.get(team_id)
+            if row is None:
+                continue
+            counts[row, gameweek] += 1
+            difficulty[row, gameweek] += team_difficulty
+            opponents[row][gameweek].append({
+                "opponent_id": opponent_id,
+                "opponent": short_names.get(opponent_id, "UNK"),
+                "home": is_home,
+                "difficulty": team_difficulty
+            })
+
+    return {
+        "teams": [{"id": team["id"], "name": team["name"], "short_name": team["short_name"]} for team in teams],
+        "last_gameweek": last_gameweek,
+        "counts": counts,
+        "difficulty": difficulty,
+        "opponents": opponents,
+        # Column g holds the total over gameweeks 1..g-1, so a window [a, b] is column b+1 minus column a
+        "cumulative_counts": np.concatenate([np.zeros((len(teams), 1), dtype=np.int64), np.cumsum(counts, axis=1)], axis=1),
+        "cumulative_difficulty": np.concatenate([np.zeros((len(teams), 1), dtype=np.int64), np.cumsum(difficulty, axis=1)], axis=1),
+        "default_gameweek": next(
+            (event["id"] for event in bootstrap_data["events"] if event["is_next"]),
+            next((event["id"] for event in bootstrap_data["events"] if event["is_current"]), 1)
+        )
+    }
+
+async def get_fixture_matrix() -> Dict[str, Any]:
+    """Get the fixture matrix for the current FPL data, building it on first use"""
+    return await get_versioned("fixture_matrix", lambda fpl_data: build_fixture_matrix(fpl_data["bootstrap"], fpl_data["fixtures"]))
+
+def window_totals(matrix: Dict[str, Any], start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fixture counts and difficulty sums of every team over gameweeks start..end
+
+    Returns:
+        Tuple of (counts, difficulty sums), one entry per team row
+    """
+    counts = matrix["cumulative_counts"][:, end + 1] - matrix["cumulative_counts"][:, start]
+    difficulty = matrix["cumulative_difficulty"][:, end + 1] - matrix["cumulative_difficulty"][:, start]
+    return counts, difficulty
+
+def resolve_window(matrix: Dict[str, Any], start: Optional[int], end: Optional[int], default_length: int = 6) -> Tuple[int, int]:
+    """
+    Fill in and clamp a gameweek window
+
+    Raises:
+        ValueError: If the window is empty
+    """
+    start = start if start is not None else matrix["default_gameweek"]
+    end = end if end is not None else start + default_length - 1
+    start, end = max(start, 1), min(end, matrix["last_gameweek"])
+    if start > end:
+        raise ValueError(f"Empty gameweek window {start}-{end}")
+    return start, end
+
+def fixture_ticker(matrix: Dict[str, Any], start: Optional[int] = None, end: Optional[int] = None, sort: str = "difficulty") -> Dict[str, Any]:
+    """
+    Every team's fixtures over a gameweek window, sorted by the run they face
+
+    Args:
+        matrix: Matrix from build_fixture_matrix
+        start, end: Inclusive gameweek window (default: the next six gameweeks)
+        sort: "difficulty" (lowest average FDR per fixture, more fixtures
+            first on ties), "total" (lowest summed FDR, counting each blank
+            gameweek as BLANK_DIFFICULTY, so a blank never makes a run look
+            easier), "fixtures" (most fixtures, then lowest average FDR) or
+            "team"; prefix with "-" to reverse
+
+    Returns:
+        Dictionary with the resolved window and one row per team
+
+    Raises:
+        ValueError: On an unknown sort or an empty window
+    """
+    descending = sort.startswith("-")
+    sort_name = sort.lstrip("-")
+    if sort_name not in TICKER_SORTS:
+        raise ValueError(f"Unknown sort {sort_name}; use one of {', '.join(TICKER_SORTS)}")
+    start, end = resolve_window(matrix, start, end)
+
+    counts, difficulty = window_totals(matrix, start, end)
+    average = np.divide(difficulty, counts, out=np.full(len(counts), np.inf), where=counts > 0)
+    names = np.array([team["name"] for team in matrix["teams"]])
+    window_counts = matrix["counts"][:, start:end + 1]
+
+    # np.lexsort sorts by the last key first
+    if sort_name == "difficulty":
+        order = np.lexsort((names, -counts, average))
+    elif sort_name == "total":
+        # A blank adds no difficulty of its own, so it is charged a fixed penalty
+        blanks = (window_counts == 0).sum(axis=1)
+        order = np.lexsort((names, difficulty + BLANK_DIFFICULTY * blanks))
+    elif sort_name == "fixtures":
+        order = np.lexsort((names, average, -counts))
+    else:
+        order = np.argsort(names, kind="stable")
+    if descending:
+        order = order[::-1]
+
+    gameweeks = list(range(start, end + 1))
+    rows = []
+    for row in order.tolist():
+        team = matrix["teams"][row]
+        rows.append({
+            "team_id": team["id"],
+            "team": team["name"],
+            "short_name": team["short_name"],
+            "fixture_count": int(counts[row]),
+            "total_difficulty": int(difficulty[row]),
+            "average_difficulty": round(float(average[row]), 2) if counts[row] else None,
+            "blanks": [gw for gw, count in zip(gameweeks, window_counts[row].tolist()) if count == 0],
+            "doubles": [gw for gw, count in zip(gameweeks, window_counts[row].tolist()) if count > 1],
+            "gameweeks": [
+                {"gameweek": gw, "fixtures": matrix["opponents"][row][gw]}
+                for gw in gameweeks
+            ]
+        })
+
+    return {"from": start, "to": end, "sort": sort, "teams": rows}
+
+register_versioned_cache_metrics("fixture_matrix", "fixtures", lambda matrix: int(matrix["counts"].sum()) // 2)
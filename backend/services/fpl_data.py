@@ -1,26 +1,47 @@
-import httpx
 import time
 import logging
 import asyncio
-from typing import Dict, Any
+import inspect
+from bisect import bisect_right
+from typing import Dict, Any, List, Optional, Callable
+from services.snapshot_diff import record_snapshot
+from services.push_hub import publish_refresh_events
+from services.cache_backend import get_cache_backend
+from services.leader_election import is_leader, on_elected, on_follow
+from services.upstream import upstream_client, FPL_API_BASE
+from services.fpl_schema import decode_bootstrap, decode_fixtures
+from services.metrics import record_cache_access, observe_histogram, inc_counter, register_gauge_callback, gauge_value
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Base FPL API URLs
-FPL_BOOTSTRAP_URL = "https://fantasy.premierleague.com/api/bootstrap-static/"
-FPL_FIXTURES_URL = "https://fantasy.premierleague.com/api/fixtures/"
+FPL_BOOTSTRAP_URL = f"{FPL_API_BASE}/bootstrap-static/"
+FPL_FIXTURES_URL = f"{FPL_API_BASE}/fixtures/"
+
+# Position names by element_type
+POSITION_NAMES = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
 
 # Cache configuration
 CACHE_TTL = 86400  # 24 hour cache lifetime
 _fpl_data_cache = {
     "data": None,
     "timestamp": 0,
+    "version": 0,
+    "shared_checked": 0,
     "refresh_task": None,
     "is_refreshing": False
 }
 
+# Structures derived from the FPL data (player index, fixture matrix,
+# projections), by cache name; each is rebuilt when the data version changes
+_versioned_cache = {}
+
+# Shared cache entry holding the latest snapshot for all workers
+SHARED_DATA_KEY = "fpl_data"
+SHARED_CHECK_INTERVAL = 5  # Seconds between checks for snapshots from other workers
+
 async def refresh_fpl_data_cache():
     """
     Background task to refresh the FPL data cache
@@ -33,63 +54,133 @@ async def refresh_fpl_data_cache():
     
     try:
         _fpl_data_cache["is_refreshing"] = True
-        logger.info("Starting automatic FPL data cache refresh")
         
-        # Fetch fresh data directly from the API
-        async with httpx.AsyncClient() as client:
-            # Fetch general data (includes players, teams, etc.)
-            bootstrap_response = await client.get(FPL_BOOTSTRAP_URL)
-            bootstrap_response.raise_for_status()
-            bootstrap_data = bootstrap_response.json()
+        # Only the leader downloads; followers consume whatever it has published
+        if not is_leader():
+            await load_shared_fpl_data(max_age=float("inf"))
+        # Another worker may already have refreshed the shared cache
+        elif await load_shared_fpl_data(max_age=CACHE_TTL):
+            logger.info("FPL data cache is fresh in the shared cache, skipping download")
+        else:
+            logger.info("Starting automatic FPL data cache refresh")
+            refresh_start = time.perf_counter()
             
-            # Get team name mapping for easier reference
-            teams = {team["id"]: team["name"] for team in bootstrap_data["teams"]}
+            # Fetch fresh data directly from the API
+            async with upstream_client() as client:
+                # Fetch general data (includes players, teams, etc.)
+                bootstrap_response = await client.get(FPL_BOOTSTRAP_URL)
+                bootstrap_response.raise_for_status()
+                bootstrap_data = decode_bootstrap(bootstrap_response.content)
+                
+                # Process injury data
+                injured_players = extract_injuries(bootstrap_data)
+                
+                # Fetch fixture data
+                fixtures_response = await client.get(FPL_FIXTURES_URL)
+                fixtures_response.raise_for_status()
+                fixtures_data = decode_fixtures(fixtures_response.content)
+                
+                # Compile the data, tagged with the version it will be published under
+                # The raw body is kept for the bootstrap-static proxy, which serves it unchanged
+                fresh_data = {
+                    "bootstrap": bootstrap_data,
+                    "bootstrap_raw": bootstrap_response.content,
+                    "fixtures": fixtures_data,
+                    "injuries": injured_players,
+                    "injury_index": build_injury_index(injured_players),
+                    "version": next_data_version()
+                }
             
-            # Process injury data
-            injured_players = []
-            for p in bootstrap_data["elements"]:
-                if p["status"] not in ["a", "u"]:  # Not available or unknown
-                    injured_players.append({
-                        "id": p["id"],
-                        "player": f"{p['first_name']} {p['second_name']}",
-                        "web_name": p["web_name"],
-                        "team": teams.get(p["team"], "Unknown"),
-                        "team_id": p["team"],
-                        "status": p["status"],
-                        "news": p["news"],
-                        "chance_of_playing": p["chance_of_playing_next_round"]
-                    })
+            timestamp = time.time()
+            publish_fpl_data(fresh_data, timestamp)
             
-            # Fetch fixture data
-            fixtures_response = await client.get(FPL_FIXTURES_URL)
-            fixtures_response.raise_for_status()
-            fixtures_data = fixtures_response.json()
+            # Share the new snapshot with the other workers
+            await get_cache_backend().set(SHARED_DATA_KEY, {
+                "data": fresh_data,
+                "timestamp": timestamp,
+                "version": fresh_data["version"]
+            })
             
-            # Compile the data
-            fresh_data = {
-                "bootstrap": bootstrap_data,
-                "fixtures": fixtures_data,
-                "injuries": injured_players
-            }
+            observe_histogram("fpl_cache_refresh_duration_seconds", time.perf_counter() - refresh_start, cache="fpl_data")
+            inc_counter("fpl_cache_refreshes_total", cache="fpl_data", outcome="success")
+            logger.info(f"FPL data cache refreshed successfully at {time.ctime()}")
         
-        # Update cache
-        _fpl_data_cache["data"] = fresh_data
-        _fpl_data_cache["timestamp"] = time.time()
-        
-        logger.info(f"FPL data cache refreshed successfully at {time.ctime()}")
-        
-        # Schedule next refresh after CACHE_TTL seconds
+        # Schedule next refresh after CACHE_TTL seconds, replacing any pending one
+        previous_task = _fpl_data_cache["refresh_task"]
+        if previous_task is not None and previous_task is not asyncio.current_task() and not previous_task.done():
+            previous_task.cancel()
         _fpl_data_cache["refresh_task"] = asyncio.create_task(schedule_next_refresh())
     except Exception as e:
+        inc_counter("fpl_cache_refreshes_total", cache="fpl_data", outcome="error")
         logger.error(f"Error refreshing FPL data cache: {str(e)}")
     finally:
         _fpl_data_cache["is_refreshing"] = False
 
+def publish_fpl_data(fresh_data: Dict[str, Any], timestamp: float) -> None:
+    """
+    Make a new FPL data snapshot the current one in this process
+    
+    Records the snapshot delta for /changes, swaps the cached data and pushes
+    deadline and injury updates to this process's subscribers.
+    """
+    # Record what changed since the previous snapshot for /changes
+    delta = record_snapshot(_fpl_data_cache["data"], fresh_data)
+    
+    # Update cache
+    _fpl_data_cache["data"] = fresh_data
+    _fpl_data_cache["timestamp"] = timestamp
+    _fpl_data_cache["version"] = fresh_data["version"]
+    
+    # Push deadline and injury updates to connected clients
+    publish_refresh_events(fresh_data, delta)
+
+async def load_shared_fpl_data(max_age: float) -> bool:
+    """
+    Adopt a newer FPL data snapshot published to the shared cache by another worker
+    
+    Args:
+        max_age: Only consider shared snapshots younger than this many seconds
+    
+    Returns:
+        True if this process now holds a snapshot younger than max_age
+    """
+    backend = get_cache_backend()
+    if not backend.is_shared:
+        return False
+    
+    _fpl_data_cache["shared_checked"] = time.time()
+    try:
+        shared = await backend.get(SHARED_DATA_KEY)
+    except Exception as e:
+        logger.warning(f"Error reading shared FPL data cache: {str(e)}")
+        return False
+    
+    if shared is None or time.time() - shared["timestamp"] > max_age:
+        return False
+    
+    if shared["version"] > _fpl_data_cache["version"]:
+        logger.info(f"Loading FPL data version {shared['version']} from the shared cache")
+        publish_fpl_data(shared["data"], shared["timestamp"])
+    
+    return True
+
 async def schedule_next_refresh():
     """Schedule the next cache refresh after CACHE_TTL seconds"""
     await asyncio.sleep(CACHE_TTL)
     await refresh_fpl_data_cache()
 
+async def refresh_if_stale():
+    """Refresh straight away if the data is missing or expired (run when elected leader)"""
+    if _fpl_data_cache["data"] is None or time.time() - _fpl_data_cache["timestamp"] > CACHE_TTL:
+        _fpl_data_cache["refresh_task"] = asyncio.create_task(refresh_fpl_data_cache())
+
+async def follow_shared_fpl_data():
+    """Pick up snapshots published by the leader (run periodically on followers)"""
+    await load_shared_fpl_data(max_age=float("inf"))
+
+on_elected(refresh_if_stale)
+on_follow(follow_shared_fpl_data)
+
 async def initialize_fpl_data_cache():
     """Initialize the cache refresh background task"""
     if _fpl_data_cache["refresh_task"] is None:
@@ -106,8 +197,14 @@ async def get_fpl_data() -> Dict[str, Any]:
     global _fpl_data_cache
     current_time = time.time()
     
+    # Pick up snapshots published by other workers, checking at most every few seconds
+    if current_time - _fpl_data_cache["shared_checked"] > SHARED_CHECK_INTERVAL:
+        await load_shared_fpl_data(max_age=CACHE_TTL)
+    
     # Check if cache is valid
-    if _fpl_data_cache["data"] is None or (current_time - _fpl_data_cache["timestamp"]) > CACHE_TTL:
+    is_valid = _fpl_data_cache["data"] is not None and (current_time - _fpl_data_cache["timestamp"]) <= CACHE_TTL
+    record_cache_access("fpl_data", is_valid)
+    if not is_valid:
         # Cache expired or not initialized, fetch fresh data
         if not _fpl_data_cache["is_refreshing"]:  # Only if not already refreshing
             await refresh_fpl_data_cache()
@@ -121,42 +218,243 @@ async def get_fpl_data() -> Dict[str, Any]:
 
 async def fetch_fpl_data_directly():
     """Direct fetch from API when cache is not available"""
-    async with httpx.AsyncClient() as client:
+    async with upstream_client() as client:
         # Fetch general data (includes players, teams, etc.)
         bootstrap_response = await client.get(FPL_BOOTSTRAP_URL)
         bootstrap_response.raise_for_status()
-        bootstrap_data = bootstrap_response.json()
-        
-        # Get team name mapping for easier reference
-        teams = {team["id"]: team["name"] for team in bootstrap_data["teams"]}
+        bootstrap_data = decode_bootstrap(bootstrap_response.content)
         
         # Process injury data
-        injured_players = []
-        for p in bootstrap_data["elements"]:
-            if p["status"] not in ["a", "u"]:  # Not available or unknown
-                injured_players.append({
-                    "id": p["id"],
-                    "player": f"{p['first_name']} {p['second_name']}",
-                    "web_name": p["web_name"],
-                    "team": teams.get(p["team"], "Unknown"),
-                    "team_id": p["team"],
-                    "status": p["status"],
-                    "news": p["news"],
-                    "chance_of_playing": p["chance_of_playing_next_round"]
-                })
+        injured_players = extract_injuries(bootstrap_data)
         
         # Fetch fixture data
         fixtures_response = await client.get(FPL_FIXTURES_URL)
         fixtures_response.raise_for_status()
-        fixtures_data = fixtures_response.json()
+        fixtures_data = decode_fixtures(fixtures_response.content)
         
         # Return combined data including injuries
+        # (version 0 marks data that never went through the cache)
         return {
             "bootstrap": bootstrap_data,
+            "bootstrap_raw": bootstrap_response.content,
             "fixtures": fixtures_data,
-            "injuries": injured_players
+            "injuries": injured_players,
+            "injury_index": build_injury_index(injured_players),
+            "version": 0
         }
 
+def next_data_version() -> int:
+    """
+    Get the version for a freshly fetched FPL data snapshot
+    
+    Versions are millisecond timestamps (at least one more than the current
+    version), so they keep increasing across restarts and between workers and a
+    client's version from before a restart is never mistaken for a newer one.
+    """
+    return max(_fpl_data_cache["version"] + 1, int(time.time() * 1000))
+
+def get_data_version() -> int:
+    """
+    Get the version of the currently cached FPL data
+    
+    The version increases on every successful refresh, so anything derived
+    from the FPL data (prompts, indexes, serialized responses) can be keyed on it.
+    """
+    return _fpl_data_cache["version"]
+
+def _fpl_data_cache_metrics():
+    """Report FPL data cache size, age and version at scrape time"""
+    data = _fpl_data_cache["data"]
+    if data is None:
+        return {}
+    return {
+        **gauge_value(len(data["bootstrap"]["elements"]), cache="fpl_data", metric="elements"),
+        **gauge_value(len(data["fixtures"]), cache="fpl_data", metric="fixtures"),
+        **gauge_value(len(data["injuries"]), cache="fpl_data", metric="injuries"),
+        **gauge_value(_fpl_data_cache["version"], cache="fpl_data", metric="version"),
+        **gauge_value(time.time() - _fpl_data_cache["timestamp"], cache="fpl_data", metric="age_seconds"),
+    }
+
+register_gauge_callback("fpl_cache_state", "Cache size, age and version, by cache and metric", _fpl_data_cache_metrics)
+
+async def get_versioned(name: str, build: Callable[[Dict[str, Any]], Any]) -> Any:
+    """
+    Get a structure derived from the current FPL data, building it once per data version
+
+    Args:
+        name: Cache name, as reported in the cache metrics
+        build: Builds the structure from the FPL data; may be async
+
+    Returns:
+        The structure for the current data version
+    """
+    fpl_data = await get_fpl_data()
+    version = fpl_data.get("version", 0)
+
+    entry = _versioned_cache.get(name)
+    is_valid = entry is not None and entry["version"] == version
+    record_cache_access(name, is_valid)
+    if is_valid:
+        return entry["value"]
+
+    value = build(fpl_data)
+    if inspect.isawaitable(value):
+        value = await value
+    # Data fetched directly (version 0) is used once and not kept
+    if version > 0:
+        _versioned_cache[name] = {"value": value, "version": version}
+    return value
+
+def register_versioned_cache_metrics(name: str, metric: str, size: Callable[[Any], float]) -> None:
+    """Report the size of a get_versioned structure at scrape time"""
+    def report():
+        entry = _versioned_cache.get(name)
+        if entry is None:
+            return {}
+        return gauge_value(size(entry["value"]), cache=name, metric=metric)
+
+    register_gauge_callback("fpl_cache_state", "Cache size, age and version, by cache and metric", report)
+
+def extract_injuries(bootstrap_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Extract the players flagged as injured, doubtful or unavailable from bootstrap data
+    
+    Returns:
+        List of injury records in bootstrap element order
+    """
+    # Get team name mapping for easier reference
+    teams = {team["id"]: team["name"] for team in bootstrap_data["teams"]}
+    
+    injured_players = []
+    for p in bootstrap_data["elements"]:
+        if p["status"] not in ["a", "u"]:  # Not available or unknown
+            injured_players.append({
+                "id": p["id"],
+                "player": f"{p['first_name']} {p['second_name']}",
+                "web_name": p["web_name"],
+                "team": teams.get(p["team"], "Unknown"),
+                "team_id": p["team"],
+                "position": POSITION_NAMES.get(p["element_type"], "UNK"),
+                "status": p["status"],
+                "news": p["news"],
+                "chance_of_playing": p["chance_of_playing_next_round"]
+            })
+    
+    return injured_players
+
+def build_injury_index(injuries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build lookup structures over the injury list, once per data refresh
+    
+    Every bucket keeps the records in their original order, so any single bucket
+    can be returned as-is without re-sorting.
+    
+    Returns:
+        Dictionary with the full list plus id, team, status, position and
+        chance-of-playing buckets
+    """
+    by_id = {}
+    by_team = {}
+    by_status = {}
+    by_position = {}
+    by_chance = {}
+    team_names = {}
+    
+    for injury in injuries:
+        by_id[injury["id"]] = injury
+        by_team.setdefault(injury["team_id"], []).append(injury)
+        by_status.setdefault(injury["status"], []).append(injury)
+        by_position.setdefault(injury["position"], []).append(injury)
+        team_names[injury["team"].lower()] = injury["team_id"]
+        
+        # Unknown chance of playing is left out of the chance buckets
+        if injury["chance_of_playing"] is not None:
+            by_chance.setdefault(injury["chance_of_playing"], []).append(injury)
+    
+    # Cumulative buckets: every record whose chance of playing is at most the threshold
+    chance_thresholds = sorted(by_chance.keys())
+    by_max_chance = {}
+    order = {injury["id"]: position for position, injury in enumerate(injuries)}
+    cumulative = []
+    for threshold in chance_thresholds:
+        cumulative = sorted(cumulative + by_chance[threshold], key=lambda x: order[x["id"]])
+        by_max_chance[threshold] = cumulative
+    
+    # Group by team name, ordered by team name, as served by /injuries?group_by_team=true
+    grouped_by_team = {
+        records[0]["team"]: records
+        for records in sorted(by_team.values(), key=lambda records: records[0]["team"])
+    }
+    
+    return {
+        "all": injuries,
+        "by_id": by_id,
+        "by_team": by_team,
+        "by_status": by_status,
+        "by_position": by_position,
+        "chance_thresholds": chance_thresholds,
+        "by_max_chance": by_max_chance,
+        "grouped_by_team": grouped_by_team,
+        "team_ids_by_name": team_names
+    }
+
+def query_injuries(
+    injury_index: Dict[str, Any],
+    team_id: Optional[int] = None,
+    status: Optional[str] = None,
+    max_chance: Optional[int] = None,
+    position: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Filter injuries using the injury index
+    
+    The smallest matching bucket is used as the starting point and the remaining
+    filters are checked against its records only.
+    
+    Returns:
+        Matching injury records in their original order
+    """
+    candidates = []
+    
+    if team_id is not None:
+        candidates.append(injury_index["by_team"].get(team_id, []))
+    if status is not None:
+        candidates.append(injury_index["by_status"].get(status, []))
+    if position is not None:
+        candidates.append(injury_index["by_position"].get(position, []))
+    if max_chance is not None:
+        thresholds = injury_index["chance_thresholds"]
+        position_in_thresholds = bisect_right(thresholds, max_chance) - 1
+        if position_in_thresholds < 0:
+            candidates.append([])
+        else:
+            candidates.append(injury_index["by_max_chance"][thresholds[position_in_thresholds]])
+    
+    if not candidates:
+        return injury_index["all"]
+    
+    base = min(candidates, key=len)
+    if len(candidates) == 1:
+        return base
+    
+    return [
+        injury for injury in base
+        if (team_id is None or injury["team_id"] == team_id)
+        and (status is None or injury["status"] == status)
+        and (position is None or injury["position"] == position)
+        and (max_chance is None or (injury["chance_of_playing"] is not None and injury["chance_of_playing"] <= max_chance))
+    ]
+
+def get_injury(player_id, injury_index) -> Optional[Dict[str, Any]]:
+    """Get the injury record for a player, or None if the player is not injured"""
+    return injury_index["by_id"].get(player_id)
+
 def is_player_injured(player_id, injuries_data):
-    """Check if a player is injured based on player ID"""
+    """
+    Check if a player is injured based on player ID
+    
+    Accepts either the injury index (constant-time lookup) or the plain injuries list
+    """
+    if isinstance(injuries_data, dict):
+        return player_id in injuries_data["by_id"]
     return any(p["id"] == player_id for p in injuries_data)
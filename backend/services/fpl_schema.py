@@ -0,0 +1,148 @@
+import json
+import logging
+from typing import Dict, Any, List, Optional, TypedDict
+
+import msgspec
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Compact schemas for the FPL payloads kept in the shared cache
+#
+# The API sends ~100 fields per player; these list only the fields the backend
+# reads. msgspec skips everything else while parsing, so the unused fields are
+# never materialized as Python objects. They are TypedDicts rather than Structs
+# so every consumer keeps working with plain dicts.
+#
+# Add a field here before reading it from cached FPL data.
+
+class Element(TypedDict):
+    id: int
+    web_name: str
+    first_name: str
+    second_name: str
+    team: int
+    element_type: int
+    now_cost: int
+    form: str
+    points_per_game: str
+    selected_by_percent: str
+    total_points: int
+    minutes: int
+    status: str
+    news: str
+    news_added: Optional[str]
+    chance_of_playing_this_round: Optional[int]
+    chance_of_playing_next_round: Optional[int]
+
+class Team(TypedDict):
+    id: int
+    name: str
+    short_name: str
+    strength_attack_home: int
+    strength_attack_away: int
+    strength_defence_home: int
+    strength_defence_away: int
+
+class Event(TypedDict):
+    id: int
+    name: str
+    deadline_time: str
+    average_entry_score: int
+    finished: bool
+    data_checked: bool
+    is_previous: bool
+    is_current: bool
+    is_next: bool
+
+class ElementType(TypedDict):
+    id: int
+    singular_name_short: str
+    squad_min_play: int
+    squad_max_play: int
+
+class Bootstrap(TypedDict):
+    events: List[Event]
+    teams: List[Team]
+    elements: List[Element]
+    element_types: List[ElementType]
+
+class Fixture(TypedDict):
+    id: int
+    event: Optional[int]
+    kickoff_time: Optional[str]
+    started: Optional[bool]
+    finished: bool
+    finished_provisional: bool
+    minutes: int
+    team_h: int
+    team_a: int
+    team_h_score: Optional[int]
+    team_a_score: Optional[int]
+    team_h_difficulty: int
+    team_a_difficulty: int
+
+class ElementHistory(TypedDict):
+    element: int
+    fixture: int
+    round: int
+    kickoff_time: Optional[str]
+    opponent_team: int
+    was_home: bool
+    minutes: int
+    total_points: int
+    goals_scored: int
+    assists: int
+    clean_sheets: int
+    goals_conceded: int
+    saves: int
+    bonus: int
+    bps: int
+    influence: str
+    creativity: str
+    threat: str
+    ict_index: str
+    expected_goals: str
+    expected_assists: str
+    expected_goal_involvements: str
+    expected_goals_conceded: str
+    value: int
+    selected: int
+    transfers_balance: int
+
+class ElementSummary(TypedDict):
+    history: List[ElementHistory]
+
+# Decoders are built once; building one compiles the schema
+_bootstrap_decoder = msgspec.json.Decoder(Bootstrap)
+_fixtures_decoder = msgspec.json.Decoder(List[Fixture])
+_element_summary_decoder = msgspec.json.Decoder(ElementSummary)
+
+def _decode(decoder: msgspec.json.Decoder, raw: bytes, name: str) -> Any:
+    try:
+        return decoder.decode(raw)
+    except msgspec.ValidationError as e:
+        # The API changed shape: serve the full payload rather than failing the refresh
+        logger.warning(f"FPL {name} payload doesn't match the compact schema ({str(e)}), keeping it whole")
+        return json.loads(raw)
+
+def decode_bootstrap(raw: bytes) -> Dict[str, Any]:
+    """
+    Decode a bootstrap-static response body, keeping only the fields in Bootstrap
+
+    Args:
+        raw: The response body as bytes
+
+    Returns:
+        Dict with events, teams, elements and element_types
+    """
+    return _decode(_bootstrap_decoder, raw, "bootstrap")
+
+def decode_fixtures(raw: bytes) -> List[Dict[str, Any]]:
+    """Decode a fixtures response body, keeping only the fields in Fixture"""
+    return _decode(_fixtures_decoder, raw, "fixtures")
+
+def decode_element_summary(raw: bytes) -> Dict[str, Any]:
+    """Decode an element-summary response body, keeping only the gameweek history"""
+    return _decode(_element_summary_decoder, raw, "element-summary")
@@ -1,91 +1,296 @@
 import os
+import asyncio
 import google.generativeai as genai
 from dotenv import load_dotenv
+from datetime import timedelta
+import logging
 import re
+import time
+from services.fpl_data import build_injury_index, query_injuries
+from services.cache_backend import get_cache_backend
+from services.metrics import observe_histogram, inc_counter, add_gauge, record_cache_access
+from services.tracing import span, set_span_attribute
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
+
+# Optional endpoint override, e.g. a local stand-in for load testing (see loadtest/)
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+if GEMINI_API_ENDPOINT:
+    genai.configure(api_key=GEMINI_API_KEY, transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+else:
+    genai.configure(api_key=GEMINI_API_KEY)
 
 # Use a model that's available in the list
-model = genai.GenerativeModel("models/gemini-1.5-pro")
+GEMINI_MODEL_NAME = "models/gemini-1.5-pro"
+model = genai.GenerativeModel(GEMINI_MODEL_NAME)
 
-async def get_gemini_response(user_input, fpl_data, team_data=None):
-    """Get response from Gemini for the given user input and FPL data"""
-    try:
-        # Basic prompt to give context
-        system_prompt = """You are an FPL (Fantasy Premier League) Assistant with expertise in fantasy football.
+SYSTEM_PROMPT = """You are an FPL (Fantasy Premier League) Assistant with expertise in fantasy football.
         Your purpose is to provide helpful, accurate, and tactical advice on all things FPL.
         Use data-backed recommendations when available.
         Focus on being concise but informative, strategic, and up-to-date with the latest FPL information."""
+
+# Cached prompt prefix - the system prompt and FPL context are the same for every
+# user until the next FPL data refresh, so they are registered once per data version
+CONTEXT_CACHE_TTL = 86400  # Matches the FPL data cache lifetime
+CONTEXT_CACHE_MIN_TOKENS = 32768  # Smallest prefix Gemini 1.5 Pro accepts for context caching
+CONTEXT_CACHE_KEY = "gemini_prompt_prefix"  # Shared cache key prefix for the registered content name
+_prompt_prefix_cache = {
+    "version": None,
+    "model": None,
+    "cached_content": None
+}
+
+async def get_gemini_response(user_input, fpl_data, team_data=None):
+    """Get response from Gemini for the given user input and FPL data"""
+    try:
+        # The shared prefix (system prompt + FPL snapshot) lives in the prefix model,
+        # so the request itself only carries the user-specific part
+        with span("gemini_prefix"):
+            prefix_model = await get_prefix_model(fpl_data)
+        request_prompt = build_team_context(team_data) + "\n" + user_input
         
-        # Add user team context if available
-        team_context = ""
-        if team_data:
-            # Extract team context
-            team_name = team_data.get('name', 'Unknown')
-            team_player = team_data.get('player_name', 'Unknown')
-            team_summary = team_data.get('summary', {})
-            overall_rank = team_summary.get('overall_rank', 'Unknown')
-            team_value = team_summary.get('value', 0) / 10 if team_summary.get('value') else 'Unknown'
-            
-            # Extract current squad if available
-            squad_info = ""
-            if team_data.get('picks'):
-                picks = team_data.get('picks', [])
-                # Format picks info
-                squad_info = "\nCurrent Squad:\n"
-                for pick in picks:
-                    is_captain = pick.get('is_captain', False)
-                    is_vice = pick.get('is_vice_captain', False)
-                    multiplier = pick.get('multiplier', 1)
-                    position = "Captain" if is_captain else "Vice Captain" if is_vice else ""
-                    # Add player info to squad
-                    squad_info += f"- Player ID: {pick.get('element')} {position}\n"
-                
-                active_chip = team_data.get('active_chip')
-                if active_chip:
-                    squad_info += f"\nActive chip: {active_chip}\n"
-            
-            team_context = f"""
-            I'm providing you with specific data about the user's FPL team:
-            Team name: {team_name}
-            Manager: {team_player}
-            Overall rank: {overall_rank}
-            Team value: £{team_value}m
-            {squad_info}
-            
-            Please provide personalized advice considering this team information.
-            """
-        
-        # Create messages for the API
-        messages = [
-            {"role": "system", "content": system_prompt + team_context},
-            {"role": "user", "content": user_input}
-        ]
-        
-        # Add FPL data context if available
-        if fpl_data:
-            current_gw = fpl_data.get('current_gameweek', {})
-            gw_info = f"Current gameweek: {current_gw.get('id', 'Unknown')}, Status: {current_gw.get('name', 'Unknown')}"
-            
-            fpl_context = f"""
-            Here's some recent FPL data to help with your response:
-            {gw_info}
-            """
-            
-            messages[0]["content"] += "\n" + fpl_context
-        
-        # Generate response
-        model = genai.GenerativeModel(model_name="gemini-pro")
-        response = model.generate_content(messages)
+        response = generate_with_metrics(prefix_model, request_prompt, operation="chat")
         
         return response.text
     except Exception as e:
         logger.error(f"Error getting Gemini response: {e}")
         return "I'm sorry, I couldn't process your request at the moment. Please try again later."
 
+# Token counts reported in Gemini usage metadata, by metric label
+USAGE_TOKEN_FIELDS = {
+    "prompt": "prompt_token_count",
+    "cached": "cached_content_token_count",
+    "completion": "candidates_token_count"
+}
+
+def generate_with_metrics(generative_model, prompt: str, operation: str):
+    """
+    Call generate_content, recording latency, outcome and token usage
+    
+    Args:
+        generative_model: The Gemini model to call
+        prompt: The request prompt
+        operation: Metric label for the kind of request ("chat", "team_rating")
+    
+    Returns:
+        The Gemini response
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    add_gauge("llm_requests_in_flight", 1)
+    try:
+        with span("gemini", operation=operation):
+            response = generative_model.generate_content(prompt)
+            usage = getattr(response, "usage_metadata", None)
+            if usage is not None:
+                set_span_attribute("prompt_tokens", getattr(usage, "prompt_token_count", 0))
+        outcome = "success"
+    finally:
+        add_gauge("llm_requests_in_flight", -1)
+        observe_histogram("llm_request_duration_seconds", time.perf_counter() - start, operation=operation, outcome=outcome)
+    
+    if usage is not None:
+        for token_type, field in USAGE_TOKEN_FIELDS.items():
+            count = getattr(usage, field, 0) or 0
+            if count:
+                inc_counter("llm_tokens_total", count, operation=operation, type=token_type)
+    
+    return response
+
+def build_shared_prefix(fpl_data) -> str:
+    """
+    Build the part of the chat prompt that is identical for every user
+    
+    Args:
+        fpl_data: Compact FPL data from the chat route (current gameweek and top players)
+    
+    Returns:
+        System prompt followed by the FPL data context
+    """
+    prefix = SYSTEM_PROMPT
+    
+    # Add FPL data context if available
+    if fpl_data:
+        current_gw = fpl_data.get('current_gameweek') or {}
+        gw_info = f"Current gameweek: {current_gw.get('id', 'Unknown')}, Status: {current_gw.get('name', 'Unknown')}"
+        
+        top_players = "\n".join(
+            f"- {p.get('web_name', 'Unknown')}: {p.get('total_points', 0)} points, form {p.get('form', '0.0')}"
+            for p in fpl_data.get('top_players', [])
+        )
+        
+        prefix += f"""
+        
+        Here's some recent FPL data to help with your response:
+        {gw_info}
+        Top players by points:
+        {top_players}
+        """
+        
+        if fpl_data.get('top_projected'):
+            top_projected = "\n".join(
+                f"- {p['web_name']} ({p['team']}, {p['position']}, £{p['price']}m): {p['expected_points']} expected points"
+                for p in fpl_data['top_projected']
+            )
+            prefix += f"""
+        Top projected players for gameweek {fpl_data.get('projected_gameweek')}:
+        {top_projected}
+        """
+    
+    return prefix
+
+def build_team_context(team_data) -> str:
+    """Build the user-specific part of the chat prompt from the user's team data"""
+    if not team_data:
+        return ""
+    
+    # Extract team context
+    team_name = team_data.get('name', 'Unknown')
+    team_player = team_data.get('player_name', 'Unknown')
+    team_summary = team_data.get('summary', {})
+    overall_rank = team_summary.get('overall_rank', 'Unknown')
+    team_value = team_summary.get('value', 0) / 10 if team_summary.get('value') else 'Unknown'
+    
+    # Extract current squad if available
+    squad_info = ""
+    if team_data.get('picks'):
+        picks = team_data.get('picks', [])
+        # Format picks info
+        squad_info = "\nCurrent Squad:\n"
+        for pick in picks:
+            is_captain = pick.get('is_captain', False)
+            is_vice = pick.get('is_vice_captain', False)
+            position = "Captain" if is_captain else "Vice Captain" if is_vice else ""
+            # Add player info to squad
+            squad_info += f"- Player ID: {pick.get('element')} {position}\n"
+        
+        active_chip = team_data.get('active_chip')
+        if active_chip:
+            squad_info += f"\nActive chip: {active_chip}\n"
+    
+    # Transfers found by the squad optimizer, within budget and squad rules
+    suggestions = team_data.get('suggested_transfers')
+    if suggestions:
+        gameweeks = suggestions.get('gameweeks') or []
+        window = f"gameweeks {gameweeks[0]}-{gameweeks[-1]}" if gameweeks else "the next gameweeks"
+        if suggestions.get('transfers'):
+            transfer_lines = "\n".join(
+                f"- Out: {t['out']['web_name']} (£{t['out']['price']}m, {t['out']['expected_points']} xP), "
+                f"In: {t['in']['web_name']} (£{t['in']['price']}m, {t['in']['expected_points']} xP)"
+                for t in suggestions['transfers']
+            )
+            squad_info += (
+                f"\nBest transfers with {team_data.get('free_transfers', 1)} free transfer(s), for {window} "
+                f"({suggestions['hits']} points in hits, {suggestions['expected_gain']:+} projected points):\n{transfer_lines}\n"
+            )
+        else:
+            squad_info += f"\nNo transfer improves the squad's projected points for {window}; rolling the free transfer is best.\n"
+    elif team_data.get('transfer_note'):
+        squad_info += f"\n{team_data['transfer_note']}.\n"
+    
+    # Captain candidates ranked by projected points, with doubles and minutes risk
+    captain_options = team_data.get('captain_options')
+    if captain_options and captain_options.get('candidates'):
+        candidate_lines = "\n".join(
+            f"- {c['web_name']} ({c['team']}, vs {', '.join(c['fixtures']) or 'no fixture'}): "
+            f"{c['captain_points']} projected captain points (± {c['captain_std']}), "
+            f"{round(c['chance_of_playing'] * 100)}% chance of playing, {c['ownership']}% owned"
+            for c in [c for c in captain_options['candidates'] if c['in_lineup']][:3]
+        )
+        squad_info += f"\nBest captains for gameweek {captain_options['gameweek']}:\n{candidate_lines}\n"
+    
+    return f"""
+    I'm providing you with specific data about the user's FPL team:
+    Team name: {team_name}
+    Manager: {team_player}
+    Overall rank: {overall_rank}
+    Team value: £{team_value}m
+    {squad_info}
+    
+    Please provide personalized advice considering this team information.
+    """
+
+async def get_prefix_model(fpl_data, client=genai):
+    """
+    Get a model bound to the shared prompt prefix for the current FPL data version
+    
+    The prefix is registered with Gemini context caching once per data version,
+    and shared with the other workers through the cache backend. Prefixes below
+    the model's minimum cacheable size, or any caching error, fall back to
+    passing the prefix inline as the system instruction. Gemini API calls run in
+    a thread so the event loop keeps serving other requests.
+    
+    Args:
+        fpl_data: Compact FPL data from the chat route, including its data version
+        client: Module providing the Gemini API (swappable for a local stub in tests)
+    
+    Returns:
+        A GenerativeModel that only needs the user-specific prompt
+    """
+    version = fpl_data.get("version") if fpl_data else None
+    
+    is_cached = _prompt_prefix_cache["model"] is not None and _prompt_prefix_cache["version"] == version
+    record_cache_access("prompt_prefix", is_cached)
+    if is_cached:
+        return _prompt_prefix_cache["model"]
+    
+    prefix = build_shared_prefix(fpl_data)
+    cached_content = None
+    prefix_model = None
+    
+    try:
+        backend = get_cache_backend()
+        shared_key = f"{CONTEXT_CACHE_KEY}:{version}"
+        shared_name = await backend.get(shared_key) if backend.is_shared else None
+        if shared_name is not None:
+            # Another worker already registered this version's prefix
+            shared_content = await asyncio.to_thread(client.caching.CachedContent.get, shared_name)
+            prefix_model = client.GenerativeModel.from_cached_content(cached_content=shared_content)
+            logger.info(f"Using cached prompt prefix {shared_name} for FPL data version {version}")
+        else:
+            counter = client.GenerativeModel(model_name=GEMINI_MODEL_NAME)
+            token_count = (await asyncio.to_thread(counter.count_tokens, prefix)).total_tokens
+            if token_count < CONTEXT_CACHE_MIN_TOKENS:
+                logger.info(f"Prompt prefix of {token_count} tokens is below the {CONTEXT_CACHE_MIN_TOKENS} token caching minimum, passing it inline")
+            else:
+                cached_content = await asyncio.to_thread(
+                    client.caching.CachedContent.create,
+                    model=GEMINI_MODEL_NAME,
+                    display_name=f"fpl-chat-prefix-v{version}",
+                    system_instruction=prefix,
+                    ttl=timedelta(seconds=CONTEXT_CACHE_TTL)
+                )
+                prefix_model = client.GenerativeModel.from_cached_content(cached_content=cached_content)
+                if backend.is_shared:
+                    await backend.set(shared_key, cached_content.name, ttl=CONTEXT_CACHE_TTL)
+                    # Other workers may still use it after this one moves on, so it expires with its TTL
+                    cached_content = None
+                logger.info(f"Registered cached prompt prefix for FPL data version {version}")
+    except Exception as e:
+        logger.info(f"Context caching unavailable, using inline prompt prefix: {e}")
+        cached_content = None
+    
+    if prefix_model is None:
+        prefix_model = client.GenerativeModel(model_name=GEMINI_MODEL_NAME, system_instruction=prefix)
+    
+    # The previous version's cached content is no longer used
+    previous_content = _prompt_prefix_cache["cached_content"]
+    if previous_content is not None:
+        try:
+            await asyncio.to_thread(previous_content.delete)
+        except Exception as e:
+            logger.warning(f"Error deleting stale cached prompt prefix: {e}")
+    
+    _prompt_prefix_cache["version"] = version
+    _prompt_prefix_cache["model"] = prefix_model
+    _prompt_prefix_cache["cached_content"] = cached_content
+    
+    return prefix_model
+
 def is_team_rating_request(user_input: str) -> bool:
     """Detect if the user is asking for team rating"""
     input_lower = user_input.lower()
@@ -111,6 +316,26 @@ def is_team_rating_request(user_input: str) -> bool:
         
     return False
 
+def is_transfer_request(user_input: str) -> bool:
+    """Detect if the user is asking about transfers"""
+    input_lower = user_input.lower()
+    
+    transfer_keywords = [
+        "transfer", "who should i buy", "who should i sell", "who to buy", "who to sell",
+        "bring in", "ship out", "swap", "replace", "upgrade", "downgrade",
+        "wildcard", "take a hit", "sell ", "buy "
+    ]
+    
+    return any(keyword in input_lower for keyword in transfer_keywords)
+
+def is_captaincy_request(user_input: str) -> bool:
+    """Detect if the user is asking who to captain"""
+    input_lower = user_input.lower()
+    
+    captain_keywords = ["captain", "armband", "(c)", "triple cap"]
+    
+    return any(keyword in input_lower for keyword in captain_keywords)
+
 async def rate_fpl_team(user_input: str, fpl_data: dict) -> str:
     """Rate a user's FPL team on a scale from 1-10"""
     bootstrap_data = fpl_data["bootstrap"]
@@ -119,11 +344,12 @@ async def rate_fpl_team(user_input: str, fpl_data: dict) -> str:
     teams_data = {team["id"]: team for team in bootstrap_data["teams"]}
     
     # Process injury data for the prompt - select only serious injuries
-    injury_lines = []
-    for injury in injuries_data:
-        # Only include serious injuries that would impact team selection
-        if injury['status'] == 'i' and injury.get('chance_of_playing') == 0:
-            injury_lines.append(f"{injury['player']} ({injury['team']})")
+    # that would impact team selection
+    injury_index = fpl_data.get("injury_index") or build_injury_index(injuries_data)
+    injury_lines = [
+        f"{injury['player']} ({injury['team']})"
+        for injury in query_injuries(injury_index, status="i", max_chance=0)
+    ]
     
     # Limit to just 5 key injuries
     injury_lines = injury_lines[:5]
@@ -196,7 +422,7 @@ USER'S TEAM:
 """.strip()
 
     try:
-        response = model.generate_content(prompt)
+        response = generate_with_metrics(model, prompt, operation="team_rating")
         raw_text = response.text
         
         # Remove markdown formatting and post-process
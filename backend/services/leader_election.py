@@ -0,0 +1,205 @@
+import asyncio
+import os
+import socket
+import uuid
+import logging
+from typing import Callable, Awaitable, List, Optional
+
+from services.cache_backend import CACHE_BACKEND, CACHE_SHM_DIR, RedisCacheBackend, get_cache_backend
+from services.metrics import register_gauge_callback, gauge_value
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; file leases fall back to single-process mode
+    fcntl = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Election mode: "none" (every process refreshes), "file" (one process per host)
+# or "redis" (one process across hosts). Follows the cache backend by default.
+LEADER_ELECTION = os.getenv(
+    "LEADER_ELECTION",
+    {"shm": "file", "redis": "redis"}.get(CACHE_BACKEND, "none")
+)
+LEADER_LOCK_PATH = os.getenv("LEADER_LOCK_PATH", os.path.join(CACHE_SHM_DIR, "leader.lock"))
+LEADER_LEASE_KEY = "leader_lease"
+LEASE_TTL = 30  # Seconds a Redis lease survives without renewal
+RENEW_INTERVAL = 10  # Seconds between lease renewals (and follower syncs)
+
+# Release or extend the lease only if we still own it
+RENEW_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+class FileLease:
+    """
+    Leadership held through an exclusive lock on a local file
+
+    The kernel releases the lock when the holding process dies, so another
+    worker on the same host takes over at its next attempt.
+    """
+    def __init__(self, path: str = LEADER_LOCK_PATH):
+        self.path = path
+        self._file = None
+
+    async def acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        if fcntl is None:
+            return True
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        lock_file = open(self.path, "a+")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+
+        self._file = lock_file
+        return True
+
+    async def release(self) -> None:
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+class RedisLease:
+    """
+    Leadership held through an expiring key on a Redis-protocol server
+
+    The holder renews the key well before it expires; if the holder dies the key
+    expires after LEASE_TTL and another process acquires it.
+    """
+    def __init__(self, client: RedisCacheBackend, owner: str, key: str = LEADER_LEASE_KEY, ttl: int = LEASE_TTL):
+        self.client = client
+        self.owner = owner
+        self.key = key
+        self.ttl_ms = ttl * 1000
+
+    async def acquire(self) -> bool:
+        if await self.client.execute("SET", self.key, self.owner, "NX", "PX", self.ttl_ms) == "OK":
+            return True
+        # Already ours: extend it
+        return await self.client.execute("EVAL", RENEW_SCRIPT, 1, self.key, self.owner, self.ttl_ms) == 1
+
+    async def release(self) -> None:
+        await self.client.execute("EVAL", RELEASE_SCRIPT, 1, self.key, self.owner)
+
+_leader_state = {
+    "lease": None,
+    "owner": f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}",
+    "is_leader": LEADER_ELECTION == "none",
+    "election_task": None,
+    "on_elected": [],  # Coroutine functions run when this process becomes leader
+    "on_follow": []  # Coroutine functions run on every renewal interval while following
+}
+
+def create_lease():
+    """Create the lease for the configured election mode, or None when disabled"""
+    if LEADER_ELECTION == "file":
+        return FileLease()
+    if LEADER_ELECTION == "redis":
+        backend = get_cache_backend()
+        client = backend if isinstance(backend, RedisCacheBackend) else RedisCacheBackend()
+        return RedisLease(client, _leader_state["owner"])
+    return None
+
+def is_leader() -> bool:
+    """Check whether this process should perform upstream refreshes"""
+    return _leader_state["is_leader"]
+
+def on_elected(callback: Callable[[], Awaitable[None]]) -> None:
+    """Register a coroutine function to run when this process becomes leader"""
+    _leader_state["on_elected"].append(callback)
+
+def on_follow(callback: Callable[[], Awaitable[None]]) -> None:
+    """Register a coroutine function to run periodically while this process follows"""
+    _leader_state["on_follow"].append(callback)
+
+async def _run_callbacks(callbacks: List[Callable[[], Awaitable[None]]]) -> None:
+    for callback in callbacks:
+        try:
+            await callback()
+        except Exception as e:
+            logger.error(f"Error in leadership callback {callback.__name__}: {str(e)}")
+
+async def run_election_round() -> bool:
+    """
+    Try to acquire or renew the lease once and run the matching callbacks
+
+    Returns:
+        Whether this process is the leader after this round
+    """
+    lease = _leader_state["lease"]
+    was_leader = _leader_state["is_leader"]
+
+    try:
+        leader = await lease.acquire()
+    except Exception as e:
+        # Without a lease we can't be sure nobody else holds it, so step down
+        logger.error(f"Error renewing leader lease: {str(e)}")
+        leader = False
+
+    _leader_state["is_leader"] = leader
+
+    if leader and not was_leader:
+        logger.info(f"Process {_leader_state['owner']} became leader")
+        await _run_callbacks(_leader_state["on_elected"])
+    elif was_leader and not leader:
+        logger.warning(f"Process {_leader_state['owner']} lost leadership")
+
+    if not leader:
+        await _run_callbacks(_leader_state["on_follow"])
+
+    return leader
+
+async def election_loop():
+    """Background loop keeping the lease renewed (or trying to take it over)"""
+    while True:
+        await run_election_round()
+        await asyncio.sleep(RENEW_INTERVAL)
+
+async def initialize_leader_election():
+    """Run the first election round and start the background election task"""
+    if _leader_state["election_task"] is not None:
+        return
+
+    _leader_state["lease"] = create_lease()
+    if _leader_state["lease"] is None:
+        logger.info("Leader election disabled, this process refreshes on its own")
+        _leader_state["is_leader"] = True
+        return
+
+    # Decide before the caches start so only the leader downloads on startup
+    await run_election_round()
+    logger.info(f"Leader election ({LEADER_ELECTION}): this process is {'leader' if is_leader() else 'a follower'}")
+    _leader_state["election_task"] = asyncio.create_task(election_loop())
+
+async def release_leadership():
+    """Give up the lease, letting another process take over immediately"""
+    lease: Optional[object] = _leader_state["lease"]
+    if lease is not None and _leader_state["is_leader"]:
+        try:
+            await lease.release()
+        except Exception as e:
+            logger.error(f"Error releasing leader lease: {str(e)}")
+    _leader_state["is_leader"] = LEADER_ELECTION == "none"
+
+register_gauge_callback(
+    "refresh_leader",
+    "1 if this process performs upstream refreshes",
+    lambda: gauge_value(1 if _leader_state["is_leader"] else 0, mode=LEADER_ELECTION)
+)
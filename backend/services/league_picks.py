@@ -0,0 +1,282 @@
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from services.cache_backend import get_cache_backend
+from services.metrics import record_cache_access
+from services.upstream import upstream_client, get_with_backoff, FPL_API_BASE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Picks of the teams in a league, for ownership among rivals rather than all managers
+STANDINGS_CACHE_DURATION = 10 * 60  # 10 minutes in seconds
+PICKS_CACHE_DURATION = 6 * 60 * 60  # Picks can't change after the deadline
+PICKS_CONCURRENCY = 8  # Picks requests in flight at once
+DEFAULT_LEAGUE_SIZE = 50  # Top entries of a league used by default
+# Every entry is a picks request and every 50 a standings page, so one cold
+# request for a full league costs MAX_LEAGUE_SIZE * 1.02 upstream requests
+MAX_LEAGUE_SIZE = 500
+TEMPLATE_SIZE = 15  # Most selected players making up the template squad
+DIFFERENTIAL_OWNERSHIP = 10.0  # Effective ownership in percent below which a starter is a differential
+
+FPL_LEAGUE_URL = f"{FPL_API_BASE}/leagues-classic"
+FPL_TEAM_URL = f"{FPL_API_BASE}/entry"
+
+async def _cached(key: str, ttl: float, cache_name: str, fetch):
+    """Read a value from the cache backend, or fetch and store it"""
+    cache = get_cache_backend()
+    try:
+        cached = await cache.get(key)
+    except Exception as e:
+        logger.error(f"Error reading {cache_name} cache: {str(e)}")
+        cached = None
+    record_cache_access(cache_name, cached is not None)
+    if cached is not None:
+        return cached
+
+    value = await fetch()
+    await cache.set(key, value, ttl=ttl)
+    return value
+
+async def get_league_entries(client, league_id: int, limit: int = DEFAULT_LEAGUE_SIZE) -> List[int]:
+    """
+    IDs of the top entries of a classic league, in standings order
+
+    Raises:
+        httpx.HTTPStatusError: If the FPL API doesn't know the league
+    """
+    entries = []
+    page = 1
+    while len(entries) < limit:
+        async def fetch():
+            response = await get_with_backoff(client, f"{FPL_LEAGUE_URL}/{league_id}/standings/", params={"page_standings": page})
+            standings = response.json().get("standings", {})
+            return {
+                "entries": [result["entry"] for result in standings.get("results", [])],
+                "has_next": standings.get("has_next", False)
+            }
+
+        standings = await _cached(f"league_{league_id}_{page}", STANDINGS_CACHE_DURATION, "league_standings", fetch)
+        entries.extend(standings["entries"])
+        if not standings["has_next"] or not standings["entries"]:
+            break
+        page += 1
+    # Standings can shift between page requests, repeating an entry
+    return list(dict.fromkeys(entries))[:limit]
+
+async def get_entry_picks(client, team_id: int, gameweek: int) -> Optional[Dict[str, Any]]:
+    """
+    A team's picks for a gameweek as element and multiplier lists
+
+    Returns:
+        The picks, or None if the team has none for the gameweek (it joined later)
+
+    Raises:
+        httpx.HTTPStatusError: If the FPL API still fails after backing off
+    """
+    async def fetch():
+        response = await get_with_backoff(client, f"{FPL_TEAM_URL}/{team_id}/event/{gameweek}/picks/")
+        payload = response.json()
+        return {
+            "elements": [pick["element"] for pick in payload.get("picks", [])],
+            "multipliers": [pick.get("multiplier", 1) for pick in payload.get("picks", [])],
+            "active_chip": payload.get("active_chip")
+        }
+
+    try:
+        return await _cached(f"picks_{team_id}_{gameweek}", PICKS_CACHE_DURATION, "picks", fetch)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            return None
+        raise
+
+async def get_teams_picks(team_ids: List[int], gameweek: int) -> Tuple[Dict[int, Dict[str, Any]], List[int], List[int]]:
+    """
+    Picks of many teams for a gameweek, fetched concurrently
+
+    Returns:
+        The picks by team, the IDs of teams whose picks couldn't be fetched and
+        the IDs of teams without picks for the gameweek (joined later)
+    """
+    semaphore = asyncio.Semaphore(PICKS_CONCURRENCY)
+
+    async with upstream_client(follow_redirects=True) as client:
+        async def fetch(team_id):
+            async with semaphore:
+                try:
+                    return team_id, await get_entry_picks(client, team_id, gameweek), False
+                except Exception as e:
+                    logger.warning(f"Error fetching picks for team {team_id}: {str(e)}")
+                    return team_id, None, True
+
+        results = await asyncio.gather(*(fetch(team_id) for team_id in team_ids))
+    picks_by_team = {team_id: picks for team_id, picks, _ in results if picks is not None}
+    failed_ids = [team_id for team_id, _, failed in results if failed]
+    without_picks = [team_id for team_id, picks, failed in results if picks is None and not failed]
+    return picks_by_team, failed_ids, without_picks
+
+async def get_league_picks(league_id: int, gameweek: int, limit: int = DEFAULT_LEAGUE_SIZE) -> Tuple[Dict[int, Dict[str, Any]], List[int]]:
+    """
+    Picks of the top entries of a classic league for a gameweek
+
+    Returns:
+        Same as get_teams_picks
+
+    Raises:
+        httpx.HTTPStatusError: If the FPL API doesn't know the league
+    """
+    async with upstream_client(follow_redirects=True) as client:
+        team_ids = await get_league_entries(client, league_id, limit)
+    return await get_teams_picks(team_ids, gameweek)
+
+def pick_matrix(picks_by_team: Dict[int, Dict[str, Any]], row_of: Dict[int, int]) -> Dict[str, np.ndarray]:
+    """
+    Team x player pick matrix in coordinate form: one entry per pick
+
+    Args:
+        picks_by_team: Picks from get_teams_picks
+        row_of: Player ID to row, as in the projections
+
+    Returns:
+        Dict with the team IDs, and per pick its team index, player row and
+        multiplier; picks of players missing from row_of are left out
+    """
+    team_ids = list(picks_by_team)
+    elements = [element for picks in picks_by_team.values() for element in picks["elements"]]
+    rows = np.array([row_of.get(element, -1) for element in elements], dtype=np.int64)
+    teams = np.repeat(np.arange(len(team_ids)), [len(picks["elements"]) for picks in picks_by_team.values()])
+    multipliers = np.array([m for picks in picks_by_team.values() for m in picks["multipliers"]], dtype=np.float64)
+    known = rows >= 0
+    return {
+        "team_ids": np.array(team_ids, dtype=np.int64),
+        "teams": teams[known],
+        "rows": rows[known],
+        "multipliers": multipliers[known]
+    }
+
+def effective_ownership(picks_by_team: Dict[int, Dict[str, Any]], row_of: Dict[int, int], players: int) -> np.ndarray:
+    """
+    Effective ownership of every player among a set of teams, in percent
+
+    Effective ownership sums pick multipliers - 0 on the bench, 1 in the XI,
+    2 as captain and 3 as triple captain - so it is the share of the teams'
+    points a player's points count towards.
+
+    Args:
+        picks_by_team: Picks from get_teams_picks
+        row_of: Player ID to row, as in the projections
+        players: Number of rows
+
+    Returns:
+        Array of shape (players,)
+    """
+    if not picks_by_team:
+        return np.zeros(players)
+    matrix = pick_matrix(picks_by_team, row_of)
+    return np.bincount(matrix["rows"], weights=matrix["multipliers"], minlength=players) * 100 / len(picks_by_team)
+
+def ownership_analytics(
+    picks_by_team: Dict[int, Dict[str, Any]],
+    projections: Dict[str, Any],
+    gameweek: Optional[int] = None,
+    limit: int = 50
+) -> Dict[str, Any]:
+    """
+    Ownership across a set of teams and each team's differentials against it
+
+    Every figure is a weighted count over the pick matrix's entries, so the
+    work grows with the number of picks and not with teams x players.
+
+    Args:
+        picks_by_team: Picks from get_teams_picks
+        projections: Projections from build_projections
+        gameweek: Projected gameweek that differentials are valued in (default: the next one)
+        limit: Number of players to return, by effective ownership
+
+    Returns:
+        Dictionary with the number of teams, the template squad, the players
+        with the highest effective ownership and, per team, its overlap with
+        the template, its differentials and the projected points they and the
+        players it lacks are worth against the field
+
+    Raises:
+        ValueError: If the gameweek isn't projected
+    """
+    gameweeks = projections["gameweeks"]
+    gameweek = gameweek if gameweek is not None else (gameweeks[0] if gameweeks else None)
+    if gameweek not in gameweeks:
+        raise ValueError(f"Gameweek {gameweek} is not projected (projections cover {gameweeks[0] if gameweeks else '-'} to {gameweeks[-1] if gameweeks else '-'})")
+
+    players = len(projections["players"])
+    matrix = pick_matrix(picks_by_team, projections["row_of"])
+    teams, rows, multipliers = matrix["teams"], matrix["rows"], matrix["multipliers"]
+    team_count = max(len(matrix["team_ids"]), 1)
+    expected_points = projections["expected_points"][:, gameweek - gameweeks[0]]
+
+    def share(weights):
+        return np.bincount(rows, weights=weights, minlength=players) * 100 / team_count
+
+    selected = share(None)
+    starting = share(multipliers > 0)
+    captaincy = share(multipliers >= 2)
+    eo = share(multipliers)
+
+    # The template is the most selected squad; ties go to the lower row
+    template = np.lexsort((np.arange(players), -selected))[:TEMPLATE_SIZE]
+    in_template = np.zeros(players, dtype=bool)
+    in_template[template[selected[template] > 0]] = True
+
+    def per_team(weights):
+        return np.bincount(teams, weights=weights, minlength=len(matrix["team_ids"]))
+
+    # A team's projected points less the field's, split into what its own picks
+    # gain on the field and what the field's picks it lacks cost it
+    field_share = eo[rows] / 100
+    team_points = per_team(multipliers * expected_points[rows])
+    field_points = float(np.dot(eo / 100, expected_points))
+    differential_points = per_team((multipliers - field_share) * expected_points[rows])
+    threat_points = field_points - per_team(field_share * expected_points[rows])
+
+    is_differential = (multipliers > 0) & (eo[rows] < DIFFERENTIAL_OWNERSHIP)
+    overlap = per_team(in_template[rows])
+    # Picks are stored team by team, so each team's differentials are one contiguous slice
+    differential_ids = np.array([player["id"] for player in projections["players"]], dtype=np.int64)[rows[is_differential]]
+    split_at = np.cumsum(per_team(is_differential).astype(np.int64))[:-1]
+
+    top = np.lexsort((np.arange(players), -eo))[:limit]
+    top = top[eo[top] > 0]
+
+    def describe(row):
+        return {
+            **projections["players"][row],
+            "selected": round(float(selected[row]), 1),
+            "starting": round(float(starting[row]), 1),
+            "captaincy": round(float(captaincy[row]), 1),
+            "effective_ownership": round(float(eo[row]), 1),
+            "expected_points": round(float(expected_points[row]), 2)
+        }
+
+    return {
+        "teams_analyzed": len(matrix["team_ids"]),
+        "gameweek": gameweek,
+        "field_points": round(field_points, 2),
+        "template": [describe(row) for row in template[in_template[template]].tolist()],
+        "players": [describe(row) for row in top.tolist()],
+        "teams": [
+            {
+                "team_id": int(team_id),
+                "template_overlap": int(overlap[index]),
+                "differentials": differentials.tolist(),
+                "expected_points": round(float(team_points[index]), 2),
+                "differential_points": round(float(differential_points[index]), 2),
+                "threat_points": round(float(threat_points[index]), 2),
+                "projected_swing": round(float(team_points[index] - field_points), 2)
+            }
+            for index, (team_id, differentials) in enumerate(zip(matrix["team_ids"].tolist(), np.split(differential_ids, split_at)))
+        ]
+    }
@@ -0,0 +1,473 @@
+import asyncio
+import time
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from services.fpl_data import get_fpl_data
+from services.push_hub import publish_event, EVENT_LIVE_POINTS
+from services.cache_backend import get_cache_backend
+from services.leader_election import is_leader
+from services.metrics import record_cache_access, observe_histogram, register_gauge_callback, gauge_value
+from services.upstream import upstream_client, FPL_API_BASE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# FPL API URLs
+FPL_LIVE_URL = f"{FPL_API_BASE}/event"
+FPL_FIXTURES_URL = f"{FPL_API_BASE}/fixtures/"
+
+# Polling configuration
+LIVE_POLL_INTERVAL = 60  # Seconds between live polls while matches are on
+LIVE_IDLE_INTERVAL = 300  # Seconds between match window checks otherwise
+MATCH_WINDOW = timedelta(hours=2, minutes=30)  # Kickoff to final whistle, with stoppage time
+TRACKED_TEAM_TTL = 30 * 60  # Stop tracking teams not viewed for 30 minutes
+
+# Shared cache entry the leader publishes its polled live data to
+SHARED_LIVE_KEY = "live_points"
+
+# Bonus points awarded by BPS rank within a fixture (ties share the higher rank)
+BONUS_BY_RANK = np.array([0, 3, 2, 1])
+
+# Formation limits for autosubs: element_type -> minimum starters
+MIN_STARTERS = {1: 1, 2: 3, 3: 2, 4: 1}
+
+# Live points state, shared by every team page
+_live_points_cache = {
+    "gameweek": None,
+    "live_data": None,  # Raw event/{gw}/live/ payload, served to team pages
+    "points": None,  # element id -> live points including provisional bonus
+    "minutes": None,  # element id -> minutes played
+    "element_type": None,  # element id -> position
+    "element_team": None,  # element id -> club id
+    "team_done": None,  # club id -> all gameweek fixtures finished
+    "teams": {},  # team id -> tracked picks and last view time
+    "team_views": {},  # team id -> precomputed live score view
+    "timestamp": 0,
+    "refresh_task": None,
+    "is_refreshing": False
+}
+
+def compute_provisional_bonus(fixture_ids: np.ndarray, element_ids: np.ndarray, bps: np.ndarray, size: int) -> np.ndarray:
+    """
+    Compute provisional bonus points from BPS for all fixtures at once
+
+    Args:
+        fixture_ids: Fixture id of each (fixture, element) BPS row
+        element_ids: Element id of each row
+        bps: BPS value of each row
+        size: Length of the returned per-element array
+
+    Returns:
+        Array indexed by element id with provisional bonus points
+    """
+    bonus = np.zeros(size, dtype=np.int64)
+    if len(bps) == 0:
+        return bonus
+
+    # Sort by fixture, then by BPS descending
+    order = np.lexsort((-bps, fixture_ids))
+    fixture_sorted = fixture_ids[order]
+    bps_sorted = bps[order]
+    positions = np.arange(len(order))
+
+    # Competition ranking within each fixture: ties share the rank of their first row
+    new_fixture = np.r_[True, fixture_sorted[1:] != fixture_sorted[:-1]]
+    new_value = new_fixture | np.r_[True, bps_sorted[1:] != bps_sorted[:-1]]
+    fixture_start = np.maximum.accumulate(np.where(new_fixture, positions, 0))
+    value_start = np.maximum.accumulate(np.where(new_value, positions, 0))
+    rank = value_start - fixture_start + 1
+
+    awarded = np.where(rank <= 3, BONUS_BY_RANK[np.minimum(rank, 3)], 0)
+    np.add.at(bonus, element_ids[order], awarded)
+    return bonus
+
+def build_bps_rows(fixtures: List[Dict]) -> tuple:
+    """
+    Flatten the BPS stats of fixtures whose bonus is still provisional
+
+    Returns:
+        Tuple of (fixture ids, element ids, bps values) arrays
+    """
+    fixture_ids, element_ids, bps_values = [], [], []
+
+    for fixture in fixtures:
+        if not fixture.get("started"):
+            continue
+        stats = {stat["identifier"]: stat for stat in fixture.get("stats", [])}
+
+        # Once bonus has been awarded it is already part of total_points
+        bonus_stat = stats.get("bonus")
+        if bonus_stat and (bonus_stat.get("h") or bonus_stat.get("a")):
+            continue
+
+        bps_stat = stats.get("bps", {})
+        for row in bps_stat.get("h", []) + bps_stat.get("a", []):
+            fixture_ids.append(fixture["id"])
+            element_ids.append(row["element"])
+            bps_values.append(row["value"])
+
+    return (
+        np.array(fixture_ids, dtype=np.int64),
+        np.array(element_ids, dtype=np.int64),
+        np.array(bps_values, dtype=np.int64)
+    )
+
+def compute_element_arrays(live_data: Dict[str, Any], fixtures: List[Dict], bootstrap: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Build per-element live arrays indexed by element id
+
+    Returns:
+        Dict with points (including provisional bonus), minutes, element type,
+        element club and per-club "all fixtures finished" arrays
+    """
+    elements = bootstrap["elements"]
+    live_elements = live_data.get("elements", [])
+    size = max([e["id"] for e in elements] + [e["id"] for e in live_elements] + [0]) + 1
+
+    element_type = np.zeros(size, dtype=np.int64)
+    element_team = np.zeros(size, dtype=np.int64)
+    element_type[[e["id"] for e in elements]] = [e["element_type"] for e in elements]
+    element_team[[e["id"] for e in elements]] = [e["team"] for e in elements]
+
+    points = np.zeros(size, dtype=np.int64)
+    minutes = np.zeros(size, dtype=np.int64)
+    if live_elements:
+        live_ids = np.array([e["id"] for e in live_elements], dtype=np.int64)
+        points[live_ids] = [e.get("stats", {}).get("total_points", 0) for e in live_elements]
+        minutes[live_ids] = [e.get("stats", {}).get("minutes", 0) for e in live_elements]
+
+    points += compute_provisional_bonus(*build_bps_rows(fixtures), size)
+
+    # A club is done once all of its gameweek fixtures are finished (blanks are done too)
+    team_count = max([t["id"] for t in bootstrap["teams"]] + [0]) + 1
+    team_done = np.ones(team_count, dtype=bool)
+    for fixture in fixtures:
+        finished = fixture.get("finished") or fixture.get("finished_provisional")
+        if not finished:
+            team_done[fixture["team_h"]] = False
+            team_done[fixture["team_a"]] = False
+
+    return {
+        "points": points,
+        "minutes": minutes,
+        "element_type": element_type,
+        "element_team": element_team,
+        "team_done": team_done
+    }
+
+def apply_autosubs(picks: List[Dict], arrays: Dict[str, np.ndarray], active_chip: Optional[str]) -> Dict[str, Any]:
+    """
+    Apply FPL automatic substitutions and vice-captain promotion to one team
+
+    Starters who did not play once all their club's fixtures are finished are
+    replaced by the first bench player who played and keeps a valid formation.
+    The goalkeeper can only be replaced by the bench goalkeeper.
+
+    Returns:
+        Dict with the element multipliers after substitutions, the substitutions
+        made and the effective captain
+    """
+    minutes = arrays["minutes"]
+    element_type = arrays["element_type"]
+    team_done = arrays["team_done"][arrays["element_team"]]
+
+    picks = sorted(picks, key=lambda p: p["position"])
+    multipliers = {p["element"]: p["multiplier"] for p in picks}
+    autosubs = []
+
+    def did_not_play(element):
+        return minutes[element] == 0 and team_done[element]
+
+    if active_chip != "bboost":
+        starters = [p["element"] for p in picks[:11]]
+        bench = [p["element"] for p in picks[11:]]
+
+        for starter in list(starters):
+            if not did_not_play(starter):
+                continue
+            for substitute in bench:
+                if minutes[substitute] == 0:
+                    continue
+                if (element_type[starter] == 1) != (element_type[substitute] == 1):
+                    continue
+
+                lineup = [substitute if e == starter else e for e in starters]
+                counts = {t: sum(1 for e in lineup if element_type[e] == t) for t in MIN_STARTERS}
+                if counts[1] != 1 or any(counts[t] < MIN_STARTERS[t] for t in MIN_STARTERS):
+                    continue
+
+                starters = lineup
+                bench.remove(substitute)
+                multipliers[substitute] = 1
+                multipliers[starter] = 0
+                autosubs.append({"element_out": starter, "element_in": substitute})
+                break
+
+    # The vice captain takes over the captain's multiplier if the captain did not play
+    captain = next((p for p in picks if p.get("is_captain")), None)
+    vice_captain = next((p for p in picks if p.get("is_vice_captain")), None)
+    effective_captain = captain["element"] if captain else None
+    if captain and vice_captain and did_not_play(captain["element"]) and not did_not_play(vice_captain["element"]) and multipliers[vice_captain["element"]] > 0:
+        multipliers[vice_captain["element"]] = captain["multiplier"]
+        multipliers[captain["element"]] = 0
+        effective_captain = vice_captain["element"]
+
+    return {"multipliers": multipliers, "autosubs": autosubs, "captain": effective_captain}
+
+def build_team_views(teams: Dict[int, Dict], arrays: Dict[str, np.ndarray], gameweek: int) -> Dict[int, Dict]:
+    """
+    Compute the live score view of every tracked team
+
+    Totals are computed for all teams at once from a teams x picks matrix; only
+    teams with a starter or captain who did not play go through autosub logic.
+
+    Returns:
+        Dict mapping team id -> live score view
+    """
+    team_ids = [team_id for team_id, team in teams.items() if team["gameweek"] == gameweek and team["picks"]]
+    if not team_ids:
+        return {}
+
+    element_matrix = np.array([[p["element"] for p in sorted(teams[t]["picks"], key=lambda p: p["position"])] for t in team_ids])
+    multiplier_matrix = np.array([[p["multiplier"] for p in sorted(teams[t]["picks"], key=lambda p: p["position"])] for t in team_ids])
+
+    points = arrays["points"]
+    totals = (points[element_matrix] * multiplier_matrix).sum(axis=1)
+
+    # Teams with a starter who did not play may be affected by autosubs or captain fallback
+    starter_elements = element_matrix[:, :11]
+    did_not_play = (arrays["minutes"][starter_elements] == 0) & arrays["team_done"][arrays["element_team"][starter_elements]]
+    needs_adjustment = did_not_play.any(axis=1)
+
+    now = time.time()
+    views = {}
+    for row, team_id in enumerate(team_ids):
+        team = teams[team_id]
+        autosubs = []
+        captain = next((p["element"] for p in team["picks"] if p.get("is_captain")), None)
+        multipliers = dict(zip(element_matrix[row].tolist(), multiplier_matrix[row].tolist()))
+        total = int(totals[row])
+
+        if needs_adjustment[row]:
+            adjusted = apply_autosubs(team["picks"], arrays, team.get("active_chip"))
+            multipliers = adjusted["multipliers"]
+            autosubs = adjusted["autosubs"]
+            captain = adjusted["captain"]
+            total = int(sum(points[element] * multiplier for element, multiplier in multipliers.items()))
+
+        views[team_id] = {
+            "team_id": team_id,
+            "gameweek": gameweek,
+            "live_points": total - team.get("transfer_cost", 0),
+            "points_before_transfer_cost": total,
+            "transfer_cost": team.get("transfer_cost", 0),
+            "captain": captain,
+            "autosubs": autosubs,
+            "element_points": {element: int(points[element]) for element in multipliers},
+            "multipliers": multipliers,
+            "updated_at": now
+        }
+
+    return views
+
+def find_current_gameweek(bootstrap: Dict[str, Any]) -> Optional[int]:
+    """Get the id of the current gameweek, if the season has started"""
+    return next((event["id"] for event in bootstrap["events"] if event["is_current"]), None)
+
+def is_match_window(fixtures: List[Dict], now: datetime) -> bool:
+    """Check whether any gameweek fixture is in progress (or about to finish)"""
+    for fixture in fixtures:
+        if fixture.get("started") and not (fixture.get("finished") or fixture.get("finished_provisional")):
+            return True
+        kickoff_time = fixture.get("kickoff_time")
+        if kickoff_time:
+            kickoff = datetime.fromisoformat(kickoff_time.replace("Z", "+00:00"))
+            if kickoff <= now <= kickoff + MATCH_WINDOW:
+                return True
+    return False
+
+async def refresh_live_points() -> int:
+    """
+    Poll live gameweek data once and update every tracked team's live score
+
+    Returns:
+        Seconds to wait before the next poll
+    """
+    global _live_points_cache
+
+    if _live_points_cache["is_refreshing"]:
+        return LIVE_POLL_INTERVAL
+
+    try:
+        _live_points_cache["is_refreshing"] = True
+
+        # Only the leader polls upstream; followers use what it has published
+        if not is_leader():
+            return await load_shared_live_points()
+
+        fpl_data = await get_fpl_data()
+        bootstrap = fpl_data["bootstrap"]
+        gameweek = find_current_gameweek(bootstrap)
+        if gameweek is None:
+            return LIVE_IDLE_INTERVAL
+
+        gw_fixtures = [f for f in fpl_data["fixtures"] if f["event"] == gameweek]
+        in_window = is_match_window(gw_fixtures, datetime.now(timezone.utc))
+
+        # Outside match windows one poll per gameweek is enough to seed final scores
+        if not in_window and _live_points_cache["gameweek"] == gameweek:
+            return LIVE_IDLE_INTERVAL
+
+        refresh_start = time.perf_counter()
+        async with upstream_client() as client:
+            live_response = await client.get(f"{FPL_LIVE_URL}/{gameweek}/live/")
+            live_response.raise_for_status()
+            live_data = live_response.json()
+
+            fixtures_response = await client.get(FPL_FIXTURES_URL, params={"event": gameweek})
+            fixtures_response.raise_for_status()
+            gw_fixtures = fixtures_response.json()
+
+        arrays = compute_element_arrays(live_data, gw_fixtures, bootstrap)
+        timestamp = time.time()
+        apply_live_arrays(gameweek, live_data, arrays, timestamp)
+        observe_histogram("fpl_cache_refresh_duration_seconds", time.perf_counter() - refresh_start, cache="live_points")
+
+        # Share the polled data with follower workers
+        backend = get_cache_backend()
+        if backend.is_shared:
+            await backend.set(SHARED_LIVE_KEY, {
+                "gameweek": gameweek,
+                "live_data": live_data,
+                "arrays": arrays,
+                "timestamp": timestamp,
+                "next_poll": LIVE_POLL_INTERVAL if in_window else LIVE_IDLE_INTERVAL
+            })
+
+        return LIVE_POLL_INTERVAL if in_window else LIVE_IDLE_INTERVAL
+    except Exception as e:
+        logger.error(f"Error refreshing live points: {str(e)}")
+        return LIVE_POLL_INTERVAL
+    finally:
+        _live_points_cache["is_refreshing"] = False
+
+def apply_live_arrays(gameweek: int, live_data: Dict[str, Any], arrays: Dict[str, np.ndarray], timestamp: float) -> None:
+    """
+    Make newly polled live arrays current, rebuild tracked team views and push changes
+    """
+    # Push only the elements whose live points changed since the last tick
+    previous_points = _live_points_cache["points"]
+    if previous_points is not None and _live_points_cache["gameweek"] == gameweek and len(previous_points) == len(arrays["points"]):
+        changed = np.nonzero(previous_points != arrays["points"])[0]
+    else:
+        changed = np.nonzero(arrays["points"])[0]
+
+    _live_points_cache.update(arrays)
+    _live_points_cache["gameweek"] = gameweek
+    _live_points_cache["live_data"] = live_data
+    _live_points_cache["timestamp"] = timestamp
+
+    prune_tracked_teams()
+    _live_points_cache["team_views"] = build_team_views(_live_points_cache["teams"], arrays, gameweek)
+
+    if len(changed):
+        publish_event(EVENT_LIVE_POINTS, {
+            "gameweek": gameweek,
+            "elements": {int(element): int(arrays["points"][element]) for element in changed}
+        })
+
+    logger.info(f"Live points updated for GW{gameweek}: {len(changed)} elements changed, {len(_live_points_cache['team_views'])} teams tracked")
+
+async def load_shared_live_points() -> int:
+    """
+    Adopt live arrays published by the leader, if newer than ours
+
+    Returns:
+        Seconds to wait before checking again
+    """
+    backend = get_cache_backend()
+    if not backend.is_shared:
+        return LIVE_IDLE_INTERVAL
+
+    shared = await backend.get(SHARED_LIVE_KEY)
+    if shared is None:
+        return LIVE_POLL_INTERVAL
+
+    if shared["timestamp"] > _live_points_cache["timestamp"]:
+        apply_live_arrays(shared["gameweek"], shared["live_data"], shared["arrays"], shared["timestamp"])
+
+    # Check a little after the leader's next poll is due
+    return min(shared["next_poll"], LIVE_POLL_INTERVAL)
+
+async def live_points_loop():
+    """Background loop polling live data at the interval chosen by each refresh"""
+    while True:
+        interval = await refresh_live_points()
+        await asyncio.sleep(interval)
+
+async def initialize_live_points_engine():
+    """Initialize the live points background task"""
+    if _live_points_cache["refresh_task"] is None:
+        logger.info("Initializing live gameweek points engine")
+        _live_points_cache["refresh_task"] = asyncio.create_task(live_points_loop())
+
+def prune_tracked_teams():
+    """Stop tracking teams that have not been viewed recently"""
+    cutoff = time.time() - TRACKED_TEAM_TTL
+    teams = _live_points_cache["teams"]
+    for team_id in [team_id for team_id, team in teams.items() if team["last_viewed"] < cutoff]:
+        del teams[team_id]
+        _live_points_cache["team_views"].pop(team_id, None)
+
+def track_team(team_id: int, gameweek: int, picks_data: Dict[str, Any]) -> None:
+    """
+    Start (or keep) tracking a team's live score
+
+    Args:
+        team_id: FPL team ID
+        gameweek: Gameweek of the picks
+        picks_data: Raw entry/{id}/event/{gw}/picks/ payload
+    """
+    _live_points_cache["teams"][team_id] = {
+        "gameweek": gameweek,
+        "picks": picks_data.get("picks", []),
+        "active_chip": picks_data.get("active_chip"),
+        "transfer_cost": picks_data.get("entry_history", {}).get("event_transfers_cost", 0),
+        "last_viewed": time.time()
+    }
+
+    # Compute the view straight away so the first page load has live totals
+    if _live_points_cache["gameweek"] == gameweek and _live_points_cache["points"] is not None:
+        arrays = {key: _live_points_cache[key] for key in ["points", "minutes", "element_type", "element_team", "team_done"]}
+        views = build_team_views({team_id: _live_points_cache["teams"][team_id]}, arrays, gameweek)
+        _live_points_cache["team_views"].update(views)
+
+def get_team_live_view(team_id: int, gameweek: int) -> Optional[Dict[str, Any]]:
+    """Get the precomputed live score view for a tracked team, marking it as viewed"""
+    team = _live_points_cache["teams"].get(team_id)
+    if team is None or team["gameweek"] != gameweek:
+        return None
+    team["last_viewed"] = time.time()
+    view = _live_points_cache["team_views"].get(team_id)
+    record_cache_access("live_team_views", view is not None)
+    return view
+
+def get_live_data(gameweek: int) -> Optional[Dict[str, Any]]:
+    """Get the last polled live payload for a gameweek, if the engine has it"""
+    if _live_points_cache["gameweek"] == gameweek:
+        return _live_points_cache["live_data"]
+    return None
+
+def _live_points_cache_metrics():
+    """Report live points engine state at scrape time"""
+    metrics = gauge_value(len(_live_points_cache["teams"]), cache="live_points", metric="tracked_teams")
+    if _live_points_cache["timestamp"]:
+        metrics.update(gauge_value(time.time() - _live_points_cache["timestamp"], cache="live_points", metric="age_seconds"))
+    return metrics
+
+register_gauge_callback("fpl_cache_state", "Cache size, age and version, by cache and metric", _live_points_cache_metrics)
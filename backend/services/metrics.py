@@ -0,0 +1,186 @@
+import os
+import time
+import logging
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from cache hits to slow LLM calls
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+# Metric registry: name -> definition and values keyed by sorted label tuples
+# Recording is a dict lookup plus a bisect, cheap enough to leave on in production
+_metrics = {}
+
+# Gauges computed at scrape time: name -> (help text, callbacks returning {label tuple: value})
+_gauge_callbacks = {}
+
+def _define(name: str, metric_type: str, help_text: str, buckets: List[float] = None) -> None:
+    _metrics[name] = {"type": metric_type, "help": help_text, "buckets": buckets, "values": {}}
+
+def _label_key(labels: Dict[str, str]) -> Tuple:
+    return tuple(sorted(labels.items()))
+
+def inc_counter(name: str, amount: float = 1, **labels) -> None:
+    """Increase a counter"""
+    values = _metrics[name]["values"]
+    key = _label_key(labels)
+    values[key] = values.get(key, 0) + amount
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    """Set a gauge to a value"""
+    _metrics[name]["values"][_label_key(labels)] = value
+
+def add_gauge(name: str, amount: float, **labels) -> None:
+    """Add to (or subtract from) a gauge"""
+    values = _metrics[name]["values"]
+    key = _label_key(labels)
+    values[key] = values.get(key, 0) + amount
+
+def observe_histogram(name: str, value: float, **labels) -> None:
+    """Record one observation in a histogram"""
+    metric = _metrics[name]
+    key = _label_key(labels)
+    series = metric["values"].get(key)
+    if series is None:
+        series = metric["values"][key] = {"buckets": [0] * len(metric["buckets"]), "sum": 0.0, "count": 0}
+    position = bisect_left(metric["buckets"], value)
+    if position < len(series["buckets"]):
+        series["buckets"][position] += 1
+    series["sum"] += value
+    series["count"] += 1
+
+def record_cache_access(cache: str, hit: bool) -> None:
+    """Count a cache hit or miss"""
+    inc_counter("fpl_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+def register_gauge_callback(name: str, help_text: str, callback: Callable[[], Dict[Tuple, float]]) -> None:
+    """
+    Register a gauge whose values are computed when metrics are scraped
+
+    Several modules can register callbacks for the same gauge, each reporting
+    its own label values.
+
+    Args:
+        name: Metric name
+        help_text: Metric description
+        callback: Returns a dict mapping label tuples (sorted (name, value) pairs) to values
+    """
+    _gauge_callbacks.setdefault(name, (help_text, []))[1].append(callback)
+
+def gauge_value(value: float, **labels) -> Dict[Tuple, float]:
+    """Build a single-series result for a gauge callback"""
+    return {_label_key(labels): value}
+
+def _format_labels(key: Tuple, extra: Tuple = ()) -> str:
+    labels = key + extra
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{str(value)}"' for name, value in labels) + "}"
+
+def render_metrics() -> str:
+    """Render all metrics in the Prometheus text exposition format"""
+    lines = []
+    for name, metric in _metrics.items():
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for key, value in metric["values"].items():
+            if metric["type"] == "histogram":
+                cumulative = 0
+                for bound, count in zip(metric["buckets"], value["buckets"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {value['count']}")
+                lines.append(f"{name}_sum{_format_labels(key)} {value['sum']}")
+                lines.append(f"{name}_count{_format_labels(key)} {value['count']}")
+            else:
+                lines.append(f"{name}{_format_labels(key)} {value}")
+
+    for name, (help_text, callbacks) in _gauge_callbacks.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for callback in callbacks:
+            try:
+                values = callback()
+            except Exception as e:
+                logger.error(f"Error collecting metric {name}: {str(e)}")
+                continue
+            for key, value in values.items():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+
+    return "\n".join(lines) + "\n"
+
+# Request metrics
+_define("http_request_duration_seconds", "histogram", "Time to respond to API requests, by route", LATENCY_BUCKETS)
+_define("http_requests_in_flight", "gauge", "API requests currently being handled")
+
+# Upstream (FPL API) metrics
+_define("upstream_request_duration_seconds", "histogram", "Upstream request latency, by URL pattern and status", LATENCY_BUCKETS)
+_define("upstream_requests_in_flight", "gauge", "Upstream requests currently in progress")
+
+# LLM metrics
+_define("llm_request_duration_seconds", "histogram", "Gemini request latency, by operation and outcome", LATENCY_BUCKETS)
+_define("llm_tokens_total", "counter", "Gemini tokens used, by operation and token type")
+_define("llm_requests_in_flight", "gauge", "Gemini requests currently in progress")
+
+# Cache metrics
+_define("fpl_cache_requests_total", "counter", "Cache lookups, by cache and hit/miss")
+_define("fpl_cache_refresh_duration_seconds", "histogram", "Time taken by cache refreshes, by cache", LATENCY_BUCKETS)
+_define("fpl_cache_refreshes_total", "counter", "Cache refreshes, by cache and outcome")
+
+# Optimizer metrics
+_define("optimizer_duration_seconds", "histogram", "Time taken by optimizer searches, by optimizer and outcome", LATENCY_BUCKETS)
+
+_metrics["process_start_time_seconds"] = {
+    "type": "gauge",
+    "help": "Start time of this worker process",
+    "buckets": None,
+    "values": {(("pid", os.getpid()),): time.time()}
+}
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency and in-flight requests
+
+    Latency is measured until the response starts, so long-lived streams
+    (Server-Sent Events) are measured by their time to first byte.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        recorded = False
+        add_gauge("http_requests_in_flight", 1)
+
+        def record(status):
+            route = scope.get("route")
+            observe_histogram(
+                "http_request_duration_seconds",
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=route.path if route is not None else "unmatched",
+                status=str(status)
+            )
+
+        async def send_with_metrics(message):
+            nonlocal recorded
+            if message["type"] == "http.response.start" and not recorded:
+                recorded = True
+                add_gauge("http_requests_in_flight", -1)
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            if not recorded:
+                add_gauge("http_requests_in_flight", -1)
+                record(500)
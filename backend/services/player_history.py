@@ -0,0 +1,360 @@
+import os
+import time
+import sqlite3
+import asyncio
+import hashlib
+import logging
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
+
+from services.fpl_data import get_fpl_data
+from services.fpl_schema import decode_element_summary
+from services.leader_election import is_leader
+from services.upstream import upstream_client, get_with_backoff, FPL_API_BASE
+from services.metrics import observe_histogram, inc_counter, register_gauge_callback, gauge_value
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Local store for per-player gameweek history (element-summary/{id}/)
+#
+# One row per player per fixture, clustered on (element, fixture) so a player's
+# season is a single contiguous range read; a (round, element) index serves
+# per-gameweek queries across players.
+PLAYER_HISTORY_DB = os.getenv("PLAYER_HISTORY_DB", os.path.join(os.path.dirname(os.path.dirname(__file__)), "player_history.db"))
+INGEST_INTERVAL = int(os.getenv("PLAYER_HISTORY_INTERVAL", "3600"))  # Seconds between runs; 0 disables the background ingester
+INGEST_CONCURRENCY = 8  # Element summaries fetched at once
+INGEST_BATCH_SIZE = 50  # Players written per transaction
+FPL_ELEMENT_SUMMARY_URL = f"{FPL_API_BASE}/element-summary/{{element_id}}/"
+
+# Stored history columns; decimals the API sends as strings are stored as REAL
+INTEGER_COLUMNS = (
+    "minutes", "total_points", "goals_scored", "assists", "clean_sheets", "goals_conceded",
+    "saves", "bonus", "bps", "value", "selected", "transfers_balance"
+)
+REAL_COLUMNS = (
+    "influence", "creativity", "threat", "ict_index", "expected_goals", "expected_assists",
+    "expected_goal_involvements", "expected_goals_conceded"
+)
+NUMERIC_COLUMNS = INTEGER_COLUMNS + REAL_COLUMNS
+HISTORY_COLUMNS = ("element", "fixture", "round", "kickoff_time", "opponent_team", "was_home") + NUMERIC_COLUMNS
+# How get_history_series folds a double gameweek's rows into one value; with
+# MAX(kickoff_time), SQLite takes the bare column from the latest fixture's row
+SERIES_AGGREGATES = {
+    "sum": "SUM({column}) AS value",
+    "last": "{column} AS value, MAX(kickoff_time) AS last_kickoff"
+}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS player_history (
+    element INTEGER NOT NULL,
+    fixture INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    kickoff_time TEXT,
+    opponent_team INTEGER,
+    was_home INTEGER,
+    {", ".join(f"{column} INTEGER" for column in INTEGER_COLUMNS)},
+    {", ".join(f"{column} REAL" for column in REAL_COLUMNS)},
+    PRIMARY KEY (element, fixture)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS player_history_round ON player_history (round, element);
+CREATE TABLE IF NOT EXISTS ingest_state (
+    element INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+# Stores whose tables exist already
+_initialized_paths = set()
+
+_ingest_state = {
+    "task": None,
+    "is_running": False,
+    "last_run": 0,
+    "last_stats": {}
+}
+
+@contextmanager
+def open_store(path: Optional[str] = None):
+    """Open the history store, creating the tables on first use"""
+    path = path or PLAYER_HISTORY_DB
+    connection = sqlite3.connect(path, timeout=30)
+    connection.row_factory = sqlite3.Row
+    try:
+        if path not in _initialized_paths:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            _initialized_paths.add(path)
+        yield connection
+    finally:
+        connection.close()
+
+def element_fingerprint(element: Dict[str, Any], last_checked_gameweek: int) -> str:
+    """
+    Summary of a player's bootstrap entry that changes whenever their history does
+
+    Points and minutes move after every match they play, and the last checked
+    gameweek moves once a round's data is final, so an unchanged fingerprint
+    means the stored history is still current.
+    """
+    return f"{last_checked_gameweek}:{element['total_points']}:{element['minutes']}:{element['now_cost']}"
+
+def _to_number(value: Any, real: bool):
+    if value is None:
+        return None
+    try:
+        return float(value) if real else int(value)
+    except (TypeError, ValueError):
+        return None
+
+def history_rows(element_id: int, summary: Dict[str, Any]) -> List[Tuple]:
+    """Convert an element-summary payload into store rows"""
+    rows = []
+    for entry in summary.get("history", []):
+        rows.append(
+            (element_id, entry.get("fixture"), entry.get("round"), entry.get("kickoff_time"),
+             entry.get("opponent_team"), 1 if entry.get("was_home") else 0)
+            + tuple(_to_number(entry.get(column), False) for column in INTEGER_COLUMNS)
+            + tuple(_to_number(entry.get(column), True) for column in REAL_COLUMNS)
+        )
+    return rows
+
+def load_fingerprints(path: Optional[str] = None) -> Dict[int, Tuple[str, str]]:
+    """Stored (fingerprint, content hash) of every ingested player"""
+    with open_store(path) as connection:
+        return {
+            row["element"]: (row["fingerprint"], row["content_hash"])
+            for row in connection.execute("SELECT element, fingerprint, content_hash FROM ingest_state")
+        }
+
+def write_histories(results: List[Dict[str, Any]], path: Optional[str] = None) -> int:
+    """
+    Store fetched histories in one transaction
+
+    A player's rows are only rewritten when the payload differs from the
+    stored one; otherwise just the fingerprint is updated.
+
+    Returns:
+        Number of players whose rows were rewritten
+    """
+    rewritten = 0
+    now = time.time()
+    with open_store(path) as connection, connection:
+        for result in results:
+            stored = connection.execute(
+                "SELECT content_hash FROM ingest_state WHERE element = ?", (result["element"],)
+            ).fetchone()
+            if stored is None or stored["content_hash"] != result["content_hash"]:
+                connection.execute("DELETE FROM player_history WHERE element = ?", (result["element"],))
+                connection.executemany(
+                    f"INSERT OR REPLACE INTO player_history ({', '.join(HISTORY_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' for _ in HISTORY_COLUMNS)})",
+                    result["rows"]
+                )
+                rewritten += 1
+            connection.execute(
+                "INSERT OR REPLACE INTO ingest_state (element, fingerprint, content_hash, updated_at) VALUES (?, ?, ?, ?)",
+                (result["element"], result["fingerprint"], result["content_hash"], now)
+            )
+    return rewritten
+
+async def fetch_element_summary(client: httpx.AsyncClient, element_id: int) -> bytes:
+    """Fetch one element summary, backing off on rate limits and server errors"""
+    response = await get_with_backoff(client, FPL_ELEMENT_SUMMARY_URL.format(element_id=element_id))
+    return response.content
+
+async def ingest_player_histories(force: bool = False, path: Optional[str] = None) -> Dict[str, int]:
+    """
+    Fetch and store the history of every player whose data changed since the last run
+
+    Args:
+        force: Refetch every player, ignoring stored fingerprints
+        path: Store location (default: PLAYER_HISTORY_DB)
+
+    Returns:
+        Counts of players checked, fetched, rewritten and failed
+    """
+    fpl_data = await get_fpl_data()
+    bootstrap = fpl_data["bootstrap"]
+    last_checked_gameweek = max(
+        (event["id"] for event in bootstrap["events"] if event["finished"] and event["data_checked"]),
+        default=0
+    )
+
+    stored = await asyncio.to_thread(load_fingerprints, path)
+    stale = []
+    for element in bootstrap["elements"]:
+        fingerprint = element_fingerprint(element, last_checked_gameweek)
+        if force or stored.get(element["id"], (None, None))[0] != fingerprint:
+            stale.append((element["id"], fingerprint))
+
+    stats = {"checked": len(bootstrap["elements"]), "fetched": 0, "rewritten": 0, "failed": 0}
+    if not stale:
+        return stats
+
+    logger.info(f"Ingesting history for {len(stale)} of {len(bootstrap['elements'])} players")
+    semaphore = asyncio.Semaphore(INGEST_CONCURRENCY)
+
+    async def fetch(client, element_id, fingerprint):
+        async with semaphore:
+            try:
+                raw = await fetch_element_summary(client, element_id)
+                # A malformed payload fails this player only, not the batch
+                rows = history_rows(element_id, decode_element_summary(raw))
+            except Exception as e:
+                logger.warning(f"Error fetching history for player {element_id}: {str(e)}")
+                return None
+        return {
+            "element": element_id,
+            "fingerprint": fingerprint,
+            "content_hash": hashlib.blake2b(raw, digest_size=16).hexdigest(),
+            "rows": rows
+        }
+
+    async with upstream_client() as client:
+        for start in range(0, len(stale), INGEST_BATCH_SIZE):
+            batch = stale[start:start + INGEST_BATCH_SIZE]
+            results = await asyncio.gather(*(fetch(client, element_id, fingerprint) for element_id, fingerprint in batch))
+            fetched = [result for result in results if result is not None]
+            stats["fetched"] += len(fetched)
+            stats["failed"] += len(results) - len(fetched)
+            if fetched:
+                stats["rewritten"] += await asyncio.to_thread(write_histories, fetched, path)
+
+    return stats
+
+async def run_ingest(force: bool = False) -> Dict[str, int]:
+    """Run one ingestion unless one is already in progress, recording its outcome"""
+    if _ingest_state["is_running"]:
+        return _ingest_state["last_stats"]
+
+    try:
+        _ingest_state["is_running"] = True
+        started = time.perf_counter()
+        stats = await ingest_player_histories(force=force)
+        observe_histogram("fpl_cache_refresh_duration_seconds", time.perf_counter() - started, cache="player_history")
+        inc_counter("fpl_cache_refreshes_total", cache="player_history", outcome="success" if not stats["failed"] else "partial")
+        _ingest_state["last_run"] = time.time()
+        _ingest_state["last_stats"] = stats
+        logger.info(f"Player history ingestion finished: {stats}")
+        return stats
+    except Exception as e:
+        inc_counter("fpl_cache_refreshes_total", cache="player_history", outcome="error")
+        logger.error(f"Error ingesting player history: {str(e)}")
+        return {}
+    finally:
+        _ingest_state["is_running"] = False
+
+async def player_history_loop():
+    """Background loop ingesting player history; only the refresh leader calls the API"""
+    while True:
+        if is_leader():
+            await run_ingest()
+        await asyncio.sleep(INGEST_INTERVAL)
+
+async def initialize_player_history_ingester():
+    """Initialize the player history background task"""
+    if INGEST_INTERVAL > 0 and _ingest_state["task"] is None:
+        logger.info("Initializing player history ingester")
+        _ingest_state["task"] = asyncio.create_task(player_history_loop())
+
+def get_player_history(
+    element_id: int,
+    from_round: Optional[int] = None,
+    to_round: Optional[int] = None,
+    path: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Stored gameweek history of one player, in kickoff order"""
+    query = f"SELECT {', '.join(HISTORY_COLUMNS)} FROM player_history WHERE element = ?"
+    params = [element_id]
+    if from_round is not None:
+        query += " AND round >= ?"
+        params.append(from_round)
+    if to_round is not None:
+        query += " AND round <= ?"
+        params.append(to_round)
+    query += " ORDER BY round, kickoff_time"
+
+    with open_store(path) as connection:
+        return [
+            {**dict(row), "was_home": bool(row["was_home"])}
+            for row in connection.execute(query, params)
+        ]
+
+def get_history_series(
+    element_ids: List[int],
+    column: str,
+    from_round: Optional[int] = None,
+    to_round: Optional[int] = None,
+    path: Optional[str] = None,
+    aggregate: str = "sum"
+) -> Dict[int, Dict[int, float]]:
+    """
+    One stat per player per gameweek, summed over double gameweeks
+
+    Stats that are a state rather than a tally, like value, would double up
+    when summed; aggregate="last" takes them from the gameweek's last fixture.
+
+    Raises:
+        ValueError: If the column isn't a stored numeric stat or the aggregate is unknown
+
+    Returns:
+        Dict mapping player ID -> gameweek -> value
+    """
+    if column not in NUMERIC_COLUMNS:
+        raise ValueError(f"Unknown stat {column}; use one of {', '.join(NUMERIC_COLUMNS)}")
+    if aggregate not in SERIES_AGGREGATES:
+        raise ValueError(f"Unknown aggregate {aggregate}; use one of {', '.join(SERIES_AGGREGATES)}")
+
+    placeholders = ", ".join("?" for _ in element_ids)
+    query = f"SELECT element, round, {SERIES_AGGREGATES[aggregate].format(column=column)} FROM player_history WHERE element IN ({placeholders})"
+    params = list(element_ids)
+    if from_round is not None:
+        query += " AND round >= ?"
+        params.append(from_round)
+    if to_round is not None:
+        query += " AND round <= ?"
+        params.append(to_round)
+    query += " GROUP BY element, round ORDER BY element, round"
+
+    series = {element_id: {} for element_id in element_ids}
+    with open_store(path) as connection:
+        for row in connection.execute(query, params):
+            series[row["element"]][row["round"]] = row["value"]
+    return series
+
+def get_round_stats(round_number: int, column: str = "total_points", path: Optional[str] = None) -> Dict[int, float]:
+    """
+    One stat for every stored player in a gameweek, summed over double gameweeks
+
+    Raises:
+        ValueError: If the column isn't a stored numeric stat
+    """
+    if column not in NUMERIC_COLUMNS:
+        raise ValueError(f"Unknown stat {column}; use one of {', '.join(NUMERIC_COLUMNS)}")
+    with open_store(path) as connection:
+        return {
+            row["element"]: row["value"]
+            for row in connection.execute(
+                f"SELECT element, SUM({column}) AS value FROM player_history WHERE round = ? GROUP BY element",
+                (round_number,)
+            )
+        }
+
+def _player_history_metrics():
+    """Report the last ingestion run at scrape time"""
+    stats = _ingest_state["last_stats"]
+    if not _ingest_state["last_run"]:
+        return {}
+    return {
+        **gauge_value(time.time() - _ingest_state["last_run"], cache="player_history", metric="age_seconds"),
+        **gauge_value(stats.get("fetched", 0), cache="player_history", metric="last_fetched"),
+        **gauge_value(stats.get("failed", 0), cache="player_history", metric="last_failed"),
+    }
+
+register_gauge_callback("fpl_cache_state", "Cache size, age and version, by cache and metric", _player_history_metrics)
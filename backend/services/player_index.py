@@ -0,0 +1,348 @@
+import base64
+import heapq
+import logging
+from bisect import bisect_left, bisect_right
+from typing import Dict, Any, List, Optional, Tuple
+
+import msgspec
+
+from services.fpl_data import get_versioned, register_versioned_cache_metrics, POSITION_NAMES
+from services.tracing import set_span_attribute
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fields of a player record served by /players
+PLAYER_FIELDS = (
+    "id", "web_name", "first_name", "second_name", "team_id", "team", "position",
+    "now_cost", "price", "status", "chance_of_playing_next_round", "news",
+    "form", "points_per_game", "selected_by_percent", "total_points", "minutes"
+)
+
+# Fields with a precomputed sort order (price sorts like now_cost)
+SORTABLE_FIELDS = (
+    "web_name", "now_cost", "form", "points_per_game", "selected_by_percent", "total_points", "minutes"
+)
+SORT_ALIASES = {"price": "now_cost"}
+
+# A filter bucket this many times the page size or smaller is scanned directly
+# instead of walking the sort order
+BUCKET_SCAN_FACTOR = 4
+
+def _to_float(value: Any) -> float:
+    """FPL sends decimals like form as strings"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+def build_player_rows(bootstrap_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten bootstrap elements into player records, in bootstrap element order"""
+    teams = {team["id"]: team["name"] for team in bootstrap_data["teams"]}
+    return [
+        {
+            "id": p["id"],
+            "web_name": p["web_name"],
+            "first_name": p["first_name"],
+            "second_name": p["second_name"],
+            "team_id": p["team"],
+            "team": teams.get(p["team"], "Unknown"),
+            "position": POSITION_NAMES.get(p["element_type"], "UNK"),
+            "now_cost": p["now_cost"],
+            "price": p["now_cost"] / 10,
+            "status": p["status"],
+            "chance_of_playing_next_round": p["chance_of_playing_next_round"],
+            "news": p["news"],
+            "form": _to_float(p["form"]),
+            "points_per_game": _to_float(p["points_per_game"]),
+            "selected_by_percent": _to_float(p["selected_by_percent"]),
+            "total_points": p["total_points"],
+            "minutes": p["minutes"],
+        }
+        for p in bootstrap_data["elements"]
+    ]
+
+def build_player_index(bootstrap_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build sorted orders and filter buckets over all players, once per data version
+
+    Every sortable field gets the row positions ordered by (value, id) and each
+    row's dense rank for that field, so queries can start anywhere in the order
+    with a bisect and compare rows without looking at the values again.
+
+    Returns:
+        Dictionary with the rows, per-field orders and ranks, and position, team
+        and status buckets
+    """
+    rows = build_player_rows(bootstrap_data)
+
+    orders = {}
+    order_ranks = {}
+    ranks = {}
+    distinct = {}
+    for field in SORTABLE_FIELDS:
+        values = sorted({row[field] for row in rows})
+        rank_of = {value: rank for rank, value in enumerate(values)}
+        field_ranks = [rank_of[row[field]] for row in rows]
+        order = sorted(range(len(rows)), key=lambda position: (field_ranks[position], rows[position]["id"]))
+
+        distinct[field] = values
+        ranks[field] = field_ranks
+        orders[field] = order
+        order_ranks[field] = [field_ranks[position] for position in order]
+
+    by_position = {}
+    by_team = {}
+    by_status = {}
+    team_ids_by_name = {}
+    for position, row in enumerate(rows):
+        by_position.setdefault(row["position"], []).append(position)
+        by_team.setdefault(row["team_id"], []).append(position)
+        by_status.setdefault(row["status"], []).append(position)
+
+    for team in bootstrap_data["teams"]:
+        team_ids_by_name[team["name"].lower()] = team["id"]
+        team_ids_by_name[team["short_name"].lower()] = team["id"]
+
+    return {
+        "rows": rows,
+        "orders": orders,
+        "order_ranks": order_ranks,
+        "ranks": ranks,
+        "distinct": distinct,
+        "by_position": by_position,
+        "by_team": by_team,
+        "by_status": by_status,
+        "team_ids_by_name": team_ids_by_name
+    }
+
+async def get_player_index() -> Dict[str, Any]:
+    """Get the player index for the current FPL data, building it on first use"""
+    return await get_versioned("player_index", lambda fpl_data: build_player_index(fpl_data["bootstrap"]))
+
+def parse_sort(sort: str) -> List[Tuple[str, bool]]:
+    """
+    Parse a sort specification like "-total_points,now_cost"
+
+    Returns:
+        List of (field, descending) pairs
+
+    Raises:
+        ValueError: If a field can't be sorted on
+    """
+    keys = []
+    seen = set()
+    for part in sort.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        descending = part.startswith("-")
+        field = part.lstrip("+-")
+        field = SORT_ALIASES.get(field, field)
+        if field not in SORTABLE_FIELDS:
+            raise ValueError(f"Can't sort by {field}; sortable fields are {', '.join(SORTABLE_FIELDS)}")
+        if field not in seen:
+            seen.add(field)
+            keys.append((field, descending))
+    if not keys:
+        raise ValueError("Sort needs at least one field")
+    return keys
+
+def format_sort(keys: List[Tuple[str, bool]]) -> str:
+    return ",".join(f"-{field}" if descending else field for field, descending in keys)
+
+def resolve_team_ids(index: Dict[str, Any], teams: List[str]) -> List[int]:
+    """Resolve team IDs, names or short names to team IDs (unknown teams match nothing)"""
+    return [
+        int(team) if team.isdigit() else index["team_ids_by_name"].get(team.lower(), -1)
+        for team in teams
+    ]
+
+def encode_cursor(keys: List[Tuple[str, bool]], row: Dict[str, Any]) -> str:
+    """Opaque cursor holding the sort and the last returned row's sort values"""
+    payload = {"sort": format_sort(keys), "values": [row[field] for field, _ in keys], "id": row["id"]}
+    return base64.urlsafe_b64encode(msgspec.json.encode(payload)).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, keys: List[Tuple[str, bool]]) -> Dict[str, Any]:
+    """
+    Decode a cursor from encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed or was made for another sort
+    """
+    try:
+        payload = msgspec.json.decode(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        values, player_id = payload["values"], payload["id"]
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if payload.get("sort") != format_sort(keys) or len(values) != len(keys):
+        raise ValueError("Cursor was made for a different sort")
+    return {"values": values, "id": player_id}
+
+def _rank_of(index: Dict[str, Any], field: str, value: Any) -> float:
+    """
+    Rank of a value in a field's sort order
+
+    Values no longer present (a cursor from before a refresh) rank between
+    their neighbours, so paging carries on from the right place.
+    """
+    values = index["distinct"][field]
+    try:
+        position = bisect_left(values, value)
+    except TypeError:
+        raise ValueError("Invalid cursor")
+    if position < len(values) and values[position] == value:
+        return position
+    return position - 0.5
+
+def query_players(
+    index: Dict[str, Any],
+    positions: Optional[List[str]] = None,
+    team_ids: Optional[List[int]] = None,
+    statuses: Optional[List[str]] = None,
+    min_cost: Optional[int] = None,
+    max_cost: Optional[int] = None,
+    min_minutes: Optional[int] = None,
+    sort: str = "-total_points",
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Filter, sort and page players using the player index
+
+    Either scans the smallest filter bucket, when it is small next to the page,
+    or walks the precomputed order of the first sort key and stops as soon as
+    the page is full, so a query touches few rows beyond the ones it returns.
+
+    Args:
+        index: Index from build_player_index
+        positions, team_ids, statuses: Keep players matching any of the values
+        min_cost, max_cost: Price range in tenths of a million, like now_cost
+        min_minutes: Minimum minutes played this season
+        sort: Comma separated fields, "-" for descending; ties break on id
+        limit: Page size
+        cursor: next_cursor from the previous page
+
+    Returns:
+        Dictionary with the page of player records, the next_cursor (None on
+        the last page) and how many rows were scanned
+
+    Raises:
+        ValueError: On an unknown sort field or a bad cursor
+    """
+    keys = parse_sort(sort)
+    rows = index["rows"]
+    ranks = [(index["ranks"][field], descending) for field, descending in keys]
+
+    def sort_key(position):
+        return tuple(-r[position] if descending else r[position] for r, descending in ranks) + (rows[position]["id"],)
+
+    after = None
+    if cursor is not None:
+        decoded = decode_cursor(cursor, keys)
+        after = tuple(
+            -_rank_of(index, field, value) if descending else _rank_of(index, field, value)
+            for (field, descending), value in zip(keys, decoded["values"])
+        ) + (decoded["id"],)
+
+    position_set = set(positions) if positions else None
+    team_set = set(team_ids) if team_ids else None
+    status_set = set(statuses) if statuses else None
+
+    def matches(position):
+        row = rows[position]
+        return (
+            (position_set is None or row["position"] in position_set)
+            and (team_set is None or row["team_id"] in team_set)
+            and (status_set is None or row["status"] in status_set)
+            and (min_cost is None or row["now_cost"] >= min_cost)
+            and (max_cost is None or row["now_cost"] <= max_cost)
+            and (min_minutes is None or row["minutes"] >= min_minutes)
+        )
+
+    # Candidate buckets from the filters; the price range is a slice of the price order
+    buckets = []
+    if position_set is not None:
+        buckets.append([p for name in position_set for p in index["by_position"].get(name, [])])
+    if team_set is not None:
+        buckets.append([p for team_id in team_set for p in index["by_team"].get(team_id, [])])
+    if status_set is not None:
+        buckets.append([p for status in status_set for p in index["by_status"].get(status, [])])
+    if min_cost is not None or max_cost is not None:
+        cost_ranks = index["order_ranks"]["now_cost"]
+        start = bisect_left(cost_ranks, _rank_of(index, "now_cost", min_cost)) if min_cost is not None else 0
+        end = bisect_right(cost_ranks, _rank_of(index, "now_cost", max_cost)) if max_cost is not None else len(cost_ranks)
+        buckets.append(index["orders"]["now_cost"][start:end])
+
+    smallest = min(buckets, key=len) if buckets else None
+    if smallest is not None and len(smallest) <= BUCKET_SCAN_FACTOR * (limit + 1):
+        scanned = len(smallest)
+        candidates = [p for p in smallest if matches(p) and (after is None or sort_key(p) > after)]
+        page = heapq.nsmallest(limit + 1, candidates, key=sort_key)
+    else:
+        page, scanned = _walk_sort_order(index, keys, matches, sort_key, after, limit + 1)
+
+    set_span_attribute("scanned", scanned)
+    next_cursor = encode_cursor(keys, rows[page[limit - 1]]) if len(page) > limit else None
+    return {
+        "players": [rows[position] for position in page[:limit]],
+        "next_cursor": next_cursor,
+        "sort": format_sort(keys),
+        "scanned": scanned
+    }
+
+def _walk_sort_order(index, keys, matches, sort_key, after, wanted):
+    """
+    Collect the first matching rows in the order of the first sort key
+
+    Rows tied on the first key are collected as a group and ordered by the
+    remaining keys, so the walk only stops at a change of the first key.
+
+    Returns:
+        Tuple of (row positions in full sort order, rows scanned)
+    """
+    field, descending = keys[0]
+    order = index["orders"][field]
+    order_ranks = index["order_ranks"][field]
+
+    # Start at the cursor's group of the first key
+    if after is None:
+        start = len(order) - 1 if descending else 0
+    elif descending:
+        start = bisect_right(order_ranks, -after[0]) - 1
+    else:
+        start = bisect_left(order_ranks, after[0])
+    step = -1 if descending else 1
+
+    collected = []
+    scanned = 0
+    i = start
+    while 0 <= i < len(order):
+        if len(collected) >= wanted and order_ranks[i] != boundary_rank:
+            break
+        position = order[i]
+        scanned += 1
+        if matches(position) and (after is None or sort_key(position) > after):
+            collected.append(position)
+            boundary_rank = order_ranks[i]
+        i += step
+
+    collected.sort(key=sort_key)
+    return collected[:wanted], scanned
+
+def project(players: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """
+    Keep only the requested fields of each player record
+
+    Raises:
+        ValueError: On an unknown field
+    """
+    if not fields:
+        return players
+    unknown = [field for field in fields if field not in PLAYER_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return [{field: player[field] for field in fields} for player in players]
+
+register_versioned_cache_metrics("player_index", "players", lambda index: len(index["rows"]))
@@ -0,0 +1,227 @@
+import logging
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from services.fpl_data import get_versioned, register_versioned_cache_metrics, POSITION_NAMES
+from services.fixture_ticker import get_fixture_matrix, build_fixture_matrix
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Model parameters
+#
+# A player's expected points in a gameweek is
+#   points per appearance x expected share of minutes x availability
+#   x sum over the player's team fixtures of the fixture multiplier
+# where the fixture multiplier blends an attacking and a defensive term by
+# position: FDR and venue, scaled by the team's attack (or defence) strength
+# against the opponent's defence (or attack).
+FORM_WEIGHT = 0.5  # Weight of recent form against season points per game
+FDR_MULTIPLIERS = np.array([1.0, 1.25, 1.1, 1.0, 0.85, 0.7])  # Indexed by FDR 1-5 (0 unused)
+HOME_MULTIPLIER = 1.05
+AWAY_MULTIPLIER = 0.95
+STRENGTH_EXPONENT = 0.5
+ATTACK_WEIGHTS = np.array([0.0, 0.0, 0.3, 0.7, 1.0])  # Share of the attacking term, indexed by element_type
+RECOVERY_GAMEWEEKS = 3  # Gameweeks for a doubtful or injured player to get back to full availability
+
+# Chance of playing assumed when the FPL API doesn't give one, by status
+DEFAULT_CHANCE = {"a": 100, "d": 75, "i": 0, "s": 0, "u": 0, "n": 0}
+
+def _to_float_array(values) -> np.ndarray:
+    """FPL sends decimals like form as strings"""
+    result = np.zeros(len(values))
+    for i, value in enumerate(values):
+        try:
+            result[i] = float(value)
+        except (TypeError, ValueError):
+            pass
+    return result
+
+def fixture_multipliers(bootstrap_data: Dict[str, Any], matrix: Dict[str, Any], gameweeks: List[int]) -> Dict[str, np.ndarray]:
+    """
+    Attacking and defensive fixture multipliers per team and gameweek
+
+    Blanks are zero and doubles the sum of both fixtures.
+
+    Returns:
+        Dict with "attack" and "defence" arrays of shape (teams, gameweeks)
+    """
+    strength = {team["id"]: team for team in bootstrap_data["teams"]}
+    attack = np.zeros((len(matrix["teams"]), len(gameweeks)))
+    defence = np.zeros((len(matrix["teams"]), len(gameweeks)))
+
+    def ratio(numerator, denominator):
+        return (numerator / denominator) ** STRENGTH_EXPONENT if numerator and denominator else 1.0
+
+    for row, team in enumerate(matrix["teams"]):
+        own = strength.get(team["id"], {})
+        for column, gameweek in enumerate(gameweeks):
+            for fixture in matrix["opponents"][row][gameweek]:
+                opponent = strength.get(fixture["opponent_id"], {})
+                venue, opponent_venue = ("home", "away") if fixture["home"] else ("away", "home")
+                base = FDR_MULTIPLIERS[fixture["difficulty"]] * (HOME_MULTIPLIER if fixture["home"] else AWAY_MULTIPLIER)
+                attack[row, column] += base * ratio(own.get(f"strength_attack_{venue}"), opponent.get(f"strength_defence_{opponent_venue}"))
+                defence[row, column] += base * ratio(own.get(f"strength_defence_{venue}"), opponent.get(f"strength_attack_{opponent_venue}"))
+
+    return {"attack": attack, "defence": defence}
+
+def availability(statuses: List[str], chances: List[Optional[int]], horizon: int) -> np.ndarray:
+    """
+    Probability of being available in each projected gameweek
+
+    The chance of playing applies to the first gameweek. Doubtful and injured
+    players recover linearly over RECOVERY_GAMEWEEKS, suspended players are back
+    after one gameweek, and unavailable or ineligible players stay out.
+
+    Returns:
+        Array of shape (players, horizon)
+    """
+    first = np.array([
+        (chance if chance is not None else DEFAULT_CHANCE.get(status, 100)) / 100
+        for status, chance in zip(statuses, chances)
+    ])[:, None]
+    offsets = np.arange(horizon)[None, :]
+    recovering = first + (1 - first) * np.minimum(1, offsets / RECOVERY_GAMEWEEKS)
+    suspended = np.where(offsets == 0, first, 1.0)
+
+    status_array = np.array(statuses)[:, None]
+    return np.select(
+        [np.isin(status_array, ["u", "n"]), status_array == "s"],
+        [np.zeros_like(recovering), suspended],
+        default=recovering
+    )
+
+def build_projections(bootstrap_data: Dict[str, Any], matrix: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Project expected points for every player over every remaining gameweek, once per data version
+
+    Args:
+        bootstrap_data: Bootstrap data with elements, teams and events
+        matrix: Fixture matrix from build_fixture_matrix
+
+    Returns:
+        Dictionary with the projected gameweeks, player metadata and expected
+        points and per-fixture chance of playing arrays of shape (players, gameweeks)
+    """
+    start = matrix["default_gameweek"]
+    gameweeks = list(range(start, matrix["last_gameweek"] + 1))
+    elements = bootstrap_data["elements"]
+    row_of = {team["id"]: row for row, team in enumerate(matrix["teams"])}
+
+    team_rows = np.array([row_of.get(p["team"], 0) for p in elements], dtype=np.int64)
+    element_types = np.array([p["element_type"] for p in elements], dtype=np.int64)
+    minutes = np.array([p["minutes"] for p in elements], dtype=np.float64)
+
+    # Points per appearance, from recent form and the season average
+    points_per_appearance = FORM_WEIGHT * _to_float_array([p["form"] for p in elements]) + \
+        (1 - FORM_WEIGHT) * _to_float_array([p["points_per_game"] for p in elements])
+
+    # Share of the team's minutes so far
+    team_games = matrix["counts"][:, 1:start].sum(axis=1)[team_rows]
+    minutes_share = np.clip(np.divide(minutes, 90 * team_games, out=np.zeros(len(elements)), where=team_games > 0), 0, 1)
+
+    multipliers = fixture_multipliers(bootstrap_data, matrix, gameweeks)
+    attack_weights = ATTACK_WEIGHTS[element_types][:, None]
+    fixture_factor = attack_weights * multipliers["attack"][team_rows] + (1 - attack_weights) * multipliers["defence"][team_rows]
+
+    available = availability([p["status"] for p in elements], [p["chance_of_playing_next_round"] for p in elements], len(gameweeks))
+    expected_points = (points_per_appearance * minutes_share)[:, None] * available * fixture_factor
+    # Chance of playing in each of the team's fixtures, for simulations that need more than the mean
+    appearances = minutes_share[:, None] * available
+
+    teams = {team["id"]: team["short_name"] for team in bootstrap_data["teams"]}
+    return {
+        "gameweeks": gameweeks,
+        "players": [
+            {
+                "id": p["id"],
+                "web_name": p["web_name"],
+                "team_id": p["team"],
+                "team": teams.get(p["team"], "UNK"),
+                "position": POSITION_NAMES.get(p["element_type"], "UNK"),
+                "price": p["now_cost"] / 10
+            }
+            for p in elements
+        ],
+        "row_of": {p["id"]: row for row, p in enumerate(elements)},
+        "element_types": element_types,
+        "team_ids": np.array([p["team"] for p in elements], dtype=np.int64),
+        "costs": np.array([p["now_cost"] for p in elements], dtype=np.int64),
+        "ownership": _to_float_array([p["selected_by_percent"] for p in elements]),
+        "expected_points": expected_points,
+        "appearances": appearances
+    }
+
+async def get_projections() -> Dict[str, Any]:
+    """Get the projections for the current FPL data, building them on first use"""
+    async def build(fpl_data):
+        matrix = await get_fixture_matrix() if fpl_data.get("version", 0) > 0 else build_fixture_matrix(fpl_data["bootstrap"], fpl_data["fixtures"])
+        return build_projections(fpl_data["bootstrap"], matrix)
+
+    return await get_versioned("projections", build)
+
+def gameweek_column(projections: Dict[str, Any], gameweek: int) -> Optional[np.ndarray]:
+    """Expected points of every player in one gameweek, or None if it isn't projected"""
+    if gameweek not in projections["gameweeks"]:
+        return None
+    return projections["expected_points"][:, gameweek - projections["gameweeks"][0]]
+
+def expected_points_for(projections: Dict[str, Any], player_id: int, gameweek: int) -> Optional[float]:
+    """Expected points of one player in one gameweek, or None if unknown"""
+    row = projections["row_of"].get(player_id)
+    column = gameweek_column(projections, gameweek)
+    if row is None or column is None:
+        return None
+    return float(column[row])
+
+def top_projected(
+    projections: Dict[str, Any],
+    gameweeks: int = 5,
+    element_type: Optional[int] = None,
+    team_id: Optional[int] = None,
+    limit: int = 50
+) -> Dict[str, Any]:
+    """
+    Players with the most expected points over the next gameweeks
+
+    Args:
+        projections: Projections from build_projections
+        gameweeks: Number of gameweeks to sum, from the next one
+        element_type: Optional position filter (1=GK, 2=DEF, 3=MID, 4=FWD)
+        team_id: Optional team filter
+        limit: Number of players to return
+
+    Returns:
+        Dictionary with the projected gameweeks and the players, each with
+        total and per-gameweek expected points
+    """
+    window = projections["expected_points"][:, :gameweeks]
+    totals = window.sum(axis=1)
+
+    mask = np.ones(len(totals), dtype=bool)
+    if element_type is not None:
+        mask &= projections["element_types"] == element_type
+    if team_id is not None:
+        mask &= projections["team_ids"] == team_id
+    candidates = np.flatnonzero(mask)
+
+    # Partial selection of the top rows, then a sort of just those
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(-totals[candidates], limit - 1)[:limit]]
+    top = candidates[np.lexsort((candidates, -totals[candidates]))]
+
+    return {
+        "gameweeks": projections["gameweeks"][:gameweeks],
+        "players": [
+            {
+                **projections["players"][row],
+                "expected_points": round(float(totals[row]), 2),
+                "by_gameweek": [round(value, 2) for value in window[row].tolist()]
+            }
+            for row in top.tolist()
+        ]
+    }
+
+register_versioned_cache_metrics("projections", "cells", lambda projections: projections["expected_points"].size)
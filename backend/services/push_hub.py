@@ -0,0 +1,196 @@
+import asyncio
+import json
+import uuid
+import logging
+from collections import deque
+from typing import Dict, Any, Optional, AsyncIterator
+
+from services.metrics import register_gauge_callback, gauge_value
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Event types pushed to subscribers
+EVENT_DEADLINE = "deadline"
+EVENT_INJURIES = "injuries"
+EVENT_LIVE_POINTS = "live_points"
+
+# Seconds between keep-alive comments on idle streams
+KEEPALIVE_INTERVAL = 15
+
+# Broadcast hub state
+# Each event is encoded once at publish time; subscribers all read the same
+# shared log, so publishing costs the same however many clients are connected.
+# Sequences are counted per process, so event ids carry a per-process epoch:
+# ids from before a restart or from another worker never match this log.
+EVENT_HISTORY_SIZE = 100
+_push_hub = {
+    "epoch": uuid.uuid4().hex[:12],
+    "events": deque(maxlen=EVENT_HISTORY_SIZE),  # (sequence, encoded event) pairs
+    "latest": {},  # event type -> latest encoded event, replayed to new subscribers
+    "sequence": 0,
+    "new_event": None,  # asyncio.Event replaced on every publish
+    "subscribers": 0
+}
+
+def _get_new_event_signal() -> asyncio.Event:
+    """Get the signal set on the next publish, creating it inside the running loop"""
+    if _push_hub["new_event"] is None:
+        _push_hub["new_event"] = asyncio.Event()
+    return _push_hub["new_event"]
+
+def format_event_id(sequence: int) -> str:
+    """Build the wire event id for a sequence number of this process"""
+    return f"{_push_hub['epoch']}-{sequence}"
+
+def parse_event_id(event_id: Optional[str]) -> Optional[int]:
+    """
+    Get the sequence number from a Last-Event-ID sent by a reconnecting client
+
+    Returns:
+        The sequence number, or None if the id is malformed or was issued by
+        another process (or before a restart)
+    """
+    if not event_id:
+        return None
+    epoch, _, sequence = event_id.rpartition("-")
+    if epoch != _push_hub["epoch"] or not sequence.isdigit():
+        return None
+    return int(sequence)
+
+def encode_sse(sequence: int, event_type: str, data: Any) -> bytes:
+    """Encode an event in Server-Sent Events wire format"""
+    return f"id: {format_event_id(sequence)}\nevent: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode("utf-8")
+
+def publish_event(event_type: str, data: Any) -> int:
+    """
+    Publish a typed event to every subscriber
+
+    Args:
+        event_type: One of the EVENT_* types
+        data: JSON-serializable payload
+
+    Returns:
+        The sequence number of the published event
+    """
+    _push_hub["sequence"] += 1
+    sequence = _push_hub["sequence"]
+    encoded = encode_sse(sequence, event_type, data)
+
+    _push_hub["events"].append((sequence, encoded))
+    _push_hub["latest"][event_type] = (sequence, encoded)
+
+    # Wake every waiting subscriber at once, and give later waiters a fresh signal
+    signal = _push_hub["new_event"]
+    _push_hub["new_event"] = None
+    if signal is not None:
+        signal.set()
+
+    return sequence
+
+async def subscribe_events(last_event_id: Optional[int] = None) -> AsyncIterator[bytes]:
+    """
+    Stream encoded events to one subscriber
+
+    New subscribers first receive the latest event of each type (for example the
+    current deadline). Reconnecting subscribers that send their last event id get
+    the events they missed, as long as these are still in the history.
+
+    Args:
+        last_event_id: Sequence number of the last event the client received,
+            from parse_event_id
+    """
+    _push_hub["subscribers"] += 1
+    try:
+        events = _push_hub["events"]
+        if last_event_id is not None and events and events[0][0] <= last_event_id + 1 <= _push_hub["sequence"] + 1:
+            cursor = last_event_id
+        else:
+            # Too far behind, ahead of this log or a new subscriber: start from the latest state,
+            # taking the cursor first so events published during the replay aren't skipped
+            cursor = _push_hub["sequence"]
+            for sequence, encoded in sorted(_push_hub["latest"].values()):
+                yield encoded
+
+        while True:
+            pending = [(sequence, encoded) for sequence, encoded in _push_hub["events"] if sequence > cursor]
+            for sequence, encoded in pending:
+                yield encoded
+                cursor = sequence
+
+            # More events may have been published while this subscriber was sending
+            if pending and _push_hub["sequence"] > cursor:
+                continue
+            cursor = _push_hub["sequence"]
+
+            signal = _get_new_event_signal()
+            try:
+                await asyncio.wait_for(signal.wait(), timeout=KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+    finally:
+        _push_hub["subscribers"] -= 1
+
+def get_subscriber_count() -> int:
+    """Get the number of currently connected subscribers"""
+    return _push_hub["subscribers"]
+
+def get_deadline_payload(bootstrap_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the deadline event payload: just the current and next gameweeks"""
+    fields = ["id", "name", "deadline_time", "is_current", "is_next", "finished"]
+    return {
+        "events": [
+            {field: event.get(field) for field in fields}
+            for event in bootstrap_data["events"]
+            if event.get("is_current") or event.get("is_next")
+        ]
+    }
+
+def publish_refresh_events(fpl_data: Dict[str, Any], delta: Optional[Dict[str, Any]]) -> None:
+    """
+    Publish the events for a freshly refreshed FPL data snapshot
+
+    Args:
+        fpl_data: The new FPL data snapshot
+        delta: The recorded snapshot delta, or None for the first snapshot
+    """
+    try:
+        changes = delta["changes"] if delta else {}
+
+        # Deadlines: always on the first snapshot, then only when gameweeks change
+        if delta is None or "events" in changes:
+            publish_event(EVENT_DEADLINE, get_deadline_payload(fpl_data["bootstrap"]))
+
+        # Injuries: players whose status, news or chance of playing changed
+        injury_fields = {"status", "news", "chance_of_playing_this_round", "chance_of_playing_next_round"}
+        changed_ids = [
+            change["id"]
+            for change in changes.get("elements", {}).get("changed", [])
+            if injury_fields & change["changes"].keys()
+        ]
+        if changed_ids:
+            players = {player["id"]: player for player in fpl_data["bootstrap"]["elements"]}
+            publish_event(EVENT_INJURIES, {
+                "version": fpl_data["version"],
+                "players": [
+                    {
+                        "id": player_id,
+                        "web_name": players[player_id]["web_name"],
+                        "team_id": players[player_id]["team"],
+                        "status": players[player_id]["status"],
+                        "news": players[player_id]["news"],
+                        "chance_of_playing": players[player_id]["chance_of_playing_next_round"]
+                    }
+                    for player_id in changed_ids
+                    if player_id in players
+                ]
+            })
+    except Exception as e:
+        logger.error(f"Error publishing refresh events: {str(e)}")
+
+register_gauge_callback(
+    "push_subscribers",
+    "Clients connected to the push event stream",
+    lambda: gauge_value(_push_hub["subscribers"])
+)
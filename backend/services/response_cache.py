@@ -0,0 +1,186 @@
+import gzip
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import msgspec
+from fastapi import Request
+from fastapi.responses import Response
+
+from services.metrics import record_cache_access, register_gauge_callback, gauge_value
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; clients get gzip instead
+    brotli = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Serialized response bodies for the read-heavy endpoints, keyed by endpoint and
+# normalized query. Each entry is built once per FPL data version: the JSON is
+# encoded once, compressed once per encoding, and every later request for the
+# same version is served straight from the stored bytes.
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_MAX_AGE = 60  # Seconds browsers and proxies may reuse a response without revalidating
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+_response_cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+
+# Preferred first when the client accepts several
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+def _compress(body: bytes) -> Dict[str, bytes]:
+    bodies = {"identity": body, "gzip": gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        bodies["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return bodies
+
+def build_entry(body: bytes) -> Dict[str, Any]:
+    """
+    Build a cache entry from a serialized JSON body
+
+    Args:
+        body: The uncompressed response body
+
+    Returns:
+        Dict with the base ETag (a hash of the body) and the body per content encoding
+    """
+    return {
+        "etag": hashlib.blake2b(body, digest_size=12).hexdigest(),
+        "bodies": _compress(body)
+    }
+
+def choose_encoding(accept_encoding: Optional[str]) -> str:
+    """
+    Pick the content encoding to send for an Accept-Encoding header
+
+    Honours q-values (including q=0 to refuse an encoding) and prefers brotli
+    over gzip when the client rates them equally.
+    """
+    if not accept_encoding:
+        return "identity"
+
+    qualities = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip()] = quality
+
+    best, best_quality = "identity", 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def etag_for(entry: Dict[str, Any], encoding: str) -> str:
+    """Strong ETag for one encoding of an entry; each encoding is a different representation"""
+    suffix = "" if encoding == "identity" else f"-{encoding}"
+    return f'"{entry["etag"]}{suffix}"'
+
+def matches_etag(if_none_match: Optional[str], entry: Dict[str, Any]) -> bool:
+    """
+    Check an If-None-Match header against an entry
+
+    Uses weak comparison on the body hash, so a client (or proxy) revalidating
+    with the ETag of another encoding still gets a 304.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag.split("-", 1)[0] == entry["etag"]:
+            return True
+    return False
+
+def build_response(request: Request, entry: Dict[str, Any], max_age: int = RESPONSE_MAX_AGE) -> Response:
+    """Build a 200 (or 304 on a matching If-None-Match) response from a cache entry"""
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    headers = {
+        "ETag": etag_for(entry, encoding),
+        "Cache-Control": f"public, max-age={max_age}",
+        "Vary": "Accept-Encoding"
+    }
+
+    if matches_etag(request.headers.get("if-none-match"), entry):
+        return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=entry["bodies"][encoding], media_type="application/json", headers=headers)
+
+async def cached_response(
+    request: Request,
+    key: Tuple,
+    version: int,
+    build: Callable[[], Awaitable[Any]],
+    max_age: int = RESPONSE_MAX_AGE
+) -> Response:
+    """
+    Serve an endpoint's response from the cache, building it once per data version
+
+    Args:
+        request: The incoming request, for content negotiation and revalidation
+        key: Endpoint name and normalized query parameters
+        version: FPL data version the response is built from; 0 (data fetched
+            directly, not from the refreshed cache) is never cached
+        build: Coroutine producing the response, either as an object to encode
+            as JSON or as an already serialized JSON body
+        max_age: Cache-Control max-age in seconds
+
+    Returns:
+        The encoded response
+    """
+    entry = _response_cache.get(key)
+    hit = entry is not None and entry["version"] == version and version > 0
+    record_cache_access("response", hit)
+
+    if hit:
+        _response_cache.move_to_end(key)
+    else:
+        content = await build()
+        body = content if isinstance(content, bytes) else msgspec.json.encode(content)
+        entry = {**build_entry(body), "version": version}
+
+        if version > 0:
+            _response_cache[key] = entry
+            _response_cache.move_to_end(key)
+            while len(_response_cache) > RESPONSE_CACHE_SIZE:
+                _response_cache.popitem(last=False)
+
+    return build_response(request, entry, max_age)
+
+def clear_response_cache() -> None:
+    """Drop every cached response"""
+    _response_cache.clear()
+
+def _response_cache_metrics():
+    """Report response cache size at scrape time"""
+    identity_bytes = sum(len(entry["bodies"]["identity"]) for entry in _response_cache.values())
+    compressed_bytes = sum(
+        len(body)
+        for entry in _response_cache.values()
+        for encoding, body in entry["bodies"].items()
+        if encoding != "identity"
+    )
+    return {
+        **gauge_value(len(_response_cache), cache="response", metric="entries"),
+        **gauge_value(identity_bytes, cache="response", metric="identity_bytes"),
+        **gauge_value(compressed_bytes, cache="response", metric="compressed_bytes"),
+    }
+
+register_gauge_callback("fpl_cache_state", "Cache size, age and version, by cache and metric", _response_cache_metrics)
@@ -0,0 +1,166 @@
+import time
+import logging
+from collections import deque
+from typing import Dict, List, Any, Optional
+
+from services.metrics import register_gauge_callback, gauge_value
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fields compared between snapshots, per collection
+# Anything else in the payload is either static for the season or not used by clients
+TRACKED_FIELDS = {
+    "elements": [
+        "now_cost", "status", "news", "news_added",
+        "chance_of_playing_this_round", "chance_of_playing_next_round"
+    ],
+    "events": ["deadline_time", "is_previous", "is_current", "is_next", "finished", "data_checked"],
+    "fixtures": ["event", "kickoff_time", "started", "finished", "team_h_score", "team_a_score"],
+}
+
+# Ring buffer of versioned deltas, oldest first
+MAX_CHANGE_HISTORY = 50
+_change_history = {
+    "deltas": deque(maxlen=MAX_CHANGE_HISTORY),
+    "version": 0
+}
+
+def diff_collection(old_items: List[Dict], new_items: List[Dict], fields: List[str]) -> Dict[str, Any]:
+    """
+    Compare two lists of records keyed by "id"
+
+    Returns:
+        Dict with added records, removed ids and per-record field changes as [old, new]
+    """
+    old_by_id = {item["id"]: item for item in old_items}
+
+    added = []
+    changed = []
+    for item in new_items:
+        old_item = old_by_id.pop(item["id"], None)
+
+        if old_item is None:
+            added.append({field: item.get(field) for field in ["id"] + fields})
+            continue
+
+        field_changes = {
+            field: [old_item.get(field), item.get(field)]
+            for field in fields
+            if old_item.get(field) != item.get(field)
+        }
+        if field_changes:
+            changed.append({"id": item["id"], "changes": field_changes})
+
+    # Whatever was not matched no longer exists in the new snapshot
+    removed = list(old_by_id.keys())
+
+    result = {}
+    if added:
+        result["added"] = added
+    if removed:
+        result["removed"] = removed
+    if changed:
+        result["changed"] = changed
+    return result
+
+def diff_snapshots(old_data: Dict[str, Any], new_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute a structural diff between two FPL data snapshots
+
+    Args:
+        old_data: Previous FPL data (bootstrap, fixtures, ...)
+        new_data: Freshly fetched FPL data
+
+    Returns:
+        Dict mapping collection name -> changes, containing only collections that changed
+    """
+    collections = {
+        "elements": (old_data["bootstrap"]["elements"], new_data["bootstrap"]["elements"]),
+        "events": (old_data["bootstrap"]["events"], new_data["bootstrap"]["events"]),
+        "fixtures": (old_data["fixtures"], new_data["fixtures"]),
+    }
+
+    changes = {}
+    for name, (old_items, new_items) in collections.items():
+        collection_changes = diff_collection(old_items, new_items, TRACKED_FIELDS[name])
+        if collection_changes:
+            changes[name] = collection_changes
+
+    return changes
+
+def record_snapshot(old_data: Optional[Dict[str, Any]], new_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Record the delta between the previous and the new snapshot in the ring buffer
+
+    Called by the FPL data refresh before the new snapshot is published. The first
+    snapshot has nothing to compare against, so it only sets the starting version.
+
+    Returns:
+        The recorded delta, or None if there was no previous snapshot
+    """
+    version = new_data["version"]
+
+    if old_data is None:
+        _change_history["version"] = version
+        return None
+
+    try:
+        changes = diff_snapshots(old_data, new_data)
+    except Exception as e:
+        # Clients will be asked to refetch everything rather than receive a wrong delta
+        logger.error(f"Error computing snapshot diff for version {version}: {str(e)}")
+        _change_history["deltas"].clear()
+        _change_history["version"] = version
+        return None
+
+    delta = {
+        "version": version,
+        "previous_version": old_data["version"],
+        "timestamp": time.time(),
+        "changes": changes
+    }
+    _change_history["deltas"].append(delta)
+    _change_history["version"] = version
+
+    logger.info(f"Recorded snapshot delta for version {version}: {', '.join(changes.keys()) or 'no changes'}")
+    return delta
+
+def get_changes_since(since: int) -> Dict[str, Any]:
+    """
+    Get all deltas published after the given version
+
+    Returns:
+        Dict with the current version, the deltas in order, and whether the client
+        is too far behind the ring buffer (or holds an unknown version) and needs
+        to refetch the full data
+    """
+    current_version = _change_history["version"]
+    deltas = _change_history["deltas"]
+
+    if since == current_version:
+        return {"version": current_version, "since": since, "full_refresh_required": False, "deltas": []}
+
+    # A version this process never published (another worker's, or one from
+    # before a restart) can't be patched up with deltas
+    if since > current_version:
+        return {"version": current_version, "since": since, "full_refresh_required": True, "deltas": []}
+
+    # The buffer must reach back to the client's version for the deltas to be complete
+    oldest_available = deltas[0]["previous_version"] if deltas else current_version
+    if since < oldest_available:
+        return {"version": current_version, "since": since, "full_refresh_required": True, "deltas": []}
+
+    return {
+        "version": current_version,
+        "since": since,
+        "full_refresh_required": False,
+        "deltas": [delta for delta in deltas if delta["version"] > since]
+    }
+
+register_gauge_callback(
+    "fpl_cache_state",
+    "Cache size, age and version, by cache and metric",
+    lambda: gauge_value(len(_change_history["deltas"]), cache="change_history", metric="deltas")
+)
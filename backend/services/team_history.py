@@ -0,0 +1,262 @@
+import os
+import time
+import sqlite3
+import asyncio
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from services.metrics import inc_counter, register_gauge_callback, gauge_value
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Local store of team snapshots, one row per team per gameweek
+#
+# Rows come from the entry/{id}/history/ payloads fetched while serving team
+# requests; they are queued and written by a background task so the request
+# path never waits on the disk.
+TEAM_HISTORY_DB = os.getenv("TEAM_HISTORY_DB", os.path.join(os.path.dirname(os.path.dirname(__file__)), "team_history.db"))
+WRITE_QUEUE_SIZE = 1000  # Pending payloads; more are dropped until the writer catches up
+WRITE_BATCH_SIZE = 100  # Teams written per transaction
+LIVE_HISTORY_TTL = 10 * 60  # Seconds stored snapshots are served while the current gameweek is being scored
+
+SNAPSHOT_COLUMNS = (
+    "team_id", "event", "points", "total_points", "rank", "overall_rank", "percentile_rank",
+    "bank", "value", "event_transfers", "event_transfers_cost", "points_on_bench", "chip"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS team_snapshots (
+    team_id INTEGER NOT NULL,
+    event INTEGER NOT NULL,
+    points INTEGER,
+    total_points INTEGER,
+    rank INTEGER,
+    overall_rank INTEGER,
+    percentile_rank INTEGER,
+    bank INTEGER,
+    value INTEGER,
+    event_transfers INTEGER,
+    event_transfers_cost INTEGER,
+    points_on_bench INTEGER,
+    chip TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (team_id, event)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS settled_events (
+    event INTEGER PRIMARY KEY,
+    seen_at REAL NOT NULL
+);
+"""
+
+# Stores whose tables exist already
+_initialized_paths = set()
+
+_writer_state = {
+    "queue": None,
+    "task": None,
+    "written": 0,
+    "dropped": 0
+}
+
+@contextmanager
+def open_store(path: Optional[str] = None):
+    """Open the team history store, creating the table on first use"""
+    path = path or TEAM_HISTORY_DB
+    connection = sqlite3.connect(path, timeout=30)
+    connection.row_factory = sqlite3.Row
+    try:
+        if path not in _initialized_paths:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            _initialized_paths.add(path)
+        yield connection
+    finally:
+        connection.close()
+
+def snapshot_rows(team_id: int, history: Dict[str, Any]) -> List[Tuple]:
+    """Convert an entry history payload into store rows, tagging each gameweek with the chip played"""
+    chips = {chip.get("event"): chip.get("name") for chip in history.get("chips", [])}
+    return [
+        (
+            team_id, event.get("event"), event.get("points"), event.get("total_points"), event.get("rank"),
+            event.get("overall_rank"), event.get("percentile_rank"), event.get("bank"), event.get("value"),
+            event.get("event_transfers"), event.get("event_transfers_cost"), event.get("points_on_bench"),
+            chips.get(event.get("event"))
+        )
+        for event in history.get("current", [])
+        if event.get("event") is not None
+    ]
+
+def write_snapshots(histories: Dict[int, Dict[str, Any]], path: Optional[str] = None) -> int:
+    """
+    Upsert the snapshots of several teams in one transaction
+
+    Returns:
+        Number of rows written
+    """
+    now = time.time()
+    written = 0
+    with open_store(path) as connection, connection:
+        for team_id, history in histories.items():
+            rows = snapshot_rows(team_id, history)
+            connection.executemany(
+                f"INSERT OR REPLACE INTO team_snapshots ({', '.join(SNAPSHOT_COLUMNS)}, updated_at) "
+                f"VALUES ({', '.join('?' for _ in SNAPSHOT_COLUMNS)}, ?)",
+                [row + (now,) for row in rows]
+            )
+            written += len(rows)
+    return written
+
+def record_team_history(team_id: int, history: Dict[str, Any]) -> None:
+    """
+    Queue a team's history payload for the background writer
+
+    Never blocks; if the writer isn't running or has fallen behind, the
+    payload is dropped and stored the next time the team is fetched.
+    """
+    queue = _writer_state["queue"]
+    if queue is None or not history.get("current"):
+        return
+    try:
+        queue.put_nowait((team_id, history))
+    except asyncio.QueueFull:
+        _writer_state["dropped"] += 1
+        inc_counter("fpl_cache_refreshes_total", cache="team_history", outcome="dropped")
+
+async def team_history_writer():
+    """Drain the write queue in batches, keeping only the latest payload per team"""
+    queue = _writer_state["queue"]
+    while True:
+        team_id, history = await queue.get()
+        batch = {team_id: history}
+        while len(batch) < WRITE_BATCH_SIZE and not queue.empty():
+            team_id, history = queue.get_nowait()
+            batch[team_id] = history
+
+        try:
+            _writer_state["written"] += await asyncio.to_thread(write_snapshots, batch)
+            inc_counter("fpl_cache_refreshes_total", cache="team_history", outcome="success")
+        except Exception as e:
+            inc_counter("fpl_cache_refreshes_total", cache="team_history", outcome="error")
+            logger.error(f"Error writing team snapshots: {str(e)}")
+
+async def initialize_team_history_writer():
+    """Initialize the team history background writer"""
+    if _writer_state["task"] is None:
+        logger.info("Initializing team history writer")
+        _writer_state["queue"] = asyncio.Queue(maxsize=WRITE_QUEUE_SIZE)
+        _writer_state["task"] = asyncio.create_task(team_history_writer())
+
+def snapshots_from_history(team_id: int, history: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Snapshots straight from an entry history payload, shaped like stored ones"""
+    rows = sorted(snapshot_rows(team_id, history), key=lambda row: row[1])
+    return [dict(zip(SNAPSHOT_COLUMNS[1:], row[1:])) for row in rows]
+
+def get_team_snapshots(
+    team_id: int,
+    from_event: Optional[int] = None,
+    to_event: Optional[int] = None,
+    path: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Stored snapshots of one team, in gameweek order"""
+    query = f"SELECT {', '.join(SNAPSHOT_COLUMNS[1:])} FROM team_snapshots WHERE team_id = ?"
+    params = [team_id]
+    if from_event is not None:
+        query += " AND event >= ?"
+        params.append(from_event)
+    if to_event is not None:
+        query += " AND event <= ?"
+        params.append(to_event)
+    query += " ORDER BY event"
+
+    with open_store(path) as connection:
+        return [dict(row) for row in connection.execute(query, params)]
+
+def last_updated(team_id: int, path: Optional[str] = None) -> Optional[float]:
+    """When a team's snapshots were last written, or None if it has none"""
+    with open_store(path) as connection:
+        return connection.execute("SELECT MAX(updated_at) FROM team_snapshots WHERE team_id = ?", (team_id,)).fetchone()[0]
+
+def store_is_fresh(updated_at: Optional[float], current_event: Optional[Dict[str, Any]], path: Optional[str] = None, now: Optional[float] = None) -> bool:
+    """
+    Whether a team's stored snapshots can be served without going upstream
+
+    Snapshots written before the current gameweek's deadline miss it. While
+    it is being played and scored its points and ranks keep changing, so they
+    are only served for LIVE_HISTORY_TTL. Once it is finished and its data
+    checked, snapshots written before that was first seen are refetched once.
+    """
+    if updated_at is None:
+        return False
+    if current_event is None:
+        return True
+    now = now if now is not None else time.time()
+    deadline = datetime.fromisoformat(current_event["deadline_time"].replace("Z", "+00:00")).timestamp()
+    if updated_at < deadline:
+        return False
+    if not (current_event.get("finished") and current_event.get("data_checked")):
+        return now - updated_at < LIVE_HISTORY_TTL
+
+    with open_store(path) as connection, connection:
+        connection.execute("INSERT OR IGNORE INTO settled_events (event, seen_at) VALUES (?, ?)", (current_event["id"], now))
+        settled_at = connection.execute("SELECT seen_at FROM settled_events WHERE event = ?", (current_event["id"],)).fetchone()[0]
+    return updated_at >= settled_at
+
+def downsample(snapshots: List[Dict[str, Any]], step: Optional[int] = None, max_points: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Merge consecutive gameweeks into buckets
+
+    Each bucket reports its last gameweek's totals and ranks, with from_event
+    set to its first gameweek, and sums the per-gameweek points, transfers,
+    hits and bench points. The latest gameweek always ends a bucket so the
+    current standing is exact.
+
+    Args:
+        snapshots: Snapshots in gameweek order
+        step: Gameweeks per bucket
+        max_points: Upper bound on the number of buckets; overrides a smaller step
+
+    Raises:
+        ValueError: If step or max_points isn't positive
+    """
+    if (step is not None and step < 1) or (max_points is not None and max_points < 1):
+        raise ValueError("step and max_points must be positive")
+    step = step or 1
+    if max_points is not None:
+        step = max(step, -(-len(snapshots) // max_points))
+    if step == 1:
+        return snapshots
+
+    buckets = []
+    # Buckets are aligned on the latest gameweek, so only the first one can be partial
+    first = len(snapshots) % step or step
+    for end in range(first, len(snapshots) + 1, step):
+        bucket = snapshots[max(end - step, 0):end]
+        last = bucket[-1]
+        buckets.append({
+            **last,
+            "from_event": bucket[0]["event"],
+            "points": sum(row["points"] or 0 for row in bucket),
+            "event_transfers": sum(row["event_transfers"] or 0 for row in bucket),
+            "event_transfers_cost": sum(row["event_transfers_cost"] or 0 for row in bucket),
+            "points_on_bench": sum(row["points_on_bench"] or 0 for row in bucket),
+            "chip": ",".join(row["chip"] for row in bucket if row["chip"]) or None
+        })
+    return buckets
+
+def _team_history_metrics():
+    """Report the writer's queue depth and throughput at scrape time"""
+    if _writer_state["queue"] is None:
+        return {}
+    return {
+        **gauge_value(_writer_state["queue"].qsize(), cache="team_history", metric="queued"),
+        **gauge_value(_writer_state["written"], cache="team_history", metric="rows_written"),
+        **gauge_value(_writer_state["dropped"], cache="team_history", metric="dropped"),
+    }
+
+register_gauge_callback("fpl_cache_state", "Cache size, age and version, by cache and metric", _team_history_metrics)
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from typing import Dict, Any, List
+
+from services.cache_backend import get_cache_backend
+from services.fpl_data import get_fpl_data
+from services.metrics import record_cache_access
+from services.team_history import record_team_history
+from services.upstream import upstream_client, FPL_API_BASE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SQUAD_CACHE_DURATION = 5 * 60  # 5 minutes in seconds
+MAX_FREE_TRANSFERS = 5  # Free transfers a team can bank
+
+FPL_TEAM_URL = f"{FPL_API_BASE}/entry"
+
+def free_transfers_from_history(history: Dict[str, Any]) -> int:
+    """
+    Free transfers available for the next deadline, replayed from a team's history
+
+    A team gets one free transfer after its first gameweek and one more after
+    each gameweek, up to MAX_FREE_TRANSFERS. Transfers use them up (beyond
+    that they cost points, leaving none), while Wildcard and Free Hit weeks
+    leave them untouched.
+    """
+    chips = {chip.get("event"): chip.get("name") for chip in history.get("chips", [])}
+    events = sorted(history.get("current", []), key=lambda event: event.get("event", 0))
+    free_transfers = 0
+    for index, event in enumerate(events):
+        if index == 0:
+            free_transfers = 1
+            continue
+        if chips.get(event.get("event")) not in ("wildcard", "freehit"):
+            free_transfers = max(free_transfers - (event.get("event_transfers") or 0), 0)
+        free_transfers = min(free_transfers + 1, MAX_FREE_TRANSFERS)
+    return free_transfers
+
+def get_chips_status(chips_used: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Availability of every chip, given the chips a team has played
+
+    Args:
+        chips_used: Chips played, each with a name and an event
+
+    Returns:
+        List of chips, each with its name, whether it is available and the
+        gameweek it was used in
+    """
+    # Check used wildcard to determine if second wildcard is available
+    wildcards_used = [chip for chip in chips_used if chip.get("name") == "wildcard"]
+
+    # In FPL, there are 2 wildcards allowed per season
+    wildcard_status = []
+    if len(wildcards_used) == 0:
+        wildcard_status = [{"name": "wildcard", "available": True, "used_in": None}]
+    elif len(wildcards_used) == 1:
+        wildcard_gw = wildcards_used[0].get("event", 0)
+        # First half wildcard can only be used in first half of season (roughly GW1-19)
+        if wildcard_gw <= 19:
+            wildcard_status = [
+                {"name": "wildcard", "available": False, "used_in": wildcard_gw},
+                {"name": "wildcard2", "available": True, "used_in": None}
+            ]
+        else:
+            wildcard_status = [{"name": "wildcard", "available": False, "used_in": wildcard_gw}]
+    else:
+        wildcard_status = [{"name": "wildcard", "available": False, "used_in": wildcards_used[-1].get("event", 0)}]
+
+    # Check status of other chips
+    chips_status = wildcard_status
+    for chip_name in ["freehit", "bboost", "3xc"]:
+        used = next((chip for chip in chips_used if chip.get("name") == chip_name), None)
+        chips_status.append({
+            "name": chip_name,
+            "available": used is None,
+            "used_in": used.get("event") if used else None
+        })
+
+    return chips_status
+
+def squad_from_payloads(team_id: int, gameweek: int, picks: Dict[str, Any], history: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine a team's picks and history payloads into its current squad"""
+    entry_history = picks.get("entry_history") or {}
+    return {
+        "team_id": team_id,
+        "gameweek": gameweek,
+        "squad": [pick["element"] for pick in picks.get("picks", [])],
+        "picks": [
+            {
+                "element": pick["element"],
+                "position": pick.get("position"),
+                "multiplier": pick.get("multiplier", 1),
+                "is_captain": pick.get("is_captain", False),
+                "is_vice_captain": pick.get("is_vice_captain", False)
+            }
+            for pick in picks.get("picks", [])
+        ],
+        "bank": entry_history.get("bank", 0),
+        "value": entry_history.get("value", 0),
+        "free_transfers": free_transfers_from_history(history),
+        "active_chip": picks.get("active_chip"),
+        "chips": [{"name": chip.get("name"), "event": chip.get("event")} for chip in history.get("chips", [])],
+        "chips_status": get_chips_status([{"name": chip.get("name", "unknown"), "event": chip.get("event", 0)} for chip in history.get("chips", [])])
+    }
+
+async def get_team_squad(team_id: int) -> Dict[str, Any]:
+    """
+    Get a team's squad as of the current gameweek, with its bank and free transfers
+
+    Raises:
+        ValueError: If the season hasn't started yet
+        httpx.HTTPStatusError: If the FPL API doesn't know the team
+    """
+    fpl_data = await get_fpl_data()
+    gameweek = next((event["id"] for event in fpl_data["bootstrap"]["events"] if event["is_current"]), None)
+    if gameweek is None:
+        raise ValueError("The season hasn't started yet, so there are no squads")
+
+    cache = get_cache_backend()
+    cache_key = f"squad_{team_id}_{gameweek}"
+    try:
+        cached = await cache.get(cache_key)
+    except Exception as e:
+        logger.error(f"Error reading squad cache: {str(e)}")
+        cached = None
+    record_cache_access("squad", cached is not None)
+    if cached is not None:
+        return cached
+
+    async with upstream_client(follow_redirects=True) as client:
+        picks_response, history_response = await asyncio.gather(
+            client.get(f"{FPL_TEAM_URL}/{team_id}/event/{gameweek}/picks/"),
+            client.get(f"{FPL_TEAM_URL}/{team_id}/history/")
+        )
+    picks_response.raise_for_status()
+    history_response.raise_for_status()
+    history = history_response.json()
+    record_team_history(team_id, history)
+
+    squad = squad_from_payloads(team_id, gameweek, picks_response.json(), history)
+    await cache.set(cache_key, squad, ttl=SQUAD_CACHE_DURATION)
+    return squad
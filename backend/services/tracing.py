@@ -0,0 +1,253 @@
+import os
+import json
+import asyncio
+import time
+import uuid
+import random
+import logging
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Any, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fraction of requests whose span tree is kept; slow and failed requests are always kept
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.05"))
+TRACE_SLOW_THRESHOLD = float(os.getenv("TRACE_SLOW_THRESHOLD", "2.0"))  # Seconds
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "traces.jsonl"))
+TRACE_LOG_MAX_BYTES = 10 * 1024 * 1024  # Rotated to <path>.1 past this size
+TRACE_QUEUE_SIZE = 1000  # Kept traces waiting to be written; more are dropped until the writer catches up
+
+# Long-lived or scrape endpoints that would only add noise
+TRACE_EXCLUDED_PATHS = ("/events/stream", "/metrics", "/traces")
+
+# Recently kept traces, served by the /traces viewer
+RECENT_TRACES_SIZE = 200
+_recent_traces = deque(maxlen=RECENT_TRACES_SIZE)
+
+# Kept traces are queued and appended to the log by a background task, so the
+# request path never waits on the disk
+_writer_state = {
+    "queue": None,
+    "task": None,
+    "dropped": 0
+}
+
+# The trace and span of the request being handled; copied into tasks it spawns
+_current_trace: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_span", default=None)
+
+def _new_span(name: str, start_ms: float, attributes: Dict[str, Any]) -> Dict[str, Any]:
+    return {"name": name, "start_ms": start_ms, "duration_ms": None, "attributes": attributes, "children": []}
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time a block of work as a child of the current span
+
+    Outside a traced request (background refreshes, tests) this does nothing,
+    so services can be instrumented unconditionally.
+
+    Args:
+        name: Span name, also used as the Server-Timing metric name
+        attributes: Extra details stored with the span
+    """
+    trace = _current_trace.get()
+    parent = _current_span.get()
+    if trace is None or parent is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    node = _new_span(name, round((start - trace["start"]) * 1000, 2), attributes)
+    parent["children"].append(node)
+    token = _current_span.set(node)
+    try:
+        yield
+    except Exception as e:
+        node["attributes"]["error"] = type(e).__name__
+        raise
+    finally:
+        node["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        _current_span.reset(token)
+
+def traced(name: str):
+    """Decorator timing every call of an async function as a span"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def set_span_attribute(key: str, value: Any) -> None:
+    """Attach a detail (status code, token count, cache hit) to the current span"""
+    current = _current_span.get()
+    if current is not None and _current_trace.get() is not None:
+        current["attributes"][key] = value
+
+def build_server_timing(root: Dict[str, Any]) -> str:
+    """
+    Build a Server-Timing header value from the spans finished so far
+
+    Spans with the same name (e.g. several upstream calls) are summed.
+    """
+    totals = {}
+    stack = list(root["children"])
+    while stack:
+        node = stack.pop()
+        stack.extend(node["children"])
+        if node["duration_ms"] is None:
+            continue
+        total, count = totals.get(node["name"], (0.0, 0))
+        totals[node["name"]] = (total + node["duration_ms"], count + 1)
+
+    entries = []
+    for name, (total, count) in totals.items():
+        token = "".join(c if c.isalnum() or c in "_-." else "_" for c in name)
+        description = f';desc="{count} calls"' if count > 1 else ""
+        entries.append(f"{token};dur={total:.1f}{description}")
+    return ", ".join(entries)
+
+def _write_traces(records: List[Dict[str, Any]]) -> None:
+    """Append traces to the JSONL log, rotating it once it grows too large"""
+    if os.path.exists(TRACE_LOG_PATH) and os.path.getsize(TRACE_LOG_PATH) > TRACE_LOG_MAX_BYTES:
+        os.replace(TRACE_LOG_PATH, TRACE_LOG_PATH + ".1")
+    with open(TRACE_LOG_PATH, "a") as trace_file:
+        trace_file.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records))
+
+def _queue_trace(record: Dict[str, Any]) -> None:
+    """
+    Queue a kept trace for the background writer
+
+    Never blocks; if the writer isn't running or has fallen behind, the trace
+    is only kept in memory for the viewer.
+    """
+    queue = _writer_state["queue"]
+    if queue is None:
+        return
+    try:
+        queue.put_nowait(record)
+    except asyncio.QueueFull:
+        _writer_state["dropped"] += 1
+
+async def trace_writer():
+    """Drain the trace queue, appending everything pending in one write"""
+    queue = _writer_state["queue"]
+    while True:
+        records = [await queue.get()]
+        while not queue.empty():
+            records.append(queue.get_nowait())
+        try:
+            await asyncio.to_thread(_write_traces, records)
+        except Exception as e:
+            logger.error(f"Error writing {len(records)} traces: {str(e)}")
+
+async def initialize_trace_writer():
+    """Initialize the trace log background writer"""
+    if _writer_state["task"] is None:
+        logger.info("Initializing trace writer")
+        _writer_state["queue"] = asyncio.Queue(maxsize=TRACE_QUEUE_SIZE)
+        _writer_state["task"] = asyncio.create_task(trace_writer())
+
+def finish_trace(trace: Dict[str, Any], status: int) -> bool:
+    """
+    Close a request trace and keep it if it was sampled, slow or failed
+
+    Returns:
+        Whether the trace was kept
+    """
+    root = trace["root"]
+    root["duration_ms"] = round((time.perf_counter() - trace["start"]) * 1000, 2)
+
+    keep = trace["sampled"] or root["duration_ms"] >= TRACE_SLOW_THRESHOLD * 1000 or status >= 500
+    if not keep:
+        return False
+
+    record = {
+        "trace_id": trace["trace_id"],
+        "timestamp": trace["timestamp"],
+        "method": trace["method"],
+        "path": trace["path"],
+        "route": trace["route"],
+        "status": status,
+        "duration_ms": root["duration_ms"],
+        "spans": root["children"]
+    }
+    _recent_traces.append(record)
+    _queue_trace(record)
+    return True
+
+def get_recent_traces(limit: int = 50, min_duration_ms: float = 0, route: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Get summaries of recently kept traces, newest first"""
+    summaries = []
+    for record in reversed(_recent_traces):
+        if record["duration_ms"] < min_duration_ms:
+            continue
+        if route is not None and record["route"] != route:
+            continue
+        summaries.append({key: value for key, value in record.items() if key != "spans"})
+        if len(summaries) >= limit:
+            break
+    return summaries
+
+def get_trace(trace_id: str) -> Optional[Dict[str, Any]]:
+    """Get a kept trace with its full span tree"""
+    return next((record for record in _recent_traces if record["trace_id"] == trace_id), None)
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening a trace for each request
+
+    Adds a Server-Timing header with the spans finished before the response
+    starts, and an X-Trace-Id header to find the trace in the viewer.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(TRACE_EXCLUDED_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        trace = {
+            "trace_id": uuid.uuid4().hex[:16],
+            "timestamp": time.time(),
+            "start": start,
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": None,
+            "sampled": random.random() < TRACE_SAMPLE_RATE,
+            "root": _new_span("request", 0.0, {})
+        }
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(trace["root"])
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total_ms = (time.perf_counter() - start) * 1000
+                server_timing = build_server_timing(trace["root"])
+                server_timing = f"{server_timing}, total;dur={total_ms:.1f}" if server_timing else f"total;dur={total_ms:.1f}"
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing.encode("latin-1")))
+                headers.append((b"x-trace-id", trace["trace_id"].encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = scope.get("route")
+            trace["route"] = route.path if route is not None else None
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            finish_trace(trace, status)
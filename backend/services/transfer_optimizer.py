@@ -0,0 +1,368 @@
+import os
+import time
+import asyncio
+import logging
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from services.chip_planner import lineup_points, MAX_PER_TEAM
+from services.metrics import observe_histogram
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Search settings
+OPTIMIZER_WORKERS = int(os.getenv("OPTIMIZER_WORKERS", "2"))  # Processes running searches
+TIME_BUDGET = 2.0  # Seconds a search may run before returning its best squad so far
+DEFAULT_HORIZON = 5  # Gameweeks of expected points optimized
+HIT_COST = 4  # Points deducted per transfer beyond the free ones
+MAX_TRANSFERS = 5
+CANDIDATES_PER_POSITION = 60
+DEADLINE_CHECK_INTERVAL = 64  # Nodes between deadline checks
+# Workers start from a clean interpreter rather than a fork of the server, whose
+# event loop and thread pool locks a forked child would inherit
+OPTIMIZER_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_optimizer_pool = {
+    "executor": None
+}
+
+def squad_value(expected_points: np.ndarray, element_types: np.ndarray, rows) -> float:
+    """Summed best XI plus captain points of a squad over the horizon"""
+    points = lineup_points(expected_points[rows], element_types[rows])
+    return float((points["lineup"] + points["captain"]).sum())
+
+def _relaxed_value(points: np.ndarray, is_goalkeeper: np.ndarray) -> np.ndarray:
+    """
+    Per gameweek upper bound on XI plus captain points: the best goalkeeper, the
+    best ten outfield players regardless of formation, and the best player again
+    """
+    goalkeeper = points[is_goalkeeper].max(axis=0) if is_goalkeeper.any() else 0
+    outfield = -np.sort(-points[~is_goalkeeper], axis=0)[:10].sum(axis=0)
+    captain = points.max(axis=0) if len(points) else 0
+    return goalkeeper + outfield + captain
+
+def _candidate_bounds(points: np.ndarray, is_goalkeeper: np.ndarray, candidates: np.ndarray, candidate_is_goalkeeper: bool) -> np.ndarray:
+    """Summed relaxed value of the fixed players plus each candidate in turn, in one evaluation"""
+    count, horizon = candidates.shape
+    stacked = np.vstack([np.tile(points, (1, count)), candidates.reshape(1, -1)])
+    relaxed = _relaxed_value(stacked, np.append(is_goalkeeper, candidate_is_goalkeeper))
+    return relaxed.reshape(count, horizon).sum(axis=1)
+
+def candidate_pool(
+    totals: np.ndarray,
+    element_types: np.ndarray,
+    costs: np.ndarray,
+    owned: set,
+    depth: int
+) -> Dict[int, np.ndarray]:
+    """
+    Players worth buying, by position, in descending expected points
+
+    A player is dropped once `depth` players of the same position score at
+    least as much for no more money, since at most a few of them can be
+    blocked by the squad or the club limit.
+    """
+    pool = {}
+    for position in (1, 2, 3, 4):
+        rows = np.flatnonzero(element_types == position)
+        rows = rows[np.lexsort((costs[rows], -totals[rows]))]
+        kept = []
+        for row in rows.tolist():
+            if row in owned:
+                continue
+            if sum(1 for other in kept if costs[other] <= costs[row]) >= depth:
+                continue
+            kept.append(row)
+            if len(kept) == CANDIDATES_PER_POSITION:
+                break
+        pool[position] = np.array(kept, dtype=np.int64)
+    return pool
+
+def optimize_transfers(
+    expected_points: np.ndarray,
+    element_types: np.ndarray,
+    team_ids: np.ndarray,
+    costs: np.ndarray,
+    squad_rows: List[int],
+    selling_prices: List[int],
+    bank: int,
+    free_transfers: int = 1,
+    max_transfers: Optional[int] = None,
+    time_budget: float = TIME_BUDGET
+) -> Dict[str, Any]:
+    """
+    Best transfers for a squad over a horizon, by branch and bound
+
+    Transfer-out sets are visited by size, and within a size best bound first,
+    checking the time budget while they are built. For each, the
+    incoming players are chosen slot by slot (one per outgoing player, same
+    position) from pools sorted by expected points, so a slot stops as soon as
+    the bound fails. All candidates for the last slot are scored in one
+    vectorized lineup evaluation. The bound on a squad is its relaxed value
+    without the outgoing players plus the full expected points of every
+    incoming one.
+
+    Args:
+        expected_points: Array of shape (players, horizon gameweeks)
+        element_types, team_ids, costs: Per player arrays, as in the projections
+        squad_rows: Rows of the 15 squad players
+        selling_prices: Selling price of each squad player, in tenths of a million
+        bank: Money in the bank, in tenths of a million
+        free_transfers: Transfers without a points hit
+        max_transfers: Most transfers considered (default: one more than free)
+        time_budget: Seconds before the best answer so far is returned
+
+    Returns:
+        Dictionary with the rows out and in, the squad's projected points
+        before and after (net of hits), the hit taken, whether the search
+        finished within the time budget and how many squads it evaluated
+    """
+    deadline = time.perf_counter() + time_budget
+    max_transfers = min(MAX_TRANSFERS, max_transfers if max_transfers is not None else free_transfers + 1)
+    squad_rows = list(squad_rows)
+    totals = expected_points.sum(axis=1)
+    weekly_best = {}
+    weekly_top = {}
+
+    baseline = squad_value(expected_points, element_types, squad_rows)
+    best = {"value": baseline, "out": [], "in": [], "hits": 0}
+    state = {"evaluated": 1, "nodes": 0, "complete": True}
+
+    pool = candidate_pool(totals, element_types, costs, set(squad_rows), max_transfers + MAX_PER_TEAM)
+    pool_costs = {position: costs[rows] for position, rows in pool.items()}
+    pool_clubs = {position: team_ids[rows] for position, rows in pool.items()}
+    pool_totals = {position: totals[rows] for position, rows in pool.items()}
+    for position, rows in pool.items():
+        weekly_best[position] = expected_points[rows].max(axis=0) if len(rows) else np.zeros(expected_points.shape[1])
+        # Stand-ins for incoming players: the k-th best candidate points in each gameweek
+        weekly_top[position] = -np.sort(-expected_points[rows], axis=0)[:max_transfers]
+    cheapest = {position: np.sort(pool_costs[position]) for position in pool}
+
+    def out_of_time():
+        state["nodes"] += 1
+        if state["nodes"] % DEADLINE_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+            state["complete"] = False
+        return not state["complete"]
+
+    def bounded_out_sets(count):
+        """
+        Every transfer-out set of one size with its upper bound, best first
+
+        Returns None once the time budget runs out, since bounding every set is
+        itself too slow for the larger sizes.
+        """
+        hits = HIT_COST * max(0, count - free_transfers)
+        out_sets = []
+        for out_positions in itertools.combinations(range(len(squad_rows)), count):
+            if out_of_time():
+                return None
+            out_set = sorted(out_positions, key=lambda i: element_types[squad_rows[i]])
+            kept = [row for i, row in enumerate(squad_rows) if i not in out_positions]
+            slots = [int(element_types[squad_rows[i]]) for i in out_set]
+            if any(len(pool[position]) < slots.count(position) for position in set(slots)):
+                continue
+            # The set's bound adds the stand-ins to the squad; the one used while
+            # searching adds incoming players' full points to what is kept
+            stand_ins = np.vstack([weekly_top[position][:slots.count(position)] for position in sorted(set(slots))])
+            stand_in_goalkeepers = np.repeat([position == 1 for position in sorted(set(slots))], [slots.count(position) for position in sorted(set(slots))])
+            bound = float(_relaxed_value(
+                np.vstack([expected_points[kept], stand_ins]),
+                np.concatenate([element_types[kept] == 1, stand_in_goalkeepers])
+            ).sum()) - hits
+            relaxed = _relaxed_value(expected_points[kept], element_types[kept] == 1)
+            # The best player may be a new one, adding to the captain term
+            captain_slack = np.maximum(0, np.max([weekly_best[position] for position in set(slots)], axis=0) - expected_points[kept].max(axis=0)).sum()
+            out_sets.append((bound, out_set, kept, slots, hits, float(relaxed.sum() + captain_slack)))
+        out_sets.sort(key=lambda entry: -entry[0])
+        return out_sets
+
+    # Sizes are searched smallest first, so the cheap single transfers set a
+    # good best squad before the many larger sets are even built
+    for count in range(1, max_transfers + 1):
+        out_sets = bounded_out_sets(count)
+        if out_sets is None:
+            break
+
+        for bound, out_set, kept, slots, hits, base_bound in out_sets:
+            # Sets come best bound first, so none of the rest of this size can beat the best squad either
+            if bound <= best["value"] + 1e-9 or out_of_time():
+                break
+
+            funds = bank + sum(selling_prices[i] for i in out_set)
+            clubs = {}
+            for row in kept:
+                clubs[int(team_ids[row])] = clubs.get(int(team_ids[row]), 0) + 1
+
+            # Optimistic points and minimum cost of the slots after each one
+            remaining_points = [0.0] * (len(slots) + 1)
+            remaining_cost = [0] * (len(slots) + 1)
+            for j in reversed(range(len(slots))):
+                same_after = slots[j + 1:].count(slots[j])
+                remaining_points[j] = remaining_points[j + 1] + float(pool_totals[slots[j]][same_after] if same_after < len(pool[slots[j]]) else 0)
+                remaining_cost[j] = remaining_cost[j + 1] + int(cheapest[slots[j]][0])
+
+            def search(j, chosen, spent, points, first):
+                position = slots[j]
+                rows, row_costs, row_clubs, row_totals = pool[position], pool_costs[position], pool_clubs[position], pool_totals[position]
+
+                if j == len(slots) - 1:
+                    # Score every affordable candidate for the last slot at once
+                    club_counts = np.array([clubs.get(int(club), 0) for club in row_clubs[first:]])
+                    feasible = np.flatnonzero(
+                        (row_costs[first:] <= funds - spent)
+                        & (club_counts < MAX_PER_TEAM)
+                        & (base_bound + points + row_totals[first:] - hits > best["value"] + 1e-9)
+                    ) + first
+                    if len(feasible) == 0:
+                        return
+                    block = np.tile(expected_points[kept + chosen], (1, len(feasible)))
+                    candidates = expected_points[rows[feasible]].reshape(1, -1)
+                    lineup = lineup_points(np.vstack([block, candidates]), np.append(element_types[kept + chosen], position))
+                    values = (lineup["lineup"] + lineup["captain"]).reshape(len(feasible), -1).sum(axis=1) - hits
+                    state["evaluated"] += len(feasible)
+                    top = int(np.argmax(values))
+                    if values[top] > best["value"] + 1e-9:
+                        best["value"] = float(values[top])
+                        best["out"] = [squad_rows[i] for i in out_set]
+                        best["in"] = chosen + [int(rows[feasible[top]])]
+                        best["hits"] = hits
+                    return
+
+                # Tighter bounds for every candidate, with stand-ins for the slots after this one
+                rest = slots[j + 1:]
+                fixed = np.vstack([expected_points[kept + chosen]] + [weekly_top[p][:rest.count(p)] for p in sorted(set(rest))])
+                fixed_goalkeepers = np.concatenate([element_types[kept + chosen] == 1] + [np.full(rest.count(p), p == 1) for p in sorted(set(rest))])
+                bounds = _candidate_bounds(fixed, fixed_goalkeepers, expected_points[rows[first:]], position == 1) - hits
+
+                for index in range(first, len(rows)):
+                    if base_bound + points + row_totals[index] + remaining_points[j + 1] - hits <= best["value"] + 1e-9:
+                        break
+                    if bounds[index - first] <= best["value"] + 1e-9:
+                        continue
+                    if out_of_time():
+                        return
+                    club = int(row_clubs[index])
+                    if spent + row_costs[index] + remaining_cost[j + 1] > funds or clubs.get(club, 0) >= MAX_PER_TEAM:
+                        continue
+                    clubs[club] = clubs.get(club, 0) + 1
+                    # Players for the same position are taken in pool order to skip permutations
+                    next_first = index + 1 if slots[j + 1] == position else 0
+                    search(j + 1, chosen + [int(rows[index])], spent + int(row_costs[index]), points + float(row_totals[index]), next_first)
+                    clubs[club] -= 1
+
+            search(0, [], 0, 0.0, 0)
+            if not state["complete"]:
+                break
+        if not state["complete"]:
+            break
+
+    return {
+        "out": best["out"],
+        "in": best["in"],
+        "hits": best["hits"],
+        "baseline_points": baseline,
+        "expected_points": best["value"],
+        "complete": state["complete"],
+        "evaluated": state["evaluated"]
+    }
+
+def get_optimizer_pool() -> ProcessPoolExecutor:
+    """Process pool for optimizer searches, started on first use"""
+    if _optimizer_pool["executor"] is None:
+        _optimizer_pool["executor"] = ProcessPoolExecutor(
+            max_workers=OPTIMIZER_WORKERS,
+            mp_context=multiprocessing.get_context(OPTIMIZER_START_METHOD)
+        )
+    return _optimizer_pool["executor"]
+
+def shutdown_optimizer_pool():
+    """Stop the optimizer processes"""
+    if _optimizer_pool["executor"] is not None:
+        _optimizer_pool["executor"].shutdown(wait=False, cancel_futures=True)
+        _optimizer_pool["executor"] = None
+
+async def suggest_transfers(
+    projections: Dict[str, Any],
+    squad: List[int],
+    bank: int,
+    free_transfers: int = 1,
+    horizon: int = DEFAULT_HORIZON,
+    max_transfers: Optional[int] = None,
+    selling_prices: Optional[Dict[int, int]] = None,
+    time_budget: float = TIME_BUDGET
+) -> Dict[str, Any]:
+    """
+    Best transfers for a squad, searched in the optimizer process pool
+
+    Args:
+        projections: Projections from build_projections
+        squad: Player IDs of the 15 squad players
+        bank: Money in the bank, in tenths of a million
+        free_transfers: Transfers without a points hit
+        horizon: Gameweeks of expected points to maximize, from the next one
+        max_transfers: Most transfers considered (default: one more than free)
+        selling_prices: Selling price by player ID (default: the current price,
+            as the public FPL API doesn't expose selling prices)
+        time_budget: Seconds before the best answer so far is returned
+
+    Returns:
+        Dictionary with the suggested transfers and the projected points of the
+        squad before and after them
+
+    Raises:
+        ValueError: If the squad has players the projections don't know
+    """
+    unknown = [player_id for player_id in squad if player_id not in projections["row_of"]]
+    if unknown:
+        raise ValueError(f"Unknown players {', '.join(str(player_id) for player_id in unknown)}")
+    rows = [projections["row_of"][player_id] for player_id in squad]
+    prices = [(selling_prices or {}).get(player_id, int(projections["costs"][row])) for player_id, row in zip(squad, rows)]
+
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(get_optimizer_pool(), partial(
+        optimize_transfers,
+        projections["expected_points"][:, :horizon],
+        projections["element_types"],
+        projections["team_ids"],
+        projections["costs"],
+        rows,
+        prices,
+        bank,
+        free_transfers=free_transfers,
+        max_transfers=max_transfers,
+        time_budget=time_budget
+    ))
+    observe_histogram(
+        "optimizer_duration_seconds", time.perf_counter() - started,
+        optimizer="transfers", outcome="complete" if result["complete"] else "time_budget"
+    )
+
+    players = projections["players"]
+    horizon_points = projections["expected_points"][:, :horizon].sum(axis=1)
+    price_of = dict(zip(rows, prices))
+
+    def describe(row, price):
+        return {**players[row], "price": price / 10, "expected_points": round(float(horizon_points[row]), 2)}
+
+    return {
+        "gameweeks": projections["gameweeks"][:horizon],
+        "transfers": [
+            {"out": describe(out_row, price_of[out_row]), "in": describe(in_row, int(projections["costs"][in_row]))}
+            for out_row, in_row in zip(result["out"], result["in"])
+        ],
+        "hits": result["hits"],
+        "bank_after": (bank + sum(price_of[row] for row in result["out"]) - sum(int(projections["costs"][row]) for row in result["in"])) / 10,
+        "baseline_points": round(result["baseline_points"], 2),
+        "expected_points": round(result["expected_points"], 2),
+        "expected_gain": round(result["expected_points"] - result["baseline_points"], 2),
+        "complete": result["complete"],
+        "evaluated": result["evaluated"]
+    }
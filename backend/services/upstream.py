@@ -0,0 +1,76 @@
+import os
+import re
+import time
+import random
+import asyncio
+import httpx
+
+from services.metrics import observe_histogram, add_gauge
+from services.tracing import span, set_span_attribute
+
+# Base URL of the FPL API, overridable to point at a local stand-in (see loadtest/)
+FPL_API_BASE = os.getenv("FPL_API_BASE", "https://fantasy.premierleague.com/api").rstrip("/")
+
+# Attempts per request for callers that back off on rate limits and server errors
+UPSTREAM_MAX_ATTEMPTS = 4
+
+# Numeric path segments (team, gameweek, player ids) are replaced so that
+# upstream metrics have one series per endpoint rather than one per id
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+def url_pattern(url: httpx.URL) -> str:
+    """Get the URL with ids replaced by {id}, for use as a metric label"""
+    return f"{url.host}{_ID_SEGMENT.sub('/{id}', url.path)}"
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """HTTP transport recording latency and status of every upstream request"""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        pattern = url_pattern(request.url)
+        start = time.perf_counter()
+        add_gauge("upstream_requests_in_flight", 1)
+        status = "error"
+        try:
+            with span("fpl_api", url=pattern):
+                response = await super().handle_async_request(request)
+                status = str(response.status_code)
+                set_span_attribute("status", response.status_code)
+            return response
+        finally:
+            add_gauge("upstream_requests_in_flight", -1)
+            observe_histogram(
+                "upstream_request_duration_seconds",
+                time.perf_counter() - start,
+                url=pattern,
+                status=status
+            )
+
+def upstream_client(**kwargs) -> httpx.AsyncClient:
+    """
+    Create an HTTP client for upstream (FPL API) requests
+
+    Accepts the same arguments as httpx.AsyncClient.
+    """
+    return httpx.AsyncClient(transport=InstrumentedTransport(), **kwargs)
+
+async def get_with_backoff(client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+    """
+    GET an upstream URL, backing off on rate limits and server errors
+
+    Waits for Retry-After when the FPL API sends one, otherwise exponentially
+    with jitter, for up to UPSTREAM_MAX_ATTEMPTS attempts.
+
+    Raises:
+        httpx.HTTPStatusError: If the last attempt still fails, or on any other error status
+    """
+    for attempt in range(UPSTREAM_MAX_ATTEMPTS):
+        response = await client.get(url, **kwargs)
+        if response.status_code == 429 or response.status_code >= 500:
+            if attempt == UPSTREAM_MAX_ATTEMPTS - 1:
+                response.raise_for_status()
+            retry_after = response.headers.get("retry-after")
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else 2 ** attempt
+            await asyncio.sleep(delay + random.random())
+            continue
+        response.raise_for_status()
+        return response
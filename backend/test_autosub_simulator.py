@@ -0,0 +1,88 @@
+import numpy as np
+from benchmarks.fixtures import load_fixture, load_fixture_bytes
+from services.fpl_schema import decode_bootstrap
+from services.fixture_ticker import build_fixture_matrix
+from services.projections import build_projections
+from services.chip_planner import pick_squad, LINEUP_MINIMUMS
+from services.autosub_simulator import draw_points, points_moments, autosubs, simulate_bench
+
+BOOTSTRAP = decode_bootstrap(load_fixture_bytes("bootstrap"))
+MATRIX = build_fixture_matrix(BOOTSTRAP, load_fixture("fixtures"))
+PROJECTIONS = build_projections(BOOTSTRAP, MATRIX)
+# A 4-4-2 with a goalkeeper and one player of each outfield position on the bench
+TYPES = np.array([1, 2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 1, 2, 3, 4])
+
+def autosubs_one_trial(played, element_types, order):
+    """FPL's rules, one trial at a time"""
+    lineup = list(order[:11])
+    subbed_on = []
+    for substitute in order[11:]:
+        if not played[substitute]:
+            continue
+        for index, starter in enumerate(lineup):
+            if played[starter] or starter in subbed_on or (element_types[starter] == 1) != (element_types[substitute] == 1):
+                continue
+            candidate = lineup[:index] + [substitute] + lineup[index + 1:]
+            if all((element_types[candidate] == position).sum() >= minimum for position, minimum in LINEUP_MINIMUMS.items()):
+                lineup, subbed_on = candidate, subbed_on + [substitute]
+                break
+    return subbed_on
+
+def test_autosubs_match_one_trial_at_a_time():
+    """Vectorized substitutions match applying the rules trial by trial"""
+    rng = np.random.default_rng(5)
+    played = rng.random((15, 2000)) < 0.6
+    for order in [list(range(15)), list(range(11)) + [11, 14, 12, 13], [0, 1, 2, 3, 5, 6, 7, 9, 10, 4, 8, 11, 13, 12, 14]]:
+        subbed_on = autosubs(played, TYPES, order)
+        for trial in range(played.shape[1]):
+            expected = autosubs_one_trial(played[:, trial], TYPES, order)
+            assert sorted(np.flatnonzero(subbed_on[:, trial]).tolist()) == sorted(expected), (order, trial)
+    print("✅ Autosubs match the rules applied one trial at a time")
+
+def test_draws_match_projections():
+    """Simulated points average out to expected points, appearances to the chance of playing"""
+    rng = np.random.default_rng(1)
+    expected_points = np.array([3.0, 0.5, 6.0, 0.0, 2.0])
+    appearances = np.array([0.8, 0.9, 0.5, 0.3, 0.0])
+    fixtures = np.array([1, 2, 2, 0, 1])
+    draws = draw_points(expected_points, appearances, fixtures, 200000, rng)
+    assert np.allclose(draws["points"].mean(axis=1), expected_points * (appearances > 0), atol=0.05)
+    assert np.allclose(draws["played"].mean(axis=1), 1 - (1 - appearances) ** fixtures, atol=0.01)
+    assert draws["points"].min() >= 0
+
+    moments = points_moments(expected_points, appearances, fixtures)
+    assert np.allclose(moments["mean"], draws["points"].mean(axis=1), atol=0.05)
+    assert np.allclose(moments["variance"], draws["points"].var(axis=1), rtol=0.05, atol=0.05)
+    assert np.allclose(moments["chance_of_playing"], draws["played"].mean(axis=1), atol=0.01)
+    print("✅ Draws are unbiased and match the exact moments")
+
+def test_simulate_bench():
+    """Bench Boost adds the bench's points, and the current bench order gains nothing on itself"""
+    rows = pick_squad(PROJECTIONS["ownership"], PROJECTIONS["element_types"], PROJECTIONS["team_ids"], PROJECTIONS["costs"]).tolist()
+    by_type = {position: [row for row in rows if PROJECTIONS["element_types"][row] == position] for position in range(1, 5)}
+    lineup = by_type[1][:1] + by_type[2][:4] + by_type[3][:4] + by_type[4][:2] + [by_type[1][1], by_type[2][4], by_type[3][4], by_type[4][2]]
+    picks = [
+        {"element": PROJECTIONS["players"][row]["id"], "position": index + 1, "is_captain": index == 5, "is_vice_captain": index == 6}
+        for index, row in enumerate(lineup)
+    ]
+
+    result = simulate_bench(PROJECTIONS, MATRIX, picks, gameweek=34, trials=20000)
+    current = next(entry for entry in result["bench_orders"] if entry["current"])
+    assert current["gain"] == 0 and len(result["bench_orders"]) == 6
+    assert result["bench_orders"][0]["mean"] >= current["mean"]
+    assert result["bench_boost"]["mean"] >= result["points"]["mean"]
+    assert result["bench_boost"]["gain"]["mean"] > 0 and result["bench_boost"]["gain"]["variance"] > 0
+    bench_points = sum(player["expected_points"] for player in result["players"][11:])
+    assert result["bench_boost"]["gain"]["mean"] <= bench_points + 0.5
+
+    try:
+        simulate_bench(PROJECTIONS, MATRIX, picks, gameweek=29)
+        assert False, "Gameweek 29 isn't projected"
+    except ValueError:
+        pass
+    print(f"✅ Bench Boost gains {result['bench_boost']['gain']['mean']} ± {result['bench_boost']['gain']['std']} in GW34")
+
+if __name__ == "__main__":
+    test_autosubs_match_one_trial_at_a_time()
+    test_draws_match_projections()
+    test_simulate_bench()
@@ -0,0 +1,109 @@
+from benchmarks.fixtures import load_fixture
+from loadtest import mock_upstream
+from services.backtest import (
+    archive_payload, list_seasons, load_season, season_name, snapshots_from_history,
+    prepare_snapshot, evaluate_season, sweep, CHIP_WINDOW
+)
+from services.chip_calculator import identify_double_gameweeks, calculate_gameweek_difficulty, get_recommended_players
+from services.player_history import history_rows, write_histories
+
+BOOTSTRAP = load_fixture("bootstrap")
+FIXTURES = load_fixture("fixtures")
+
+def synthesize_history(element):
+    """The stand-in upstream's history, with a second fixture in gameweek 5 for one player"""
+    history = mock_upstream.synthesize_element_summary(element, FIXTURES)["history"]
+    if element["id"] == BOOTSTRAP["elements"][5]["id"]:
+        first = next(entry for entry in history if entry["round"] == 5)
+        history.append({**first, "fixture": 9999, "kickoff_time": "2024-09-18T19:00:00Z", "total_points": 3, "value": first["value"] + 1})
+    return history
+
+def build_store(path):
+    """Player history store filled from the stand-in upstream's summaries"""
+    write_histories([
+        {
+            "element": element["id"],
+            "fingerprint": "test",
+            "content_hash": "test",
+            "rows": history_rows(element["id"], {"history": synthesize_history(element)})
+        }
+        for element in BOOTSTRAP["elements"]
+    ], path)
+
+def test_archive_round_trip(tmp_path):
+    """Snapshots are read back in gameweek order, skipping gameweeks without results yet"""
+    root = str(tmp_path)
+    season = season_name(BOOTSTRAP)
+    assert season == "2024-25"
+    for gameweek in (2, 1):
+        for name, payload in (("bootstrap", BOOTSTRAP), ("fixtures", FIXTURES), ("live", {"elements": []})):
+            archive_payload(season, gameweek, name, payload, root)
+    archive_payload(season, 3, "bootstrap", BOOTSTRAP, root)
+
+    snapshots = load_season(season, root)
+    assert list_seasons(root) == [season]
+    assert [snapshot["gameweek"] for snapshot in snapshots] == [1, 2]
+    assert snapshots[0]["bootstrap"] == BOOTSTRAP and snapshots[0]["fixtures"] == FIXTURES
+    print(f"✅ Archived {season} read back as {len(snapshots)} complete gameweeks")
+
+def test_snapshots_from_history(tmp_path):
+    """Rebuilt snapshots hold the totals as they stood before each gameweek"""
+    path = str(tmp_path / "history.db")
+    build_store(path)
+    snapshots = snapshots_from_history(BOOTSTRAP, FIXTURES, path)
+    assert [snapshot["gameweek"] for snapshot in snapshots] == list(range(1, 30))
+
+    element = BOOTSTRAP["elements"][5]
+    history = synthesize_history(element)
+    for snapshot in (snapshots[0], snapshots[4], snapshots[9], snapshots[-1]):
+        gameweek = snapshot["gameweek"]
+        rebuilt = next(e for e in snapshot["bootstrap"]["elements"] if e["id"] == element["id"])
+        assert rebuilt["total_points"] == sum(entry["total_points"] for entry in history if entry["round"] < gameweek)
+        assert rebuilt["minutes"] == sum(entry["minutes"] for entry in history if entry["round"] < gameweek)
+        live = next(e for e in snapshot["live"]["elements"] if e["id"] == element["id"])
+        assert live["stats"]["total_points"] == sum(entry["total_points"] for entry in history if entry["round"] == gameweek)
+        # Prices are taken from the last fixture of a double gameweek, not summed
+        assert rebuilt["now_cost"] == max((entry for entry in history if entry["round"] <= gameweek), key=lambda entry: entry["kickoff_time"])["value"]
+    print(f"✅ Rebuilt {len(snapshots)} gameweeks from the history store")
+
+def test_evaluate_and_sweep(tmp_path):
+    """Default weights replay the calculator's picks; a parallel sweep matches a serial one"""
+    path = str(tmp_path / "history.db")
+    build_store(path)
+    snapshots = snapshots_from_history(BOOTSTRAP, FIXTURES, path)[-12:]
+
+    # The replay's picks are the calculator's own
+    snapshot = snapshots[0]
+    prepared = prepare_snapshot(snapshot)
+    teams = {team["id"]: team for team in BOOTSTRAP["teams"]}
+    team_fixtures = identify_double_gameweeks(FIXTURES, snapshot["gameweek"])
+    gameweek_data = calculate_gameweek_difficulty(snapshot["gameweek"], team_fixtures, FIXTURES, teams)
+    best = max(
+        (player for position in (1, 2, 3, 4) for player in get_recommended_players(gameweek_data, snapshot["bootstrap"], position_filter=position)),
+        key=lambda player: player["score"]
+    )
+    result = evaluate_season([prepared])
+    assert result["captain_points"] == prepared["realized"][best["id"]]
+    assert 0 < result["capture"] <= 1
+
+    result = evaluate_season([prepare_snapshot(snapshot) for snapshot in snapshots])
+    assert result["chip_decisions"] == len(snapshots) - CHIP_WINDOW + 1
+    assert result["triple_captain_regret"] >= 0 and 0 <= result["triple_captain_hit_rate"] <= 1
+
+    grid = {"double_teams": [0.0, 7.0], "form": [1.0, 3.0]}
+    serial = sweep({"2024-25": snapshots}, grid, workers=1)
+    parallel = sweep({"2024-25": snapshots}, grid, workers=2)
+    assert serial == parallel
+    assert len(serial["results"]) == 4
+    assert serial["baseline"]["seasons"]["2024-25"] == result
+    values = [entry["overall"]["captain_points"] for entry in serial["results"]]
+    assert values == sorted(values, reverse=True)
+    print(f"✅ Best of {len(values)} combinations: {serial['results'][0]['params']} ({values[0]} captain points per gameweek)")
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    for test in (test_archive_round_trip, test_snapshots_from_history, test_evaluate_and_sweep):
+        with tempfile.TemporaryDirectory() as directory:
+            test(Path(directory))
@@ -0,0 +1,158 @@
+import asyncio
+import os
+import pickle
+import tempfile
+import time
+import numpy as np
+from services.cache_backend import SharedMemoryCacheBackend, RedisCacheBackend, encode_value, decode_value
+
+class RedisStandIn:
+    """Minimal in-memory server speaking enough of the Redis protocol for the cache backend"""
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+
+    def _alive(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at < time.time():
+            del self.data[key]
+            return None
+        return value
+
+    def handle(self, args):
+        command = args[0].decode().upper()
+        self.commands.append(command)
+        if command == "GET":
+            return self._alive(args[1].decode())
+        if command == "GETRANGE":
+            value = self._alive(args[1].decode())
+            return (value or b"")[int(args[2]):int(args[3]) + 1]
+        if command == "SET":
+            key, value, options = args[1].decode(), args[2], [a.decode().upper() for a in args[3:]]
+            if "NX" in options and self._alive(key) is not None:
+                return None
+            expires_at = time.time() + int(options[options.index("PX") + 1]) / 1000 if "PX" in options else None
+            self.data[key] = (value, expires_at)
+            return "OK"
+        if command == "DEL":
+            return 1 if self.data.pop(args[1].decode(), None) else 0
+        if command == "EVAL":
+            # Only the compare-and-renew / compare-and-delete lease scripts are supported
+            script, key, owner = args[1].decode(), args[3].decode(), args[4]
+            if self._alive(key) != owner:
+                return 0
+            if "PEXPIRE" in script:
+                self.data[key] = (owner, time.time() + int(args[5]) / 1000)
+            else:
+                del self.data[key]
+            return 1
+        return Exception(f"ERR unknown command '{command}'")
+
+    async def serve(self, reader, writer):
+        try:
+            while True:
+                count = int((await reader.readuntil(b"\r\n"))[1:-2])
+                args = []
+                for _ in range(count):
+                    length = int((await reader.readuntil(b"\r\n"))[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                reply = self.handle(args)
+                if reply is None:
+                    writer.write(b"$-1\r\n")
+                elif isinstance(reply, Exception):
+                    writer.write(f"-{reply}\r\n".encode())
+                elif isinstance(reply, int):
+                    writer.write(b":%d\r\n" % reply)
+                elif isinstance(reply, str):
+                    writer.write(f"+{reply}\r\n".encode())
+                else:
+                    writer.write(b"$%d\r\n%s\r\n" % (len(reply), reply))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.serve, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+snapshot = {"version": 3, "teams": {1: {"name": "Arsenal"}}, "elements": list(range(1000))}
+
+def test_shared_memory_backend():
+    """Two workers see each other's writes through the shared-memory directory"""
+    async def run():
+        directory = tempfile.mkdtemp()
+        worker_a = SharedMemoryCacheBackend(directory)
+        worker_b = SharedMemoryCacheBackend(directory)
+
+        await worker_a.set("fpl_data", snapshot)
+        first = await worker_b.get("fpl_data")
+        assert first == snapshot
+        assert await worker_b.get("fpl_data") is first  # Decoded once until replaced
+
+        await worker_a.set("fpl_data", {**snapshot, "version": 4})
+        assert (await worker_b.get("fpl_data"))["version"] == 4
+
+        await worker_a.set("team_1_30", {"team_id": 1}, ttl=0.05)
+        await asyncio.sleep(0.1)
+        assert await worker_b.get("team_1_30") is None
+    asyncio.run(run())
+    print("✅ Shared-memory backend shares values between workers")
+
+def test_redis_backend():
+    """Workers share values through a Redis-protocol server and skip unchanged transfers"""
+    async def run():
+        stand_in = RedisStandIn()
+        port = await stand_in.start()
+        worker_a = RedisCacheBackend(f"redis://127.0.0.1:{port}/0")
+        worker_b = RedisCacheBackend(f"redis://127.0.0.1:{port}/0")
+
+        await worker_a.set("fpl_data", snapshot)
+        assert await worker_b.get("fpl_data") == snapshot
+
+        stand_in.commands.clear()
+        await worker_b.get("fpl_data")
+        assert stand_in.commands == ["GETRANGE"]  # Only the stamp was fetched
+
+        await worker_a.set("fpl_data", {**snapshot, "version": 4})
+        assert (await worker_b.get("fpl_data"))["version"] == 4
+
+        await worker_a.delete("fpl_data")
+        assert await worker_b.get("fpl_data") is None
+        stand_in.server.close()
+    asyncio.run(run())
+    print("✅ Redis backend shares values between workers")
+
+class Exploit:
+    """Pickle payload that would run code when unpickled"""
+    def __reduce__(self):
+        return (os.system, ("touch /tmp/fpl-cache-exploit",))
+
+def test_values_are_not_pickled():
+    """Shared values keep bytes, integer keys and numpy arrays, and planted pickles are never loaded"""
+    value = {
+        "raw": b"\x00\x01", 7: {"name": "Arsenal"}, "points": np.arange(6, dtype=np.int64).reshape(2, 3),
+        "done": np.array([True, False]), "count": np.int64(3)
+    }
+    decoded = decode_value(encode_value(value))
+    assert decoded["raw"] == b"\x00\x01" and decoded[7] == {"name": "Arsenal"} and decoded["count"] == 3
+    assert decoded["points"].dtype == np.int64 and (decoded["points"] == value["points"]).all()
+    assert decoded["points"].flags.writeable and decoded["done"].dtype == bool
+
+    async def run():
+        directory = tempfile.mkdtemp()
+        worker = SharedMemoryCacheBackend(directory)
+        await worker.set("fpl_data", snapshot)
+        with open(worker._path("fpl_data"), "r+b") as f:
+            f.seek(SharedMemoryCacheBackend.HEADER.size)
+            f.write(pickle.dumps(Exploit()))
+            f.truncate()
+        worker._decoded.clear()
+        assert await worker.get("fpl_data") is None  # Undecodable entries are misses
+    asyncio.run(run())
+    assert not os.path.exists("/tmp/fpl-cache-exploit")
+    print("✅ Values round-trip without pickle")
+
+if __name__ == "__main__":
+    test_shared_memory_backend()
+    test_redis_backend()
+    test_values_are_not_pickled()
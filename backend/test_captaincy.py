@@ -0,0 +1,51 @@
+from benchmarks.fixtures import load_fixture, load_fixture_bytes
+from services.fpl_schema import decode_bootstrap
+from services.fixture_ticker import build_fixture_matrix
+from services.projections import build_projections
+from services.captaincy import rank_captains
+from services.league_picks import effective_ownership
+
+BOOTSTRAP = decode_bootstrap(load_fixture_bytes("bootstrap"))
+MATRIX = build_fixture_matrix(BOOTSTRAP, load_fixture("fixtures"))
+PROJECTIONS = build_projections(BOOTSTRAP, MATRIX)
+PICKS = load_fixture("picks")["picks"]
+
+def test_rank_captains():
+    """Captains are ranked by expected points, doubles counted and blanks scoring nothing"""
+    for gameweek in (31, 34):
+        result = rank_captains(PROJECTIONS, MATRIX, PICKS, gameweek=gameweek)
+        candidates = result["candidates"]
+        assert len(candidates) == len(PICKS)
+        assert [c["captain_points"] for c in candidates] == sorted((c["captain_points"] for c in candidates), reverse=True)
+        assert result["captain"] == next(c for c in candidates if c["in_lineup"])
+        assert result["vice_captain"]["in_lineup"] and result["vice_captain"] is not result["captain"]
+        for candidate in candidates:
+            row = PROJECTIONS["row_of"][candidate["id"]]
+            assert abs(candidate["expected_points"] - PROJECTIONS["expected_points"][row, gameweek - 31]) < 0.011
+            assert len(candidate["fixtures"]) == MATRIX["counts"][candidate["team_id"] - 1, gameweek]
+            if not candidate["fixtures"]:
+                assert candidate["captain_points"] == 0 and candidate["chance_of_playing"] == 0
+        print(f"✅ GW{gameweek}: captain {result['captain']['web_name']} ({result['captain']['captain_points']} points)")
+
+def test_effective_ownership():
+    """Effective ownership sums multipliers over teams, as a percentage"""
+    picks_by_team = {
+        1: {"elements": [1, 2, 3], "multipliers": [2, 1, 0]},
+        2: {"elements": [1, 3, 4], "multipliers": [1, 3, 1]},
+        3: {"elements": [2, 999999], "multipliers": [2, 1]}
+    }
+    ownership = effective_ownership(picks_by_team, PROJECTIONS["row_of"], len(PROJECTIONS["players"]))
+    expected = {1: 100.0, 2: 100.0, 3: 100.0, 4: 100 / 3}
+    for player_id, value in expected.items():
+        assert abs(ownership[PROJECTIONS["row_of"][player_id]] - value) < 1e-9
+    assert abs(ownership.sum() - sum(expected.values())) < 1e-9
+
+    result = rank_captains(PROJECTIONS, MATRIX, PICKS, effective_ownership=ownership)
+    for candidate in result["candidates"]:
+        eo = ownership[PROJECTIONS["row_of"][candidate["id"]]]
+        assert abs(candidate["field_gain"] - candidate["expected_points"] * (2 - eo / 100)) < 0.02
+    print("✅ Effective ownership and field gain")
+
+if __name__ == "__main__":
+    test_rank_captains()
+    test_effective_ownership()
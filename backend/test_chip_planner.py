@@ -0,0 +1,104 @@
+import itertools
+import numpy as np
+from benchmarks.fixtures import load_fixture, load_fixture_bytes
+from services.fpl_schema import decode_bootstrap
+from services.fixture_ticker import build_fixture_matrix
+from services.projections import build_projections
+from services.chip_planner import (
+    solve_chip_schedule, remaining_chips, pick_squad, lineup_points,
+    SQUAD_QUOTAS, MAX_PER_TEAM, DEFAULT_BUDGET, WILDCARD_HORIZON
+)
+
+BOOTSTRAP = decode_bootstrap(load_fixture_bytes("bootstrap"))
+PROJECTIONS = build_projections(BOOTSTRAP, build_fixture_matrix(BOOTSTRAP, load_fixture("fixtures")))
+
+def test_pick_squad_follows_rules():
+    """Greedy squads are always legal"""
+    for scores in [PROJECTIONS["ownership"], PROJECTIONS["expected_points"][:, 0], PROJECTIONS["expected_points"].sum(axis=1)]:
+        rows = pick_squad(scores, PROJECTIONS["element_types"], PROJECTIONS["team_ids"], PROJECTIONS["costs"])
+        assert len(set(rows.tolist())) == 15
+        assert {position: int((PROJECTIONS["element_types"][rows] == position).sum()) for position in SQUAD_QUOTAS} == SQUAD_QUOTAS
+        assert np.bincount(PROJECTIONS["team_ids"][rows]).max() <= MAX_PER_TEAM
+        assert PROJECTIONS["costs"][rows].sum() <= DEFAULT_BUDGET
+    print("✅ Squads have 2/5/5/3 players, at most 3 per team, within budget")
+
+def test_lineup_matches_brute_force():
+    """The best XI is the best of every valid formation"""
+    rng = np.random.default_rng(3)
+    types = np.array([1, 1] + [2] * 5 + [3] * 5 + [4] * 3)
+    for _ in range(20):
+        points = rng.gamma(2, 2, size=(15, 1))
+        best = 0
+        for defenders, midfielders in itertools.product(range(3, 6), range(2, 6)):
+            forwards = 10 - defenders - midfielders
+            if not 1 <= forwards <= 3:
+                continue
+            ranked = {position: np.sort(points[types == position, 0])[::-1] for position in range(1, 5)}
+            best = max(best, ranked[1][0] + ranked[2][:defenders].sum() + ranked[3][:midfielders].sum() + ranked[4][:forwards].sum())
+        result = lineup_points(points, types)
+        assert abs(result["lineup"][0] - best) < 1e-9
+        assert abs(result["bench"][0] - (points.sum() - best)) < 1e-9
+    print("✅ Lineups match a search over every formation")
+
+def test_schedule_matches_brute_force():
+    """The DP finds the best of every assignment of chips to gameweeks"""
+    chips = ["wildcard2", "freehit", "bboost", "3xc"]
+    result = solve_chip_schedule(PROJECTIONS, chips)
+
+    expected_points, types = PROJECTIONS["expected_points"], PROJECTIONS["element_types"]
+    args = (types, PROJECTIONS["team_ids"], PROJECTIONS["costs"])
+    columns = range(len(PROJECTIONS["gameweeks"]))
+    start = pick_squad(PROJECTIONS["ownership"], *args)
+    wildcard = {column: pick_squad(expected_points[:, column:column + WILDCARD_HORIZON].sum(axis=1), *args) for column in columns}
+    free_hit = {column: pick_squad(expected_points[:, column], *args) for column in columns}
+
+    def week(rows, column):
+        points = lineup_points(expected_points[rows][:, [column]], types[rows])
+        return {key: float(value[0]) for key, value in points.items()}
+
+    def simulate(assignment):
+        total, held, wildcard_column = 0.0, start, None
+        for column in columns:
+            if assignment.get("wildcard2") == column:
+                held, wildcard_column = wildcard[column], column
+            if wildcard_column is not None and column >= wildcard_column + WILDCARD_HORIZON:
+                held = start
+            points = week(free_hit[column] if assignment.get("freehit") == column else held, column)
+            total += points["lineup"] + points["captain"]
+            if assignment.get("3xc") == column:
+                total += points["captain"]
+            if assignment.get("bboost") == column:
+                total += points["bench"]
+        return total
+
+    best = 0.0
+    options = list(columns) + [None]
+    for weeks in itertools.product(options, repeat=len(chips)):
+        played = [column for column in weeks if column is not None]
+        if len(played) == len(set(played)):
+            best = max(best, simulate(dict(zip(chips, weeks))))
+
+    planned = {entry["chip"]: PROJECTIONS["gameweeks"].index(entry["gameweek"]) for entry in result["plan"]}
+    assert abs(result["expected_points"] - round(best, 2)) < 0.011, (result["expected_points"], best)
+    assert abs(simulate(planned) - best) < 1e-6
+    assert len({entry["gameweek"] for entry in result["plan"]}) == len(result["plan"])
+    print(f"✅ Plan {[(entry['chip'], entry['gameweek']) for entry in result['plan']]} matches brute force ({best:.2f} xP)")
+
+def test_remaining_chips():
+    """Only chips still inside their window are scheduled"""
+    status = [
+        {"name": "wildcard", "available": True}, {"name": "wildcard2", "available": False},
+        {"name": "freehit", "available": True}, {"name": "bboost", "available": False}, {"name": "3xc", "available": True}
+    ]
+    assert remaining_chips(status, 31, 38) == ["freehit", "3xc"]
+    assert remaining_chips(None, 31, 38) == ["wildcard2", "freehit", "bboost", "3xc"]
+    assert remaining_chips(None, 5, 38) == ["wildcard", "wildcard2", "freehit", "bboost", "3xc"]
+    result = solve_chip_schedule(PROJECTIONS, remaining_chips(status, 31, 38))
+    assert {entry["chip"] for entry in result["plan"]} | set(result["unused"]) == {"freehit", "3xc"}
+    print("✅ Used and expired chips are left out")
+
+if __name__ == "__main__":
+    test_pick_squad_follows_rules()
+    test_lineup_matches_brute_force()
+    test_schedule_matches_brute_force()
+    test_remaining_chips()
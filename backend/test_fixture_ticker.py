@@ -0,0 +1,71 @@
+import time
+from benchmarks.fixtures import load_fixture_bytes
+from services.fpl_schema import decode_bootstrap, decode_fixtures
+from services.fixture_ticker import build_fixture_matrix, fixture_ticker, window_totals, BLANK_DIFFICULTY
+
+BOOTSTRAP = decode_bootstrap(load_fixture_bytes("bootstrap"))
+FIXTURES = decode_fixtures(load_fixture_bytes("fixtures"))
+MATRIX = build_fixture_matrix(BOOTSTRAP, FIXTURES)
+
+def test_ticker_matches_fixture_list():
+    """Window totals, blanks and doubles agree with a pass over the fixtures"""
+    ticker = fixture_ticker(MATRIX, 29, 35)
+    assert (ticker["from"], ticker["to"]) == (29, 35)
+    assert len(ticker["teams"]) == len(BOOTSTRAP["teams"])
+
+    for row in ticker["teams"]:
+        played = [
+            (f["event"], f["team_h_difficulty"] if f["team_h"] == row["team_id"] else f["team_a_difficulty"])
+            for f in FIXTURES
+            if f["event"] is not None and 29 <= f["event"] <= 35 and row["team_id"] in (f["team_h"], f["team_a"])
+        ]
+        gameweeks = [gw for gw, _ in played]
+        assert row["fixture_count"] == len(played)
+        assert row["total_difficulty"] == sum(difficulty for _, difficulty in played)
+        assert row["blanks"] == [gw for gw in range(29, 36) if gw not in gameweeks]
+        assert row["doubles"] == sorted({gw for gw in gameweeks if gameweeks.count(gw) > 1})
+        assert sum(len(gw["fixtures"]) for gw in row["gameweeks"]) == len(played)
+    print("✅ Ticker rows agree with the fixture list")
+
+    assert any(row["blanks"] == [31] for row in ticker["teams"])
+    assert any(row["doubles"] == [34] for row in ticker["teams"])
+    print("✅ Blank GW31 and double GW34 show up")
+
+    averages = [row["average_difficulty"] for row in ticker["teams"]]
+    assert averages == sorted(averages)
+    counts = [row["fixture_count"] for row in fixture_ticker(MATRIX, 29, 35, "fixtures")["teams"]]
+    assert counts == sorted(counts, reverse=True)
+    by_total = fixture_ticker(MATRIX, 29, 35, "total")["teams"]
+    totals = [row["total_difficulty"] + BLANK_DIFFICULTY * len(row["blanks"]) for row in by_total]
+    assert totals == sorted(totals)  # Blanks don't float teams to the top
+    by_fixtures = fixture_ticker(MATRIX, 29, 35, "fixtures")["teams"]
+    assert [row["team_id"] for row in by_total] != [row["team_id"] for row in by_fixtures]
+    names = [row["team"] for row in fixture_ticker(MATRIX, 29, 35, "-team")["teams"]]
+    assert names == sorted(names, reverse=True)
+    print("✅ Sorts by average difficulty, total difficulty, fixture count and team")
+
+def test_window_totals_are_fast():
+    """Summing any window for every team is a pair of column lookups"""
+    start = time.perf_counter()
+    for first in range(1, 33):
+        window_totals(MATRIX, first, first + 5)
+    per_window = (time.perf_counter() - start) / 32
+    assert per_window < 0.001
+    print(f"✅ Window totals in {per_window * 1e6:.1f} µs")
+
+def test_window_validation():
+    """Windows are clamped to the season and empty ones rejected"""
+    ticker = fixture_ticker(MATRIX, 36, 50)
+    assert (ticker["from"], ticker["to"]) == (36, 38)
+    for bad in [lambda: fixture_ticker(MATRIX, 10, 5), lambda: fixture_ticker(MATRIX, sort="colour")]:
+        try:
+            bad()
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+    print("✅ Windows clamped and bad input rejected")
+
+if __name__ == "__main__":
+    test_ticker_matches_fixture_list()
+    test_window_totals_are_fast()
+    test_window_validation()
@@ -0,0 +1,37 @@
+import json
+import tracemalloc
+from benchmarks.fixtures import load_fixture_bytes
+from services.fpl_schema import decode_bootstrap, decode_fixtures, Element
+
+def measure(decode, raw):
+    tracemalloc.start()
+    decoded = decode(raw)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return decoded, size
+
+def test_compact_bootstrap():
+    """Only the fields the backend reads are kept, in a fraction of the memory"""
+    raw = load_fixture_bytes("bootstrap")
+    full, full_size = measure(json.loads, raw)
+    compact, compact_size = measure(decode_bootstrap, raw)
+
+    assert set(compact["elements"][0]) == set(Element.__annotations__)
+    assert compact["elements"][0]["web_name"] == full["elements"][0]["web_name"]
+    assert len(compact["elements"]) == len(full["elements"])
+    assert compact_size < full_size / 3
+    print(f"✅ Compact bootstrap uses {compact_size / 1e6:.1f} MB instead of {full_size / 1e6:.1f} MB")
+
+    fixtures = decode_fixtures(load_fixture_bytes("fixtures"))
+    assert "stats" not in fixtures[0] and "team_h_difficulty" in fixtures[0]
+    print("✅ Fixture stats dropped")
+
+def test_schema_mismatch_falls_back():
+    """A payload that no longer matches the schema is kept whole instead of failing"""
+    raw = json.dumps([{"id": 1, "event": "not a number"}]).encode()
+    assert decode_fixtures(raw) == [{"id": 1, "event": "not a number"}]
+    print("✅ Unexpected payload shape kept whole")
+
+if __name__ == "__main__":
+    test_compact_bootstrap()
+    test_schema_mismatch_falls_back()
@@ -0,0 +1,143 @@
+import asyncio
+from types import SimpleNamespace
+from services import gemini, cache_backend
+from services.cache_backend import InProcessCacheBackend, SharedMemoryCacheBackend
+
+class StubCachedContent:
+    """Local stand-in for google.generativeai.caching.CachedContent"""
+    created = []
+    fail = False
+
+    def __init__(self, system_instruction):
+        self.system_instruction = system_instruction
+        self.name = f"cachedContents/{len(StubCachedContent.created)}"
+        self.deleted = False
+
+    @classmethod
+    def create(cls, model, display_name, system_instruction, ttl):
+        if cls.fail:
+            raise ValueError("Cached content is too small")
+        content = cls(system_instruction)
+        cls.created.append(content)
+        return content
+
+    @classmethod
+    def get(cls, name):
+        return next(content for content in cls.created if content.name == name)
+
+    def delete(self):
+        self.deleted = True
+
+class StubModel:
+    """Local stand-in for google.generativeai.GenerativeModel"""
+    prefix_tokens = gemini.CONTEXT_CACHE_MIN_TOKENS
+    counted = 0
+
+    def __init__(self, model_name=None, system_instruction=None, cached_content=None):
+        self.system_instruction = system_instruction
+        self.cached_content = cached_content
+        self.prompts = []
+
+    @classmethod
+    def from_cached_content(cls, cached_content):
+        return cls(cached_content=cached_content)
+
+    def count_tokens(self, contents):
+        StubModel.counted += 1
+        return SimpleNamespace(total_tokens=StubModel.prefix_tokens)
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return SimpleNamespace(text="stub response")
+
+stub_client = SimpleNamespace(
+    caching=SimpleNamespace(CachedContent=StubCachedContent),
+    GenerativeModel=StubModel
+)
+
+def make_fpl_data(version):
+    return {
+        "current_gameweek": {"id": 30, "name": "Gameweek 30"},
+        "top_players": [{"web_name": "Salah", "total_points": 250, "form": "9.0"}],
+        "version": version
+    }
+
+def reset_cache(monkeypatch):
+    StubCachedContent.created = []
+    StubCachedContent.fail = False
+    StubModel.prefix_tokens = gemini.CONTEXT_CACHE_MIN_TOKENS
+    StubModel.counted = 0
+    monkeypatch.setitem(cache_backend._cache_backend, "backend", InProcessCacheBackend())
+    for key in gemini._prompt_prefix_cache:
+        gemini._prompt_prefix_cache[key] = None
+
+def get_prefix_model(version):
+    return asyncio.run(gemini.get_prefix_model(make_fpl_data(version), client=stub_client))
+
+def test_prefix_registered_once_per_version(monkeypatch):
+    """The shared prefix is cached once and reused until the data version changes"""
+    reset_cache(monkeypatch)
+
+    first = get_prefix_model(1)
+    again = get_prefix_model(1)
+    assert first is again
+    assert len(StubCachedContent.created) == 1
+    assert "Salah" in StubCachedContent.created[0].system_instruction
+    print("✅ Prefix registered once for version 1")
+
+    refreshed = get_prefix_model(2)
+    assert refreshed is not first
+    assert len(StubCachedContent.created) == 2
+    assert StubCachedContent.created[0].deleted
+    print("✅ New prefix registered for version 2 and the stale one deleted")
+
+def test_inline_fallback_when_caching_unavailable(monkeypatch):
+    """Without context caching the prefix is passed as the system instruction"""
+    reset_cache(monkeypatch)
+    StubCachedContent.fail = True
+
+    prefix_model = get_prefix_model(1)
+    assert prefix_model.cached_content is None
+    assert prefix_model.system_instruction == gemini.build_shared_prefix(make_fpl_data(1))
+    print("✅ Fell back to an inline prompt prefix")
+
+def test_small_prefix_not_registered(monkeypatch):
+    """A prefix below the caching minimum goes inline without a create call"""
+    reset_cache(monkeypatch)
+    StubModel.prefix_tokens = gemini.CONTEXT_CACHE_MIN_TOKENS - 1
+
+    prefix_model = get_prefix_model(1)
+    assert StubCachedContent.created == [] and StubModel.counted == 1
+    assert prefix_model.system_instruction == gemini.build_shared_prefix(make_fpl_data(1))
+    print("✅ Small prefix passed inline without trying to cache it")
+
+def test_prefix_shared_between_workers(monkeypatch, tmp_path):
+    """Workers sharing a cache backend register each version's prefix once"""
+    reset_cache(monkeypatch)
+    monkeypatch.setitem(cache_backend._cache_backend, "backend", SharedMemoryCacheBackend(str(tmp_path)))
+
+    first = get_prefix_model(1)
+    # Another worker: same shared cache, its own prefix state
+    for key in gemini._prompt_prefix_cache:
+        gemini._prompt_prefix_cache[key] = None
+    second = get_prefix_model(1)
+    assert len(StubCachedContent.created) == 1
+    assert first.cached_content is second.cached_content
+
+    get_prefix_model(2)
+    assert not StubCachedContent.created[0].deleted  # Other workers may still be on it
+    print("✅ One cached prefix per version across workers")
+
+def test_request_carries_only_user_context():
+    """The per-request prompt holds the team context and question, not the prefix"""
+    team_data = {"name": "Test XI", "player_name": "Tester", "picks": [{"element": 1, "is_captain": True}]}
+    prompt = gemini.build_team_context(team_data) + "\n" + "Who should I captain?"
+
+    assert "Test XI" in prompt
+    assert gemini.SYSTEM_PROMPT not in prompt
+    assert "Top players by points" not in prompt
+    print("✅ Per-request prompt only carries the user-specific part")
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q", "-s"])
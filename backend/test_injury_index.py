@@ -0,0 +1,53 @@
+from services.fpl_data import extract_injuries, build_injury_index, query_injuries, is_player_injured, get_injury
+
+def make_player(player_id, team, element_type, status, chance):
+    return {
+        "id": player_id,
+        "first_name": "Player",
+        "second_name": str(player_id),
+        "web_name": f"P{player_id}",
+        "team": team,
+        "element_type": element_type,
+        "status": status,
+        "news": "" if status == "a" else "Knock",
+        "chance_of_playing_next_round": chance
+    }
+
+bootstrap_data = {
+    "teams": [{"id": 1, "name": "Arsenal"}, {"id": 2, "name": "Brentford"}],
+    "elements": [
+        make_player(1, 2, 3, "i", 0),
+        make_player(2, 1, 2, "d", 75),
+        make_player(3, 1, 4, "a", None),
+        make_player(4, 2, 2, "d", 25),
+        make_player(5, 1, 3, "s", None),
+        make_player(6, 1, 2, "i", 0),
+    ]
+}
+
+def test_injury_index_lookups():
+    """Injury index answers id, team and status lookups without scanning"""
+    index = build_injury_index(extract_injuries(bootstrap_data))
+
+    assert is_player_injured(1, index) and not is_player_injured(3, index)
+    assert is_player_injured(1, index["all"])
+    assert get_injury(4, index)["chance_of_playing"] == 25
+    assert [i["id"] for i in index["by_team"][1]] == [2, 5, 6]
+    assert list(index["grouped_by_team"].keys()) == ["Arsenal", "Brentford"]
+    print("✅ Index lookups match the injury list")
+
+def test_injury_filters():
+    """Filters combine and keep the original injury order"""
+    index = build_injury_index(extract_injuries(bootstrap_data))
+
+    assert [i["id"] for i in query_injuries(index, max_chance=25)] == [1, 4, 6]
+    assert [i["id"] for i in query_injuries(index, max_chance=30)] == [1, 4, 6]
+    assert [i["id"] for i in query_injuries(index, team_id=1, position="DEF")] == [2, 6]
+    assert [i["id"] for i in query_injuries(index, status="i", max_chance=0, team_id=2)] == [1]
+    assert query_injuries(index, team_id=3) == []
+    assert len(query_injuries(index)) == 5
+    print("✅ Filtered queries return the expected injuries")
+
+if __name__ == "__main__":
+    test_injury_index_lookups()
+    test_injury_filters()
@@ -0,0 +1,52 @@
+import asyncio
+import os
+import tempfile
+from services.cache_backend import RedisCacheBackend
+from services.leader_election import FileLease, RedisLease
+from test_cache_backend import RedisStandIn
+
+def test_file_lease_failover():
+    """Only one process holds the file lease, and another takes over once it is released"""
+    async def run():
+        path = os.path.join(tempfile.mkdtemp(), "leader.lock")
+        worker_a, worker_b = FileLease(path), FileLease(path)
+
+        assert await worker_a.acquire()
+        assert not await worker_b.acquire()
+        assert await worker_a.acquire()  # Renewal keeps the lock
+
+        await worker_a.release()  # Same as the process exiting
+        assert await worker_b.acquire()
+    asyncio.run(run())
+    print("✅ File lease held by one worker at a time")
+
+def test_redis_lease_failover():
+    """A Redis lease is renewed by its holder and taken over after it expires"""
+    async def run():
+        stand_in = RedisStandIn()
+        port = await stand_in.start()
+        url = f"redis://127.0.0.1:{port}/0"
+        worker_a = RedisLease(RedisCacheBackend(url), "worker-a", ttl=1)
+        worker_b = RedisLease(RedisCacheBackend(url), "worker-b", ttl=1)
+
+        assert await worker_a.acquire()
+        assert not await worker_b.acquire()
+        await asyncio.sleep(0.6)
+        assert await worker_a.acquire()  # Renewed before expiry
+        await asyncio.sleep(0.6)
+        assert not await worker_b.acquire()
+
+        # worker-a stops renewing, as if it died
+        await asyncio.sleep(1.1)
+        assert await worker_b.acquire()
+        assert not await worker_a.acquire()
+
+        await worker_b.release()
+        assert await worker_a.acquire()
+        stand_in.server.close()
+    asyncio.run(run())
+    print("✅ Redis lease fails over when the leader stops renewing")
+
+if __name__ == "__main__":
+    test_file_lease_failover()
+    test_redis_lease_failover()
@@ -0,0 +1,52 @@
+import numpy as np
+from services.live_points import compute_provisional_bonus, compute_element_arrays, build_team_views
+
+def test_provisional_bonus_ties():
+    """BPS ties share the higher bonus and push the next player down"""
+    fixture_ids = np.array([1, 1, 1, 1, 2, 2, 2, 2])
+    element_ids = np.array([1, 2, 3, 4, 5, 6, 7, 8])
+    bps = np.array([30, 30, 20, 10, 40, 25, 25, 5])
+
+    bonus = compute_provisional_bonus(fixture_ids, element_ids, bps, 9)
+    assert bonus.tolist() == [0, 3, 3, 1, 0, 3, 2, 2, 0]
+    print("✅ Provisional bonus follows FPL tie rules")
+
+def make_squad():
+    """A 3-4-3 with bench GK(12), DEF(13), MID(14), FWD(15); ids match pick positions"""
+    types = [1, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 1, 2, 3, 4]
+    elements = [{"id": i + 1, "element_type": t, "team": 1 if i < 11 else 2} for i, t in enumerate(types)]
+    picks = [
+        {"element": i + 1, "position": i + 1, "multiplier": 1 if i < 11 else 0,
+         "is_captain": i == 8, "is_vice_captain": i == 9}
+        for i in range(15)
+    ]
+    picks[8]["multiplier"] = 2
+    return elements, picks
+
+def test_autosubs_and_vice_captain():
+    """A defender who did not play is replaced by the bench defender and the vice takes the armband"""
+    elements, picks = make_squad()
+    bootstrap = {"elements": elements, "teams": [{"id": 1}, {"id": 2}]}
+
+    # Everyone scores 2 except the defender (id 2) and the captain (id 9), who did not play
+    live_data = {"elements": [
+        {"id": e["id"], "stats": {"total_points": 0 if e["id"] in (2, 9) else 2, "minutes": 0 if e["id"] in (2, 9) else 90}}
+        for e in elements
+    ]}
+    fixtures = [{"id": 1, "team_h": 1, "team_a": 2, "started": True, "finished": True, "stats": []}]
+
+    arrays = compute_element_arrays(live_data, fixtures, bootstrap)
+    teams = {42: {"gameweek": 30, "picks": picks, "active_chip": None, "transfer_cost": 4}}
+    view = build_team_views(teams, arrays, 30)[42]
+
+    # The defender is replaced by the bench defender, and the captain (a forward)
+    # by the first bench outfielder who keeps a valid formation
+    assert view["autosubs"] == [{"element_out": 2, "element_in": 13}, {"element_out": 9, "element_in": 14}]
+    assert view["captain"] == 10
+    assert view["points_before_transfer_cost"] == 2 * 11 + 2  # 11 players on 2 points, vice doubled
+    assert view["live_points"] == view["points_before_transfer_cost"] - 4
+    print("✅ Autosubs and vice-captain promotion applied")
+
+if __name__ == "__main__":
+    test_provisional_bonus_ties()
+    test_autosubs_and_vice_captain()
@@ -0,0 +1,42 @@
+from fastapi.testclient import TestClient
+from loadtest import mock_upstream
+from loadtest.scenario import percentile, summarize
+
+def test_mock_upstream():
+    """The stand-in replays recorded payloads and injects failures on demand"""
+    with TestClient(mock_upstream.app) as client:
+        client.put("/_mock/config", json={"fpl": {"latency_ms": 0, "rate_limit_rate": 0}, "llm": {"latency_ms": 0}})
+
+        bootstrap = client.get("/api/bootstrap-static/").json()
+        assert len(bootstrap["elements"]) > 500
+        gameweek_fixtures = client.get("/api/fixtures/", params={"event": 34}).json()
+        assert gameweek_fixtures and all(f["event"] == 34 for f in gameweek_fixtures)
+        print("✅ Recorded FPL payloads served")
+
+        answer = client.post("/v1beta/models/gemini-1.5-pro:generateContent", json={"contents": []}).json()
+        assert answer["usageMetadata"]["candidatesTokenCount"] > 0
+        print("✅ Gemini stand-in answers with usage metadata")
+
+        client.put("/_mock/config", json={"fpl": {"rate_limit_rate": 1}})
+        limited = client.get("/api/entry/1/")
+        assert limited.status_code == 429 and limited.headers["retry-after"] == "1"
+        assert client.put("/_mock/config", json={"fpl": {"unknown": 1}}).status_code == 400
+        rejected = client.put("/_mock/config", json={"fpl": {"rate_limit_rate": 0}, "other": {"latency_ms": 0}})
+        assert rejected.status_code == 400
+        assert client.get("/_mock/config").json()["fpl"]["rate_limit_rate"] == 1
+        client.put("/_mock/config", json={"fpl": {"rate_limit_rate": 0}})
+        print("✅ Rate limiting injected on demand")
+
+def test_report_percentiles():
+    """Percentiles use the nearest-rank method"""
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 0.5) == 0.05
+    assert percentile(values, 0.99) == 0.099
+    summary = summarize({"GET /": {"latencies": values, "statuses": {"200": 99, "503": 1}}}, duration=10)
+    assert summary["GET /"]["errors"] == 1
+    assert summary["total"]["throughput"] == 10
+    print("✅ Report percentiles and throughput")
+
+if __name__ == "__main__":
+    test_mock_upstream()
+    test_report_percentiles()
@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+import httpx
+from fastapi.testclient import TestClient
+from main import app
+from services.gemini import generate_with_metrics
+from services.upstream import url_pattern
+
+class StubModel:
+    def generate_content(self, prompt):
+        usage = SimpleNamespace(prompt_token_count=120, cached_content_token_count=100, candidates_token_count=30)
+        return SimpleNamespace(text="Captain Salah", usage_metadata=usage)
+
+def test_metrics_endpoint():
+    """Route latency, LLM usage and cache gauges are exposed in Prometheus format"""
+    client = TestClient(app)
+    client.get("/")
+    generate_with_metrics(StubModel(), "Who should I captain?", operation="chat")
+
+    body = client.get("/metrics").text
+    assert 'http_request_duration_seconds_count{method="GET",route="/",status="200"}' in body
+    print("✅ Route latency labelled by route template")
+
+    assert 'llm_tokens_total{operation="chat",type="cached"} 100' in body
+    assert 'llm_request_duration_seconds_count{operation="chat",outcome="success"} 1' in body
+    print("✅ LLM latency and token usage recorded")
+
+    assert "# TYPE push_subscribers gauge" in body
+    assert 'refresh_leader{mode="none"} 1' in body
+    print("✅ Scrape-time gauges rendered")
+
+def test_upstream_url_pattern():
+    """Upstream latency is labelled per endpoint, not per team or gameweek"""
+    url = httpx.URL("https://fantasy.premierleague.com/api/entry/123456/event/30/picks/")
+    assert url_pattern(url) == "fantasy.premierleague.com/api/entry/{id}/event/{id}/picks/"
+    print("✅ Ids stripped from upstream URL labels")
+
+if __name__ == "__main__":
+    test_metrics_endpoint()
+    test_upstream_url_pattern()
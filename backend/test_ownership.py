@@ -0,0 +1,128 @@
+import time
+import numpy as np
+from benchmarks.fixtures import load_fixture, load_fixture_bytes
+from services.fpl_schema import decode_bootstrap
+from services.fixture_ticker import build_fixture_matrix
+from services.projections import build_projections
+from services.league_picks import ownership_analytics, get_teams_picks, DIFFERENTIAL_OWNERSHIP, TEMPLATE_SIZE
+
+BOOTSTRAP = decode_bootstrap(load_fixture_bytes("bootstrap"))
+PROJECTIONS = build_projections(BOOTSTRAP, build_fixture_matrix(BOOTSTRAP, load_fixture("fixtures")))
+
+def random_picks(teams, seed=0):
+    """Squads drawn by ownership, with a captain and four on the bench"""
+    rng = np.random.default_rng(seed)
+    weights = PROJECTIONS["ownership"] + 0.1
+    ids = [player["id"] for player in PROJECTIONS["players"]]
+    picks = {}
+    for team in range(teams):
+        rows = rng.choice(len(ids), 15, replace=False, p=weights / weights.sum())
+        multipliers = [1] * 11 + [0] * 4
+        multipliers[int(rng.integers(11))] = 2
+        picks[5000 + team] = {"elements": [ids[row] for row in rows], "multipliers": multipliers}
+    return picks
+
+def test_matches_dense_loops():
+    """Sparse counts match a dense team x player matrix"""
+    picks = random_picks(300)
+    result = ownership_analytics(picks, PROJECTIONS, gameweek=34, limit=700)
+    row_of, expected_points = PROJECTIONS["row_of"], PROJECTIONS["expected_points"][:, 34 - 31]
+
+    dense = np.zeros((len(picks), len(PROJECTIONS["players"])))
+    for index, team in enumerate(picks.values()):
+        for element, multiplier in zip(team["elements"], team["multipliers"]):
+            dense[index, row_of[element]] = multiplier + 1e-9
+    eo = np.round(dense).sum(axis=0) * 100 / len(picks)
+    selected = (dense > 0).mean(axis=0) * 100
+    field = float(np.dot(eo / 100, expected_points))
+
+    for player in result["players"]:
+        assert abs(player["effective_ownership"] - eo[row_of[player["id"]]]) < 0.051
+        assert abs(player["selected"] - selected[row_of[player["id"]]]) < 0.051
+    assert len(result["players"]) == int((eo > 0).sum())
+    assert abs(result["field_points"] - field) < 0.011
+
+    template = set(np.lexsort((np.arange(len(selected)), -selected))[:TEMPLATE_SIZE].tolist())
+    for index, (team_id, team) in enumerate(picks.items()):
+        entry = result["teams"][index]
+        rows = [row_of[element] for element in team["elements"]]
+        multipliers = np.array(team["multipliers"], dtype=float)
+        assert entry["team_id"] == team_id
+        assert entry["template_overlap"] == len(template & set(rows))
+        assert entry["differentials"] == [e for e, m in zip(team["elements"], team["multipliers"]) if m > 0 and eo[row_of[e]] < DIFFERENTIAL_OWNERSHIP]
+        points = float(np.dot(multipliers, expected_points[rows]))
+        assert abs(entry["projected_swing"] - (points - field)) < 0.011
+        assert abs(entry["differential_points"] - entry["threat_points"] - entry["projected_swing"]) < 0.03
+    print(f"✅ {len(picks)} teams match dense loops")
+
+def test_thousands_of_teams():
+    """Thousands of teams are analyzed in milliseconds"""
+    picks = random_picks(5000, seed=1)
+    started = time.perf_counter()
+    result = ownership_analytics(picks, PROJECTIONS)
+    elapsed = time.perf_counter() - started
+    assert result["teams_analyzed"] == 5000 and len(result["template"]) == TEMPLATE_SIZE
+    assert elapsed < 1.0
+    print(f"✅ 5000 teams in {elapsed * 1000:.0f} ms")
+
+def test_empty():
+    """No picks give an empty analysis rather than an error"""
+    result = ownership_analytics({}, PROJECTIONS)
+    assert result["teams_analyzed"] == 0 and result["teams"] == [] and result["players"] == []
+    print("✅ No teams")
+
+def test_picks_back_off_and_report_failures(monkeypatch):
+    """Rate-limited picks are retried, teams without picks left out and failing teams reported"""
+    import asyncio
+    import httpx
+    from types import SimpleNamespace
+    from services import league_picks, upstream
+    from services.cache_backend import InProcessCacheBackend
+
+    calls = {}
+
+    def handler(request):
+        team_id = int(request.url.path.split("/")[-5])
+        calls[team_id] = calls.get(team_id, 0) + 1
+        if team_id == 1 and calls[team_id] <= 2:
+            return httpx.Response(429, headers={"retry-after": "0"})
+        if team_id == 2:
+            return httpx.Response(404)
+        if team_id == 3:
+            return httpx.Response(503, headers={"retry-after": "0"})
+        return httpx.Response(200, json={"picks": [{"element": 1, "multiplier": 2}], "active_chip": None})
+
+    backend = InProcessCacheBackend()
+    monkeypatch.setattr(league_picks, "get_cache_backend", lambda: backend)
+    monkeypatch.setattr(league_picks, "upstream_client", lambda **kwargs: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(upstream, "random", SimpleNamespace(random=lambda: 0))
+
+    picks, failed, without_picks = asyncio.run(get_teams_picks([1, 2, 3, 4], 30))
+    assert sorted(picks) == [1, 4] and failed == [3] and without_picks == [2]
+    assert calls == {1: 3, 2: 1, 3: upstream.UPSTREAM_MAX_ATTEMPTS, 4: 1}
+    print("✅ Rate limits retried, missing picks skipped, failures reported")
+
+def test_future_gameweek_rejected(monkeypatch):
+    """Gameweeks after the current one have no picks yet and are rejected"""
+    import asyncio
+    import pytest
+    from fastapi import HTTPException
+    from routes import ownership
+
+    async def fpl_data():
+        return {"bootstrap": {"events": [{"id": 30, "is_current": True}, {"id": 31, "is_current": False}]}}
+
+    async def no_picks(*args):
+        raise AssertionError("picks fetched for a future gameweek")
+
+    monkeypatch.setattr(ownership, "get_fpl_data", fpl_data)
+    monkeypatch.setattr(ownership, "get_teams_picks", no_picks)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(ownership.get_ownership_analytics(league_id=None, team_ids="1,2", league_size=50, gameweek=31, limit=50))
+    assert error.value.status_code == 400 and "gameweek 30" in error.value.detail
+    print("✅ Future gameweek rejected")
+
+if __name__ == "__main__":
+    test_matches_dense_loops()
+    test_thousands_of_teams()
+    test_empty()
@@ -0,0 +1,99 @@
+import asyncio
+import httpx
+from benchmarks.fixtures import load_fixture
+from loadtest import mock_upstream
+from services import player_history
+from services.fpl_schema import decode_bootstrap
+from services.player_history import ingest_player_histories, get_player_history, get_history_series, get_round_stats
+
+BOOTSTRAP = load_fixture("bootstrap")
+FETCH_ELEMENT_SUMMARY = player_history.fetch_element_summary
+
+def run_ingest(monkeypatch, path, bootstrap, force=False, malformed=()):
+    """Ingest from the stand-in upstream, served in-process, with malformed payloads for some players"""
+    mock_upstream.load_payloads()
+    transport = httpx.ASGITransport(app=mock_upstream.app)
+    fetched = []
+
+    async def counting_fetch(client, element_id):
+        fetched.append(element_id)
+        if element_id in malformed:
+            return b'{"history": [{"round": '
+        return await FETCH_ELEMENT_SUMMARY(client, element_id)
+
+    async def fake_fpl_data():
+        return {"bootstrap": bootstrap, "version": 1}
+
+    monkeypatch.setattr(player_history, "FPL_ELEMENT_SUMMARY_URL", "http://mock/api/element-summary/{element_id}/")
+    monkeypatch.setattr(player_history, "upstream_client", lambda: httpx.AsyncClient(transport=transport))
+    monkeypatch.setattr(player_history, "fetch_element_summary", counting_fetch)
+    monkeypatch.setattr(player_history, "get_fpl_data", fake_fpl_data)
+    monkeypatch.setitem(mock_upstream._mock_config["fpl"], "latency_ms", 0)
+    stats = asyncio.run(ingest_player_histories(force=force, path=path))
+    return stats, fetched
+
+def test_ingest_and_incremental_update(monkeypatch, tmp_path):
+    """Every player is ingested once; later runs fetch only players that changed"""
+    path = str(tmp_path / "history.db")
+    bootstrap = decode_bootstrap(mock_upstream.json.dumps(BOOTSTRAP).encode())
+
+    stats, fetched = run_ingest(monkeypatch, path, bootstrap)
+    assert stats["fetched"] == stats["rewritten"] == len(BOOTSTRAP["elements"]) and stats["failed"] == 0
+    print(f"✅ First run stored {stats['fetched']} players")
+
+    stats, fetched = run_ingest(monkeypatch, path, bootstrap)
+    assert fetched == [] and stats["fetched"] == 0
+    print("✅ Unchanged players are not refetched")
+
+    bootstrap["elements"][0]["total_points"] += 3
+    stats, fetched = run_ingest(monkeypatch, path, bootstrap)
+    assert fetched == [bootstrap["elements"][0]["id"]]
+    assert stats["rewritten"] == 0  # Same payload from the stand-in, so rows are left alone
+    print("✅ Only the changed player is refetched")
+
+def test_malformed_payloads_fail_alone(monkeypatch, tmp_path):
+    """A player whose payload can't be decoded counts as failed without stopping the run"""
+    path = str(tmp_path / "history.db")
+    bootstrap = decode_bootstrap(mock_upstream.json.dumps(BOOTSTRAP).encode())
+    broken = bootstrap["elements"][3]["id"]
+
+    stats, _ = run_ingest(monkeypatch, path, bootstrap, malformed={broken})
+    assert stats["failed"] == 1 and stats["fetched"] == len(BOOTSTRAP["elements"]) - 1
+    assert get_player_history(broken, path=path) == []
+
+    stats, fetched = run_ingest(monkeypatch, path, bootstrap)
+    assert fetched == [broken] and stats["failed"] == 0
+    print("✅ Malformed payload failed alone and was retried on the next run")
+
+def test_history_queries(monkeypatch, tmp_path):
+    """Season time series come straight from the store"""
+    path = str(tmp_path / "history.db")
+    bootstrap = decode_bootstrap(mock_upstream.json.dumps(BOOTSTRAP).encode())
+    run_ingest(monkeypatch, path, bootstrap)
+
+    player_id = bootstrap["elements"][5]["id"]
+    history = get_player_history(player_id, path=path)
+    expected = mock_upstream.synthesize_element_summary(BOOTSTRAP["elements"][5], load_fixture("fixtures"))["history"]
+    assert sorted(row["fixture"] for row in history) == sorted(row["fixture"] for row in expected)
+    assert [row["round"] for row in history] == sorted(row["round"] for row in history)
+    assert sum(row["total_points"] for row in history) == sum(row["total_points"] for row in expected)
+    assert isinstance(history[0]["expected_goals"], float) and isinstance(history[0]["was_home"], bool)
+    print("✅ Player history matches the upstream payload")
+
+    window = get_player_history(player_id, 10, 12, path=path)
+    assert window and all(10 <= row["round"] <= 12 for row in window)
+    series = get_history_series([player_id], "total_points", path=path)[player_id]
+    assert sum(series.values()) == sum(row["total_points"] for row in history)
+    assert len(get_round_stats(10, path=path)) > 500
+    print("✅ Range, series and per-round queries")
+
+    try:
+        get_history_series([player_id], "total_points; DROP TABLE player_history", path=path)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print("✅ Unknown stats rejected")
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q", "-s"])
@@ -0,0 +1,86 @@
+import random
+from benchmarks.fixtures import load_fixture_bytes
+from services.fpl_schema import decode_bootstrap
+from services.player_index import build_player_index, build_player_rows, query_players, parse_sort, project
+
+BOOTSTRAP = decode_bootstrap(load_fixture_bytes("bootstrap"))
+INDEX = build_player_index(BOOTSTRAP)
+
+def brute_force(rows, sort, positions=None, team_ids=None, statuses=None, min_cost=None, max_cost=None, min_minutes=None):
+    matching = [
+        row for row in rows
+        if (positions is None or row["position"] in positions)
+        and (team_ids is None or row["team_id"] in team_ids)
+        and (statuses is None or row["status"] in statuses)
+        and (min_cost is None or row["now_cost"] >= min_cost)
+        and (max_cost is None or row["now_cost"] <= max_cost)
+        and (min_minutes is None or row["minutes"] >= min_minutes)
+    ]
+    matching.sort(key=lambda row: row["id"])
+    for field, descending in reversed(parse_sort(sort)):
+        matching.sort(key=lambda row: row[field], reverse=descending)
+    return matching
+
+def page_through(limit, **query):
+    players, cursor, pages = [], None, 0
+    while True:
+        page = query_players(INDEX, limit=limit, cursor=cursor, **query)
+        players += page["players"]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return players, pages
+
+def test_queries_match_brute_force():
+    """Paging through any query returns exactly the filtered, sorted players"""
+    rows = build_player_rows(BOOTSTRAP)
+    random.seed(7)
+    sorts = ["-total_points", "now_cost,-form", "-minutes,web_name", "web_name", "-selected_by_percent,-points_per_game"]
+    for _ in range(40):
+        query = {"sort": random.choice(sorts)}
+        if random.random() < 0.5:
+            query["positions"] = random.sample(["GK", "DEF", "MID", "FWD"], random.randint(1, 2))
+        if random.random() < 0.3:
+            query["team_ids"] = random.sample(range(1, 21), random.randint(1, 3))
+        if random.random() < 0.3:
+            query["statuses"] = ["a"]
+        if random.random() < 0.4:
+            query["min_cost"], query["max_cost"] = 45, random.choice([60, 80, 130])
+        if random.random() < 0.3:
+            query["min_minutes"] = 900
+
+        expected = brute_force(rows, **query)
+        players, _ = page_through(random.choice([7, 25, 50]), **query)
+        assert [p["id"] for p in players] == [p["id"] for p in expected], query
+    print("✅ 40 random queries match a full sort, across every page")
+
+def test_queries_touch_few_rows():
+    """A first page walks only a little past the rows it returns"""
+    page = query_players(INDEX, sort="-total_points", limit=20)
+    assert len(page["players"]) == 20 and page["next_cursor"]
+
+    walk_scanned = query_players(INDEX, positions=["MID"], sort="-form", limit=20)["scanned"]
+    bucket_scanned = query_players(INDEX, team_ids=[3], sort="now_cost", limit=20)["scanned"]
+
+    assert walk_scanned < 150, walk_scanned
+    assert bucket_scanned <= 40, bucket_scanned
+    print(f"✅ Sorted walk scanned {walk_scanned} rows, team bucket {bucket_scanned}, of {len(INDEX['rows'])}")
+
+def test_projection_and_errors():
+    """Fields can be projected and bad input is rejected"""
+    page = query_players(INDEX, sort="price", limit=3)
+    assert project(page["players"], ["id", "price"])[0].keys() == {"id", "price"}
+    for bad in [lambda: parse_sort("-colour"), lambda: project(page["players"], ["colour"]),
+                lambda: query_players(INDEX, sort="-form", cursor=page["next_cursor"]),
+                lambda: query_players(INDEX, cursor="not-a-cursor")]:
+        try:
+            bad()
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+    print("✅ Projection works and bad sorts, fields and cursors raise ValueError")
+
+if __name__ == "__main__":
+    test_queries_match_brute_force()
+    test_queries_touch_few_rows()
+    test_projection_and_errors()
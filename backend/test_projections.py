@@ -0,0 +1,99 @@
+import time
+from benchmarks.fixtures import load_fixture_bytes
+from services.fpl_schema import decode_bootstrap, decode_fixtures
+from services.fixture_ticker import build_fixture_matrix
+from services.projections import build_projections, top_projected, expected_points_for
+from services.chip_calculator import identify_double_gameweeks, calculate_gameweek_difficulty, get_recommended_players
+
+BOOTSTRAP = decode_bootstrap(load_fixture_bytes("bootstrap"))
+FIXTURES = decode_fixtures(load_fixture_bytes("fixtures"))
+MATRIX = build_fixture_matrix(BOOTSTRAP, FIXTURES)
+
+def test_projection_shape_and_speed():
+    """Every player is projected over every remaining gameweek in one pass"""
+    start = time.perf_counter()
+    projections = build_projections(BOOTSTRAP, MATRIX)
+    elapsed = time.perf_counter() - start
+    assert projections["gameweeks"] == list(range(31, 39))
+    assert projections["expected_points"].shape == (len(BOOTSTRAP["elements"]), 8)
+    assert (projections["expected_points"] >= 0).all()
+    assert elapsed < 0.1
+    print(f"✅ {projections['expected_points'].size} player-gameweeks projected in {elapsed * 1000:.1f} ms")
+
+def test_blanks_doubles_and_availability():
+    """Blank teams project zero, doubles more, and unavailable players nothing"""
+    projections = build_projections(BOOTSTRAP, MATRIX)
+    elements = BOOTSTRAP["elements"]
+
+    blank_teams = {row for row in range(len(MATRIX["teams"])) if MATRIX["counts"][row, 31] == 0}
+    double_teams = {row for row in range(len(MATRIX["teams"])) if MATRIX["counts"][row, 34] == 2}
+    assert blank_teams and double_teams
+    for player in elements:
+        row = [team["id"] for team in MATRIX["teams"]].index(player["team"])
+        if row in blank_teams:
+            assert expected_points_for(projections, player["id"], 31) == 0
+    print("✅ Players in blank gameweeks project zero")
+
+    doubled = [p for p in elements if [t["id"] for t in MATRIX["teams"]].index(p["team"]) in double_teams and p["status"] == "a" and p["minutes"] > 1500]
+    ratios = [expected_points_for(projections, p["id"], 34) / expected_points_for(projections, p["id"], 33) for p in doubled]
+    assert sum(ratios) / len(ratios) > 1.5
+    print("✅ Double gameweeks roughly double the projection")
+
+    for player in elements:
+        if player["status"] == "u":
+            assert all(expected_points_for(projections, player["id"], gw) == 0 for gw in projections["gameweeks"])
+        if player["status"] == "i" and not player["chance_of_playing_next_round"]:
+            assert expected_points_for(projections, player["id"], 31) == 0
+    print("✅ Unavailable and injured players are projected out")
+
+def test_top_projected_and_chip_recommendations():
+    """Top lists are ordered by expected points and feed the chip recommendations"""
+    projections = build_projections(BOOTSTRAP, MATRIX)
+    top = top_projected(projections, gameweeks=3, element_type=3, limit=10)
+    totals = [player["expected_points"] for player in top["players"]]
+    assert len(totals) == 10 and totals == sorted(totals, reverse=True)
+    assert all(player["position"] == "MID" and len(player["by_gameweek"]) == 3 for player in top["players"])
+    print("✅ Top projected midfielders sorted by expected points")
+
+    teams = {team["id"]: team for team in BOOTSTRAP["teams"]}
+    gameweek_data = calculate_gameweek_difficulty(34, identify_double_gameweeks(FIXTURES, 30), FIXTURES, teams)
+    recommended = get_recommended_players(gameweek_data, BOOTSTRAP, position_filter=4, projections=projections)
+    expected = [p["expected_points"] for p in recommended]
+    assert expected == sorted(expected, reverse=True)
+    assert all(round(p["score"], 2) == p["expected_points"] for p in recommended)
+    print("✅ Chip recommendations ranked by expected points")
+
+def test_versioned_cache(monkeypatch):
+    """Projections and the fixture matrix are built once per data version; directly fetched data isn't kept"""
+    import asyncio
+    from services import fpl_data, projections
+
+    data = {"bootstrap": BOOTSTRAP, "fixtures": FIXTURES, "version": 1}
+    builds = []
+
+    async def fake_fpl_data():
+        return dict(data)
+
+    def counting_build(bootstrap, matrix):
+        builds.append(data["version"])
+        return build_projections(bootstrap, matrix)
+
+    monkeypatch.setattr(fpl_data, "get_fpl_data", fake_fpl_data)
+    monkeypatch.setattr(fpl_data, "_versioned_cache", {})
+    monkeypatch.setattr(projections, "build_projections", counting_build)
+
+    first = asyncio.run(projections.get_projections())
+    assert asyncio.run(projections.get_projections()) is first
+    assert set(fpl_data._versioned_cache) == {"projections", "fixture_matrix"}
+    data["version"] = 2
+    assert asyncio.run(projections.get_projections()) is not first
+    data["version"] = 0
+    asyncio.run(projections.get_projections())
+    asyncio.run(projections.get_projections())
+    assert builds == [1, 2, 0, 0] and fpl_data._versioned_cache["projections"]["version"] == 2
+    print("✅ Built once per data version")
+
+if __name__ == "__main__":
+    test_projection_shape_and_speed()
+    test_blanks_doubles_and_availability()
+    test_top_projected_and_chip_recommendations()
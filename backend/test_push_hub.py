@@ -0,0 +1,162 @@
+import asyncio
+import json
+from collections import deque
+from benchmarks.fixtures import load_fixture
+from services import push_hub
+from services.push_hub import (
+    publish_event, subscribe_events, publish_refresh_events, get_subscriber_count,
+    EVENT_DEADLINE, EVENT_INJURIES, EVENT_LIVE_POINTS, EVENT_HISTORY_SIZE
+)
+from routes.events import stream_events
+
+BOOTSTRAP = load_fixture("bootstrap")
+
+def reset_hub(monkeypatch):
+    """Start every test from an empty hub"""
+    monkeypatch.setattr(push_hub, "_push_hub", {
+        "epoch": "test",
+        "events": deque(maxlen=EVENT_HISTORY_SIZE),
+        "latest": {},
+        "sequence": 0,
+        "new_event": None,
+        "subscribers": 0
+    })
+
+def parse(encoded):
+    """Split one encoded event into its sequence, type and payload"""
+    fields = dict(line.split(": ", 1) for line in encoded.decode().strip().split("\n"))
+    epoch, sequence = fields["id"].split("-")
+    assert epoch == "test"
+    return int(sequence), fields["event"], json.loads(fields["data"])
+
+async def take(stream, count, timeout=2):
+    """The next count chunks of a stream"""
+    return [await asyncio.wait_for(stream.__anext__(), timeout) for _ in range(count)]
+
+def test_publish_and_subscribe(monkeypatch):
+    """Every subscriber gets each event once, encoded once, and new ones start from the latest state"""
+    reset_hub(monkeypatch)
+
+    async def run():
+        publish_event(EVENT_DEADLINE, {"gameweek": 30})
+        publish_event(EVENT_LIVE_POINTS, {"points": 1})
+        publish_event(EVENT_LIVE_POINTS, {"points": 2})
+
+        first, second = subscribe_events(), subscribe_events()
+        # Latest of each type only, in publish order
+        replayed = await take(first, 2)
+        assert [parse(chunk)[2] for chunk in replayed] == [{"gameweek": 30}, {"points": 2}]
+        await take(second, 2)
+        assert get_subscriber_count() == 2
+
+        waiting = [asyncio.ensure_future(take(stream, 2)) for stream in (first, second)]
+        await asyncio.sleep(0)
+        publish_event(EVENT_INJURIES, {"players": []})
+        publish_event(EVENT_LIVE_POINTS, {"points": 3})
+        received = await asyncio.gather(*waiting)
+        assert [parse(chunk)[0] for chunk in received[0]] == [4, 5]
+        assert all(a is b for a, b in zip(*received))  # The same bytes for every subscriber
+
+        await first.aclose()
+        await second.aclose()
+        assert get_subscriber_count() == 0
+
+    asyncio.run(run())
+    print("✅ Subscribers share each published event")
+
+def test_resume_from_last_event_id(monkeypatch):
+    """Reconnecting subscribers get what they missed, or the latest state if it's gone from the log"""
+    reset_hub(monkeypatch)
+
+    async def run():
+        for points in range(1, 6):
+            publish_event(EVENT_LIVE_POINTS, {"points": points})
+
+        stream = subscribe_events(last_event_id=2)
+        assert [parse(chunk)[0] for chunk in await take(stream, 3)] == [3, 4, 5]
+        await stream.aclose()
+
+        for points in range(6, 6 + EVENT_HISTORY_SIZE):
+            publish_event(EVENT_LIVE_POINTS, {"points": points})
+        stream = subscribe_events(last_event_id=2)
+        sequence, _, data = parse((await take(stream, 1))[0])
+        assert sequence == push_hub._push_hub["sequence"] and data == {"points": 5 + EVENT_HISTORY_SIZE}
+        await stream.aclose()
+
+        # An id ahead of this log (issued before a restart) is treated as a new subscriber
+        current = push_hub._push_hub["sequence"]
+        stream = subscribe_events(last_event_id=current + 50)
+        assert parse((await take(stream, 1))[0])[0] == current
+        waiting = asyncio.ensure_future(take(stream, 1))
+        await asyncio.sleep(0)
+        publish_event(EVENT_LIVE_POINTS, {"points": 0})
+        assert parse((await waiting)[0])[0] == current + 1
+        await stream.aclose()
+
+    asyncio.run(run())
+    print("✅ Resumed from the shared log, never past its end")
+
+def test_keepalive(monkeypatch):
+    """Idle streams get keep-alive comments"""
+    reset_hub(monkeypatch)
+    monkeypatch.setattr(push_hub, "KEEPALIVE_INTERVAL", 0.05)
+
+    async def run():
+        stream = subscribe_events()
+        assert await take(stream, 2) == [b": keep-alive\n\n"] * 2
+        await stream.aclose()
+
+    asyncio.run(run())
+    print("✅ Keep-alives sent on idle streams")
+
+def test_publish_refresh_events(monkeypatch):
+    """Deadlines go out on the first snapshot and when gameweeks change; injuries only for injury fields"""
+    reset_hub(monkeypatch)
+    fpl_data = {"bootstrap": BOOTSTRAP, "version": 7}
+    player = BOOTSTRAP["elements"][0]
+
+    publish_refresh_events(fpl_data, None)
+    _, event_type, data = parse(push_hub._push_hub["events"][-1][1])
+    assert event_type == EVENT_DEADLINE
+    assert [event["id"] for event in data["events"]] == [e["id"] for e in BOOTSTRAP["events"] if e["is_current"] or e["is_next"]]
+
+    publish_refresh_events(fpl_data, {"changes": {"elements": {"changed": [{"id": player["id"], "changes": {"now_cost": [50, 51]}}]}}})
+    assert push_hub._push_hub["sequence"] == 1
+
+    publish_refresh_events(fpl_data, {"changes": {"elements": {"changed": [
+        {"id": player["id"], "changes": {"news": ["", "Knock"]}},
+        {"id": 999999, "changes": {"status": ["a", "d"]}}
+    ]}}})
+    _, event_type, data = parse(push_hub._push_hub["events"][-1][1])
+    assert event_type == EVENT_INJURIES and data["version"] == 7
+    assert [entry["id"] for entry in data["players"]] == [player["id"]]
+
+    publish_refresh_events(fpl_data, {"changes": {"events": {"changed": []}}})
+    assert parse(push_hub._push_hub["events"][-1][1])[1] == EVENT_DEADLINE
+    assert push_hub._push_hub["sequence"] == 3
+    print("✅ Refresh events published for deadline and injury changes")
+
+def test_stream_route(monkeypatch):
+    """The route streams from the Last-Event-ID header"""
+    reset_hub(monkeypatch)
+
+    async def run():
+        for points in range(1, 4):
+            publish_event(EVENT_LIVE_POINTS, {"points": points})
+        response = await stream_events(last_event_id="test-1")
+        assert response.media_type == "text/event-stream"
+        assert [parse(chunk)[0] for chunk in await take(response.body_iterator, 2)] == [2, 3]
+        await response.body_iterator.aclose()
+
+        # Malformed ids and ids from another process start from the latest state
+        for foreign in ["not-a-number", "1", "other-1"]:
+            response = await stream_events(last_event_id=foreign)
+            assert [parse(chunk)[0] for chunk in await take(response.body_iterator, 1)] == [3]
+            await response.body_iterator.aclose()
+
+    asyncio.run(run())
+    print("✅ Stream route resumes from Last-Event-ID")
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q", "-s"])
@@ -0,0 +1,81 @@
+import gzip
+import json
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from services import response_cache
+from services.response_cache import cached_response, choose_encoding
+
+def make_app(state):
+    app = FastAPI()
+
+    @app.get("/injuries")
+    async def get_injuries(request: Request):
+        async def build():
+            state["builds"] += 1
+            return {"injuries": [{"id": 1, "web_name": "Saka"}], "by_gameweek": {31: state["version"]}}
+        return await cached_response(request, ("injuries",), state["version"], build)
+
+    return app
+
+def test_etag_and_compression():
+    """Responses are built once per version, compressed, and revalidated with a 304"""
+    response_cache.clear_response_cache()
+    state = {"builds": 0, "version": 1}
+    client = TestClient(make_app(state))
+
+    first = client.get("/injuries", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["vary"] == "Accept-Encoding"
+    assert first.json() == {"injuries": [{"id": 1, "web_name": "Saka"}], "by_gameweek": {"31": 1}}
+    print("✅ gzip body decodes to the JSON payload")
+
+    plain = client.get("/injuries", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != first.headers["etag"]
+    assert state["builds"] == 1
+    print("✅ Every encoding served from one build")
+
+    revalidated = client.get("/injuries", headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == first.headers["etag"]
+    print("✅ Matching If-None-Match gets a 304 with no body")
+
+    state["version"] = 2
+    refreshed = client.get("/injuries", headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]})
+    assert refreshed.status_code == 200
+    assert state["builds"] == 2
+    print("✅ A new data version rebuilds the response")
+
+def test_uncached_version_not_stored():
+    """Data fetched directly (version 0) is served but never stored"""
+    response_cache.clear_response_cache()
+    state = {"builds": 0, "version": 0}
+    client = TestClient(make_app(state))
+    client.get("/injuries")
+    client.get("/injuries")
+    assert state["builds"] == 2
+    assert not response_cache._response_cache
+    print("✅ Version 0 responses are not cached")
+
+def test_choose_encoding():
+    """Accept-Encoding q-values pick the encoding"""
+    assert choose_encoding(None) == "identity"
+    assert choose_encoding("gzip;q=0, identity") == "identity"
+    assert choose_encoding("gzip, deflate") == "gzip"
+    if response_cache.brotli is not None:
+        assert choose_encoding("gzip, deflate, br") == "br"
+        assert choose_encoding("br;q=0.5, gzip") == "gzip"
+    print("✅ Content negotiation honours q-values")
+
+    body = json.dumps({"a": 1}).encode()
+    entry = response_cache.build_entry(body)
+    assert gzip.decompress(entry["bodies"]["gzip"]) == body
+    assert entry == response_cache.build_entry(body)  # Same bytes, same ETag, on every worker
+    print("✅ Compressed bodies and ETags are deterministic")
+
+if __name__ == "__main__":
+    test_etag_and_compression()
+    test_uncached_version_not_stored()
+    test_choose_encoding()
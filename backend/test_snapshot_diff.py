@@ -0,0 +1,50 @@
+import copy
+from services import snapshot_diff
+from services.snapshot_diff import record_snapshot, get_changes_since
+
+def make_snapshot(version):
+    return {
+        "version": version,
+        "bootstrap": {
+            "elements": [
+                {"id": 1, "now_cost": 130, "status": "a", "news": "", "total_points": 100},
+                {"id": 2, "now_cost": 55, "status": "a", "news": "", "total_points": 40},
+            ],
+            "events": [{"id": 30, "deadline_time": "2025-04-01T17:30:00Z", "is_current": True}],
+        },
+        "fixtures": [{"id": 300, "event": 30, "kickoff_time": "2025-04-01T19:00:00Z"}],
+    }
+
+def test_changes_feed():
+    """Each refresh records only what changed, and clients get deltas since their version"""
+    snapshot_diff._change_history["deltas"].clear()
+
+    first = make_snapshot(1)
+    record_snapshot(None, first)
+
+    second = copy.deepcopy(first)
+    second["version"] = 2
+    second["bootstrap"]["elements"][0]["now_cost"] = 131
+    second["bootstrap"]["elements"][1]["total_points"] = 45  # Not tracked
+    delta = record_snapshot(first, second)
+    assert delta["changes"] == {"elements": {"changed": [{"id": 1, "changes": {"now_cost": [130, 131]}}]}}
+    print("✅ Price move recorded, untracked fields ignored")
+
+    third = copy.deepcopy(second)
+    third["version"] = 3
+    third["bootstrap"]["elements"][1].update(status="i", news="Hamstring injury")
+    third["fixtures"][0]["event"] = None
+    record_snapshot(second, third)
+
+    feed = get_changes_since(1)
+    assert [d["version"] for d in feed["deltas"]] == [2, 3]
+    assert feed["deltas"][1]["changes"]["fixtures"]["changed"][0]["changes"]["event"] == [30, None]
+    assert get_changes_since(3)["deltas"] == []
+    assert get_changes_since(0)["full_refresh_required"]
+    # A version from before a restart is ahead of this process's history
+    ahead = get_changes_since(57)
+    assert ahead["full_refresh_required"] and ahead["deltas"] == []
+    print("✅ /changes feed returns deltas since the client's version")
+
+if __name__ == "__main__":
+    test_changes_feed()
@@ -0,0 +1,70 @@
+from collections import OrderedDict
+import numpy as np
+from benchmarks.fixtures import load_fixture, load_fixture_bytes
+from services.fpl_schema import decode_bootstrap
+from services.fixture_ticker import build_fixture_matrix
+from services.projections import build_projections
+from services.chip_planner import pick_squad
+from services.chip_calculator import squad_chip_outlook
+from services.team_squad import get_chips_status
+
+BOOTSTRAP = decode_bootstrap(load_fixture_bytes("bootstrap"))
+MATRIX = build_fixture_matrix(BOOTSTRAP, load_fixture("fixtures"))
+PROJECTIONS = build_projections(BOOTSTRAP, MATRIX)
+SQUAD_ROWS = pick_squad(PROJECTIONS["ownership"], PROJECTIONS["element_types"], PROJECTIONS["team_ids"], PROJECTIONS["costs"]).tolist()
+
+def test_outlook_matches_loops():
+    """Squad doubles, blanks and chip points match counting player by player"""
+    squad = [PROJECTIONS["players"][row]["id"] for row in SQUAD_ROWS]
+    starters = squad[:11]
+    outlook = squad_chip_outlook(PROJECTIONS, MATRIX, squad, starters)
+    team_row = {team["id"]: row for row, team in enumerate(MATRIX["teams"])}
+
+    assert [entry["gameweek"] for entry in outlook] == PROJECTIONS["gameweeks"]
+    for column, entry in enumerate(outlook):
+        gameweek = entry["gameweek"]
+        counts = {player_id: MATRIX["counts"][team_row[PROJECTIONS["players"][PROJECTIONS["row_of"][player_id]]["team_id"]], gameweek] for player_id in squad}
+        assert entry["players_with_doubles"] == sum(1 for count in counts.values() if count > 1)
+        assert entry["starters_with_doubles"] == sum(1 for player_id in starters if counts[player_id] > 1)
+        assert entry["players_with_blanks"] == sum(1 for count in counts.values() if count == 0)
+        assert entry["fixtures"] == sum(counts.values())
+
+        points = [PROJECTIONS["expected_points"][row, column] for row in SQUAD_ROWS]
+        assert abs(entry["triple_captain_points"] - round(max(points), 2)) < 1e-9
+        assert entry["captain"]["id"] == squad[int(np.argmax(points))]
+        assert abs(entry["lineup_points"] + entry["bench_boost_points"] - sum(points)) < 0.011
+    print(f"✅ Outlook for {len(outlook)} gameweeks matches player-by-player counts")
+
+def test_chips_status():
+    """A first-half wildcard frees the second one, other chips are used once"""
+    status = {chip["name"]: chip for chip in get_chips_status([{"name": "wildcard", "event": 7}, {"name": "3xc", "event": 12}])}
+    assert not status["wildcard"]["available"] and status["wildcard2"]["available"]
+    assert not status["3xc"]["available"] and status["3xc"]["used_in"] == 12
+    assert status["bboost"]["available"] and status["freehit"]["available"]
+    status = {chip["name"]: chip for chip in get_chips_status([{"name": "wildcard", "event": 25}])}
+    assert "wildcard2" not in status
+    print("✅ Chip status follows the wildcard rules")
+
+def test_team_recommendations_not_in_response_cache(monkeypatch):
+    """A team's recommendations follow its squad, and don't take shared response cache entries"""
+    import asyncio
+    from routes import chips
+    from services import response_cache
+
+    plays = []
+
+    async def recommendations(team_id, number_of_recommendations):
+        plays.append(team_id)
+        return {"team_id": team_id, "chips_available": ["bboost"] if len(plays) == 1 else [], "status": "success"}
+
+    monkeypatch.setattr(chips, "calculate_team_chip_recommendations", recommendations)
+    monkeypatch.setattr(response_cache, "_response_cache", OrderedDict())
+    first = asyncio.run(chips.get_chip_recommendations(None, limit=3, team_id=42))
+    second = asyncio.run(chips.get_chip_recommendations(None, limit=3, team_id=42))
+    assert first["chips_available"] == ["bboost"] and second["chips_available"] == []
+    assert len(response_cache._response_cache) == 0
+    print("✅ Team chip recommendations built per request")
+
+if __name__ == "__main__":
+    test_outlook_matches_loops()
+    test_chips_status()
@@ -0,0 +1,88 @@
+import asyncio
+from benchmarks.fixtures import load_fixture
+from services import team_history
+from services.team_history import (
+    write_snapshots, get_team_snapshots, snapshots_from_history, downsample,
+    record_team_history, initialize_team_history_writer, store_is_fresh, LIVE_HISTORY_TTL
+)
+
+HISTORY = load_fixture("history")
+
+def test_snapshots_round_trip(tmp_path):
+    """Every gameweek is stored once and upserts replace it"""
+    path = str(tmp_path / "teams.db")
+    assert write_snapshots({1: HISTORY, 2: HISTORY}, path=path) == 2 * len(HISTORY["current"])
+
+    stored = get_team_snapshots(1, path=path)
+    assert stored == snapshots_from_history(1, HISTORY)
+    assert [row["event"] for row in stored] == sorted(event["event"] for event in HISTORY["current"])
+    chips = {chip["event"]: chip["name"] for chip in HISTORY["chips"]}
+    assert {row["event"]: row["chip"] for row in stored if row["chip"]} == chips
+    print(f"✅ {len(stored)} gameweeks stored with chips")
+
+    updated = {**HISTORY, "current": [{**HISTORY["current"][-1], "overall_rank": 1}]}
+    write_snapshots({1: updated}, path=path)
+    assert get_team_snapshots(1, path=path)[-1]["overall_rank"] == 1
+    assert len(get_team_snapshots(1, path=path)) == len(stored)
+    assert [row["event"] for row in get_team_snapshots(1, 5, 7, path=path)] == [5, 6, 7]
+    print("✅ Latest gameweek upserted and ranges served")
+
+def test_downsample():
+    """Buckets end on the latest gameweek and keep totals consistent"""
+    snapshots = snapshots_from_history(1, HISTORY)
+    buckets = downsample(snapshots, step=5)
+    assert buckets[-1]["event"] == snapshots[-1]["event"]
+    assert buckets[-1]["overall_rank"] == snapshots[-1]["overall_rank"]
+    assert sum(bucket["points"] for bucket in buckets) == sum(row["points"] for row in snapshots)
+    assert all(b["from_event"] == a["event"] + 1 for a, b in zip(buckets, buckets[1:]))
+    assert len(downsample(snapshots, max_points=4)) <= 4
+    assert downsample(snapshots) == snapshots and downsample([], step=3) == []
+    try:
+        downsample(snapshots, step=0)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print(f"✅ {len(snapshots)} gameweeks downsampled to {len(buckets)} buckets")
+
+def test_store_freshness(tmp_path):
+    """Snapshots are refetched before the deadline, after a TTL while scoring, and once when scores are final"""
+    path = str(tmp_path / "teams.db")
+    event = {"id": 30, "deadline_time": "2025-03-29T11:00:00Z", "finished": False, "data_checked": False}
+    deadline = 1743246000.0
+
+    assert not store_is_fresh(None, event, path=path)
+    assert store_is_fresh(deadline - 60, None, path=path)
+    assert not store_is_fresh(deadline - 60, event, path=path, now=deadline + 60)
+    assert store_is_fresh(deadline + 60, event, path=path, now=deadline + 120)
+    assert not store_is_fresh(deadline + 60, event, path=path, now=deadline + 60 + LIVE_HISTORY_TTL)
+    print("✅ Live gameweek snapshots expire")
+
+    settled = {**event, "finished": True, "data_checked": True}
+    settled_seen = deadline + 3 * 86400
+    assert not store_is_fresh(deadline + 60, settled, path=path, now=settled_seen)
+    assert not store_is_fresh(deadline + 60, settled, path=path, now=settled_seen + 86400)
+    assert store_is_fresh(settled_seen + 5, settled, path=path, now=settled_seen + 86400)
+    print("✅ Snapshots from before the final scores are refetched once")
+
+def test_background_writer(monkeypatch, tmp_path):
+    """Queued payloads are written off the request path"""
+    path = str(tmp_path / "teams.db")
+    monkeypatch.setattr(team_history, "TEAM_HISTORY_DB", path)
+    monkeypatch.setattr(team_history, "_writer_state", {"queue": None, "task": None, "written": 0, "dropped": 0})
+
+    async def run():
+        await initialize_team_history_writer()
+        for team_id in range(1, 6):
+            record_team_history(team_id, HISTORY)
+        record_team_history(1, HISTORY)
+        while team_history._writer_state["written"] < 5 * len(HISTORY["current"]):
+            await asyncio.sleep(0.01)
+        team_history._writer_state["task"].cancel()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=10))
+    assert all(len(get_team_snapshots(team_id, path=path)) == len(HISTORY["current"]) for team_id in range(1, 6))
+    print("✅ Background writer stored every queued team")
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q", "-s"])
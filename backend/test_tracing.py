@@ -0,0 +1,75 @@
+import asyncio
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from services import tracing
+from services.tracing import TracingMiddleware, span, traced, build_server_timing, initialize_trace_writer
+
+@traced("process")
+async def process():
+    await asyncio.sleep(0.01)
+    return {"ok": True}
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+    app.add_event_handler("startup", initialize_trace_writer)
+
+    @app.get("/teams/{team_id}")
+    async def get_team(team_id: int):
+        with span("bootstrap_fetch"):
+            with span("fpl_api", url="bootstrap-static"):
+                await asyncio.sleep(0.01)
+        for _ in range(2):
+            with span("picks_fetch"):
+                await asyncio.sleep(0)
+        return await process()
+
+    return app
+
+def isolate(monkeypatch, tmp_path, sample_rate):
+    """Point the trace log at a temporary file and start from no kept traces"""
+    monkeypatch.setattr(tracing, "TRACE_LOG_PATH", str(tmp_path / "traces.jsonl"))
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", sample_rate)
+    monkeypatch.setattr(tracing, "_writer_state", {"queue": None, "task": None, "dropped": 0})
+    tracing._recent_traces.clear()
+
+def test_server_timing_and_traces(monkeypatch, tmp_path):
+    """Spans show up in Server-Timing and sampled traces keep the span tree"""
+    isolate(monkeypatch, tmp_path, 1.0)
+
+    log = tmp_path / "traces.jsonl"
+    with TestClient(make_app()) as client:
+        response = client.get("/teams/42")
+        # Written by the background writer, off the request path
+        deadline = time.time() + 5
+        while not (log.exists() and log.read_text().endswith("\n")) and time.time() < deadline:
+            time.sleep(0.01)
+    server_timing = response.headers["server-timing"]
+    assert "bootstrap_fetch;dur=" in server_timing
+    assert 'picks_fetch;dur=' in server_timing and 'desc="2 calls"' in server_timing
+    assert "total;dur=" in server_timing
+    print("✅ Server-Timing lists each span, with repeated spans summed")
+
+    trace = tracing.get_trace(response.headers["x-trace-id"])
+    assert trace["route"] == "/teams/{team_id}"
+    assert [s["name"] for s in trace["spans"]] == ["bootstrap_fetch", "picks_fetch", "picks_fetch", "process"]
+    assert trace["spans"][0]["children"][0]["attributes"] == {"url": "bootstrap-static"}
+    assert log.read_text().count("\n") == 1
+    print("✅ Sampled trace stored with its span tree and written to JSONL")
+
+def test_unsampled_requests(monkeypatch, tmp_path):
+    """Fast unsampled requests still get Server-Timing but are not kept"""
+    isolate(monkeypatch, tmp_path, 0.0)
+
+    with TestClient(make_app()) as client:
+        response = client.get("/teams/42")
+    assert "bootstrap_fetch" in response.headers["server-timing"]
+    assert tracing.get_recent_traces() == []
+    assert not (tmp_path / "traces.jsonl").exists()
+    assert build_server_timing({"children": []}) == ""
+    print("✅ Unsampled trace discarded")
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q", "-s"])
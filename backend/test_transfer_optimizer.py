@@ -0,0 +1,169 @@
+import time
+import asyncio
+import itertools
+import numpy as np
+from benchmarks.fixtures import load_fixture, load_fixture_bytes
+from services.fpl_schema import decode_bootstrap
+from services.fixture_ticker import build_fixture_matrix
+from services.projections import build_projections
+from services.chip_planner import pick_squad, SQUAD_QUOTAS, MAX_PER_TEAM
+from services.team_squad import free_transfers_from_history
+from services.transfer_optimizer import optimize_transfers, squad_value, suggest_transfers, get_optimizer_pool, shutdown_optimizer_pool, HIT_COST
+
+BOOTSTRAP = decode_bootstrap(load_fixture_bytes("bootstrap"))
+PROJECTIONS = build_projections(BOOTSTRAP, build_fixture_matrix(BOOTSTRAP, load_fixture("fixtures")))
+SQUAD_ROWS = pick_squad(PROJECTIONS["ownership"], PROJECTIONS["element_types"], PROJECTIONS["team_ids"], PROJECTIONS["costs"]).tolist()
+
+def brute_force(expected_points, types, clubs, costs, squad, bank, free_transfers, max_transfers):
+    best = squad_value(expected_points, types, squad)
+    others = [row for row in range(len(types)) if row not in squad]
+    for count in range(1, max_transfers + 1):
+        hits = HIT_COST * max(0, count - free_transfers)
+        for out_set in itertools.combinations(squad, count):
+            kept = [row for row in squad if row not in out_set]
+            funds = bank + sum(int(costs[row]) for row in out_set)
+            for in_set in itertools.combinations(others, count):
+                if sorted(types[list(in_set)]) != sorted(types[list(out_set)]) or costs[list(in_set)].sum() > funds:
+                    continue
+                if np.bincount(clubs[kept + list(in_set)]).max() > MAX_PER_TEAM:
+                    continue
+                best = max(best, squad_value(expected_points, types, kept + list(in_set)) - hits)
+    return best
+
+def test_matches_brute_force():
+    """Branch and bound finds the same best squad as trying every transfer"""
+    rng = np.random.default_rng(11)
+    others = rng.choice([row for row in range(len(PROJECTIONS["players"])) if row not in SQUAD_ROWS], 24, replace=False)
+    rows = np.array(SQUAD_ROWS + others.tolist())
+    expected_points = PROJECTIONS["expected_points"][rows, :4]
+    types, clubs, costs = PROJECTIONS["element_types"][rows], PROJECTIONS["team_ids"][rows], PROJECTIONS["costs"][rows]
+    squad = list(range(15))
+
+    for free_transfers, max_transfers, bank in [(1, 1, 0), (1, 2, 5), (2, 2, 30)]:
+        result = optimize_transfers(expected_points, types, clubs, costs, squad, costs[:15].tolist(), bank, free_transfers, max_transfers, time_budget=30)
+        expected = brute_force(expected_points, types, clubs, costs, squad, bank, free_transfers, max_transfers)
+        assert result["complete"]
+        assert abs(result["expected_points"] - expected) < 1e-6, (result, expected)
+        print(f"✅ {max_transfers} transfer(s) with {free_transfers} free: {result['expected_points']:.2f} xP, as brute force")
+
+def test_time_budget_returns_best_so_far():
+    """A search out of time still returns a legal squad at least as good as the current one"""
+    expected_points = PROJECTIONS["expected_points"][:, :5]
+    costs = PROJECTIONS["costs"]
+    start = time.perf_counter()
+    result = optimize_transfers(
+        expected_points, PROJECTIONS["element_types"], PROJECTIONS["team_ids"], costs,
+        SQUAD_ROWS, costs[SQUAD_ROWS].tolist(), 0, free_transfers=4, max_transfers=5, time_budget=0.05
+    )
+    # Building the thousands of transfer-out sets counts against the budget too
+    assert time.perf_counter() - start < 0.25
+    assert not result["complete"]
+    assert result["expected_points"] >= result["baseline_points"]
+    squad = [row for row in SQUAD_ROWS if row not in result["out"]] + result["in"]
+    assert {p: int((PROJECTIONS["element_types"][squad] == p).sum()) for p in SQUAD_QUOTAS} == SQUAD_QUOTAS
+    assert costs[result["in"]].sum() <= costs[result["out"]].sum()
+    print(f"✅ Stopped after {result['evaluated']} squads with {len(result['in'])} transfers")
+
+def test_suggest_transfers_in_process_pool():
+    """Suggestions come back from a worker process with player details"""
+    squad = [PROJECTIONS["players"][row]["id"] for row in SQUAD_ROWS]
+    try:
+        # Never forked from the server process
+        assert get_optimizer_pool()._mp_context.get_start_method() in ("forkserver", "spawn")
+        result = asyncio.run(suggest_transfers(PROJECTIONS, squad, bank=10, free_transfers=2, time_budget=5))
+    finally:
+        shutdown_optimizer_pool()
+    assert result["complete"] and result["hits"] <= HIT_COST and len(result["transfers"]) <= 3
+    assert result["bank_after"] >= 0 and result["expected_gain"] >= 0
+    assert all(t["out"]["position"] == t["in"]["position"] for t in result["transfers"])
+    print(f"✅ {[(t['out']['web_name'], t['in']['web_name']) for t in result['transfers']]}: {result['expected_gain']:+} xP")
+
+def test_free_hit_squads_rejected(monkeypatch):
+    """Transfers aren't planned for a Free Hit squad that reverts next gameweek"""
+    import pytest
+    from fastapi import HTTPException
+    from routes import teams
+
+    async def free_hit_squad(team_id):
+        return {"gameweek": 30, "squad": [], "bank": 0, "free_transfers": 1, "active_chip": "freehit"}
+
+    monkeypatch.setattr(teams, "get_team_squad", free_hit_squad)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(teams.get_transfer_suggestions(42, free_transfers=None, horizon=5, max_transfers=None, time_budget=1))
+    assert error.value.status_code == 400 and "Free Hit" in error.value.detail
+    print("✅ Free Hit squads rejected")
+
+def test_chat_optimizes_only_when_asked(monkeypatch):
+    """Chat runs the optimizer only for transfer questions, fetches the squad once and skips Free Hit squads"""
+    import httpx
+    from routes import chat
+
+    def handler(request):
+        if request.url.path.endswith("/bootstrap-static/"):
+            return httpx.Response(200, json={"events": [{"id": 30, "is_current": True}]})
+        if request.url.path.endswith("/picks/"):
+            return httpx.Response(200, json={"picks": [], "active_chip": None})
+        return httpx.Response(200, json={"id": 42})
+
+    calls = {"squad": 0, "optimizer": 0, "captaincy": 0}
+    squad = {"gameweek": 30, "squad": [], "picks": [], "bank": 0, "free_transfers": 1, "active_chip": None}
+    prompts = []
+
+    async def get_team_squad(team_id):
+        calls["squad"] += 1
+        return squad
+
+    async def suggest(*args, **kwargs):
+        calls["optimizer"] += 1
+        return {"transfers": []}
+
+    def rank(*args, **kwargs):
+        calls["captaincy"] += 1
+        return {"candidates": []}
+
+    async def nothing(*args, **kwargs):
+        return None
+
+    async def respond(message, fpl_data, team_data):
+        prompts.append(team_data)
+        return "ok"
+
+    monkeypatch.setattr(chat, "upstream_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(chat, "get_team_squad", get_team_squad)
+    monkeypatch.setattr(chat, "suggest_transfers", suggest)
+    monkeypatch.setattr(chat, "rank_captains", rank)
+    monkeypatch.setattr(chat, "get_projections", nothing)
+    monkeypatch.setattr(chat, "get_fixture_matrix", nothing)
+    monkeypatch.setattr(chat, "fetch_latest_fpl_data", nothing)
+    monkeypatch.setattr(chat, "get_gemini_response", respond)
+
+    def ask(message):
+        return asyncio.run(chat.chat_with_ai(chat.ChatRequest(message=message, team_id="42")))
+
+    ask("What's the injury news on Saka?")
+    assert calls == {"squad": 0, "optimizer": 0, "captaincy": 0}
+    ask("Who should I captain, and should I transfer out Palmer?")
+    assert calls == {"squad": 1, "optimizer": 1, "captaincy": 1}
+
+    squad["active_chip"] = "freehit"
+    ask("Which transfers should I make?")
+    assert calls == {"squad": 2, "optimizer": 1, "captaincy": 1}
+    assert "Free Hit" in prompts[-1]["transfer_note"]
+    print("✅ Chat runs the optimizer only for transfer questions, never on Free Hit")
+
+def test_free_transfers_from_history():
+    """Free transfers roll over, are used up by transfers and kept through wildcards"""
+    history = {"current": [{"event": 1, "event_transfers": 0}, {"event": 2, "event_transfers": 0}, {"event": 3, "event_transfers": 0}], "chips": []}
+    assert free_transfers_from_history(history) == 3
+    history["current"].append({"event": 4, "event_transfers": 4})
+    assert free_transfers_from_history(history) == 1
+    history["chips"] = [{"name": "wildcard", "event": 4}]
+    assert free_transfers_from_history(history) == 4
+    assert 1 <= free_transfers_from_history(load_fixture("history")) <= 5
+    print("✅ Free transfers replayed from history")
+
+if __name__ == "__main__":
+    test_matches_brute_force()
+    test_time_budget_returns_best_so_far()
+    test_suggest_transfers_in_process_pool()
+    test_free_transfers_from_history()
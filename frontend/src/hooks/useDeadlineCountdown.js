@@ -171,9 +171,35 @@ const useDeadlineCountdown = (onDeadlinePassed) => {
     setTimeRemaining({ days, hours, minutes, seconds });
   }, [deadline, isPassed, onDeadlinePassed]);
 
-  // Fetch deadline when component mounts
+  // Subscribe to deadline updates pushed by the backend when component mounts,
+  // falling back to a one-off fetch if the event stream is not available
   useEffect(() => {
-    fetchDeadline();
+    if (typeof EventSource === 'undefined') {
+      fetchDeadline();
+      return;
+    }
+
+    let receivedDeadline = false;
+    const eventSource = new EventSource('/api/events/stream');
+
+    eventSource.addEventListener('deadline', (event) => {
+      receivedDeadline = true;
+      setError(null);
+      setUsingFallback(false);
+      processGameweekData(JSON.parse(event.data));
+      setIsLoading(false);
+    });
+
+    eventSource.onerror = () => {
+      // The browser reconnects on its own once we have a deadline
+      if (!receivedDeadline) {
+        console.error('Deadline event stream unavailable, fetching deadline instead');
+        eventSource.close();
+        fetchDeadline();
+      }
+    };
+
+    return () => eventSource.close();
   }, [fetchDeadline]);
 
   // Update countdown every second